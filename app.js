@@ -210,4 +210,5 @@ function route() {
 
 // Set up routing
 window.addEventListener('hashchange', route);
-window.addEventListener('load', route);
+// First render waits for the photo manifest (fetched while the page loads)
+window.addEventListener('load', () => (window.ImageOptimizer?.ready || Promise.resolve()).then(route));
@@ -0,0 +1,118 @@
+"""
+Accessibility
+Gravity-model amenity accessibility: for every point, the distance-decayed
+(optionally rating-weighted) sum over every place of each type, instead of
+a count inside a hard radius capped at one API page.
+
+    access(point, type) = sum over places p of type:  w(p) * f(d(point, p))
+    f(d) = max(0, exp(-d / scale) - e) / (1 - e),   e = exp(-CUTOFF_SCALES)
+    w(p) = rating / 5 (unrated places count as DEFAULT_RATING) for rated types, else 1
+
+f falls continuously to 0 at the cutoff, so there is no radius boundary at
+which a place suddenly stops counting. scale is half the collectors'
+search radius (AMENITY_RADII).
+
+One GridIndex per type prunes far pairs, then a single bincount over the
+flat (point, place, km) pairs gives every point's sum.
+
+Features: <type>_access for every AMENITY_RADII type with places in the
+store (scoring falls back to counts for the rest).
+
+Usage:
+    python data_collection/accessibility.py   # add <type>_access to objective_locality_data.json
+"""
+
+import os
+import sys
+import json
+import time
+
+import numpy as np
+
+from geo_utils import GridIndex
+from place_store import load_places, group_by_type
+from collect_objective_data import AMENITY_RADII
+from atomic_io import write_json
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+LOCALITY_DATA_FILE = os.path.join(DATA_DIR, 'objective_locality_data.json')
+
+# Decay scale (km) per type: half the collectors' search radius
+ACCESS_SCALES = {place_type: radius / 2000 for place_type, radius in AMENITY_RADII.items()}
+RATING_WEIGHTED = {'hospital', 'school', 'bank', 'restaurant', 'cafe', 'gym', 'supermarket'}
+CUTOFF_SCALES = 4        # f reaches 0 at 4 scales (exp(-4) ~ 2% before the shift)
+DEFAULT_RATING = 3.0
+
+
+def decay(km, scale):
+    """Shifted exponential: 1 at the place, continuous 0 at CUTOFF_SCALES * scale"""
+    floor = np.exp(-CUTOFF_SCALES)
+    return np.clip((np.exp(-np.asarray(km) / scale) - floor) / (1 - floor), 0.0, None)
+
+
+def place_weights(places, place_type):
+    if place_type not in RATING_WEIGHTED:
+        return np.ones(len(places))
+    return np.array([(p.get('rating') or DEFAULT_RATING) / 5 for p in places], dtype=float)
+
+
+def access_at_points(lats, lngs, places=None, types=None):
+    """{<type>_access: array} for arbitrary points (types with no places are left out)"""
+    lats = np.asarray(lats, dtype=float).ravel()
+    lngs = np.asarray(lngs, dtype=float).ravel()
+    if places is None:
+        places = load_places()
+    by_type = group_by_type(places)
+
+    fields = {}
+    for place_type in types or ACCESS_SCALES:
+        group = by_type.get(place_type, [])
+        if not group:
+            continue
+        scale = ACCESS_SCALES[place_type]
+        index = GridIndex([p['lat'] for p in group], [p['lng'] for p in group], cell_km=scale)
+        owner, cand, km = index.pairs(lats, lngs, CUTOFF_SCALES * scale)
+        contribution = decay(km, scale) * place_weights(group, place_type)[cand]
+        fields[f"{place_type}_access"] = np.round(np.bincount(owner, contribution, minlength=len(lats)), 3)
+    return fields
+
+
+def main():
+    print("\n" + "="*70)
+    print("🧲 AMENITY ACCESSIBILITY (gravity model)")
+    print("="*70)
+
+    if not os.path.exists(LOCALITY_DATA_FILE):
+        print("❌ Error: objective_locality_data.json not found")
+        return
+
+    places = load_places()
+    print(f"📍 {len(places)} places in store")
+
+    with open(LOCALITY_DATA_FILE, 'r', encoding='utf-8') as f:
+        localities = json.load(f)
+
+    start = time.perf_counter()
+    fields = access_at_points([l['latitude'] for l in localities], [l['longitude'] for l in localities], places)
+    points_s = time.perf_counter() - start
+
+    for i, loc in enumerate(localities):
+        for place_type in ACCESS_SCALES:
+            loc.pop(f"{place_type}_access", None)
+        for field, values in fields.items():
+            loc[field] = float(values[i])
+    top = sorted(fields, key=lambda f: -fields[f].max())[:4]
+    for loc in localities:
+        print(f"   {loc['name']:<18} " + " | ".join(f"{f}: {loc[f]:.2f}" for f in top))
+
+    write_json(LOCALITY_DATA_FILE, localities)
+    print(f"\n⏱️ {len(localities)} localities in {points_s * 1000:.0f} ms ({len(fields)} features)")
+    print(f"✅ Updated {len(localities)} localities in {os.path.abspath(LOCALITY_DATA_FILE)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Air Quality
+PM2.5 for any set of points from one cached OpenAQ station fetch.
+
+Every Trivandrum locality sits within 25 km of the same few monitoring
+stations, so asking OpenAQ once per locality (limit=1) returned the same
+reading N times. Instead the station set with latest PM2.5 readings is
+fetched once around the region centre (OpenAQ v3, OPENAQ_API_KEY in .env)
+and cached in data/air_quality_cache.json for CACHE_TTL_HOURS. A failed or
+empty fetch never replaces a cache that has stations. Values at localities
+or heatmap cells are then inverse-distance weighted (power IDW_POWER) from
+all stations within MAX_STATION_KM whose reading is at most
+MAX_READING_AGE_HOURS old, vectorized over every point.
+
+Usage:
+    python data_collection/air_quality.py            # refresh pm25 in objective_locality_data.json
+    python data_collection/air_quality.py --refresh  # ignore the cache TTL
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+import requests
+from dotenv import load_dotenv
+
+from geo_utils import haversine_matrix
+from atomic_io import write_json
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+load_dotenv()
+
+OPENAQ_API_KEY = os.getenv('OPENAQ_API_KEY')
+OPENAQ_LOCATIONS_URL = "https://api.openaq.org/v3/locations"
+OPENAQ_LATEST_URL = "https://api.openaq.org/v3/locations/{id}/latest"
+PM25_PARAMETER_ID = 2
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+AQ_CACHE_FILE = os.path.join(DATA_DIR, 'air_quality_cache.json')
+LOCALITY_DATA_FILE = os.path.join(DATA_DIR, 'objective_locality_data.json')
+
+REGION_CENTRE = {"lat": 8.5241, "lng": 76.9366}   # Trivandrum
+SEARCH_RADIUS_M = 25000                            # OpenAQ maximum
+STATION_LIMIT = 100
+CACHE_TTL_HOURS = 6                                # OpenAQ "latest" is hourly at best
+MAX_STATION_KM = 40
+MAX_READING_AGE_HOURS = 72                         # older readings are left out of IDW
+IDW_POWER = 2
+
+
+# ---------------------------------------------------------------------------
+# Stations (fetched once, cached with a TTL)
+# ---------------------------------------------------------------------------
+
+def _get(url, params, api_key):
+    response = requests.get(url, params=params, headers={"X-API-Key": api_key}, timeout=15)
+    response.raise_for_status()
+    return response.json().get('results', [])
+
+
+def fetch_stations(centre=REGION_CENTRE, radius_m=SEARCH_RADIUS_M, api_key=OPENAQ_API_KEY):
+    """
+    [{name, lat, lng, pm25, updated}] for stations with a PM2.5 reading:
+    one v3 locations query, then the latest reading of each PM2.5 sensor
+    """
+    if not api_key:
+        raise RuntimeError("OPENAQ_API_KEY not found in .env")
+    locations = _get(OPENAQ_LOCATIONS_URL, {
+        "coordinates": f"{centre['lat']},{centre['lng']}",
+        "radius": radius_m,
+        "parameters_id": PM25_PARAMETER_ID,
+        "limit": STATION_LIMIT,
+    }, api_key)
+
+    stations = []
+    for location in locations:
+        coords = location.get('coordinates') or {}
+        sensors = {s['id'] for s in location.get('sensors', [])
+                   if (s.get('parameter') or {}).get('id') == PM25_PARAMETER_ID}
+        if not sensors or coords.get('latitude') is None or coords.get('longitude') is None:
+            continue
+        for m in _get(OPENAQ_LATEST_URL.format(id=location['id']), {}, api_key):
+            if m.get('sensorsId') in sensors and m.get('value') is not None and m['value'] >= 0:
+                stations.append({"name": location.get('name'), "lat": coords['latitude'],
+                                 "lng": coords['longitude'], "pm25": m['value'],
+                                 "updated": (m.get('datetime') or {}).get('utc')})
+                break
+    return stations
+
+
+def load_stations(refresh=False, ttl_hours=CACHE_TTL_HOURS, path=AQ_CACHE_FILE):
+    """
+    Cached station set, refetched when older than ttl_hours (or on
+    refresh). A failed fetch falls back to the stale cache, if any, and an
+    empty result never replaces a cache that has stations.
+    """
+    cached = None
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        fetched_at = datetime.fromisoformat(cached['fetched_at'])
+        if not refresh and datetime.now(timezone.utc) - fetched_at < timedelta(hours=ttl_hours):
+            return cached['stations']
+
+    try:
+        stations = fetch_stations()
+    except Exception as e:
+        print(f"  Error getting AQ stations: {e}")
+        return cached['stations'] if cached else []
+    if not stations and cached and cached['stations']:
+        print("  ⚠️ OpenAQ returned no stations; keeping the cached set")
+        return cached['stations']
+
+    write_json(path, {
+        "fetched_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "centre": REGION_CENTRE,
+        "radius_m": SEARCH_RADIUS_M,
+        "stations": stations,
+    })
+    print(f"  🌬️ Fetched {len(stations)} PM2.5 stations from OpenAQ")
+    return stations
+
+
+# ---------------------------------------------------------------------------
+# Interpolation
+# ---------------------------------------------------------------------------
+
+def idw(lats, lngs, stations, power=IDW_POWER, max_km=MAX_STATION_KM):
+    """
+    Inverse-distance-weighted PM2.5 at every (lat, lng), any shape.
+    Returns (pm25, station_count): NaN / 0 where no station is within max_km.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    if not stations:
+        return np.full(lats.shape, np.nan), np.zeros(lats.shape, dtype=int)
+
+    values = np.array([s['pm25'] for s in stations], dtype=float)
+    km = haversine_matrix(lats.ravel(), lngs.ravel(),
+                          [s['lat'] for s in stations], [s['lng'] for s in stations])
+    in_range = km <= max_km
+    # A point on top of a station takes its reading
+    weights = np.where(in_range, 1.0 / np.maximum(km, 1e-3) ** power, 0.0)
+    total = weights.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pm25 = np.where(total > 0, weights @ values / total, np.nan)
+    return pm25.reshape(lats.shape), in_range.sum(axis=1).reshape(lats.shape)
+
+
+def fresh_stations(stations, max_age_hours=MAX_READING_AGE_HOURS, now=None):
+    """Stations whose reading is at most max_age_hours old (undated ones are dropped)"""
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(hours=max_age_hours)
+    fresh = []
+    for s in stations:
+        try:
+            updated = datetime.fromisoformat(s['updated'].replace('Z', '+00:00'))
+        except (AttributeError, KeyError, ValueError):
+            continue
+        if updated.tzinfo is None:
+            updated = updated.replace(tzinfo=timezone.utc)
+        if updated >= cutoff:
+            fresh.append(s)
+    return fresh
+
+
+def air_quality_at(locations, stations=None):
+    """{name: {'pm25', 'aqi_source'}} for [{'name', 'lat', 'lng'}, ...] (fresh stations only)"""
+    if stations is None:
+        stations = load_stations()
+    stations = fresh_stations(stations)
+    pm25, counts = idw([l['lat'] for l in locations], [l['lng'] for l in locations], stations)
+    return {
+        loc['name']: {
+            "pm25": round(float(value), 1) if count else None,
+            "aqi_source": f"IDW of {count} OpenAQ station(s)" if count else "No nearby station",
+        }
+        for loc, value, count in zip(locations, pm25, counts)
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Interpolated PM2.5 for every locality")
+    parser.add_argument('--refresh', action='store_true', help="refetch stations even if the cache is fresh")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("\n" + "="*70)
+    print("🌬️ AIR QUALITY (cached stations, IDW)")
+    print("="*70)
+
+    if not os.path.exists(LOCALITY_DATA_FILE):
+        print("❌ Error: objective_locality_data.json not found")
+        return
+
+    stations = load_stations(refresh=args.refresh)
+    print(f"📡 {len(stations)} stations, {len(fresh_stations(stations))} with a reading "
+          f"from the last {MAX_READING_AGE_HOURS} h")
+    for s in stations:
+        print(f"   {s['name']!s:<40} PM2.5 {s['pm25']:>6}  ({s['updated']})")
+
+    with open(LOCALITY_DATA_FILE, 'r', encoding='utf-8') as f:
+        localities = json.load(f)
+    locations = [{'name': loc['name'], 'lat': loc['latitude'], 'lng': loc['longitude']} for loc in localities]
+
+    readings = air_quality_at(locations, stations)
+    updated, missing = 0, []
+    for loc in localities:
+        reading = readings[loc['name']]
+        # No fresh station in range: keep the last known reading
+        if reading['pm25'] is None:
+            missing.append(loc['name'])
+            print(f"   {loc['name']:<18} ⚠️ no nearby station, keeping PM2.5 {loc.get('pm25')!s}")
+            continue
+        loc.update(reading)
+        updated += 1
+        print(f"   {loc['name']:<18} PM2.5 {loc['pm25']!s:>6}  {loc['aqi_source']}")
+
+    if updated:
+        write_json(LOCALITY_DATA_FILE, localities)
+    print(f"\n✅ Updated {updated} localities in {os.path.abspath(LOCALITY_DATA_FILE)}")
+    if missing:
+        print(f"⚠️ {len(missing)} without a fresh reading (left unchanged): {', '.join(missing)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""
+Atomic Writes
+Crash-safe publishing for data/*.json, which the live site serves directly.
+
+Every write goes to a temp file in the same directory, is fsynced, and is
+then renamed over the target (os.replace), so readers see either the old
+file or the new one - never a truncated one, even on Ctrl-C or a crash.
+
+Each publish gets a generation number. The published file is hard-linked
+into data/.generations/<file>/<n><ext> (no copy), so a bad publish can be
+rolled back instantly:
+
+    python data_collection/atomic_io.py list data/rankings.json
+    python data_collection/atomic_io.py rollback data/rankings.json [--to N]
+
+Publishes to the same file are serialized with a lock file, so concurrent
+pipeline stages never interleave generation numbers.
+
+Stages that emit a whole directory tree (nearby lists, map tiles) build it
+with atomic_directory() and swap it in with one rename, so the site never
+serves a half-deleted or half-written tree.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import ctypes
+import argparse
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+GENERATIONS_DIR = '.generations'
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = 'lock'
+KEEP_GENERATIONS = 5
+LOCK_TIMEOUT = 60     # seconds to wait for another publisher
+LOCK_STALE_AFTER = 600  # a lock older than this was left by a crashed process
+
+
+def _archive_dir(path):
+    path = os.path.abspath(path)
+    return os.path.join(os.path.dirname(path), GENERATIONS_DIR, os.path.basename(path))
+
+
+def _archive_path(path, generation):
+    ext = os.path.splitext(path)[1]
+    return os.path.join(_archive_dir(path), f"{generation}{ext}")
+
+
+def _fsync_dir(directory):
+    """Persist a rename (POSIX only; Windows has no directory handles)"""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+@contextmanager
+def _publish_lock(path):
+    """Exclusive per-file lock (O_EXCL lock file, works on Windows too)"""
+    archive = _archive_dir(path)
+    os.makedirs(archive, exist_ok=True)
+    lock = os.path.join(archive, LOCK_FILE)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock) > LOCK_STALE_AFTER:
+                    os.remove(lock)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for publish lock on {path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.remove(lock)
+
+
+def _read_current(path):
+    try:
+        with open(os.path.join(_archive_dir(path), CURRENT_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_current(path, info):
+    archive = _archive_dir(path)
+    fd, tmp = tempfile.mkstemp(dir=archive, prefix='.current.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(archive, CURRENT_FILE))
+
+
+def generations(path):
+    """Archived generation numbers for path, oldest first"""
+    archive = _archive_dir(path)
+    if not os.path.isdir(archive):
+        return []
+    ext = os.path.splitext(path)[1]
+    found = []
+    for name in os.listdir(archive):
+        stem = name[:-len(ext)] if ext and name.endswith(ext) else name
+        if stem.isdigit():
+            found.append(int(stem))
+    return sorted(found)
+
+
+def current_generation(path):
+    """Generation number currently published at path (None if never published)"""
+    info = _read_current(path)
+    return info['generation'] if info else None
+
+
+def _prune(path, keep, protect):
+    for generation in generations(path)[:-keep]:
+        if generation != protect:
+            os.remove(_archive_path(path, generation))
+
+
+def _publish(tmp, path, keep):
+    """Rename tmp over path under the lock and record a new generation"""
+    if keep <= 0:
+        os.replace(tmp, path)
+        _fsync_dir(os.path.dirname(os.path.abspath(path)))
+        return None
+
+    with _publish_lock(path):
+        archived = generations(path)
+        # A file that predates generation tracking becomes generation 0
+        if not archived and os.path.exists(path):
+            _link_or_copy(path, _archive_path(path, 0))
+            archived = [0]
+        generation = (archived[-1] + 1) if archived else 1
+
+        os.replace(tmp, path)
+        _fsync_dir(os.path.dirname(os.path.abspath(path)))
+        _link_or_copy(path, _archive_path(path, generation))
+        _write_current(path, {
+            "generation": generation,
+            "published_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "size": os.path.getsize(path),
+        })
+        _prune(path, keep, generation)
+    return generation
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8', keep=KEEP_GENERATIONS):
+    """
+    Open a temp file next to path for writing; on success it is fsynced and
+    atomically renamed over path as a new generation. On any exception the
+    temp file is removed and path is left untouched.
+    keep: archived generations to retain (0 = no archive, plain atomic write).
+    """
+    path = str(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        # mkstemp creates 0600; keep the permissions the site is serving with
+        os.chmod(tmp, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        _publish(tmp, path, keep)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_json(path, obj, indent=2, ensure_ascii=False, keep=KEEP_GENERATIONS):
+    """json.dump(obj) to path as one atomic publish"""
+    with atomic_write(path, keep=keep) as f:
+        json.dump(obj, f, indent=indent, ensure_ascii=ensure_ascii)
+
+
+def _exchange(a, b):
+    """Atomically swap two paths (Linux renameat2 RENAME_EXCHANGE); False if unsupported"""
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return False
+    at_fdcwd, rename_exchange = -100, 2
+    return renameat2(at_fdcwd, os.fsencode(a), at_fdcwd, os.fsencode(b), rename_exchange) == 0
+
+
+@contextmanager
+def atomic_directory(path):
+    """
+    Yield an empty temp directory next to path; on success it replaces path
+    in a single rename-exchange (where the OS has one, otherwise two renames
+    microseconds apart) and the old tree is deleted. On any exception the
+    temp tree is removed and path is left untouched.
+    """
+    path = os.path.abspath(str(path))
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    os.chmod(tmp, 0o755)
+    try:
+        yield tmp
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    if not os.path.exists(path):
+        os.rename(tmp, path)
+    elif _exchange(tmp, path):
+        shutil.rmtree(tmp, ignore_errors=True)   # now holds the old tree
+    else:
+        old = f"{tmp}.old"
+        os.rename(path, old)
+        os.rename(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+    _fsync_dir(parent)
+
+
+def rollback(path, generation=None):
+    """
+    Atomically republish an archived generation of path (default: the one
+    before the current). Returns the generation now live.
+    """
+    path = str(path)
+    with _publish_lock(path):
+        archived = generations(path)
+        current = current_generation(path)
+        if generation is None:
+            older = [g for g in archived if current is None or g < current]
+            if not older:
+                raise ValueError(f"No generation older than {current} to roll back to for {path}")
+            generation = older[-1]
+        elif generation not in archived:
+            raise ValueError(f"Generation {generation} of {path} is not archived (have {archived})")
+
+        # Link the archived copy next to the target, then rename it over
+        directory = os.path.dirname(os.path.abspath(path))
+        tmp = os.path.join(directory, f".{os.path.basename(path)}.rollback.tmp")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        _link_or_copy(_archive_path(path, generation), tmp)
+        os.replace(tmp, path)
+        _fsync_dir(directory)
+        _write_current(path, {
+            "generation": generation,
+            "published_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "size": os.path.getsize(path),
+            "rolled_back_from": current,
+        })
+    return generation
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Inspect or roll back published data files")
+    sub = parser.add_subparsers(dest='command', required=True)
+    list_cmd = sub.add_parser('list', help="show archived generations")
+    list_cmd.add_argument('path')
+    back = sub.add_parser('rollback', help="republish an earlier generation")
+    back.add_argument('path')
+    back.add_argument('--to', type=int, default=None, help="generation (default: previous)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == 'rollback':
+        generation = rollback(args.path, args.to)
+        print(f"⏪ {args.path} rolled back to generation {generation}")
+        return
+
+    current = current_generation(args.path)
+    archived = generations(args.path)
+    if not archived:
+        print(f"No generations recorded for {args.path}")
+        return
+    print(f"📚 {args.path}")
+    for generation in archived:
+        archived_path = _archive_path(args.path, generation)
+        stamp = datetime.fromtimestamp(os.path.getmtime(archived_path)).strftime('%Y-%m-%d %H:%M:%S')
+        marker = '  <- live' if generation == current else ''
+        print(f"   {generation:>4}  {stamp}  {os.path.getsize(archived_path):>10,} bytes{marker}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Build Map Tiles
+Precomputes clustered map markers for the City Explorer
+(js/views/map-explorer-view.js), so the map fetches only the tiles in view
+at the current zoom instead of every place dataset.
+
+Clustering follows supercluster: points are projected to Web Mercator and,
+from MAX_ZOOM down to MIN_ZOOM, greedily merged with every not-yet-merged
+neighbour within RADIUS_PX screen pixels at that zoom (weighted centroids,
+per category so colours and toggles keep working). Above MAX_ZOOM the map
+shows individual places.
+
+Output (data/map_tiles/):
+- manifest.json: zoom range, shard zoom, per-category counts and bounds
+- <z>/<x>/<y>.json for data zoom z = MIN_ZOOM..MAX_ZOOM + 1, sharded into XYZ
+  tiles at min(z, MAX_SHARD_ZOOM) (keeps deep zooms from exploding into
+  thousands of tiny files):
+    {"clusters": {category: [[lat, lng, count, expansion_zoom], ...]},
+     "points": {category: [[lat, lng, id, name, rating, reviews, score, locality], ...]}}
+"""
+
+import os
+import sys
+import math
+from collections import defaultdict
+
+from atomic_io import write_json, atomic_directory
+from json_stream import iter_records
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+RANKINGS_FILE = os.path.join(DATA_DIR, 'clean_rankings.json')
+OUTPUT_DIR = os.path.join(DATA_DIR, 'map_tiles')
+
+MAP_CATEGORIES = [
+    'restaurants', 'cafes', 'hotels', 'malls', 'museums', 'religious_sites',
+    'healthcare', 'education', 'banking', 'specialty_shops', 'boutiques',
+]
+MIN_ZOOM = 10
+MAX_ZOOM = 16        # clusters exist up to here; MAX_ZOOM + 1 = raw points
+MAX_SHARD_ZOOM = 14
+RADIUS_PX = 40
+TILE_EXTENT = 256
+
+
+# ---------------------------------------------------------------------------
+# Web Mercator (unit square, y down - same as XYZ tiles)
+# ---------------------------------------------------------------------------
+
+def lng_x(lng):
+    return lng / 360 + 0.5
+
+
+def lat_y(lat):
+    sin = math.sin(math.radians(lat))
+    y = 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi
+    return min(max(y, 0.0), 1.0)
+
+
+def y_lat(y):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+
+
+def x_lng(x):
+    return (x - 0.5) * 360
+
+
+# ---------------------------------------------------------------------------
+# Clustering
+# ---------------------------------------------------------------------------
+
+def cluster_level(items, radius):
+    """
+    One supercluster pass. items: [x, y, count, payload] where payload is
+    a point row or None for clusters. Returns the next (coarser) level; new
+    clusters carry their creation zoom in payload slot 'expansion'.
+    """
+    grid = defaultdict(list)
+    for i, (x, y, _, _) in enumerate(items):
+        grid[(int(x / radius), int(y / radius))].append(i)
+
+    merged = [False] * len(items)
+    out = []
+    r2 = radius * radius
+    for i, (x, y, count, payload) in enumerate(items):
+        if merged[i]:
+            continue
+        merged[i] = True
+        cx, cy = int(x / radius), int(y / radius)
+        neighbours = [
+            j for gx in (cx - 1, cx, cx + 1) for gy in (cy - 1, cy, cy + 1)
+            for j in grid.get((gx, gy), ())
+            if not merged[j] and (items[j][0] - x) ** 2 + (items[j][1] - y) ** 2 <= r2
+        ]
+        if not neighbours:
+            out.append(items[i])
+            continue
+        wx, wy, total = x * count, y * count, count
+        for j in neighbours:
+            merged[j] = True
+            wx += items[j][0] * items[j][2]
+            wy += items[j][1] * items[j][2]
+            total += items[j][2]
+        out.append([wx / total, wy / total, total, {'cluster': True}])
+    return out
+
+
+def build_levels(points):
+    """{zoom: items} for MIN_ZOOM..MAX_ZOOM + 1"""
+    levels = {MAX_ZOOM + 1: [[lng_x(p[1]), lat_y(p[0]), 1, p] for p in points]}
+    for z in range(MAX_ZOOM, MIN_ZOOM - 1, -1):
+        level = cluster_level(levels[z + 1], RADIUS_PX / (TILE_EXTENT * 2 ** z))
+        for item in level:
+            # A cluster first appears at the zoom where it was formed;
+            # clicking it should zoom to where it splits apart
+            if isinstance(item[3], dict) and 'expansion' not in item[3]:
+                item[3]['expansion'] = z + 1
+        levels[z] = level
+    return levels
+
+
+# ---------------------------------------------------------------------------
+# Input
+# ---------------------------------------------------------------------------
+
+def load_points():
+    """{category: [[lat, lng, id, name, rating, reviews, score, locality]]}"""
+    points = defaultdict(list)
+    if os.path.exists(RANKINGS_FILE):
+        for loc in iter_records(RANKINGS_FILE, 'all_rankings'):
+            data = loc.get('data') or {}
+            lat, lng = loc.get('latitude') or data.get('latitude'), loc.get('longitude') or data.get('longitude')
+            if lat and lng:
+                points['localities'].append([lat, lng, loc['name'], loc['name'], None, None,
+                                             loc.get('overall_score'), None])
+
+    for category in MAP_CATEGORIES:
+        path = os.path.join(DATA_DIR, f'{category}.json')
+        if not os.path.exists(path):
+            continue
+        for item in iter_records(path):
+            location = item.get('location') or {}
+            if location.get('lat') and location.get('lng'):
+                points[category].append([location['lat'], location['lng'], item.get('id'), item.get('name'),
+                                         item.get('rating'), item.get('reviews'), item.get('score'),
+                                         item.get('locality')])
+    return points
+
+
+def main():
+    print("\n" + "="*70)
+    print("🗺️ BUILDING CLUSTERED MAP TILES")
+    print("="*70)
+
+    points = load_points()
+    tiles = defaultdict(lambda: {"clusters": defaultdict(list), "points": defaultdict(list)})
+
+    for category, rows in points.items():
+        levels = build_levels(rows)
+        for z, items in levels.items():
+            shard = min(z, MAX_SHARD_ZOOM)
+            n = 2 ** shard
+            for x, y, count, payload in items:
+                tile = tiles[(z, min(int(x * n), n - 1), min(int(y * n), n - 1))]
+                if count == 1 and not isinstance(payload, dict):
+                    tile["points"][category].append(payload)
+                else:
+                    tile["clusters"][category].append(
+                        [round(y_lat(y), 6), round(x_lng(x), 6), count, payload['expansion']])
+        sizes = [len(levels[z]) for z in range(MIN_ZOOM, MAX_ZOOM + 2)]
+        print(f"   {category:<16} {len(rows):>5} places -> markers per zoom {sizes}")
+
+    # Rebuilt from scratch (so stale tiles never linger) and swapped in
+    # whole, so the map never fetches from a half-written tree
+    with atomic_directory(OUTPUT_DIR) as build_dir:
+        for (z, x, y), tile in tiles.items():
+            path = os.path.join(build_dir, str(z), str(x), f'{y}.json')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_json(path, tile, indent=None, keep=0)
+
+        manifest = {
+            "min_zoom": MIN_ZOOM,
+            "max_zoom": MAX_ZOOM + 1,
+            "max_shard_zoom": MAX_SHARD_ZOOM,
+            "radius_px": RADIUS_PX,
+            "counts": {category: len(rows) for category, rows in points.items()},
+            "bounds": {
+                category: [[min(r[0] for r in rows), min(r[1] for r in rows)],
+                           [max(r[0] for r in rows), max(r[1] for r in rows)]]
+                for category, rows in points.items() if rows
+            },
+            "tiles": len(tiles),
+        }
+        write_json(os.path.join(build_dir, 'manifest.json'), manifest, indent=None, keep=0)
+
+    print(f"\n✅ {len(tiles)} tiles for zooms {MIN_ZOOM}-{MAX_ZOOM + 1} saved to {os.path.abspath(OUTPUT_DIR)}")
+
+
+if __name__ == '__main__':
+    main()
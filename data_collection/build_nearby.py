@@ -0,0 +1,124 @@
+"""
+Build Nearby Lists
+Precomputes "nearby places" for every locality and every place, so detail
+pages and the map fetch one small file instead of every category dataset
+and do no distance math in the browser.
+
+One GridIndex range query per locality / place over all category files.
+Output (data/nearby/):
+- <category>/<place id>.json (entity detail pages):
+    {"radius_km", "counts": {category: n}, "places": [[category, id, name, km, rating], ...]}
+  places sorted by distance, the nearest NEARBY_PER_CATEGORY of each
+  category (counts are complete), so any category subset's top N is exact
+- locality_counts.json: {locality: counts} for the map's locality popups
+
+The tree is built in a temp directory and swapped in atomically.
+
+nearby_slug() must stay in sync with nearbySlug() in js/views/entity-detail-view.js.
+"""
+
+import os
+import re
+import sys
+
+import numpy as np
+
+from atomic_io import write_json, atomic_directory
+from geo_utils import GridIndex
+from json_stream import iter_records
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+RANKINGS_FILE = os.path.join(DATA_DIR, 'clean_rankings.json')
+OUTPUT_DIR = os.path.join(DATA_DIR, 'nearby')
+
+NEARBY_CATEGORIES = [
+    'restaurants', 'cafes', 'hotels', 'malls', 'boutiques', 'specialty_shops',
+    'museums', 'religious_sites', 'healthcare', 'education', 'banking',
+]
+RADIUS_KM = 3
+NEARBY_PER_CATEGORY = 6
+
+
+def nearby_slug(value):
+    """File-safe name for a place id or locality name"""
+    return re.sub(r'[^A-Za-z0-9_-]+', '-', str(value)).strip('-') or '_'
+
+
+def load_places():
+    places = []
+    for category in NEARBY_CATEGORIES:
+        path = os.path.join(DATA_DIR, f'{category}.json')
+        if not os.path.exists(path):
+            continue
+        for item in iter_records(path):
+            location = item.get('location') or {}
+            if item.get('id') and location.get('lat') and location.get('lng'):
+                places.append({'category': category, 'id': item['id'], 'name': item.get('name'),
+                               'rating': item.get('rating'), 'lat': location['lat'], 'lng': location['lng']})
+    return places
+
+
+def load_localities():
+    localities = []
+    if os.path.exists(RANKINGS_FILE):
+        for loc in iter_records(RANKINGS_FILE, 'all_rankings'):
+            data = loc.get('data') or {}
+            lat, lng = loc.get('latitude') or data.get('latitude'), loc.get('longitude') or data.get('longitude')
+            if lat and lng:
+                localities.append({'name': loc['name'], 'lat': lat, 'lng': lng})
+    return localities
+
+
+def nearby_payload(places, indices, distances, exclude_id=None):
+    counts, rows = {}, []
+    for index, km in zip(indices, distances):
+        place = places[index]
+        if place['id'] == exclude_id:
+            continue
+        counts[place['category']] = counts.get(place['category'], 0) + 1
+        if counts[place['category']] <= NEARBY_PER_CATEGORY:
+            rows.append([place['category'], place['id'], place['name'], round(float(km), 2), place['rating']])
+    return {"radius_km": RADIUS_KM, "counts": counts, "places": rows}
+
+
+def main():
+    print("\n" + "="*70)
+    print("📍 BUILDING NEARBY LISTS")
+    print("="*70)
+
+    places = load_places()
+    localities = load_localities()
+    print(f"   {len(places)} places, {len(localities)} localities, radius {RADIUS_KM} km")
+
+    index = GridIndex([p['lat'] for p in places], [p['lng'] for p in places], cell_km=RADIUS_KM / 2)
+    place_hits = index.within([p['lat'] for p in places], [p['lng'] for p in places], RADIUS_KM)
+    locality_hits = index.within([l['lat'] for l in localities], [l['lng'] for l in localities], RADIUS_KM)
+
+    # Rebuilt from scratch (so places that disappeared lose their files) and
+    # swapped in whole, so readers never see a partial tree
+    sizes = []
+    with atomic_directory(OUTPUT_DIR) as build_dir:
+        for place, (indices, distances) in zip(places, place_hits):
+            path = os.path.join(build_dir, place['category'], f"{nearby_slug(place['id'])}.json")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_json(path, nearby_payload(places, indices, distances, exclude_id=place['id']), indent=None, keep=0)
+            sizes.append(os.path.getsize(path))
+
+        locality_counts = {
+            locality['name']: nearby_payload(places, indices, distances)['counts']
+            for locality, (indices, distances) in zip(localities, locality_hits)
+        }
+        write_json(os.path.join(build_dir, 'locality_counts.json'), locality_counts, indent=None, keep=0)
+
+    hits = np.array([len(i) for i, _ in place_hits]) - 1
+    print(f"   places within {RADIUS_KM} km of a place: median {np.median(hits):.0f}, max {hits.max()}")
+    print(f"\n✅ {len(sizes)} nearby files, median {np.median(sizes) / 1024:.1f} KB, max {max(sizes) / 1024:.1f} KB")
+    print(f"   Saved to {os.path.abspath(OUTPUT_DIR)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Build Search Index
+Prebuilds data/search_index.json for the header search box (js/search.js),
+so the browser loads one small file instead of every category file.
+
+The index holds:
+- categories: [key, label, icon, route prefix] per category
+- entries: [name, normalized name, category index, id, score, locality],
+  sorted by score (desc) then name, so posting order is result order
+- prefixes: 1-2 character word prefixes -> entry indices (short queries)
+- trigrams: character trigrams of normalized names -> entry indices
+  (longer queries: intersect the query's trigrams, then verify the substring)
+
+Posting lists are delta-encoded. normalize() must stay in sync with
+normalizeQuery() in js/search.js.
+"""
+
+import os
+import re
+import sys
+import json
+import unicodedata
+from datetime import datetime, timezone
+
+from atomic_io import atomic_write
+from json_stream import iter_records
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+RANKINGS_FILE = os.path.join(DATA_DIR, 'clean_rankings.json')  # what loadRankings() reads
+OUTPUT_FILE = os.path.join(DATA_DIR, 'search_index.json')
+
+# (key, label, icon, route prefix) - localities come from the rankings
+SEARCH_CATEGORIES = [
+    ('localities', 'Localities', '🏘️', '/locality/'),
+    ('restaurants', 'Restaurants', '🍽️', '/entity/restaurants/'),
+    ('cafes', 'Cafes', '☕', '/entity/cafes/'),
+    ('hotels', 'Hotels', '🏨', '/entity/hotels/'),
+    ('malls', 'Malls', '🛒', '/entity/malls/'),
+    ('boutiques', 'Boutiques', '👗', '/entity/boutiques/'),
+    ('specialty_shops', 'Specialty Shops', '🎁', '/entity/specialty_shops/'),
+    ('museums', 'Museums', '🏛️', '/entity/museums/'),
+    ('religious_sites', 'Religious Sites', '🛕', '/entity/religious_sites/'),
+    ('healthcare', 'Healthcare', '🏥', '/entity/healthcare/'),
+    ('education', 'Education', '🎓', '/entity/education/'),
+    ('banking', 'Banking', '🏦', '/entity/banking/'),
+]
+MAX_PREFIX = 2
+
+
+def normalize(text):
+    """Lowercase, strip accents, collapse punctuation to single spaces"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+def trigrams(norm):
+    return {norm[i:i + 3] for i in range(len(norm) - 2)}
+
+
+def word_prefixes(norm):
+    return {word[:n] for word in norm.split() for n in range(1, min(MAX_PREFIX, len(word)) + 1)}
+
+
+def delta_encode(indices):
+    out, previous = [], 0
+    for index in indices:
+        out.append(index - previous)
+        previous = index
+    return out
+
+
+def load_entries():
+    """[(name, category index, id, score, locality)] for every searchable item"""
+    entries = []
+    if os.path.exists(RANKINGS_FILE):
+        for loc in iter_records(RANKINGS_FILE, 'all_rankings'):
+            entries.append((loc['name'], 0, loc['name'], loc.get('overall_score'), None))
+
+    for cat_index, (key, _, _, _) in enumerate(SEARCH_CATEGORIES):
+        path = os.path.join(DATA_DIR, f'{key}.json')
+        if cat_index == 0 or not os.path.exists(path):
+            continue
+        for item in iter_records(path):
+            if not item.get('name'):
+                continue
+            entries.append((item['name'], cat_index, item.get('id') or item['name'],
+                            item.get('score') or item.get('rating'), item.get('locality')))
+    return entries
+
+
+def build_index(entries):
+    entries = sorted(entries, key=lambda e: (-(e[3] or 0), e[0].lower()))
+    rows, prefix_table, trigram_table = [], {}, {}
+
+    for index, (name, cat_index, item_id, score, locality) in enumerate(entries):
+        norm = normalize(name)
+        if isinstance(score, float):
+            score = round(score, 2)
+        rows.append([name, norm, cat_index, item_id, score, locality])
+        for prefix in word_prefixes(norm):
+            prefix_table.setdefault(prefix, []).append(index)
+        for gram in trigrams(norm):
+            trigram_table.setdefault(gram, []).append(index)
+
+    return {
+        "version": 1,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "categories": [list(c) for c in SEARCH_CATEGORIES],
+        "entries": rows,
+        "prefixes": {k: delta_encode(v) for k, v in sorted(prefix_table.items())},
+        "trigrams": {k: delta_encode(v) for k, v in sorted(trigram_table.items())},
+    }
+
+
+def main():
+    print("\n" + "="*70)
+    print("🔎 BUILDING SEARCH INDEX")
+    print("="*70)
+
+    entries = load_entries()
+    index = build_index(entries)
+    with atomic_write(OUTPUT_FILE) as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+    counts = {}
+    for _, cat_index, _, _, _ in entries:
+        counts[SEARCH_CATEGORIES[cat_index][1]] = counts.get(SEARCH_CATEGORIES[cat_index][1], 0) + 1
+    for label, count in counts.items():
+        print(f"   {label:<18} {count:>4}")
+    print(f"\n✅ {len(entries)} entries, {len(index['prefixes'])} prefixes, {len(index['trigrams'])} trigrams")
+    print(f"   Saved to {os.path.abspath(OUTPUT_FILE)} ({os.path.getsize(OUTPUT_FILE) / 1024:.1f} KB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Trivandrum Top 10 - Pipeline CLI
+Single entry point for every data_collection stage.
+
+Only the module for the requested stage is imported, so a quick scoring run
+never loads Gemini, pandas or scikit-learn.
+
+Usage (from the repo root):
+    python data_collection/cli.py --list
+    python data_collection/cli.py objective_scoring_engine
+    python data_collection/cli.py simple_collect process
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib
+
+# Stage name -> (module, entry function, description)
+STAGES = {
+    # Collection (API calls)
+    'collect_data': ('collect_data', 'main', "Full API + Gemini collection (legacy)"),
+    'collect_objective_data': ('collect_objective_data', 'main', "Objective API-sourced locality metrics"),
+    'collect_deduplicated_data': ('collect_deduplicated_data', 'main', "Region-wide amenities, nearest-locality assignment"),
+    'collect_premium_spots': ('collect_premium_spots', 'main', "Premium spots per locality"),
+    'fetch_dining_data': ('fetch_dining_data', 'main', "Restaurants, cafes and hotels"),
+    'fetch_property_prices': ('fetch_property_prices', 'main', "Serper + regex (Gemini fallback) price extraction"),
+    'fetch_locality_photos': ('fetch_locality_photos', 'main', "Locality photos from Places"),
+    'fetch_curated_photos': ('fetch_curated_photos', 'main', "Curated landmark photos"),
+    'fetch_better_photos': ('fetch_better_photos', 'main', "Alternative photo search"),
+    'update_kovalam_kowdiar': ('update_kovalam_kowdiar', 'main', "Refresh Kovalam/Kowdiar photos"),
+    'photo_pipeline': ('photo_pipeline', 'main', "Download, dedupe and encode photo ladders (AVIF/WebP) + manifest"),
+    'elevation': ('elevation', 'main', "Batched, cached elevation grids -> flood safety fields"),
+    'air_quality': ('air_quality', 'main', "Cached OpenAQ stations -> IDW PM2.5 per locality"),
+    'simple_collect': ('simple_collect', 'main', "Manual template + Gemini hybrid"),
+    # Processing (local only)
+    'deduplicate': ('deduplicate', 'deduplicate', "Assign duplicated amenities to the closest locality"),
+    'price_index': ('price_index', 'main', "Canonical locality prices with provenance: show, set, unset"),
+    'merge_prices': ('merge_prices', 'main', "Merge property prices into objective rankings"),
+    'map_dining_to_localities': ('map_dining_to_localities', 'main', "Attach dining places to localities"),
+    'road_graph': ('road_graph', 'main', "Compile OSM road graph, precompute travel times"),
+    'noise_model': ('noise_model', 'main', "Multi-source noise exposure -> noise_score per locality"),
+    'accessibility': ('accessibility', 'main', "Gravity-model amenity access features per locality"),
+    'isochrones': ('isochrones', 'main', "Drive-time isochrone rasters for destinations and noise sources"),
+    'build_nearby': ('build_nearby', 'main', "Precomputed 3 km nearby lists per locality / place (data/nearby)"),
+    'build_map_tiles': ('build_map_tiles', 'main', "Clustered per-zoom marker tiles for the map explorer"),
+    'build_search_index': ('build_search_index', 'main', "Prebuilt header search index (data/search_index.json)"),
+    'snapshots': ('snapshots', 'main', "Versioned snapshots of data/*.json: create, diff, restore"),
+    # Scoring
+    'objective_scoring_engine': ('objective_scoring_engine', 'main', "Objective rankings"),
+    'generate_clean_rankings': ('generate_clean_rankings', 'main', "Clean rankings with price prestige"),
+    'rank_localities': ('rank_localities', 'main', "EoLI-weighted rankings (legacy)"),
+    'train_fair_value_model': ('train_fair_value_model', 'main', "Fair value model (pandas + scikit-learn)"),
+    'score_raster': ('score_raster', 'main', "City-wide score heatmap tiles"),
+}
+
+
+def list_stages():
+    """Print the available stages"""
+    print("Available stages:")
+    for name, (_, _, description) in STAGES.items():
+        print(f"  {name:<28} {description}")
+
+
+def run_stage(name, args=()):
+    """Import the stage module on demand and call its entry function"""
+    module_name, func_name, _ = STAGES[name]
+
+    # Stage modules import each other by bare name
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+
+    # Stages that read sys.argv see the same arguments as when run directly
+    sys.argv = [os.path.join(script_dir, f'{module_name}.py'), *args]
+
+    module = importlib.import_module(module_name)
+    return getattr(module, func_name)()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Trivandrum Top 10 pipeline stage")
+    parser.add_argument('stage', nargs='?', choices=list(STAGES), help="stage to run")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="arguments passed to the stage")
+    parser.add_argument('--list', action='store_true', help="list available stages")
+    parser.add_argument('--timing', action='store_true', help="print how long the stage took")
+    opts = parser.parse_args()
+
+    if opts.list or not opts.stage:
+        list_stages()
+        return
+
+    start = time.perf_counter()
+    run_stage(opts.stage, opts.args)
+    if opts.timing:
+        print(f"\n⏱️ {opts.stage} finished in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
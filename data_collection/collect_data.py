@@ -10,7 +10,9 @@ import json
 import requests
 import time
 from typing import Dict, List
-import google.generativeai as genai
+
+from atomic_io import write_json
+from price_extractor import extract_prices
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -26,9 +28,9 @@ class DataCollector:
         self.gemini_key = os.getenv('GEMINI_API_KEY')
         self.serper_key = os.getenv('SERPER_API_KEY')
         
-        # Configure Gemini - use correct model name
-        genai.configure(api_key=self.gemini_key)
-        self.gemini_model = genai.GenerativeModel('gemini-flash-latest')
+        # Gemini is configured lazily (see gemini_model) so Maps-only
+        # callers never pay for the SDK import
+        self._gemini_model = None
         
         # Reference points for distance calculations
         self.reference_points = {
@@ -37,6 +39,17 @@ class DataCollector:
             'airport': '8.4821,76.9200',      # Trivandrum Airport
             'medical_college': '8.5261,76.9512'  # Medical College
         }
+    
+    @property
+    def gemini_model(self):
+        """Gemini model, imported and configured on first use"""
+        if self._gemini_model is None:
+            import google.generativeai as genai
+            
+            # Configure Gemini - use correct model name
+            genai.configure(api_key=self.gemini_key)
+            self._gemini_model = genai.GenerativeModel('gemini-flash-latest')
+        return self._gemini_model
         
     def get_coordinates(self, locality_name: str) -> tuple:
         """Get lat, lng for a locality using geocoding"""
@@ -199,6 +212,20 @@ class DataCollector:
         apt_query = f"{locality_name} apartment price per sqft Trivandrum site:magicbricks.com OR site:99acres.com"
         apt_results = self.search_web(apt_query)
         
+        # Rule-based extraction first; Gemini only when the snippets are ambiguous
+        local = extract_prices(land_results.splitlines(), apt_results.splitlines())
+        if len(local["resolved"]) == 2:
+            prices = {
+                "land_price_per_cent_lakhs": local["land_price_per_cent_lakhs"],
+                "apartment_price_per_sqft": local["apartment_price_per_sqft"],
+                "confidence": local["confidence"],
+                "source": local["source_notes"],
+            }
+            print(f"  ⚡ Land: ₹{prices['land_price_per_cent_lakhs']}L/cent (regex)")
+            print(f"  ⚡ Apartment: ₹{prices['apartment_price_per_sqft']}/sqft (regex)")
+            print(f"  ✓ Confidence: {prices['confidence']}")
+            return prices
+        
         # Use Gemini to extract prices
         prompt = f"""
 Extract real estate prices for {locality_name}, Trivandrum from these search results.
@@ -686,8 +713,7 @@ def main():
     output_file = 'data_collection/output/automated_scores.json'
     os.makedirs('data_collection/output', exist_ok=True)
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    write_json(output_file, results)
     
     print(f"\n{'='*60}")
     print(f"\n{'='*60}")
@@ -5,12 +5,17 @@ Each amenity is counted for ONLY the nearest locality - no double counting.
 
 import os
 import sys
-import json
 import time
-import math
 import requests
 from dotenv import load_dotenv
 
+from geo_utils import nearest_neighbors
+from place_store import save_places
+from road_graph import get_engine
+from atomic_io import write_json
+from elevation import get_elevation_profiles, flood_safety_score
+from noise_model import NoiseModel
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -53,24 +58,6 @@ DESTINATIONS = {
     "ksrtc_stand": {"lat": 8.4885, "lng": 76.9506, "name": "KSRTC Bus Stand"},
 }
 
-# Noise sources
-NOISE_SOURCES = {
-    "airport": {"lat": 8.4804, "lng": 76.9201},
-    "ksrtc_stand": {"lat": 8.4885, "lng": 76.9506},
-    "railway_station": {"lat": 8.4890, "lng": 76.9494},
-}
-
-
-def haversine_distance(lat1, lng1, lat2, lng2):
-    """Calculate distance between two points in km"""
-    R = 6371
-    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    return R * c
-
 
 def get_travel_time(origin_lat, origin_lng, dest_lat, dest_lng):
     """Get travel time in minutes using Distance Matrix API"""
@@ -147,30 +134,17 @@ def get_all_places_in_region(place_type, radius=5000):
     return list(all_places.values())
 
 
-def find_nearest_locality(place_lat, place_lng, localities):
-    """Find which locality is closest to a given place"""
-    min_distance = float('inf')
-    nearest = None
-    
-    for loc in localities:
-        dist = haversine_distance(place_lat, place_lng, loc['lat'], loc['lng'])
-        if dist < min_distance:
-            min_distance = dist
-            nearest = loc['name']
-    
-    return nearest, min_distance
-
-
-def calculate_noise_score(lat, lng):
-    """Calculate noise score based on distance from noise sources (higher = quieter)"""
-    distances = []
-    for source_name, source_coords in NOISE_SOURCES.items():
-        dist = haversine_distance(lat, lng, source_coords['lat'], source_coords['lng'])
-        distances.append(dist)
+def find_nearest_localities(places, localities):
+    """Find the closest locality for every place in one batched query.
+    Returns a list of (locality_name, distance_km) aligned with places."""
+    if not places:
+        return []
     
-    avg_distance = sum(distances) / len(distances)
-    score = min(10, max(1, avg_distance))
-    return round(score, 1)
+    idx, dist = nearest_neighbors(
+        [p['lat'] for p in places], [p['lng'] for p in places],
+        [loc['lat'] for loc in localities], [loc['lng'] for loc in localities],
+    )
+    return [(localities[i]['name'], float(d)) for i, d in zip(idx, dist)]
 
 
 def calculate_flood_safety_score(elevation):
@@ -218,6 +192,9 @@ def main():
     print("📍 Step 1: Collecting travel times for each locality...")
     locality_data = {}
     
+    # Elevation grids for every locality in one batched (and cached) request
+    elevations = get_elevation_profiles(LOCALITIES, api_key=GOOGLE_MAPS_API_KEY)
+    
     for loc in LOCALITIES:
         name = loc['name']
         print(f"\n  Processing {name}...")
@@ -228,15 +205,19 @@ def main():
             "longitude": loc['lng'],
         }
         
-        # Travel times
+        # Travel times (local road graph when available, Distance Matrix otherwise)
+        engine = get_engine()
         for dest_key, dest_info in DESTINATIONS.items():
-            t = get_travel_time(loc['lat'], loc['lng'], dest_info['lat'], dest_info['lng'])
+            if engine:
+                t = engine.travel_time(loc['lat'], loc['lng'], dest_key)
+            else:
+                t = get_travel_time(loc['lat'], loc['lng'], dest_info['lat'], dest_info['lng'])
+                time.sleep(0.2)
             data[f"{dest_key}_time"] = t
-            time.sleep(0.2)
         
-        # Noise and flood scores
-        data['noise_score'] = calculate_noise_score(loc['lat'], loc['lng'])
-        data['flood_safety_score'] = 5  # Default, could add elevation API call
+        # Flood scores (noise waits for the bus stations harvested in step 2)
+        data.update(elevations[name])
+        data['flood_safety_score'] = flood_safety_score(elevations[name])
         data['job_proximity_score'] = calculate_job_proximity_score(data)
         
         # Initialize amenity counts
@@ -262,15 +243,15 @@ def main():
         places = get_all_places_in_region(amenity_type, radius=5000)
         print(f"    Found {len(places)} unique {amenity_type}s across region")
         
-        # Assign each place to the nearest locality
+        # Keep every harvested place for the place store
         for place in places:
-            if not place.get('lat') or not place.get('lng'):
-                continue
-            
-            nearest, distance = find_nearest_locality(
-                place['lat'], place['lng'], LOCALITIES
-            )
-            
+            global_places[(place['place_id'], amenity_type)] = place
+        
+        # Assign each place to the nearest locality (one batched query)
+        places = [p for p in places if p.get('lat') and p.get('lng')]
+        nearest_localities = find_nearest_localities(places, LOCALITIES)
+        
+        for place, (nearest, distance) in zip(places, nearest_localities):
             # Only count if within 3km of the nearest locality
             if distance <= 3.0:
                 key = f"{amenity_type}_count"
@@ -286,11 +267,18 @@ def main():
         
         time.sleep(0.5)  # Rate limiting between amenity types
     
+    # Save the raw place set (used by the noise model and the raster / spatial stages)
+    save_places(list(global_places.values()))
+    print(f"\n  💾 Saved {len(global_places)} places to data/places.json")
+    
     # Step 3: Finalize data
     print("\n\n📍 Step 3: Finalizing data...")
     final_data = []
+    noise_model = NoiseModel.load()
     
     for name, data in locality_data.items():
+        data['noise_score'] = float(noise_model.noise_score(data['latitude'], data['longitude']))
+        
         # Flatten amenity counts
         for key, count in data['amenity_counts'].items():
             data[key] = count
@@ -315,8 +303,7 @@ def main():
     
     # Save results
     output_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'deduplicated_locality_data.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(final_data, f, indent=2, ensure_ascii=False)
+    write_json(output_file, final_data)
     
     print(f"\n\n✅ Deduplicated data saved to: {output_file}")
     print("="*70)
@@ -6,12 +6,17 @@ No AI-generated or subjective ratings.
 
 import os
 import sys
-import json
 import time
-import math
 import requests
 from dotenv import load_dotenv
 
+from road_graph import get_engine
+from atomic_io import write_json
+from normalization import QuantileSketch
+from elevation import get_elevations, get_elevation_profiles, flood_safety_score
+from air_quality import air_quality_at
+from noise_model import get_model as get_noise_model
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -54,23 +59,31 @@ DESTINATIONS = {
     "ksrtc_stand": {"lat": 8.4885, "lng": 76.9506, "name": "KSRTC Bus Stand"},
 }
 
-# Noise sources for noise level calculation
+# Amenity types counted per locality and their search radius (meters)
+AMENITY_RADII = {
+    "school": 3000,
+    "hospital": 3000,
+    "police": 5000,
+    "fire_station": 5000,
+    "bus_station": 2000,
+    "park": 2000,
+    "bank": 2000,
+    "atm": 2000,
+    "supermarket": 2000,
+    "pharmacy": 2000,
+    "gym": 2000,
+    "restaurant": 2000,
+    "cafe": 2000,
+    "real_estate_agency": 3000,
+}
+
+# Main noise sources (isochrone targets; the noise score itself uses noise_model.py)
 NOISE_SOURCES = {
     "airport": {"lat": 8.4804, "lng": 76.9201},
     "ksrtc_stand": {"lat": 8.4885, "lng": 76.9506},
     "railway_station": {"lat": 8.4890, "lng": 76.9494},
 }
 
-def haversine_distance(lat1, lng1, lat2, lng2):
-    """Calculate distance between two points in km"""
-    R = 6371  # Earth's radius in km
-    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    return R * c
-
 def get_travel_time(origin_lat, origin_lng, dest_lat, dest_lng):
     """Get travel time in minutes using Distance Matrix API"""
     url = "https://maps.googleapis.com/maps/api/distancematrix/json"
@@ -92,21 +105,8 @@ def get_travel_time(origin_lat, origin_lng, dest_lat, dest_lng):
         return None
 
 def get_elevation(lat, lng):
-    """Get elevation in meters using Elevation API"""
-    url = "https://maps.googleapis.com/maps/api/elevation/json"
-    params = {
-        "locations": f"{lat},{lng}",
-        "key": GOOGLE_MAPS_API_KEY
-    }
-    try:
-        response = requests.get(url, params=params)
-        data = response.json()
-        if data['results']:
-            return round(data['results'][0]['elevation'], 1)
-        return None
-    except Exception as e:
-        print(f"  Error getting elevation: {e}")
-        return None
+    """Get elevation in meters (cached; prefer get_elevation_profiles for many points)"""
+    return get_elevations([(lat, lng)], api_key=GOOGLE_MAPS_API_KEY)[0]
 
 def count_nearby_places(lat, lng, place_type, radius=2000):
     """Count places of a specific type within radius (meters)"""
@@ -135,35 +135,13 @@ def count_nearby_places(lat, lng, place_type, radius=2000):
         return {"count": 0, "avg_rating": None}
 
 def get_air_quality(lat, lng):
-    """Get AQI from OpenAQ (free API, no key needed)"""
-    try:
-        url = f"https://api.openaq.org/v2/latest?coordinates={lat},{lng}&radius=25000&limit=1"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        if data.get('results') and len(data['results']) > 0:
-            measurements = data['results'][0].get('measurements', [])
-            for m in measurements:
-                if m.get('parameter') == 'pm25':
-                    return {"pm25": m.get('value'), "source": data['results'][0].get('location')}
-        return {"pm25": None, "source": "No nearby station"}
-    except Exception as e:
-        print(f"  Error getting AQI: {e}")
-        return {"pm25": None, "source": "API Error"}
+    """PM2.5 interpolated from the cached OpenAQ station set (OpenAQ v3, OPENAQ_API_KEY)"""
+    reading = air_quality_at([{"name": None, "lat": lat, "lng": lng}])[None]
+    return {"pm25": reading['pm25'], "source": reading['aqi_source']}
 
 def calculate_noise_score(lat, lng):
-    """Calculate noise score based on distance from noise sources (higher = quieter)"""
-    distances = []
-    for source_name, source_coords in NOISE_SOURCES.items():
-        dist = haversine_distance(lat, lng, source_coords['lat'], source_coords['lng'])
-        distances.append(dist)
-    
-    # Average distance to noise sources
-    avg_distance = sum(distances) / len(distances)
-    
-    # Convert to 1-10 score (further = higher score)
-    # 0km = 1, 10km+ = 10
-    score = min(10, max(1, avg_distance))
-    return round(score, 1)
+    """Noise score from the multi-source exposure model, see noise_model.py (higher = quieter)"""
+    return float(get_noise_model().noise_score(lat, lng))
 
 def calculate_job_proximity_score(travel_times):
     """Calculate job proximity score based on weighted travel times"""
@@ -189,16 +167,18 @@ def calculate_prestige_percentile(land_price, all_prices):
     if not land_price or not all_prices:
         return 5  # Default middle score
     
-    sorted_prices = sorted(all_prices)
-    rank = sorted_prices.index(land_price) + 1
-    percentile = rank / len(sorted_prices) * 100
+    # Share of prices at or below this one (ties share a percentile);
+    # pass a QuantileSketch to avoid re-sorting for every locality
+    if not isinstance(all_prices, QuantileSketch):
+        all_prices = QuantileSketch(all_prices)
+    percentile = all_prices.percentile(land_price) * 100
     
     # Convert to 1-10 score
     score = percentile / 10
     return round(score, 1)
 
-def collect_locality_data(locality):
-    """Collect all objective metrics for a locality"""
+def collect_locality_data(locality, elevation=None, air_quality=None):
+    """Collect all objective metrics for a locality (elevation / air_quality: prefetched, if given)"""
     name = locality['name']
     lat = locality['lat']
     lng = locality['lng']
@@ -211,39 +191,29 @@ def collect_locality_data(locality):
     }
     
     # 1. Travel Times (OBJECTIVE)
-    print("  ⏱️ Calculating travel times...")
+    # Local road graph when an OSM extract is available, Distance Matrix otherwise
+    engine = get_engine()
+    print(f"  ⏱️ Calculating travel times ({'road graph' if engine else 'Distance Matrix'})...")
     for dest_key, dest_info in DESTINATIONS.items():
-        time_val = get_travel_time(lat, lng, dest_info['lat'], dest_info['lng'])
+        if engine:
+            time_val = engine.travel_time(lat, lng, dest_key)
+        else:
+            time_val = get_travel_time(lat, lng, dest_info['lat'], dest_info['lng'])
+            time.sleep(0.2)
         data[f"{dest_key}_time"] = time_val
         print(f"    → {dest_info['name']}: {time_val} min")
-        time.sleep(0.2)
     
     # 2. Elevation for Flooding Risk (OBJECTIVE)
     print("  ⛰️ Getting elevation...")
-    data['elevation_meters'] = get_elevation(lat, lng)
-    print(f"    → Elevation: {data['elevation_meters']}m")
-    time.sleep(0.2)
+    if elevation is None:
+        elevation = get_elevation_profiles([locality])[name]
+    data.update(elevation)
+    print(f"    → Elevation: {data['elevation_meters']}m "
+          f"(median {data['elevation_median']}m, low-lying {data['low_lying_fraction']})")
     
     # 3. Amenity Counts (OBJECTIVE)
     print("  🏢 Counting nearby amenities...")
-    amenity_types = {
-        "school": 3000,
-        "hospital": 3000,
-        "police": 5000,
-        "fire_station": 5000,
-        "bus_station": 2000,
-        "park": 2000,
-        "bank": 2000,
-        "atm": 2000,
-        "supermarket": 2000,
-        "pharmacy": 2000,
-        "gym": 2000,
-        "restaurant": 2000,
-        "cafe": 2000,
-        "real_estate_agency": 3000,
-    }
-    
-    for amenity_type, radius in amenity_types.items():
+    for amenity_type, radius in AMENITY_RADII.items():
         result = count_nearby_places(lat, lng, amenity_type, radius)
         data[f"{amenity_type}_count"] = result['count']
         data[f"{amenity_type}_avg_rating"] = result['avg_rating']
@@ -252,10 +222,10 @@ def collect_locality_data(locality):
     
     # 4. Air Quality (OBJECTIVE - but limited coverage)
     print("  🌬️ Checking air quality...")
-    aqi = get_air_quality(lat, lng)
-    data['pm25'] = aqi['pm25']
-    data['aqi_source'] = aqi['source']
-    print(f"    → PM2.5: {aqi['pm25']} (from: {aqi['source']})")
+    if air_quality is None:
+        air_quality = air_quality_at([locality])[name]
+    data.update(air_quality)
+    print(f"    → PM2.5: {data['pm25']} (from: {data['aqi_source']})")
     
     # 5. Calculated Scores (DERIVED FROM OBJECTIVE DATA)
     print("  📊 Calculating derived scores...")
@@ -264,14 +234,8 @@ def collect_locality_data(locality):
     data['noise_score'] = calculate_noise_score(lat, lng)
     print(f"    → Noise Score: {data['noise_score']}/10 (higher = quieter)")
     
-    # Flooding Risk Score (based on elevation - higher = safer)
-    if data['elevation_meters']:
-        # Trivandrum elevations range roughly 0-100m
-        # Normalize: 0m = 1, 50m+ = 10
-        flood_score = min(10, max(1, data['elevation_meters'] / 5))
-        data['flood_safety_score'] = round(flood_score, 1)
-    else:
-        data['flood_safety_score'] = 5  # Default
+    # Flooding Risk Score (sampled elevation around the locality - higher = safer)
+    data['flood_safety_score'] = flood_safety_score(elevation)
     print(f"    → Flood Safety: {data['flood_safety_score']}/10 (higher = safer)")
     
     # Safety Score (based on police/fire station proximity)
@@ -331,8 +295,16 @@ def main():
     
     all_data = []
     
+    # Elevation grids for every locality in one batched (and cached) request
+    print("\n⛰️ Sampling elevation around each locality...")
+    elevations = get_elevation_profiles(LOCALITIES, api_key=GOOGLE_MAPS_API_KEY)
+    
+    # PM2.5 for every locality from one (cached) station fetch
+    air_quality = air_quality_at(LOCALITIES)
+    
     for locality in LOCALITIES:
-        data = collect_locality_data(locality)
+        name = locality['name']
+        data = collect_locality_data(locality, elevations[name], air_quality[name])
         all_data.append(data)
         time.sleep(1)  # Rate limiting between localities
     
@@ -341,8 +313,7 @@ def main():
     
     # Save results
     output_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'objective_locality_data.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, indent=2, ensure_ascii=False)
+    write_json(output_file, all_data)
     
     print("\n" + "="*70)
     print(f"✅ COMPLETE! Data saved to: {output_file}")
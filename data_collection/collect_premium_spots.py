@@ -5,10 +5,12 @@ Uses Google Places API to get accurate, verified places for each locality.
 
 import os
 import sys
-import json
 import requests
 from dotenv import load_dotenv
 
+from atomic_io import write_json
+from photo_pipeline import places_photo_url
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -106,8 +108,8 @@ def get_place_details(place_id):
     return {}
 
 def get_photo_url(photo_reference, max_width=400):
-    """Generate photo URL from photo reference"""
-    return f"https://maps.googleapis.com/maps/api/place/photo?maxwidth={max_width}&photoreference={photo_reference}&key={GOOGLE_MAPS_API_KEY}"
+    """Photo URL without the API key; photo_pipeline.py downloads it"""
+    return places_photo_url(photo_reference, max_width)
 
 def collect_spots_for_locality(locality):
     """Collect premium spots for a single locality"""
@@ -196,8 +198,7 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     output_file = os.path.join(output_dir, 'premium_spots.json')
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, indent=2, ensure_ascii=False)
+    write_json(output_file, all_data)
     
     print("\n" + "="*60)
     print(f"✅ SAVED TO: {output_file}")
@@ -1,48 +1,35 @@
-import json
-import math
 from typing import Dict, List, Tuple
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """
-    Calculate the great circle distance between two points 
-    on the earth (specified in decimal degrees)
-    """
-    # Convert decimal degrees to radians 
-    lon1, lat1, lon2, lat2 = map(math.radians, [lon1, lat1, lon2, lat2])
+from geo_utils import haversine_distance
+from json_stream import iter_records, stream_dump
 
-    # Haversine formula 
-    dlon = lon2 - lon1 
-    dlat = lat2 - lat1 
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a)) 
-    r = 6371 # Radius of earth in kilometers. Use 3956 for miles
-    return c * r
+INPUT_FILE = 'data_collection/output/automated_scores.json'
+OUTPUT_FILE = 'data_collection/output/deduped_scores.json'
+
+AMENITY_TYPES = [
+    'schools', 'hospitals', 'restaurants', 'cafes', 
+    'supermarkets', 'gyms', 'parks', 'pharmacies', 
+    'police_stations', 'fire_stations'
+]
 
 def deduplicate():
     print("="*60)
     print("Running Amenity Deduplication")
     print("="*60)
 
-    # 1. Load Data
-    with open('data_collection/output/automated_scores.json', 'r', encoding='utf-8') as f:
-        localities = json.load(f)
-    
-    print(f"Loaded {len(localities)} localities.")
+    # 1. Data is streamed one locality at a time (two passes over the file),
+    # so only the amenity registry is held in memory
     
     # Registry to track every amenity instance
     # Key: place_id, Value: { 'dist': X, 'locality_name': Y }
     amenity_registry = {}
     
     # 2. First Pass: Find the closest locality for every unique amenity
-    amenity_types = [
-        'schools', 'hospitals', 'restaurants', 'cafes', 
-        'supermarkets', 'gyms', 'parks', 'pharmacies', 
-        'police_stations', 'fire_stations'
-    ]
-    
     total_duplicates_found = 0
+    locality_count = 0
     
-    for loc in localities:
+    for loc in iter_records(INPUT_FILE):
+        locality_count += 1
         loc_lat = loc['latitude']
         loc_lng = loc['longitude']
         
@@ -51,46 +38,61 @@ def deduplicate():
             print(f"⚠️ Warning: No detailed amenity data for {loc['name']}")
             continue
             
-        for type_name in amenity_types:
-            items = loc['amenities'].get(type_name, [])
+        # Distances from THIS locality center to all its amenities in one call
+        items = [
+            (type_name, item)
+            for type_name in AMENITY_TYPES
+            for item in loc['amenities'].get(type_name, [])
+            if item['place_id']  # Skip if no ID
+        ]
+        if not items:
+            continue
+        distances = haversine_distance(
+            loc_lat, loc_lng,
+            [item['lat'] for _, item in items],
+            [item['lng'] for _, item in items],
+        )
+        
+        for (type_name, item), dist in zip(items, distances):
+            pid = item['place_id']
+            dist = float(dist)
             
-            for item in items:
-                pid = item['place_id']
-                if not pid: continue # Skip if no ID
-                
-                # Calculate distance to THIS locality center
-                dist = haversine_distance(loc_lat, loc_lng, item['lat'], item['lng'])
-                
-                # Register globally
-                if pid not in amenity_registry:
-                    amenity_registry[pid] = {
-                        'closest_locality': loc['name'],
-                        'min_dist': dist,
-                        'name': item['name'],
-                        'type': type_name
-                    }
-                else:
-                    # Duplicate found!
-                    total_duplicates_found += 1
-                    # Is this locality closer?
-                    if dist < amenity_registry[pid]['min_dist']:
-                        amenity_registry[pid]['closest_locality'] = loc['name']
-                        amenity_registry[pid]['min_dist'] = dist
+            # Register globally
+            if pid not in amenity_registry:
+                amenity_registry[pid] = {
+                    'closest_locality': loc['name'],
+                    'min_dist': dist,
+                    'name': item['name'],
+                    'type': type_name
+                }
+            else:
+                # Duplicate found!
+                total_duplicates_found += 1
+                # Is this locality closer?
+                if dist < amenity_registry[pid]['min_dist']:
+                    amenity_registry[pid]['closest_locality'] = loc['name']
+                    amenity_registry[pid]['min_dist'] = dist
     
+    print(f"Loaded {locality_count} localities.")
     print(f"\nFound {len(amenity_registry)} unique amenities.")
     print(f"Identified {total_duplicates_found} overlapping instances to be removed.")
     
     # 3. Second Pass: Filter localities to keep ONLY the closest amenities
-    deduped_localities = []
-    
-    for loc in localities:
+    stream_dump(_deduped(amenity_registry), OUTPUT_FILE)
+        
+    print(f"\nDeduplication complete. Saved to {OUTPUT_FILE}")
+
+
+def _deduped(amenity_registry):
+    """Re-read the input and yield each locality with only its closest amenities"""
+    for loc in iter_records(INPUT_FILE):
         if 'amenities' not in loc:
-            deduped_localities.append(loc)
+            yield loc
             continue
             
         new_counts = {}
         
-        for type_name in amenity_types:
+        for type_name in AMENITY_TYPES:
             original_items = loc['amenities'].get(type_name, [])
             kept_items = []
             
@@ -119,14 +121,8 @@ def deduplicate():
         print(f"   Schools: {len(original_items)} -> {new_counts.get('schools', 0)}")
         print(f"   Hospitals: {len(loc['amenities'].get('hospitals', []))} -> {new_counts.get('hospitals', 0)}")
         
-        deduped_localities.append(loc)
+        yield loc
 
-    # 4. Save
-    output_file = 'data_collection/output/deduped_scores.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(deduped_localities, f, indent=2, ensure_ascii=False)
-        
-    print(f"\nDeduplication complete. Saved to {output_file}")
 
 if __name__ == "__main__":
     deduplicate()
@@ -0,0 +1,221 @@
+"""
+Elevation
+Batched Google Elevation API lookups with a permanent on-disk cache, and
+per-locality elevation profiles for flood-risk scoring.
+
+Instead of one HTTP call per centroid, every point needed by a run is
+collected first and sent MAX_LOCATIONS_PER_REQUEST at a time. Each locality
+is sampled on a GRID_SIZE x GRID_SIZE grid within GRID_RADIUS_M of its centre
+so the flood score reflects the surrounding terrain (min, median, share of
+low-lying ground) rather than a single point. Elevation never changes, so
+every answer is cached in data/elevation_cache.json and a re-run only asks
+for points it has never seen.
+
+Usage:
+    python data_collection/elevation.py   # refresh flood fields in objective_locality_data.json
+"""
+
+import os
+import sys
+import json
+import math
+import time
+
+import numpy as np
+import requests
+from dotenv import load_dotenv
+
+from geo_utils import EARTH_RADIUS_KM
+from atomic_io import write_json
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+load_dotenv()
+
+GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
+ELEVATION_URL = "https://maps.googleapis.com/maps/api/elevation/json"
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+ELEVATION_CACHE_FILE = os.path.join(DATA_DIR, 'elevation_cache.json')
+LOCALITY_DATA_FILE = os.path.join(DATA_DIR, 'objective_locality_data.json')
+
+MAX_LOCATIONS_PER_REQUEST = 512   # Elevation API limit
+COORD_DECIMALS = 5                # ~1 m; also the cache key precision
+GRID_SIZE = 5                     # samples per side (odd, so the centre is sampled)
+GRID_RADIUS_M = 600
+LOW_LYING_M = 5                   # below this, ground floods in heavy monsoon rain
+LOW_LYING_PENALTY = 3             # flood score points lost if every sample is low-lying
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def point_key(lat, lng):
+    return f"{round(lat, COORD_DECIMALS):.{COORD_DECIMALS}f},{round(lng, COORD_DECIMALS):.{COORD_DECIMALS}f}"
+
+
+def load_cache(path=ELEVATION_CACHE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('points', {})
+
+
+def save_cache(cache, path=ELEVATION_CACHE_FILE):
+    write_json(path, {"decimals": COORD_DECIMALS, "points": dict(sorted(cache.items()))}, indent=None, keep=0)
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+
+def request_elevations(keys, api_key=GOOGLE_MAPS_API_KEY):
+    """One Elevation API call for up to MAX_LOCATIONS_PER_REQUEST 'lat,lng' keys"""
+    params = {"locations": "|".join(keys), "key": api_key}
+    response = requests.get(ELEVATION_URL, params=params, timeout=30)
+    data = response.json()
+    if data.get('status') != 'OK':
+        raise RuntimeError(f"Elevation API: {data.get('status')} {data.get('error_message', '')}".strip())
+    return [round(r['elevation'], 1) for r in data['results']]
+
+
+def get_elevations(points, cache=None, api_key=GOOGLE_MAPS_API_KEY):
+    """
+    Elevations (m) for [(lat, lng), ...], in order. Cached points cost
+    nothing; the rest are fetched in batches and added to the cache (saved
+    when no cache was passed in). Points that failed come back as None.
+    """
+    own_cache = cache is None
+    if own_cache:
+        cache = load_cache()
+
+    keys = [point_key(lat, lng) for lat, lng in points]
+    missing = list(dict.fromkeys(k for k in keys if k not in cache))
+    calls = 0
+    for start in range(0, len(missing), MAX_LOCATIONS_PER_REQUEST):
+        batch = missing[start:start + MAX_LOCATIONS_PER_REQUEST]
+        try:
+            cache.update(zip(batch, request_elevations(batch, api_key)))
+            calls += 1
+        except Exception as e:
+            print(f"  Error getting elevations ({len(batch)} points): {e}")
+        time.sleep(0.2)
+
+    if missing:
+        print(f"  ⛰️ Elevation: {len(set(keys)) - len(missing)} cached, {len(missing)} fetched in {calls} call(s)")
+        if own_cache:
+            save_cache(cache)
+    return [cache.get(k) for k in keys]
+
+
+# ---------------------------------------------------------------------------
+# Profiles
+# ---------------------------------------------------------------------------
+
+def sample_grid(lat, lng, radius_m=GRID_RADIUS_M, size=GRID_SIZE):
+    """size x size (lat, lng) samples spanning +-radius_m around the centre"""
+    offsets = np.linspace(-radius_m, radius_m, size) / 1000
+    dlat = np.degrees(offsets / EARTH_RADIUS_KM)
+    dlng = np.degrees(offsets / (EARTH_RADIUS_KM * math.cos(math.radians(lat))))
+    return [(lat + a, lng + b) for a in dlat for b in dlng]
+
+
+def elevation_profile(centre, samples):
+    """Flood-relevant summary of one locality's sampled elevations"""
+    valid = np.array([e for e in samples if e is not None], dtype=float)
+    if not valid.size:
+        return {"elevation_meters": centre, "elevation_min": None,
+                "elevation_median": None, "low_lying_fraction": None}
+    return {
+        "elevation_meters": centre,
+        "elevation_min": round(float(valid.min()), 1),
+        "elevation_median": round(float(np.median(valid)), 1),
+        "low_lying_fraction": round(float((valid < LOW_LYING_M).mean()), 2),
+    }
+
+
+def get_elevation_profiles(locations, cache=None, api_key=GOOGLE_MAPS_API_KEY):
+    """
+    {name: profile} for [{'name', 'lat', 'lng'}, ...]. All grids go out
+    together, so 20 localities x 25 samples is a single API call.
+    """
+    grids = [sample_grid(loc['lat'], loc['lng']) for loc in locations]
+    flat = [p for grid in grids for p in grid]
+    elevations = get_elevations(flat, cache=cache, api_key=api_key)
+
+    profiles, i = {}, 0
+    centre = (GRID_SIZE * GRID_SIZE) // 2
+    for loc, grid in zip(locations, grids):
+        samples = elevations[i:i + len(grid)]
+        i += len(grid)
+        profiles[loc['name']] = elevation_profile(samples[centre], samples)
+    return profiles
+
+
+def flood_safety_score(profile):
+    """
+    1-10, higher = safer. Median sampled elevation (0 m = 1, 50 m+ = 10),
+    less up to LOW_LYING_PENALTY for the share of low-lying samples. Falls
+    back to the centre point, then to 5 when there is no elevation.
+    """
+    elevation = profile.get('elevation_median')
+    if elevation is None:
+        elevation = profile.get('elevation_meters')
+    if elevation is None:
+        return 5
+    score = min(10, max(1, elevation / 5))
+    score -= LOW_LYING_PENALTY * (profile.get('low_lying_fraction') or 0)
+    return round(max(1, score), 1)
+
+
+def main():
+    print("\n" + "="*70)
+    print("⛰️ ELEVATION PROFILES (batched, cached)")
+    print("="*70)
+
+    if not os.path.exists(LOCALITY_DATA_FILE):
+        print("❌ Error: objective_locality_data.json not found")
+        return
+
+    with open(LOCALITY_DATA_FILE, 'r', encoding='utf-8') as f:
+        localities = json.load(f)
+
+    locations = [{'name': loc['name'], 'lat': loc['latitude'], 'lng': loc['longitude']} for loc in localities]
+    cache = load_cache()
+    missing = {point_key(*p) for loc in locations for p in sample_grid(loc['lat'], loc['lng'])} - cache.keys()
+    if missing and not GOOGLE_MAPS_API_KEY:
+        print(f"❌ ERROR: GOOGLE_MAPS_API_KEY not found in .env ({len(missing)} uncached points)")
+        return
+
+    profiles = get_elevation_profiles(locations, cache=cache)
+    save_cache(cache)
+
+    updated, failed = 0, []
+    for loc in localities:
+        profile = profiles[loc['name']]
+        # A failed batch leaves no samples: keep what the locality already had
+        if profile['elevation_median'] is None and profile['elevation_meters'] is None:
+            failed.append(loc['name'])
+            print(f"   {loc['name']:<18} ⚠️ no elevation fetched, keeping "
+                  f"{loc.get('elevation_meters')!s} m / flood safety {loc.get('flood_safety_score')}")
+            continue
+        loc.update(profile)
+        loc['flood_safety_score'] = flood_safety_score(profile)
+        updated += 1
+        print(f"   {loc['name']:<18} centre {profile['elevation_meters']!s:>6} m | "
+              f"min {profile['elevation_min']!s:>6} | median {profile['elevation_median']!s:>6} | "
+              f"low-lying {profile['low_lying_fraction']!s:>5} -> flood safety {loc['flood_safety_score']}")
+
+    if updated:
+        write_json(LOCALITY_DATA_FILE, localities)
+    print(f"\n✅ Updated {updated} localities in {os.path.abspath(LOCALITY_DATA_FILE)}")
+    if failed:
+        print(f"⚠️ {len(failed)} without elevation (left unchanged): {', '.join(failed)}")
+    print(f"   Elevation cache: {len(cache)} points")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Fair Value Model - Persisted Artifact & Batch Inference
+Stores the StandardScaler + Lasso pipeline trained by train_fair_value_model.py
+and scores any number of localities or grid cells with plain NumPy.
+No pandas or scikit-learn needed at inference time.
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+from atomic_io import write_json
+
+# Paths
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+MODEL_FILE = os.path.join(DATA_DIR, 'fair_value_model.json')
+
+# Bump when the artifact layout or the pillar definitions change
+MODEL_FORMAT_VERSION = 1
+
+# FEATURE SPEC: raw locality fields compressed into 4 Pillars
+# Pillar 1: Connectivity (Low time = High value), inverted as (60 - time)
+CONNECTIVITY_FEATURES = [
+    'city_centre_time', 'technopark_time', 'airport_time',
+    'medical_college_time', 'secretariat_time', 'ksrtc_stand_time'
+]
+MISSING_TIME = 60  # Assume 60 mins if missing
+
+# Pillars 2-4: summed counts (missing = 0)
+INFRA_FEATURES = ['school_count', 'hospital_count', 'police_count', 'fire_station_count']
+LIFESTYLE_FEATURES = ['park_count', 'restaurant_count', 'cafe_count', 'gym_count']
+UTILITY_FEATURES = ['bank_count', 'atm_count', 'supermarket_count', 'pharmacy_count']
+
+PILLARS = ['Pillar_Connectivity', 'Pillar_Infrastructure', 'Pillar_Lifestyle', 'Pillar_Utility']
+
+
+def _value(record, field, default):
+    value = record.get(field)
+    return default if value is None else value
+
+
+def compute_pillars(record):
+    """Compute the 4 pillar values for one locality / grid cell dict"""
+    connectivity = sum(
+        MISSING_TIME - _value(record, f, MISSING_TIME) for f in CONNECTIVITY_FEATURES
+    ) / len(CONNECTIVITY_FEATURES)
+    return [
+        connectivity,
+        sum(_value(record, f, 0) for f in INFRA_FEATURES),
+        sum(_value(record, f, 0) for f in LIFESTYLE_FEATURES),
+        sum(_value(record, f, 0) for f in UTILITY_FEATURES),
+    ]
+
+
+def pillar_matrix(records):
+    """Stack pillar vectors for many records into an (n, 4) array"""
+    return np.array([compute_pillars(r) for r in records], dtype=float).reshape(-1, len(PILLARS))
+
+
+class FairValueModel:
+    """
+    Standardize -> linear model, with the scaler folded into the weights so
+    prediction is a single matrix-vector product.
+    """
+
+    def __init__(self, mean, scale, coef, intercept, features=PILLARS, metadata=None):
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.coef = np.asarray(coef, dtype=float)
+        self.intercept = float(intercept)
+        self.metadata = dict(metadata or {})
+        self.model_id = None  # Set when loaded from / saved to an artifact
+
+        # (x - mean) / scale @ coef + b  ==  x @ w + b'
+        self._weights = self.coef / self.scale
+        self._bias = self.intercept - float(np.dot(self.mean, self._weights))
+
+    @classmethod
+    def from_sklearn(cls, scaler, model, metadata=None):
+        """Build from a fitted StandardScaler and Lasso/LassoCV"""
+        return cls(scaler.mean_, scaler.scale_, model.coef_, model.intercept_, metadata=metadata)
+
+    def predict(self, X):
+        """Predict land price (lakhs/cent) for an (n, 4) pillar array"""
+        X = np.asarray(X, dtype=float)
+        return X @ self._weights + self._bias
+
+    def predict_records(self, records):
+        """Predict land price for raw locality / grid cell dicts"""
+        return self.predict(pillar_matrix(records))
+
+    def to_dict(self):
+        payload = {
+            "format_version": MODEL_FORMAT_VERSION,
+            "features": self.features,
+            "feature_spec": {
+                "Pillar_Connectivity": {"fields": CONNECTIVITY_FEATURES, "transform": f"mean({MISSING_TIME} - time)", "missing": MISSING_TIME},
+                "Pillar_Infrastructure": {"fields": INFRA_FEATURES, "transform": "sum", "missing": 0},
+                "Pillar_Lifestyle": {"fields": LIFESTYLE_FEATURES, "transform": "sum", "missing": 0},
+                "Pillar_Utility": {"fields": UTILITY_FEATURES, "transform": "sum", "missing": 0},
+            },
+            "scaler": {"mean": self.mean.tolist(), "scale": self.scale.tolist()},
+            "model": {"coef": self.coef.tolist(), "intercept": self.intercept},
+            "metadata": self.metadata,
+        }
+        # Content hash identifies the exact weights a ranking was produced with
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+        payload["model_id"] = digest[:12]
+        return payload
+
+    @classmethod
+    def from_dict(cls, payload):
+        version = payload.get("format_version")
+        if version != MODEL_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported fair value model format {version} (expected {MODEL_FORMAT_VERSION}). "
+                "Re-run train_fair_value_model.py"
+            )
+        if payload.get("features") != PILLARS:
+            raise ValueError(f"Model features {payload.get('features')} do not match {PILLARS}")
+        model = cls(
+            payload["scaler"]["mean"],
+            payload["scaler"]["scale"],
+            payload["model"]["coef"],
+            payload["model"]["intercept"],
+            features=payload["features"],
+            metadata=payload.get("metadata"),
+        )
+        model.model_id = payload.get("model_id")
+        return model
+
+
+def save_model(model, path=MODEL_FILE):
+    """Write the model artifact as JSON and return its model_id"""
+    payload = model.to_dict()
+    payload["saved_at"] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    model.model_id = payload["model_id"]
+    write_json(path, payload, ensure_ascii=True)
+    return payload["model_id"]
+
+
+def load_model(path=MODEL_FILE):
+    """Load a previously trained model artifact"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return FairValueModel.from_dict(json.load(f))
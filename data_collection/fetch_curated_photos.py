@@ -6,10 +6,12 @@ to get better quality representative photos for each locality.
 
 import os
 import sys
-import json
 import requests
 from dotenv import load_dotenv
 
+from atomic_io import write_json
+from photo_pipeline import places_photo_url
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -148,8 +150,8 @@ def search_place_photos(query):
 
 
 def get_photo_url(photo_reference, max_width=1200):
-    """Generate photo URL from photo reference"""
-    return f"https://maps.googleapis.com/maps/api/place/photo?maxwidth={max_width}&photoreference={photo_reference}&key={GOOGLE_MAPS_API_KEY}"
+    """Photo URL without the API key; photo_pipeline.py downloads it"""
+    return places_photo_url(photo_reference, max_width)
 
 
 def main():
@@ -194,8 +196,7 @@ def main():
     output_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
     output_file = os.path.join(output_dir, 'locality_photos.json')
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(locality_photos, f, indent=2, ensure_ascii=False)
+    write_json(output_file, locality_photos)
     
     print("\n" + "="*70)
     print(f"✅ SAVED: {output_file}")
@@ -11,12 +11,14 @@ Calculates a 'Foodie Score' based on:
 
 import os
 import sys
-import json
 import time
 import math
 import requests
 from dotenv import load_dotenv
 
+from atomic_io import write_json
+from photo_pipeline import places_photo_url
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -76,9 +78,7 @@ def get_place_details(place_id):
         return {}
 
 def get_photo_url(photo_reference):
-    if not photo_reference:
-        return None
-    return f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=800&photoreference={photo_reference}&key={GOOGLE_MAPS_API_KEY}"
+    return places_photo_url(photo_reference, 800)
 
 def analyze_vibe_and_amenities(details):
     """Analyze reviews and boolean fields for Vibe and Convenience"""
@@ -231,8 +231,7 @@ def main():
         
         # Save
         filepath = os.path.join(os.path.dirname(__file__), '..', 'data', config['filename'])
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=2, ensure_ascii=False)
+        write_json(filepath, final_data)
         print(f"   ✅ Saved {len(final_data)} top {cat_key} to {config['filename']}")
 
     print("\n" + "="*60)
@@ -5,10 +5,12 @@ Uses Google Places API to get real photos for all 20 localities.
 
 import os
 import sys
-import json
 import requests
 from dotenv import load_dotenv
 
+from atomic_io import write_json
+from photo_pipeline import places_photo_url
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -78,8 +80,8 @@ def get_place_photos(place_id):
 
 
 def get_photo_url(photo_reference, max_width=800):
-    """Generate photo URL from photo reference"""
-    return f"https://maps.googleapis.com/maps/api/place/photo?maxwidth={max_width}&photoreference={photo_reference}&key={GOOGLE_MAPS_API_KEY}"
+    """Photo URL without the API key; photo_pipeline.py downloads it"""
+    return places_photo_url(photo_reference, max_width)
 
 
 def main():
@@ -151,8 +153,7 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     output_file = os.path.join(output_dir, 'locality_photos.json')
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(locality_photos, f, indent=2, ensure_ascii=False)
+    write_json(output_file, locality_photos)
     
     print("\n" + "="*60)
     print(f"✅ SAVED TO: {output_file}")
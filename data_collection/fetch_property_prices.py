@@ -1,6 +1,9 @@
 """
-Fetch Property Prices using Serper (Web Search) + Gemini (AI Extraction)
+Fetch Property Prices using Serper (Web Search) + Regex / Gemini Extraction
 Gets land price per cent and apartment price per sq ft for each locality.
+Snippets go through the rule-based extractor (price_extractor.py) first;
+Gemini is prompted only for the fields it cannot settle, with only those
+fields' snippets.
 """
 
 import os
@@ -9,7 +12,10 @@ import json
 import time
 import requests
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from atomic_io import write_json
+from price_index import load_index, save_index, record_extraction, PRICE_INDEX_FILE
+from price_extractor import extract_prices
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -20,9 +26,8 @@ load_dotenv()
 SERPER_API_KEY = os.getenv('SERPER_API_KEY')
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-# Configure Gemini
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.0-flash')
+# Gemini model, configured on first use by get_model()
+_model = None
 
 LOCALITIES = [
     "Sreekaryam", "Statue", "Kazhakuttom", "Enchakkal", "Pattom",
@@ -71,24 +76,51 @@ def search_property_prices(locality: str) -> dict:
     return results
 
 
-def extract_prices_with_gemini(locality: str, search_results: dict) -> dict:
-    """Use Gemini to extract structured price data from search results"""
-    
+def get_model():
+    """Import and configure Gemini lazily so importing this module stays cheap"""
+    global _model
+    if _model is None:
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        _model = genai.GenerativeModel('gemini-2.0-flash')
+    return _model
+
+
+# Per price field: the snippets it is extracted from and the keys Gemini fills
+GEMINI_FIELDS = {
+    "land_price_per_cent_lakhs": {
+        "snippets": "land_snippets", "heading": "LAND PRICE SEARCH RESULTS",
+        "range": "land_price_range", "confidence": "land_price_confidence",
+        "schema": ('"land_price_per_cent_lakhs": <number or null if not found>,\n'
+                   '    "land_price_range": "<low-high in lakhs or null>",'),
+    },
+    "apartment_price_per_sqft": {
+        "snippets": "apartment_snippets", "heading": "APARTMENT PRICE SEARCH RESULTS",
+        "range": "apartment_price_range", "confidence": "apartment_price_confidence",
+        "schema": ('"apartment_price_per_sqft": <number or null if not found>,\n'
+                   '    "apartment_price_range": "<low-high in rupees or null>",'),
+    },
+}
+CONFIDENCE_ORDER = ["error", "low", "medium", "high"]
+
+
+def extract_prices_with_gemini(locality: str, search_results: dict, fields=tuple(GEMINI_FIELDS)) -> dict:
+    """Use Gemini to extract structured price data, prompting only for the given fields"""
+    sections = "\n\n".join(
+        f"{GEMINI_FIELDS[f]['heading']}:\n"
+        + chr(10).join(search_results.get(GEMINI_FIELDS[f]['snippets']) or ['No results'])
+        for f in fields
+    )
+    schema = "\n    ".join(GEMINI_FIELDS[f]['schema'] for f in fields)
+
     prompt = f"""
 You are a real estate data extractor. Extract property prices for {locality}, Trivandrum, Kerala from these search results.
 
-LAND PRICE SEARCH RESULTS:
-{chr(10).join(search_results.get('land_snippets', ['No results']))}
-
-APARTMENT PRICE SEARCH RESULTS:
-{chr(10).join(search_results.get('apartment_snippets', ['No results']))}
+{sections}
 
 Extract and return ONLY valid JSON (no markdown, no explanation):
 {{
-    "land_price_per_cent_lakhs": <number or null if not found>,
-    "apartment_price_per_sqft": <number or null if not found>,
-    "land_price_range": "<low-high in lakhs or null>",
-    "apartment_price_range": "<low-high in rupees or null>",
+    {schema}
     "confidence": "<high/medium/low>",
     "source_notes": "<brief note about data quality>"
 }}
@@ -102,7 +134,7 @@ IMPORTANT:
 """
     
     try:
-        response = model.generate_content(prompt)
+        response = get_model().generate_content(prompt)
         text = response.text.strip()
         
         # Clean up response - sometimes Gemini wraps in markdown
@@ -125,21 +157,39 @@ IMPORTANT:
         }
 
 
+def merge_gemini(prices: dict, llm: dict, fields) -> dict:
+    """
+    Fill the fields the rules could not settle from Gemini's answer. Fields
+    the rules resolved keep their own value and confidence; the row's
+    overall confidence is the weakest of its fields.
+    """
+    for field in fields:
+        spec = GEMINI_FIELDS[field]
+        prices[field] = llm.get(field)
+        prices[spec["range"]] = llm.get(spec["range"])
+        prices[spec["confidence"]] = llm.get("confidence")
+    known = [prices.get(spec["confidence"]) for spec in GEMINI_FIELDS.values()]
+    known = [c for c in known if c in CONFIDENCE_ORDER]
+    prices["confidence"] = min(known, key=CONFIDENCE_ORDER.index) if known else llm.get("confidence")
+    prices["source_notes"] = f"{prices['source_notes']}; Gemini: {llm.get('source_notes')}"
+    return prices
+
+
 def main():
     print("\n" + "="*70)
     print("💰 PROPERTY PRICE COLLECTION")
     print("="*70)
-    print("Using Serper (Web Search) + Gemini (AI Extraction)")
+    print("Using Serper (Web Search) + Regex, Gemini (AI Extraction) for ambiguous snippets")
     
     if not SERPER_API_KEY:
         print("❌ ERROR: SERPER_API_KEY not found in .env")
         return
     
     if not GEMINI_API_KEY:
-        print("❌ ERROR: GEMINI_API_KEY not found in .env")
-        return
+        print("⚠️ GEMINI_API_KEY not found in .env: ambiguous prices are left empty")
     
     all_prices = []
+    fields_local = localities_local = 0
     
     for locality in LOCALITIES:
         print(f"\n📍 {locality}...")
@@ -148,9 +198,22 @@ def main():
         print("  🔍 Searching web...")
         search_results = search_property_prices(locality)
         
-        # Step 2: Extract with Gemini
-        print("  🤖 Extracting prices with AI...")
-        prices = extract_prices_with_gemini(locality, search_results)
+        # Step 2: Rule-based extraction; Gemini only for what it could not settle
+        prices = extract_prices(search_results["land_snippets"], search_results["apartment_snippets"])
+        resolved = prices.pop("resolved")
+        fields_local += len(resolved)
+        if len(resolved) == 2:
+            localities_local += 1
+            prices["extraction"] = "regex"
+            print("  ⚡ Extracted locally")
+        elif GEMINI_API_KEY:
+            missing = [f for f in GEMINI_FIELDS if f not in resolved]
+            print(f"  🤖 Extracting prices with AI ({len(missing)} ambiguous field(s))...")
+            llm = extract_prices_with_gemini(locality, search_results, missing)
+            merge_gemini(prices, llm, missing)
+            prices["extraction"] = "regex+gemini" if resolved else "gemini"
+        else:
+            prices["extraction"] = "regex"
         prices["locality"] = locality
         
         print(f"    Land: {prices.get('land_price_per_cent_lakhs')} L/cent ({prices.get('confidence')})")
@@ -161,15 +224,30 @@ def main():
     
     # Save results
     output_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'property_prices.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "last_updated": "2024-12-10",
-            "source": "Serper Web Search + Gemini Extraction",
-            "prices": all_prices
-        }, f, indent=2, ensure_ascii=False)
+    write_json(output_file, {
+        "last_updated": "2024-12-10",
+        "source": "Serper Web Search + Regex / Gemini Extraction",
+        "resolved_locally": {"localities": localities_local, "fields": fields_local,
+                             "total_localities": len(all_prices)},
+        "prices": all_prices
+    })
+    
+    # Fold into the canonical price index (manual overrides are kept)
+    sources = {"regex": "Serper Web Search + Regex Extraction",
+               "gemini": "Serper Web Search + Gemini Extraction",
+               "regex+gemini": "Serper Web Search + Regex / Gemini Extraction"}
+    index = load_index()
+    for prices in all_prices:
+        record_extraction(index, prices, sources[prices["extraction"]])
+    save_index(index)
     
     print("\n" + "="*70)
     print(f"✅ Saved to: {output_file}")
+    print(f"✅ Price index updated: {PRICE_INDEX_FILE}")
+    total = len(all_prices) or 1
+    print(f"⚡ Resolved locally: {localities_local}/{len(all_prices)} localities "
+          f"({localities_local / total:.0%}), {fields_local}/{2 * len(all_prices)} fields "
+          f"({fields_local / (2 * total):.0%})")
     print("="*70)
     
     # Summary
@@ -178,7 +256,7 @@ def main():
         land = p.get('land_price_per_cent_lakhs')
         apt = p.get('apartment_price_per_sqft')
         conf = p.get('confidence', '?')
-        print(f"  {p['locality']:<20} | Land: {str(land) + ' L':>8} | Apt: ₹{str(apt):>6}/sqft | {conf}")
+        print(f"  {p['locality']:<20} | Land: {str(land) + ' L':>8} | Apt: ₹{str(apt):>6}/sqft | {conf} ({p['extraction']})")
 
 
 if __name__ == '__main__':
@@ -6,7 +6,11 @@ Uses only API-sourced metrics - no AI-generated scores.
 
 import os
 import sys
-import json
+import argparse
+
+from json_stream import iter_records, stream_dump, NDJSONWriter, read_ndjson_at
+from price_index import load_prices
+from normalization import QuantileSketch, MetricNormalizer
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -28,6 +32,58 @@ class CleanScoringEngine:
         "prestige": 0.10,          # Price-based (higher = more prestigious)
     }
     
+    # Count metrics: summed fields and the count that scores 10 in "caps" mode.
+    # In "percentile" mode the cap is replaced by the metric's percentile
+    # among all localities. With use_access, a metric's <type>_count fields
+    # are swapped for the gravity-model <type>_access features
+    # (accessibility.py) when all are present; those are only meaningful
+    # scored by percentile.
+    COUNT_METRICS = {
+        "hospitals": (("hospital_count",), 20),
+        "schools": (("school_count",), 20),
+        "shopping": (("supermarket_count", "pharmacy_count"), 40),
+        "banking": (("bank_count", "atm_count"), 40),
+        "lifestyle": (("restaurant_count", "cafe_count", "gym_count"), 60),
+        "police": (("police_count",), 20),
+        "fire_stations": (("fire_station_count",), 5),
+        "parks": (("park_count",), 20),
+        "commercial": (("bank_count", "supermarket_count"), 40),
+        "developers": (("real_estate_agency_count",), 20),
+    }
+    
+    def __init__(self, normalizer=None, use_access=False):
+        # MetricNormalizer with sketches for COUNT_METRICS, or None for caps
+        self.normalizer = normalizer
+        self.use_access = use_access
+    
+    @staticmethod
+    def access_field(field):
+        return field[:-len("_count")] + "_access"
+    
+    @classmethod
+    def metric_value(cls, metric, data, use_access=False):
+        fields, _ = cls.COUNT_METRICS[metric]
+        if use_access:
+            # Types with no places in the store have no access feature
+            access = [cls.access_field(field) for field in fields]
+            if all(field in data for field in access):
+                fields = access
+        return sum(data.get(field) or 0 for field in fields)
+    
+    @classmethod
+    def metric_extractors(cls, use_access=False):
+        """{metric: fn(data)} for building a MetricNormalizer"""
+        return {metric: (lambda data, m=metric: cls.metric_value(m, data, use_access))
+                for metric in cls.COUNT_METRICS}
+    
+    def metric_score(self, metric, data):
+        """Unrounded 0-10 score for a count metric"""
+        count = self.metric_value(metric, data, self.use_access)
+        if self.normalizer is not None and metric in self.normalizer:
+            return self.normalizer.score(metric, count)
+        _, max_expected = self.COUNT_METRICS[metric]
+        return min(10, (count / max_expected) * 10)
+    
     @staticmethod
     def score_travel_time(minutes, max_time=60):
         """Lower time = higher score. 5 min = 10, 60 min = 0"""
@@ -47,6 +103,11 @@ class CleanScoringEngine:
     def score_with_rating(count, rating, max_expected=20):
         """Combine count and rating (60/40 weight)"""
         count_score = min(10, (count / max_expected) * 10) if count else 0
+        return CleanScoringEngine.rated_score(count_score, rating)
+    
+    @staticmethod
+    def rated_score(count_score, rating):
+        """Combine a 0-10 count score and a 1-5 rating (60/40 weight)"""
         rating_score = ((rating or 3) - 1) * 2.5  # 1-5 -> 0-10
         return round((count_score * 0.6) + (rating_score * 0.4), 1)
     
@@ -68,44 +129,30 @@ class CleanScoringEngine:
     def calculate_amenities(self, data):
         """Schools, hospitals, shops nearby (25%)"""
         components = {
-            "healthcare": self.score_with_rating(
-                data.get("hospital_count", 0),
-                data.get("hospital_avg_rating"),
-                max_expected=20
+            "healthcare": self.rated_score(
+                self.metric_score("hospitals", data),
+                data.get("hospital_avg_rating")
             ) * 0.25,
-            "education": self.score_with_rating(
-                data.get("school_count", 0),
-                data.get("school_avg_rating"),
-                max_expected=20
-            ) * 0.20,
-            "shopping": self.score_count(
-                (data.get("supermarket_count", 0) + data.get("pharmacy_count", 0)),
-                max_expected=40
-            ) * 0.20,
-            "banking": self.score_count(
-                (data.get("bank_count", 0) + data.get("atm_count", 0)),
-                max_expected=40
-            ) * 0.15,
-            "lifestyle": self.score_count(
-                (data.get("restaurant_count", 0) + data.get("cafe_count", 0) + data.get("gym_count", 0)),
-                max_expected=60
+            "education": self.rated_score(
+                self.metric_score("schools", data),
+                data.get("school_avg_rating")
             ) * 0.20,
+            "shopping": round(self.metric_score("shopping", data), 1) * 0.20,
+            "banking": round(self.metric_score("banking", data), 1) * 0.15,
+            "lifestyle": round(self.metric_score("lifestyle", data), 1) * 0.20,
         }
         return round(sum(components.values()), 1)
     
     def calculate_safety(self, data):
         """Police and fire station proximity (15%)"""
-        police = data.get("police_count", 0)
-        fire = data.get("fire_station_count", 0)
-        
-        police_score = min(10, police * 0.5)  # 20 stations = 10
-        fire_score = min(10, fire * 2)        # 5 stations = 10
+        police_score = self.metric_score("police", data)       # 20 stations = 10
+        fire_score = self.metric_score("fire_stations", data)  # 5 stations = 10
         
         return round((police_score * 0.7) + (fire_score * 0.3), 1)
     
     def calculate_environment(self, data):
         """Parks, noise, flood risk (15%)"""
-        green = self.score_count(data.get("park_count", 0), max_expected=20)
+        green = round(self.metric_score("parks", data), 1)
         noise = data.get("noise_score", 5)  # Already 1-10, higher = quieter
         flood = data.get("flood_safety_score", 5)  # Already 1-10, higher = safer
         
@@ -115,30 +162,24 @@ class CleanScoringEngine:
         """Job proximity and commercial activity (15%)"""
         job_proximity = data.get("job_proximity_score", 5)
         
-        commercial = self.score_count(
-            (data.get("bank_count", 0) + data.get("supermarket_count", 0)),
-            max_expected=40
-        )
-        
-        developer = self.score_count(
-            data.get("real_estate_agency_count", 0),
-            max_expected=20
-        )
+        commercial = round(self.metric_score("commercial", data), 1)
+        developer = round(self.metric_score("developers", data), 1)
         
         return round((job_proximity * 0.5) + (commercial * 0.3) + (developer * 0.2), 1)
     
     def calculate_prestige(self, land_price, all_prices):
-        """Price-based prestige (10%) - higher price = higher prestige"""
-        if not land_price or not all_prices:
+        """
+        Price-based prestige (10%) - higher price = higher prestige.
+        all_prices is a QuantileSketch (built once per run); a plain list
+        is accepted but sketched on every call.
+        """
+        if not isinstance(all_prices, QuantileSketch):
+            all_prices = QuantileSketch(all_prices or ())
+        if not land_price or not all_prices.count:
             return 5.0
         
-        sorted_prices = sorted(all_prices)
-        # Find percentile rank
-        rank = sum(1 for p in sorted_prices if p <= land_price)
-        percentile = rank / len(sorted_prices)
-        
-        # Convert to 0-10 score
-        return round(percentile * 10, 1)
+        # Share of localities at or below this price, 0-10
+        return round(all_prices.percentile(land_price) * 10, 1)
     
     def calculate_overall(self, data, all_prices):
         """Calculate final score with all categories"""
@@ -166,29 +207,35 @@ class CleanScoringEngine:
 
 
 def load_price_data():
-    """Load price data from existing rankings.json"""
-    rankings_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'rankings.json')
-    
-    if not os.path.exists(rankings_file):
-        return {}
-    
-    with open(rankings_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Extract prices from all_rankings
-    prices = {}
-    for loc in data.get('all_rankings', []):
-        name = loc.get('name')
-        if name:
-            prices[name] = {
-                'land_price': loc.get('land_price') or loc.get('data', {}).get('land_price_per_cent_lakhs'),
-                'apartment_price': loc.get('apartment_price') or loc.get('data', {}).get('apartment_price_per_sqft'),
-            }
-    
-    return prices
+    """Current land / apartment prices per locality from the canonical price index"""
+    return load_prices()
+
+
+def load_fair_value_model():
+    """Load the persisted fair value model, if train_fair_value_model.py has been run"""
+    model_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'fair_value_model.json')
+    
+    if not os.path.exists(model_file):
+        return None
+    
+    # Imported here so rankings without a model never load NumPy
+    from fair_value_model import load_model
+    return load_model(model_file)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate clean locality rankings")
+    parser.add_argument('--normalize', choices=['caps', 'percentile'], default='caps',
+                        help="score count metrics against fixed caps (default) or by percentile "
+                             "among all localities")
+    parser.add_argument('--amenities', choices=['counts', 'access'], default='counts',
+                        help="amenity inputs: radius counts (default) or gravity-model access features "
+                             "from accessibility.py (implies --normalize percentile)")
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     print("\n" + "="*70)
     print("🏘️ GENERATING CLEAN RANKINGS (Objective Data Only)")
     print("="*70)
@@ -200,108 +247,140 @@ def main():
         print("❌ Error: objective_locality_data.json not found")
         return
     
-    with open(obj_data_file, 'r', encoding='utf-8') as f:
-        localities = json.load(f)
+    # Localities are streamed: one pass for the price distribution (prestige
+    # is a percentile), one to score, then ranked entries are spooled to disk
+    # so only (score, offset) pairs are held in memory for sorting
+    price_data = load_price_data()
+    
+    use_access = args.amenities == 'access'
+    if use_access and 'hospital_access' not in next(iter_records(obj_data_file), {}):
+        print("⚠️ No access features in objective data (run the accessibility stage); using counts")
+        use_access = False
     
-    print(f"✓ Loaded {len(localities)} localities from objective data")
+    locality_count = 0
+    all_prices = QuantileSketch()
+    normalizer = MetricNormalizer() if args.normalize == 'percentile' or use_access else None
+    extractors = CleanScoringEngine.metric_extractors(use_access)
+    for loc in iter_records(obj_data_file):
+        locality_count += 1
+        land_price = price_data.get(loc['name'], {}).get('land_price')
+        if land_price:
+            all_prices.update(land_price)
+        if normalizer:
+            normalizer.observe(loc, extractors)
     
-    # Load price data
-    price_data = load_price_data()
+    print(f"✓ Loaded {locality_count} localities from objective data")
     print(f"✓ Loaded prices for {len(price_data)} localities")
+    print(f"✓ Merged {all_prices.count} price data points")
+    print(f"✓ {'Access' if use_access else 'Count'} metrics scored by {'percentile' if normalizer else 'fixed caps'}")
     
-    # Merge prices into objective data
-    all_prices = []
-    for loc in localities:
-        name = loc['name']
-        if name in price_data:
-            loc['land_price'] = price_data[name]['land_price']
-            loc['apartment_price'] = price_data[name]['apartment_price']
-            if loc['land_price']:
-                all_prices.append(loc['land_price'])
-    
-    print(f"✓ Merged {len(all_prices)} price data points")
+    # Fair land price from the persisted model (no retraining)
+    fair_model = load_fair_value_model()
+    if fair_model:
+        print(f"✓ Scored fair land prices with model {fair_model.model_id}")
     
     # Calculate scores
-    engine = CleanScoringEngine()
-    ranked = []
-    
-    for loc in localities:
-        result = engine.calculate_overall(loc, all_prices)
-        ranked.append({
-            "name": loc["name"],
-            "overall_score": result["overall"],
-            "breakdown": result["breakdown"],
-            "land_price": loc.get("land_price"),
-            "apartment_price": loc.get("apartment_price"),
-            "data": {
-                # Only objective fields
-                "latitude": loc.get("latitude"),
-                "longitude": loc.get("longitude"),
-                "city_centre_time": loc.get("city_centre_time"),
-                "technopark_time": loc.get("technopark_time"),
-                "airport_time": loc.get("airport_time"),
-                "medical_college_time": loc.get("medical_college_time"),
-                "secretariat_time": loc.get("secretariat_time"),
-                "school_count": loc.get("school_count"),
-                "school_avg_rating": loc.get("school_avg_rating"),
-                "hospital_count": loc.get("hospital_count"),
-                "hospital_avg_rating": loc.get("hospital_avg_rating"),
-                "police_count": loc.get("police_count"),
-                "fire_station_count": loc.get("fire_station_count"),
-                "park_count": loc.get("park_count"),
-                "bank_count": loc.get("bank_count"),
-                "supermarket_count": loc.get("supermarket_count"),
-                "pharmacy_count": loc.get("pharmacy_count"),
-                "restaurant_count": loc.get("restaurant_count"),
-                "cafe_count": loc.get("cafe_count"),
-                "gym_count": loc.get("gym_count"),
-                "real_estate_agency_count": loc.get("real_estate_agency_count"),
-                "bus_station_count": loc.get("bus_station_count"),
-                "noise_score": loc.get("noise_score"),
-                "flood_safety_score": loc.get("flood_safety_score"),
-                "elevation_meters": loc.get("elevation_meters"),
-                "job_proximity_score": loc.get("job_proximity_score"),
-            }
-        })
-    
-    # Sort by score
-    ranked.sort(key=lambda x: x["overall_score"], reverse=True)
-    
-    # Add ranks
-    for i, item in enumerate(ranked):
-        item["rank"] = i + 1
-    
-    # Display results
-    print("\n🏆 CLEAN RANKINGS (6 Categories)")
-    print("-" * 70)
-    
-    for item in ranked[:10]:
-        print(f"\n#{item['rank']:2d} | {item['name']:<18} | Score: {item['overall_score']:.2f}/10")
-        b = item['breakdown']
-        print(f"    Access: {b['accessibility']:.1f} | Amenities: {b['amenities']:.1f} | "
-              f"Safety: {b['safety']:.1f} | Env: {b['environment']:.1f} | "
-              f"Economy: {b['economy']:.1f} | Prestige: {b['prestige']:.1f}")
-        print(f"    💰 Land: ₹{item.get('land_price', 'N/A')}L/cent | "
-              f"Apt: ₹{item.get('apartment_price', 'N/A')}/sqft")
-    
-    # Save clean rankings
-    output = {
-        "methodology": "100% Objective API-Sourced Data + Price-Based Prestige",
-        "category_weights": CleanScoringEngine.CATEGORY_WEIGHTS,
-        "data_sources": {
-            "travel_times": "Google Distance Matrix API",
-            "amenities": "Google Places API (counts + ratings)",
-            "noise": "Calculated from distance to airport/bus station",
-            "flood_risk": "Google Elevation API",
-            "prices": "Serper + Gemini extraction from real estate listings"
-        },
-        "top_10": ranked[:10],
-        "all_rankings": ranked
-    }
-    
+    engine = CleanScoringEngine(normalizer, use_access)
     output_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'clean_rankings.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    spool_file = output_file + '.spool.ndjson'
+    order = []
+    
+    with NDJSONWriter(spool_file) as spool:
+        for seq, loc in enumerate(iter_records(obj_data_file)):
+            name = loc['name']
+            if name in price_data:
+                loc['land_price'] = price_data[name]['land_price']
+                loc['apartment_price'] = price_data[name]['apartment_price']
+            fair_price = round(float(fair_model.predict_records([loc])[0]), 2) if fair_model else None
+            
+            result = engine.calculate_overall(loc, all_prices)
+            offset = spool.write({
+                "name": loc["name"],
+                "overall_score": result["overall"],
+                "breakdown": result["breakdown"],
+                "land_price": loc.get("land_price"),
+                "apartment_price": loc.get("apartment_price"),
+                "fair_land_price": fair_price,
+                "data": {
+                    # Only objective fields
+                    "latitude": loc.get("latitude"),
+                    "longitude": loc.get("longitude"),
+                    "city_centre_time": loc.get("city_centre_time"),
+                    "technopark_time": loc.get("technopark_time"),
+                    "airport_time": loc.get("airport_time"),
+                    "medical_college_time": loc.get("medical_college_time"),
+                    "secretariat_time": loc.get("secretariat_time"),
+                    "school_count": loc.get("school_count"),
+                    "school_avg_rating": loc.get("school_avg_rating"),
+                    "hospital_count": loc.get("hospital_count"),
+                    "hospital_avg_rating": loc.get("hospital_avg_rating"),
+                    "police_count": loc.get("police_count"),
+                    "fire_station_count": loc.get("fire_station_count"),
+                    "park_count": loc.get("park_count"),
+                    "bank_count": loc.get("bank_count"),
+                    "supermarket_count": loc.get("supermarket_count"),
+                    "pharmacy_count": loc.get("pharmacy_count"),
+                    "restaurant_count": loc.get("restaurant_count"),
+                    "cafe_count": loc.get("cafe_count"),
+                    "gym_count": loc.get("gym_count"),
+                    "real_estate_agency_count": loc.get("real_estate_agency_count"),
+                    "bus_station_count": loc.get("bus_station_count"),
+                    "noise_score": loc.get("noise_score"),
+                    "flood_safety_score": loc.get("flood_safety_score"),
+                    "elevation_meters": loc.get("elevation_meters"),
+                    "elevation_median": loc.get("elevation_median"),
+                    "low_lying_fraction": loc.get("low_lying_fraction"),
+                    "job_proximity_score": loc.get("job_proximity_score"),
+                }
+            })
+            order.append((-result["overall"], seq, offset))
+    
+    # Sort by score (ties keep input order)
+    order.sort()
+    
+    with open(spool_file, 'rb') as spool:
+        def ranked(limit=None):
+            """Ranked entries in order, with ranks added"""
+            for i, (_, _, offset) in enumerate(order[:limit]):
+                item = read_ndjson_at(spool, offset)
+                item["rank"] = i + 1
+                yield item
+        
+        top_10 = list(ranked(10))
+        
+        # Display results
+        print("\n🏆 CLEAN RANKINGS (6 Categories)")
+        print("-" * 70)
+        
+        for item in top_10:
+            print(f"\n#{item['rank']:2d} | {item['name']:<18} | Score: {item['overall_score']:.2f}/10")
+            b = item['breakdown']
+            print(f"    Access: {b['accessibility']:.1f} | Amenities: {b['amenities']:.1f} | "
+                  f"Safety: {b['safety']:.1f} | Env: {b['environment']:.1f} | "
+                  f"Economy: {b['economy']:.1f} | Prestige: {b['prestige']:.1f}")
+            print(f"    💰 Land: ₹{item.get('land_price', 'N/A')}L/cent | "
+                  f"Apt: ₹{item.get('apartment_price', 'N/A')}/sqft")
+        
+        # Save clean rankings
+        output = {
+            "methodology": "100% Objective API-Sourced Data + Price-Based Prestige",
+            "category_weights": CleanScoringEngine.CATEGORY_WEIGHTS,
+            "count_normalization": "percentile" if normalizer else "caps",
+            "amenity_inputs": "access" if use_access else "counts",
+            "data_sources": {
+                "travel_times": "Google Distance Matrix API",
+                "amenities": "Google Places API (counts + ratings)",
+                "noise": "Calculated from distance to airport/bus station",
+                "flood_risk": "Google Elevation API",
+                "prices": "Serper + Gemini extraction from real estate listings"
+            },
+            "top_10": top_10,
+            "all_rankings": ranked()
+        }
+        
+        stream_dump(output, output_file)
+    
+    os.remove(spool_file)
     
     print(f"\n✅ Clean rankings saved to: {output_file}")
     print("="*70)
@@ -0,0 +1,352 @@
+"""
+Geo Utilities
+Vectorized distance helpers shared by every pipeline stage.
+
+All functions accept scalars or NumPy-broadcastable arrays of decimal degrees
+and return kilometres, so one call can replace a Python loop over places.
+"""
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Keep intermediate (chunk x m) distance blocks around 32 MB
+_CHUNK_ELEMENTS = 4_000_000
+
+
+def _result(value):
+    """Return a plain float for scalar inputs, the array otherwise"""
+    return float(value) if np.ndim(value) == 0 else value
+
+
+def haversine_distance(lat1, lng1, lat2, lng2):
+    """
+    Great-circle distance in km. Inputs broadcast, so this covers
+    point-to-point, one-to-many and element-wise pairs.
+    """
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return _result(EARTH_RADIUS_KM * c)
+
+
+def haversine_matrix(lats_a, lngs_a, lats_b, lngs_b):
+    """Pairwise great-circle distances, shape (len(a), len(b))"""
+    lats_a = np.asarray(lats_a, dtype=float).reshape(-1, 1)
+    lngs_a = np.asarray(lngs_a, dtype=float).reshape(-1, 1)
+    lats_b = np.asarray(lats_b, dtype=float).reshape(1, -1)
+    lngs_b = np.asarray(lngs_b, dtype=float).reshape(1, -1)
+    return haversine_distance(lats_a, lngs_a, lats_b, lngs_b)
+
+
+def equirectangular_distance(lat1, lng1, lat2, lng2):
+    """
+    Fast flat-earth approximation. Error is well under 0.1% at city scale
+    (tens of km), and it skips every trig call except one cosine.
+    """
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2))
+    x = (lng2 - lng1) * np.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    return _result(EARTH_RADIUS_KM * np.hypot(x, y))
+
+
+def equirectangular_matrix(lats_a, lngs_a, lats_b, lngs_b):
+    """Pairwise equirectangular distances, shape (len(a), len(b))"""
+    lats_a = np.asarray(lats_a, dtype=float).reshape(-1, 1)
+    lngs_a = np.asarray(lngs_a, dtype=float).reshape(-1, 1)
+    lats_b = np.asarray(lats_b, dtype=float).reshape(1, -1)
+    lngs_b = np.asarray(lngs_b, dtype=float).reshape(1, -1)
+    return equirectangular_distance(lats_a, lngs_a, lats_b, lngs_b)
+
+
+def project_local(lats, lngs, ref_lat=None):
+    """
+    Project degrees to a local planar (x, y) grid in km around ref_lat.
+    Distances in this plane match equirectangular_distance, so it can be fed
+    to any Euclidean index (grids, KD-trees, convolutions).
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    if ref_lat is None:
+        ref_lat = float(np.mean(lats)) if lats.size else 0.0
+    k = np.radians(1.0) * EARTH_RADIUS_KM
+    return lngs * k * np.cos(np.radians(ref_lat)), lats * k
+
+
+def nearest_neighbors(lats, lngs, ref_lats, ref_lngs, k=1, exact=True):
+    """
+    For every query point, find the k nearest reference points.
+
+    Work is done in chunks of query points so memory stays bounded
+    (100k places x 1k localities never materializes a 100M matrix).
+    Candidates are ranked in the local planar projection; with exact=True the
+    returned distances are great-circle km.
+
+    Returns (indices, distances), each shaped (n,) for k == 1 or (n, k).
+    """
+    lats = np.asarray(lats, dtype=float).ravel()
+    lngs = np.asarray(lngs, dtype=float).ravel()
+    ref_lats = np.asarray(ref_lats, dtype=float).ravel()
+    ref_lngs = np.asarray(ref_lngs, dtype=float).ravel()
+    n, m = len(lats), len(ref_lats)
+    if m == 0:
+        raise ValueError("nearest_neighbors needs at least one reference point")
+    k = min(k, m)
+
+    ref_lat0 = float(np.mean(ref_lats))
+    rx, ry = project_local(ref_lats, ref_lngs, ref_lat0)
+    qx, qy = project_local(lats, lngs, ref_lat0)
+
+    indices = np.empty((n, k), dtype=np.int64)
+    distances = np.empty((n, k), dtype=float)
+    chunk = max(1, _CHUNK_ELEMENTS // m)
+
+    for start in range(0, n, chunk):
+        stop = min(n, start + chunk)
+        d2 = (qx[start:stop, None] - rx[None, :]) ** 2 + (qy[start:stop, None] - ry[None, :]) ** 2
+        if k < m:
+            part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        else:
+            part = np.broadcast_to(np.arange(m), (stop - start, m))
+        order = np.take_along_axis(d2, part, axis=1).argsort(axis=1)
+        idx = np.take_along_axis(part, order, axis=1)
+        indices[start:stop] = idx
+        if exact:
+            distances[start:stop] = haversine_distance(
+                lats[start:stop, None], lngs[start:stop, None], ref_lats[idx], ref_lngs[idx]
+            )
+        else:
+            distances[start:stop] = np.sqrt(np.take_along_axis(d2, idx, axis=1))
+
+    if k == 1:
+        return indices[:, 0], distances[:, 0]
+    return indices, distances
+
+
+class GridIndex:
+    """
+    Uniform-grid spatial index for repeated nearest-point queries against a
+    large, fixed reference set (e.g. every node of the road graph).
+
+    Points are bucketed into cell_km squares in the local planar projection
+    (CSR over a dense cell array). Queries scan the block of cells around
+    them in vectorized passes, widening the block only for the queries whose
+    nearest point could still lie outside it.
+    """
+
+    def __init__(self, lats, lngs, cell_km=None):
+        self.lats = np.asarray(lats, dtype=float).ravel()
+        self.lngs = np.asarray(lngs, dtype=float).ravel()
+        if not len(self.lats):
+            raise ValueError("GridIndex needs at least one reference point")
+        self.ref_lat = float(np.mean(self.lats))
+        self.x, self.y = project_local(self.lats, self.lngs, self.ref_lat)
+        if cell_km is None:
+            # ~4 points per occupied-area cell on average
+            area = max(np.ptp(self.x) * np.ptp(self.y), 1e-6)
+            cell_km = max(0.02, float(np.sqrt(4 * area / len(self.lats))))
+        self.cell_km = cell_km
+
+        ix = np.floor(self.x / cell_km).astype(np.int64)
+        iy = np.floor(self.y / cell_km).astype(np.int64)
+        self.x0, self.y0 = int(ix.min()), int(iy.min())
+        self.width = int(ix.max()) - self.x0 + 1
+        self.height = int(iy.max()) - self.y0 + 1
+
+        cell = (ix - self.x0) * self.height + (iy - self.y0)
+        self.order = np.argsort(cell, kind='stable')
+        self.cell_start = np.zeros(self.width * self.height + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell, minlength=self.width * self.height), out=self.cell_start[1:])
+
+    def _block_candidates(self, qx, qy, cx, cy, r):
+        """
+        Every (query, point) pair within each query's (2r+1)^2 cell block,
+        grouped by query: (per-query counts, owner query, point index, squared km)
+        """
+        offsets = np.arange(-r, r + 1)
+        gx = (cx[:, None, None] + offsets[None, :, None] - self.x0)
+        gy = (cy[:, None, None] + offsets[None, None, :] - self.y0)
+        inside = (gx >= 0) & (gx < self.width) & (gy >= 0) & (gy < self.height)
+        cell = np.where(inside, gx * self.height + gy, 0).reshape(len(qx), -1)
+        inside = inside.reshape(len(qx), -1)
+
+        start = self.cell_start[cell]
+        count = np.where(inside, self.cell_start[cell + 1] - start, 0)
+
+        # Flatten every (query, candidate) pair with no padding
+        per_query = count.sum(axis=1)
+        total = int(per_query.sum())
+        flat_count = count.ravel()
+        run_start = np.cumsum(flat_count) - flat_count
+        pos = np.repeat(start.ravel() - run_start, flat_count) + np.arange(total)
+        owner = np.repeat(np.arange(len(qx)), per_query)
+        cand = self.order[pos]
+        d2 = (self.x[cand] - qx[owner]) ** 2 + (self.y[cand] - qy[owner]) ** 2
+        return per_query, owner, cand, d2
+
+    def _search_block(self, qx, qy, cx, cy, r):
+        """Nearest point (index, squared km) within each query's (2r+1)^2 cell block"""
+        per_query, owner, cand, d2 = self._block_candidates(qx, qy, cx, cy, r)
+        best_idx = np.full(len(qx), -1, dtype=np.int64)
+        best_d2 = np.full(len(qx), np.inf)
+        if len(cand) == 0:
+            return best_idx, best_d2
+
+        # Candidates are grouped by query, so a segmented min finds each best
+        has = per_query > 0
+        group_start = (np.cumsum(per_query) - per_query)[has]
+        group_min = np.minimum.reduceat(d2, group_start)
+        best_d2[has] = group_min
+        hit = np.flatnonzero(d2 == np.repeat(best_d2, per_query))
+        winner = hit[np.r_[True, owner[hit][1:] != owner[hit][:-1]]]
+        best_idx[owner[winner]] = cand[winner]
+        return best_idx, best_d2
+
+    def nearest(self, lats, lngs, max_km=None, chunk=4096):
+        """
+        (indices, great-circle km) of the nearest reference point per query.
+        With max_km, queries with nothing that close get index -1 and
+        distance inf instead of an exhaustive search.
+        """
+        lats = np.asarray(lats, dtype=float).ravel()
+        lngs = np.asarray(lngs, dtype=float).ravel()
+        qx, qy = project_local(lats, lngs, self.ref_lat)
+        cx = np.floor(qx / self.cell_km).astype(np.int64)
+        cy = np.floor(qy / self.cell_km).astype(np.int64)
+
+        max_ring = 8 if max_km is None else max(1, int(np.ceil(max_km / self.cell_km)))
+        indices = np.full(len(lats), -1, dtype=np.int64)
+        pending = np.arange(len(lats))
+        r = 1
+        while len(pending):
+            still = []
+            for s in range(0, len(pending), chunk):
+                part = pending[s:s + chunk]
+                idx, d2 = self._search_block(qx[part], qy[part], cx[part], cy[part], r)
+                # Anything outside the block is at least r cells away
+                exact = d2 <= (r * self.cell_km) ** 2
+                indices[part[exact]] = idx[exact]
+                still.append(part[~exact])
+            pending = np.concatenate(still)
+            if r >= max_ring:
+                break
+            r = min(r * 2, max_ring)
+
+        distances = np.full(len(lats), np.inf)
+        if max_km is None and len(pending):
+            indices[pending], _ = nearest_neighbors(lats[pending], lngs[pending], self.lats, self.lngs)
+        found = indices >= 0
+        distances[found] = haversine_distance(lats[found], lngs[found],
+                                              self.lats[indices[found]], self.lngs[indices[found]])
+        if max_km is not None:
+            too_far = distances > max_km
+            indices[too_far] = -1
+            distances[too_far] = np.inf
+        return indices, distances
+
+    def pairs(self, lats, lngs, radius_km, chunk=1024):
+        """
+        Every (query, reference) pair within radius_km as flat arrays
+        (query index, reference index, great-circle km), grouped by query.
+        Far pairs never leave the cell blocks, so cost follows the output.
+        """
+        lats = np.asarray(lats, dtype=float).ravel()
+        lngs = np.asarray(lngs, dtype=float).ravel()
+        qx, qy = project_local(lats, lngs, self.ref_lat)
+        cx = np.floor(qx / self.cell_km).astype(np.int64)
+        cy = np.floor(qy / self.cell_km).astype(np.int64)
+        # Planar prefilter with slack for the projection error, then exact km
+        r = max(1, int(np.ceil(radius_km / self.cell_km)))
+        slack = (radius_km * 1.01) ** 2
+
+        owners, cands, kms = [], [], []
+        for s in range(0, len(lats), chunk):
+            part = slice(s, s + chunk)
+            _, owner, cand, d2 = self._block_candidates(qx[part], qy[part], cx[part], cy[part], r)
+            keep = d2 <= slack
+            owner, cand = owner[keep], cand[keep]
+            km = np.atleast_1d(haversine_distance(lats[part][owner], lngs[part][owner],
+                                                  self.lats[cand], self.lngs[cand]))
+            close = km <= radius_km
+            owners.append(owner[close] + s)
+            cands.append(cand[close])
+            kms.append(km[close])
+        if not owners:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(owners), np.concatenate(cands), np.concatenate(kms)
+
+    def within(self, lats, lngs, radius_km, chunk=1024):
+        """
+        Range query: for each query point, (indices, great-circle km) of every
+        reference point within radius_km, sorted by distance.
+        """
+        owner, cand, km = self.pairs(lats, lngs, radius_km, chunk)
+        order = np.lexsort((km, owner))
+        owner, cand, km = owner[order], cand[order], km[order]
+        bounds = np.searchsorted(owner, np.arange(np.size(lats) + 1))
+        return [(cand[a:b], km[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+class LatLngGrid:
+    """Regular lat/lng grid with roughly square cells of cell_m metres"""
+
+    def __init__(self, south, west, north, east, cell_m=100):
+        self.cell_m = cell_m
+        self.ref_lat = (south + north) / 2
+        km_per_deg_lat = np.radians(1.0) * EARTH_RADIUS_KM
+        self.dlat = cell_m / 1000 / km_per_deg_lat
+        self.dlng = self.dlat / np.cos(np.radians(self.ref_lat))
+
+        # Tolerance so a grid rebuilt from its own spec() keeps its shape
+        self.rows = int(np.ceil((north - south) / self.dlat - 1e-9))
+        self.cols = int(np.ceil((east - west) / self.dlng - 1e-9))
+        self.south, self.west = south, west
+        self.north = south + self.rows * self.dlat
+        self.east = west + self.cols * self.dlng
+
+    @classmethod
+    def around(cls, points, margin=0.03, cell_m=100):
+        lats = [p['lat'] for p in points]
+        lngs = [p['lng'] for p in points]
+        return cls(min(lats) - margin, min(lngs) - margin,
+                   max(lats) + margin, max(lngs) + margin, cell_m)
+
+    @property
+    def shape(self):
+        return (self.rows, self.cols)
+
+    def spec(self):
+        """Constructor arguments, for storing a grid next to its rasters"""
+        return {"south": self.south, "west": self.west, "north": self.north,
+                "east": self.east, "cell_m": self.cell_m}
+
+    def centres(self):
+        """Cell-centre (lat, lng) arrays, row 0 = north"""
+        lats = self.north - (np.arange(self.rows) + 0.5) * self.dlat
+        lngs = self.west + (np.arange(self.cols) + 0.5) * self.dlng
+        return np.meshgrid(lats, lngs, indexing='ij')
+
+    def cell_index(self, lats, lngs):
+        """(row, col) for points, -1 where outside the grid"""
+        rows = np.floor((self.north - np.asarray(lats, dtype=float)) / self.dlat).astype(int)
+        cols = np.floor((np.asarray(lngs, dtype=float) - self.west) / self.dlng).astype(int)
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        return np.where(inside, rows, -1), np.where(inside, cols, -1)
+
+    def rasterize(self, lats, lngs, weights=None):
+        """Per-cell point count (or weight sum)"""
+        rows, cols = self.cell_index(lats, lngs)
+        keep = rows >= 0
+        out = np.zeros(self.shape)
+        w = None if weights is None else np.asarray(weights, dtype=float)[keep]
+        np.add.at(out, (rows[keep], cols[keep]), 1.0 if w is None else w)
+        return out
+
+    def bounds(self, r0=0, c0=0, r1=None, c1=None):
+        """[[south, west], [north, east]] of a cell block (Leaflet order)"""
+        r1 = self.rows if r1 is None else r1
+        c1 = self.cols if c1 is None else c1
+        return [[self.north - r1 * self.dlat, self.west + c0 * self.dlng],
+                [self.north - r0 * self.dlat, self.west + c1 * self.dlng]]
@@ -0,0 +1,240 @@
+"""
+Isochrone Precomputation
+Drive-time rasters around every reference destination (DESTINATIONS) and
+noise source (NOISE_SOURCES), so accessibility features for any coordinate
+are an O(1) array lookup - no API calls and no graph searches.
+
+Per target the stage stores:
+- whole minutes per 100 m cell (uint8, 255 = unreachable)
+- isochrone band per cell for ISOCHRONE_BANDS (5/10/20/30/45 min, then 45+)
+
+Minutes come from the road graph (road_graph.py) when an OSM extract is
+available, otherwise from straight-line distance calibrated against the
+collected Distance Matrix times. Targets the road graph does not cache (the
+noise sources) get a Dijkstra run per build; the rasters are what persists.
+
+Output: data/isochrones.npz
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+
+import numpy as np
+
+from geo_utils import haversine_distance, LatLngGrid
+from collect_objective_data import LOCALITIES, DESTINATIONS, NOISE_SOURCES
+from road_graph import get_engine
+from atomic_io import atomic_write
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+LOCALITY_DATA_FILE = os.path.join(DATA_DIR, 'objective_locality_data.json')
+ISOCHRONE_FILE = os.path.join(DATA_DIR, 'isochrones.npz')
+
+ISOCHRONE_BANDS = [5, 10, 20, 30, 45]
+DEFAULT_CELL_METERS = 100
+GRID_MARGIN_DEG = 0.05  # A little wider than the heatmap so it always fits
+UNREACHABLE = 255
+
+# Same targets as the collectors; noise sources that are not already a
+# destination are added under their own key
+TARGETS = dict(DESTINATIONS)
+TARGETS.update({k: v for k, v in NOISE_SOURCES.items() if k not in TARGETS})
+
+
+def calibrate_travel_times(localities_data, targets=TARGETS):
+    """
+    Fit minutes ~ a + b * km per target from the collected Distance
+    Matrix times. Returns {target_key: (a, b)}.
+    """
+    fits = {}
+    pooled_km, pooled_min = [], []
+    for key, target in targets.items():
+        km, minutes = [], []
+        for loc in localities_data:
+            t = loc.get(f"{key}_time")
+            if t is None or loc.get('latitude') is None:
+                continue
+            km.append(haversine_distance(loc['latitude'], loc['longitude'], target['lat'], target['lng']))
+            minutes.append(t)
+        pooled_km += km
+        pooled_min += minutes
+        if len(km) >= 3:
+            A = np.column_stack([np.ones(len(km)), km])
+            fits[key] = tuple(np.linalg.lstsq(A, np.array(minutes, dtype=float), rcond=None)[0])
+
+    # Targets without enough samples share the pooled fit
+    if pooled_km:
+        A = np.column_stack([np.ones(len(pooled_km)), pooled_km])
+        pooled = tuple(np.linalg.lstsq(A, np.array(pooled_min, dtype=float), rcond=None)[0])
+    else:
+        pooled = (5.0, 2.5)  # ~24 km/h city driving plus a fixed overhead
+    for key in targets:
+        fits.setdefault(key, pooled)
+    return fits
+
+
+def load_localities_data():
+    if not os.path.exists(LOCALITY_DATA_FILE):
+        return []
+    with open(LOCALITY_DATA_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def estimate_minutes(lats, lngs, targets=TARGETS):
+    """
+    {<target>_time: minutes} for many points, from the road graph when
+    available, else from calibrated straight-line distance.
+    Returns (fields, source name).
+    """
+    engine = get_engine()
+    if engine:
+        return engine.travel_times(lats, lngs, targets=targets), 'road_graph'
+
+    fits = calibrate_travel_times(load_localities_data(), targets)
+    fields = {}
+    for key, target in targets.items():
+        a, b = fits[key]
+        fields[f"{key}_time"] = a + b * haversine_distance(lats, lngs, target['lat'], target['lng'])
+    return fields, 'calibrated_distance'
+
+
+def band_index(minutes, bands=ISOCHRONE_BANDS):
+    """0 = within bands[0] min, ..., len(bands) = beyond the last band"""
+    return np.searchsorted(np.asarray(bands, dtype=float), minutes, side='left').astype(np.uint8)
+
+
+def build_isochrones(grid, targets=TARGETS):
+    """Quantized minute rasters per target on the grid"""
+    lats, lngs = grid.centres()
+    fields, source = estimate_minutes(lats, lngs, targets)
+    rasters = {}
+    for key in targets:
+        minutes = np.round(np.maximum(fields[f"{key}_time"], 1))
+        rasters[key] = np.where(np.isfinite(minutes), np.minimum(minutes, UNREACHABLE - 1),
+                                UNREACHABLE).astype(np.uint8)
+    return rasters, source
+
+
+def save_isochrones(grid, rasters, source, path=ISOCHRONE_FILE):
+    meta = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "grid": grid.spec(),
+        "bands": ISOCHRONE_BANDS,
+        "targets": {k: TARGETS[k] for k in rasters},
+        "source": source,
+    }
+    with atomic_write(path, 'wb', keep=0) as f:
+        np.savez_compressed(f, meta=json.dumps(meta), **{f"minutes_{k}": v for k, v in rasters.items()})
+
+
+class IsochroneIndex:
+    """O(1) travel-time / isochrone-band lookups from the precomputed rasters"""
+
+    def __init__(self, grid, minutes, bands=ISOCHRONE_BANDS, meta=None):
+        self.grid = grid
+        self.minutes = minutes
+        self.bands = list(bands)
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, path=ISOCHRONE_FILE):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            minutes = {k[len('minutes_'):]: data[k] for k in data.files if k.startswith('minutes_')}
+        return cls(LatLngGrid(**meta['grid']), minutes, meta['bands'], meta)
+
+    @staticmethod
+    def available(path=ISOCHRONE_FILE):
+        return os.path.exists(path)
+
+    @property
+    def targets(self):
+        return list(self.minutes)
+
+    def lookup(self, lats, lngs):
+        """
+        {<target>_time: whole minutes} per point, NaN outside the grid or
+        where the target is unreachable.
+        """
+        rows, cols = self.grid.cell_index(lats, lngs)
+        inside = rows >= 0
+        out = {}
+        for key, raster in self.minutes.items():
+            values = raster[np.maximum(rows, 0), np.maximum(cols, 0)].astype(float)
+            values[~inside | (values == UNREACHABLE)] = np.nan
+            out[f"{key}_time"] = values
+        return out
+
+    def band(self, lats, lngs, target):
+        """Isochrone band index per point (len(bands) = beyond, or unknown)"""
+        minutes = self.lookup(lats, lngs)[f"{target}_time"]
+        return band_index(np.where(np.isnan(minutes), np.inf, minutes), self.bands)
+
+    def band_label(self, index):
+        if index == 0:
+            return f"<= {self.bands[0]} min"
+        if index >= len(self.bands):
+            return f"> {self.bands[-1]} min"
+        return f"{self.bands[index - 1]}-{self.bands[index]} min"
+
+
+_index = None
+
+
+def get_index():
+    """Shared IsochroneIndex, or None when the stage has not been run"""
+    global _index
+    if _index is None and IsochroneIndex.available():
+        _index = IsochroneIndex.load()
+    return _index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute drive-time isochrone rasters")
+    parser.add_argument('--cell', type=int, default=DEFAULT_CELL_METERS, help="cell size in metres")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("\n" + "="*70)
+    print("⏱️ ISOCHRONE PRECOMPUTATION")
+    print("="*70)
+
+    start = time.perf_counter()
+    grid = LatLngGrid.around(LOCALITIES, GRID_MARGIN_DEG, args.cell)
+    rasters, source = build_isochrones(grid)
+    save_isochrones(grid, rasters, source)
+    print(f"🔲 {grid.rows} x {grid.cols} cells at {grid.cell_m} m, {len(rasters)} targets "
+          f"(source: {source}) in {time.perf_counter() - start:.2f}s")
+
+    # Area inside each band, per target
+    cell_km2 = (grid.cell_m / 1000) ** 2
+    header = "".join(f"{f'<={b}':>8}" for b in ISOCHRONE_BANDS)
+    print(f"\n{'Target (km²)':<20}{header}")
+    for key, raster in rasters.items():
+        reachable = raster[raster != UNREACHABLE]
+        row = "".join(f"{(reachable <= b).sum() * cell_km2:>8.0f}" for b in ISOCHRONE_BANDS)
+        print(f"{key:<20}{row}")
+
+    # Lookup speed check
+    index = IsochroneIndex.load()
+    lats = np.random.uniform(grid.south, grid.north, 100_000)
+    lngs = np.random.uniform(grid.west, grid.east, 100_000)
+    start = time.perf_counter()
+    index.lookup(lats, lngs)
+    print(f"\n⚡ 100,000 point lookups in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"✅ Saved isochrones to {os.path.abspath(ISOCHRONE_FILE)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""
+Streaming JSON I/O
+Record-by-record reading and writing for pipeline files, so memory stays
+bounded no matter how many amenities a stage handles.
+
+Readers:
+- iter_records(path)        .ndjson / .jsonl lines, or the elements of a JSON
+                            array (top level, or under `key` of a top-level
+                            object) decoded incrementally
+- iter_ndjson(path, follow) tail an NDJSON file while its writer is still
+                            running (see NDJSONWriter)
+
+Writers:
+- NDJSONWriter              one compact record per line; marks the file as
+                            in progress until closed
+- stream_dump(obj, path)    json.dump(obj, indent=2) output, but any
+                            generator / iterator inside obj is written
+                            element by element instead of materialized
+"""
+
+import os
+import json
+import time
+import types
+
+from atomic_io import atomic_write
+
+CHUNK_SIZE = 1 << 16
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+IN_PROGRESS_SUFFIX = '.inprogress'
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def is_ndjson(path):
+    return str(path).endswith(NDJSON_EXTENSIONS)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+class _Buffer:
+    """Text buffer over a file that grows on demand and drops consumed text"""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read one more chunk; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Compact so memory holds roughly one record plus one chunk
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more text as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number cut off by the chunk boundary ("2" of "2.5") may still be growing
+            if (self.text[self.pos] in '-0123456789' and not self.eof
+                    and (end == len(self.text) or self.text[end] in '.eE+-0123456789')
+                    and self.fill()):
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_array(buf):
+    buf.expect('[')
+    if buf.peek() == ']':
+        buf.pos += 1
+        return
+    while True:
+        yield buf.value()
+        sep = buf.peek()
+        buf.pos += 1
+        if sep == ']':
+            return
+        if sep != ',':
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {sep!r}")
+
+
+def iter_json_array(path, key=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of a JSON array without loading the whole file.
+    With key, the array is the value of that top-level object field; other
+    fields are decoded and skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = _Buffer(f, chunk_size)
+        if key is None:
+            yield from _iter_array(buf)
+            return
+
+        buf.expect('{')
+        while buf.peek() not in ('}', ''):
+            name = buf.value()
+            buf.expect(':')
+            if name == key:
+                yield from _iter_array(buf)
+                return
+            buf.value()
+            if buf.peek() == ',':
+                buf.pos += 1
+        raise KeyError(f"{key!r} not found in {path}")
+
+
+def iter_ndjson(path, follow=False, poll=0.5):
+    """
+    Yield one record per line. With follow=True, keep waiting for new lines
+    while the writer's in-progress marker exists, so a downstream stage can
+    start before the upstream file is finished.
+    """
+    marker = str(path) + IN_PROGRESS_SUFFIX
+    while follow and not os.path.exists(path):
+        if not os.path.exists(marker):
+            raise FileNotFoundError(path)
+        time.sleep(poll)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        partial = ''
+        while True:
+            line = f.readline()
+            if line.endswith('\n'):
+                line, partial = partial + line, ''
+                if line.strip():
+                    yield json.loads(line)
+                continue
+            # End of what has been written so far
+            partial += line
+            if follow and os.path.exists(marker):
+                time.sleep(poll)
+                continue
+            if partial.strip():
+                yield json.loads(partial)
+            return
+
+
+def iter_records(path, key=None, follow=False):
+    """Stream records from an NDJSON file or a (keyed) JSON array file"""
+    if is_ndjson(path):
+        return iter_ndjson(path, follow=follow)
+    return iter_json_array(path, key=key)
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+class NDJSONWriter:
+    """
+    Append-only newline-delimited JSON writer.
+
+    While open, `<path>.inprogress` exists so iter_ndjson(follow=True)
+    readers know more records are coming. write() returns each record's byte
+    offset for later random access (read_ndjson_at).
+    """
+
+    def __init__(self, path, flush_every=1000):
+        self.path = str(path)
+        self.marker = self.path + IN_PROGRESS_SUFFIX
+        self.flush_every = flush_every
+        self.count = 0
+        open(self.marker, 'w').close()
+        self.f = open(self.path, 'wb')
+
+    def write(self, record):
+        offset = self.f.tell()
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        self.f.write(line.encode('utf-8'))
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.f.flush()
+        return offset
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        if not self.f.closed:
+            self.f.close()
+        if os.path.exists(self.marker):
+            os.remove(self.marker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_ndjson_at(f, offset):
+    """Read the record written at `offset` (f opened in binary mode)"""
+    f.seek(offset)
+    return json.loads(f.readline())
+
+
+def _is_stream(value):
+    return isinstance(value, (types.GeneratorType, map, filter, zip)) or (
+        hasattr(value, '__next__') and not isinstance(value, (str, bytes, dict, list, tuple))
+    )
+
+
+def _write(f, value, indent, level, ensure_ascii):
+    pad = ' ' * (indent * (level + 1))
+    end_pad = ' ' * (indent * level)
+
+    if isinstance(value, dict) and any(_is_stream(v) or isinstance(v, dict) for v in value.values()):
+        if not value:
+            f.write('{}')
+            return
+        f.write('{')
+        for i, (k, v) in enumerate(value.items()):
+            f.write((',' if i else '') + '\n' + pad + json.dumps(str(k), ensure_ascii=ensure_ascii) + ': ')
+            _write(f, v, indent, level + 1, ensure_ascii)
+        f.write('\n' + end_pad + '}')
+    elif _is_stream(value):
+        first = True
+        for item in value:
+            f.write(('[' if first else ',') + '\n' + pad)
+            _write(f, item, indent, level + 1, ensure_ascii)
+            first = False
+        f.write('[]' if first else '\n' + end_pad + ']')
+    else:
+        text = json.dumps(value, indent=indent, ensure_ascii=ensure_ascii)
+        f.write(text.replace('\n', '\n' + end_pad) if level else text)
+
+
+def stream_dump(obj, path, indent=2, ensure_ascii=False):
+    """
+    Write obj like json.dump(obj, f, indent=indent), consuming generators
+    and iterators lazily, as one atomic publish (see atomic_io). Returns the
+    number of bytes written.
+    """
+    with atomic_write(path) as f:
+        _write(f, obj, indent, 0, ensure_ascii)
+        return f.tell()
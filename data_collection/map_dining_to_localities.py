@@ -3,31 +3,31 @@ Map Dining Establishments to Localities
 Creates connections between restaurants/cafes/hotels and the 20 ranked localities.
 """
 
-import json
 import os
 import re
 import sys
 
+from json_stream import iter_records, stream_dump, NDJSONWriter
+from atomic_io import write_json
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
-def load_data():
-    """Load all necessary data files"""
-    data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 
-    with open(os.path.join(data_dir, 'restaurants.json'), 'r', encoding='utf-8') as f:
-        restaurants = json.load(f)
-    with open(os.path.join(data_dir, 'cafes.json'), 'r', encoding='utf-8') as f:
-        cafes = json.load(f)
-    with open(os.path.join(data_dir, 'hotels.json'), 'r', encoding='utf-8') as f:
-        hotels = json.load(f)
-    with open(os.path.join(data_dir, 'clean_rankings.json'), 'r', encoding='utf-8') as f:
-        rankings = json.load(f)
+# Category -> data file, streamed one establishment at a time
+DINING_FILES = {
+    'Restaurants': 'restaurants.json',
+    'Cafes': 'cafes.json',
+    'Hotels': 'hotels.json',
+}
 
-    localities = [loc['name'] for loc in rankings['all_rankings']]
 
-    return restaurants, cafes, hotels, localities
+def load_localities():
+    """Ranked locality names, streamed out of clean_rankings.json"""
+    rankings_file = os.path.join(DATA_DIR, 'clean_rankings.json')
+    return [loc['name'] for loc in iter_records(rankings_file, key='all_rankings')]
 
 def extract_locality_from_address(address, localities):
     """
@@ -76,111 +76,131 @@ def extract_locality_from_address(address, localities):
 
     return None
 
-def map_establishments_to_localities(establishments, localities, category):
-    """Add locality field to each establishment"""
-    mapped = []
-    unmatched = []
-
-    for est in establishments:
-        locality = extract_locality_from_address(est['address'], localities)
-
-        est_copy = est.copy()
-        est_copy['locality'] = locality
-
-        if locality:
-            mapped.append(est_copy)
-        else:
-            unmatched.append(est_copy)
+def map_establishments_to_localities(path, localities, category, accumulator):
+    """
+    Stream establishments from `path`, yielding each with a locality field.
+    Mapped establishments come first and unmatched ones last (spooled to a
+    temporary NDJSON file), and per-locality stats are accumulated on the way.
+    """
+    unmatched_path = path + '.unmatched.ndjson'
+    total = mapped_count = 0
+    unmatched_sample = []
+
+    with NDJSONWriter(unmatched_path) as unmatched:
+        for est in iter_records(path):
+            total += 1
+            locality = extract_locality_from_address(est['address'], localities)
+
+            est_copy = est.copy()
+            est_copy['locality'] = locality
+
+            if locality:
+                mapped_count += 1
+                accumulator.add(category, est_copy)
+                yield est_copy
+            else:
+                unmatched.write(est_copy)
+                if len(unmatched_sample) < 5:
+                    unmatched_sample.append(est_copy)
+
+    yield from iter_records(unmatched_path)
+    os.remove(unmatched_path)
 
     print(f"\n{category.upper()}:")
-    print(f"  ✅ Mapped to localities: {len(mapped)}/{len(establishments)}")
-    print(f"  ❌ Unmatched: {len(unmatched)}")
+    print(f"  ✅ Mapped to localities: {mapped_count}/{total}")
+    print(f"  ❌ Unmatched: {total - mapped_count}")
 
-    if unmatched:
+    if unmatched_sample:
         print(f"  Unmatched addresses:")
-        for u in unmatched[:5]:
+        for u in unmatched_sample:
             print(f"    - {u['name'][:30]:30} | {u['address'][:50]}")
 
-    return mapped + unmatched
-
-def calculate_locality_dining_stats(restaurants, cafes, hotels, localities):
-    """Calculate dining statistics for each locality"""
 
-    stats = {}
-
-    for locality in localities:
-        locality_restaurants = [r for r in restaurants if r.get('locality') == locality]
-        locality_cafes = [c for c in cafes if c.get('locality') == locality]
-        locality_hotels = [h for h in hotels if h.get('locality') == locality]
-
-        # Top establishments
-        top_restaurant = max(locality_restaurants, key=lambda x: x['score']) if locality_restaurants else None
-        top_cafe = max(locality_cafes, key=lambda x: x['score']) if locality_cafes else None
-        top_hotel = max(locality_hotels, key=lambda x: x['score']) if locality_hotels else None
-
-        # Calculate dining scene score (0-10)
-        # Based on number and quality of establishments
-        dining_scene_score = 0
-        if locality_restaurants:
-            dining_scene_score += min(5, len(locality_restaurants) * 0.5 + max([r['rating'] for r in locality_restaurants]) - 3)
-        if locality_cafes:
-            dining_scene_score += min(3, len(locality_cafes) * 0.3 + max([c['rating'] for c in locality_cafes]) * 0.5)
-        if locality_hotels:
-            dining_scene_score += min(2, len(locality_hotels) * 0.2)
-
-        stats[locality] = {
-            'restaurant_count': len(locality_restaurants),
-            'cafe_count': len(locality_cafes),
-            'hotel_count': len(locality_hotels),
-            'total_dining_count': len(locality_restaurants) + len(locality_cafes) + len(locality_hotels),
-            'dining_scene_score': round(min(10, dining_scene_score), 1),
-            'top_restaurant': {
-                'name': top_restaurant['name'],
-                'score': top_restaurant['score'],
-                'rating': top_restaurant['rating'],
-                'reviews': top_restaurant['reviews']
-            } if top_restaurant else None,
-            'top_cafe': {
-                'name': top_cafe['name'],
-                'score': top_cafe['score'],
-                'rating': top_cafe['rating'],
-                'reviews': top_cafe['reviews']
-            } if top_cafe else None,
-            'top_hotel': {
-                'name': top_hotel['name'],
-                'score': top_hotel['score'],
-                'rating': top_hotel['rating'],
-                'reviews': top_hotel['reviews']
-            } if top_hotel else None
-        }
-
-    return stats
+class DiningStatsAccumulator:
+    """Running per-locality counts, best establishments and best ratings"""
+
+    def __init__(self, localities):
+        self.localities = localities
+        self.counts = {loc: {c: 0 for c in DINING_FILES} for loc in localities}
+        self.top = {loc: {} for loc in localities}
+        self.best_rating = {loc: {} for loc in localities}
+
+    def add(self, category, est):
+        locality = est.get('locality')
+        if locality not in self.counts:
+            return
+        self.counts[locality][category] += 1
+        # Strict > keeps the first of equal scores, like max()
+        top = self.top[locality].get(category)
+        if top is None or est['score'] > top['score']:
+            self.top[locality][category] = est
+        best = self.best_rating[locality].get(category)
+        if best is None or est['rating'] > best:
+            self.best_rating[locality][category] = est['rating']
+
+    @staticmethod
+    def _summary(est):
+        return {
+            'name': est['name'],
+            'score': est['score'],
+            'rating': est['rating'],
+            'reviews': est['reviews']
+        } if est else None
+
+    def stats(self):
+        """Calculate dining statistics for each locality"""
+        stats = {}
+
+        for locality in self.localities:
+            counts = self.counts[locality]
+            best = self.best_rating[locality]
+            top = self.top[locality]
+            n_restaurants, n_cafes, n_hotels = counts['Restaurants'], counts['Cafes'], counts['Hotels']
+
+            # Calculate dining scene score (0-10)
+            # Based on number and quality of establishments
+            dining_scene_score = 0
+            if n_restaurants:
+                dining_scene_score += min(5, n_restaurants * 0.5 + best['Restaurants'] - 3)
+            if n_cafes:
+                dining_scene_score += min(3, n_cafes * 0.3 + best['Cafes'] * 0.5)
+            if n_hotels:
+                dining_scene_score += min(2, n_hotels * 0.2)
+
+            stats[locality] = {
+                'restaurant_count': n_restaurants,
+                'cafe_count': n_cafes,
+                'hotel_count': n_hotels,
+                'total_dining_count': n_restaurants + n_cafes + n_hotels,
+                'dining_scene_score': round(min(10, dining_scene_score), 1),
+                'top_restaurant': self._summary(top.get('Restaurants')),
+                'top_cafe': self._summary(top.get('Cafes')),
+                'top_hotel': self._summary(top.get('Hotels'))
+            }
+
+        return stats
 
 def main():
     print("\n" + "="*70)
     print("🍽️ MAPPING DINING ESTABLISHMENTS TO LOCALITIES")
     print("="*70)
 
-    # Load data
-    restaurants, cafes, hotels, localities = load_data()
+    # Localities are small; establishments are streamed file to file
+    localities = load_localities()
+    print(f"\n📊 Loaded {len(localities)} localities")
 
-    print(f"\n📊 Loaded:")
-    print(f"  Restaurants: {len(restaurants)}")
-    print(f"  Cafes: {len(cafes)}")
-    print(f"  Hotels: {len(hotels)}")
-    print(f"  Localities: {len(localities)}")
-
-    # Map establishments
-    restaurants_mapped = map_establishments_to_localities(restaurants, localities, 'Restaurants')
-    cafes_mapped = map_establishments_to_localities(cafes, localities, 'Cafes')
-    hotels_mapped = map_establishments_to_localities(hotels, localities, 'Hotels')
+    accumulator = DiningStatsAccumulator(localities)
+    for category, filename in DINING_FILES.items():
+        path = os.path.join(DATA_DIR, filename)
+        # Reads path while publishing its replacement atomically
+        stream_dump(map_establishments_to_localities(path, localities, category, accumulator), path)
 
     # Calculate stats
     print("\n" + "="*70)
     print("📈 CALCULATING LOCALITY DINING STATS")
     print("="*70)
 
-    dining_stats = calculate_locality_dining_stats(restaurants_mapped, cafes_mapped, hotels_mapped, localities)
+    dining_stats = accumulator.stats()
 
     # Display top dining localities
     sorted_localities = sorted(dining_stats.items(), key=lambda x: x[1]['dining_scene_score'], reverse=True)
@@ -195,20 +215,8 @@ def main():
         if stats['top_cafe']:
             print(f"   ☕ {stats['top_cafe']['name']} ({stats['top_cafe']['rating']}⭐)")
 
-    # Save mapped data
-    data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
-
-    with open(os.path.join(data_dir, 'restaurants.json'), 'w', encoding='utf-8') as f:
-        json.dump(restaurants_mapped, f, indent=2, ensure_ascii=False)
-
-    with open(os.path.join(data_dir, 'cafes.json'), 'w', encoding='utf-8') as f:
-        json.dump(cafes_mapped, f, indent=2, ensure_ascii=False)
-
-    with open(os.path.join(data_dir, 'hotels.json'), 'w', encoding='utf-8') as f:
-        json.dump(hotels_mapped, f, indent=2, ensure_ascii=False)
-
-    with open(os.path.join(data_dir, 'locality_dining_stats.json'), 'w', encoding='utf-8') as f:
-        json.dump(dining_stats, f, indent=2, ensure_ascii=False)
+    # Save dining stats (establishment files were written while streaming)
+    write_json(os.path.join(DATA_DIR, 'locality_dining_stats.json'), dining_stats)
 
     print("\n✅ Saved updated files:")
     print("   - data/restaurants.json (with locality field)")
@@ -0,0 +1,225 @@
+"""
+Noise Model
+Multi-source noise exposure for any set of points, vectorized.
+
+Each source is a point (airport, bus stand) or a polyline (railway line,
+highway, flight path) with its own weight and distance decay:
+- exponential:    exp(-d / scale_km)           road / rail traffic
+- inverse_square: 1 / (1 + (d / scale_km)^2)   geometric spreading from a point
+- linear:         max(0, 1 - d / scale_km)     short-range local sources
+Exposure is the weighted sum over sources, computed as one broadcast of
+points x sources (point distances in the local km projection, polyline
+distances as the minimum over segments), chunked so heatmap grids stay
+within memory. noise_score maps exposure to 1-10 (higher = quieter).
+
+Sources are STATIC_SOURCES plus every bus_station in the place store
+(harvested by collect_deduplicated_data.py). Polyline coordinates are
+approximate traces of the real alignments.
+
+Without data/places.json there are no bus_station sources, only the static
+ones, so central localities score noticeably quieter than they are. The
+model warns when loaded that way, and this stage will not overwrite stored
+scores from it unless --allow-partial is given.
+
+Usage:
+    python data_collection/noise_model.py   # refresh noise_score in objective_locality_data.json
+    python data_collection/noise_model.py --allow-partial
+"""
+
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+from geo_utils import project_local
+from place_store import load_places
+from atomic_io import write_json
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+LOCALITY_DATA_FILE = os.path.join(DATA_DIR, 'objective_locality_data.json')
+
+STATIC_SOURCES = [
+    {"name": "airport", "kind": "point", "weight": 1.0, "decay": "inverse_square", "scale_km": 1.5,
+     "coords": [[8.4804, 76.9201]]},
+    {"name": "airport_flight_path", "kind": "line", "weight": 0.6, "decay": "exponential", "scale_km": 1.0,
+     # Runway 14/32 axis extended ~5 km along the approach / departure paths
+     "coords": [[8.5160, 76.8900], [8.4804, 76.9201], [8.4450, 76.9500]]},
+    {"name": "ksrtc_stand", "kind": "point", "weight": 0.5, "decay": "exponential", "scale_km": 0.8,
+     "coords": [[8.4885, 76.9506]]},
+    {"name": "railway_station", "kind": "point", "weight": 0.4, "decay": "exponential", "scale_km": 0.8,
+     "coords": [[8.4890, 76.9494]]},
+    {"name": "railway_line", "kind": "line", "weight": 0.4, "decay": "exponential", "scale_km": 0.4,
+     "coords": [[8.4420, 77.0050], [8.4690, 76.9750], [8.4890, 76.9494], [8.5050, 76.9280],
+                [8.5180, 76.8980], [8.5660, 76.8760], [8.6280, 76.8350], [8.7330, 76.7150]]},
+    {"name": "nh66_bypass", "kind": "line", "weight": 0.5, "decay": "exponential", "scale_km": 0.5,
+     "coords": [[8.4000, 76.9870], [8.4400, 76.9700], [8.4830, 76.9450], [8.5050, 76.9180],
+                [8.5300, 76.9020], [8.5640, 76.8790]]},
+    # Old NH 66 through the city: Thampanoor, Pattom, Ulloor, Sreekaryam, Kazhakuttam
+    {"name": "nh66_city", "kind": "line", "weight": 0.3, "decay": "exponential", "scale_km": 0.3,
+     "coords": [[8.4930, 76.9490], [8.5070, 76.9560], [8.5250, 76.9420], [8.5360, 76.9260],
+                [8.5470, 76.9160], [8.5640, 76.8790]]},
+    # MC Road from Kesavadasapuram north-east via Mannanthala and Vattappara to Venjaramoodu
+    {"name": "mc_road", "kind": "line", "weight": 0.3, "decay": "exponential", "scale_km": 0.3,
+     "coords": [[8.5270, 76.9440], [8.5530, 76.9500], [8.5800, 76.9560], [8.6050, 76.9600],
+                [8.6300, 76.9450], [8.6550, 76.9300], [8.6810, 76.9180]]},
+]
+BUS_STATION_SOURCE = {"kind": "point", "type": "bus_station", "weight": 0.1, "decay": "linear", "scale_km": 0.5}
+
+EXPOSURE_REF = 1.0   # exposure that takes a point ~2/3 of the way from 10 to 1
+CHUNK_ELEMENTS = 2_000_000
+
+DECAYS = {
+    "exponential": lambda d, s: np.exp(-d / s),
+    "inverse_square": lambda d, s: 1.0 / (1.0 + (d / s) ** 2),
+    "linear": lambda d, s: np.clip(1.0 - d / s, 0.0, None),
+}
+
+
+def load_sources(include_bus_stations=True):
+    """STATIC_SOURCES plus one point source per bus_station in the place store"""
+    sources = [dict(s) for s in STATIC_SOURCES]
+    if include_bus_stations:
+        for place in load_places(types=['bus_station'], include_categories=False):
+            sources.append(dict(BUS_STATION_SOURCE, name=place.get('name'), coords=[[place['lat'], place['lng']]]))
+    return sources
+
+
+def _segment_distances(px, py, ax, ay, bx, by):
+    """(points, segments) km from each point to each segment"""
+    dx, dy = bx - ax, by - ay
+    length2 = np.maximum(dx * dx + dy * dy, 1e-12)
+    t = np.clip(((px[:, None] - ax) * dx + (py[:, None] - ay) * dy) / length2, 0.0, 1.0)
+    return np.hypot(px[:, None] - (ax + t * dx), py[:, None] - (ay + t * dy))
+
+
+class NoiseModel:
+    """Sources compiled to flat arrays once; exposure() is pure NumPy"""
+
+    def __init__(self, sources, ref_lat=8.5):
+        self.ref_lat = ref_lat
+        self.sources = sources
+        self.bus_stations = sum(1 for s in sources if s.get('type') == 'bus_station')
+        self.point_sources = [s for s in sources if s['kind'] == 'point']
+        self.line_sources = [s for s in sources if s['kind'] == 'line']
+
+        coords = np.array([s['coords'][0] for s in self.point_sources], dtype=float).reshape(-1, 2)
+        self.px, self.py = project_local(coords[:, 0], coords[:, 1], ref_lat)
+        self.p_weight = np.array([s['weight'] for s in self.point_sources], dtype=float)
+        self.p_scale = np.array([s['scale_km'] for s in self.point_sources], dtype=float)
+        self.p_decay = np.array([s['decay'] for s in self.point_sources])
+
+        # Every segment of every polyline, tagged with its source
+        seg_a, seg_b, owner = [], [], []
+        for i, s in enumerate(self.line_sources):
+            pts = np.array(s['coords'], dtype=float)
+            seg_a.append(pts[:-1])
+            seg_b.append(pts[1:])
+            owner.extend([i] * (len(pts) - 1))
+        seg_a = np.concatenate(seg_a) if seg_a else np.empty((0, 2))
+        seg_b = np.concatenate(seg_b) if seg_b else np.empty((0, 2))
+        self.ax, self.ay = project_local(seg_a[:, 0], seg_a[:, 1], ref_lat)
+        self.bx, self.by = project_local(seg_b[:, 0], seg_b[:, 1], ref_lat)
+        self.seg_owner = np.array(owner, dtype=int)
+
+    @classmethod
+    def load(cls, include_bus_stations=True):
+        return cls(load_sources(include_bus_stations))
+
+    def _source_distances(self, x, y):
+        """(points, point sources) and (points, line sources) distances in km"""
+        point_km = np.hypot(x[:, None] - self.px, y[:, None] - self.py)
+        line_km = np.full((len(x), len(self.line_sources)), np.inf)
+        if len(self.seg_owner):
+            seg_km = _segment_distances(x, y, self.ax, self.ay, self.bx, self.by)
+            for i in range(len(self.line_sources)):
+                line_km[:, i] = seg_km[:, self.seg_owner == i].min(axis=1)
+        return point_km, line_km
+
+    def exposure(self, lats, lngs):
+        """Weighted, decayed exposure at every (lat, lng), any shape"""
+        lats = np.asarray(lats, dtype=float)
+        x, y = project_local(lats.ravel(), np.asarray(lngs, dtype=float).ravel(), self.ref_lat)
+        total = np.zeros(x.size)
+
+        width = max(1, len(self.point_sources) + len(self.seg_owner))
+        step = max(1, CHUNK_ELEMENTS // width)
+        for start in range(0, x.size, step):
+            cx, cy = x[start:start + step], y[start:start + step]
+            point_km, line_km = self._source_distances(cx, cy)
+            exposure = np.zeros(cx.size)
+            for decay, fn in DECAYS.items():
+                mask = self.p_decay == decay
+                if mask.any():
+                    exposure += fn(point_km[:, mask], self.p_scale[mask]) @ self.p_weight[mask]
+            for i, s in enumerate(self.line_sources):
+                exposure += s['weight'] * DECAYS[s['decay']](line_km[:, i], s['scale_km'])
+            total[start:start + step] = exposure
+        return total.reshape(lats.shape)
+
+    def noise_score(self, lats, lngs):
+        """1-10, higher = quieter (no exposure = 10)"""
+        exposure = self.exposure(lats, lngs)
+        return np.round(1 + 9 * np.exp(-exposure / EXPOSURE_REF), 1)
+
+
+_model = None
+
+
+def get_model():
+    """Process-wide model (sources loaded once)"""
+    global _model
+    if _model is None:
+        _model = NoiseModel.load()
+        if not _model.bus_stations:
+            print("⚠️  Noise model has no bus_station sources (no data/places.json); "
+                  "central localities will score too quiet")
+    return _model
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Refresh noise_score from the multi-source model")
+    parser.add_argument('--allow-partial', action='store_true',
+                        help="write scores even without bus_station sources from the place store")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print("\n" + "="*70)
+    print("🔊 NOISE EXPOSURE MODEL")
+    print("="*70)
+
+    if not os.path.exists(LOCALITY_DATA_FILE):
+        print("❌ Error: objective_locality_data.json not found")
+        return
+
+    model = get_model()
+    print(f"📍 {len(model.point_sources)} point sources ({model.bus_stations} bus stations), "
+          f"{len(model.line_sources)} line sources ({len(model.seg_owner)} segments)")
+
+    with open(LOCALITY_DATA_FILE, 'r', encoding='utf-8') as f:
+        localities = json.load(f)
+
+    lats = [loc['latitude'] for loc in localities]
+    lngs = [loc['longitude'] for loc in localities]
+    scores = model.noise_score(lats, lngs)
+    for loc, score in zip(localities, scores):
+        print(f"   {loc['name']:<18} {loc.get('noise_score')!s:>5} -> {score}")
+        loc['noise_score'] = float(score)
+
+    if not model.bus_stations and not args.allow_partial:
+        print("\n❌ Not saved: run collect_deduplicated_data.py first to harvest bus stations, "
+              "or pass --allow-partial")
+        return
+    write_json(LOCALITY_DATA_FILE, localities)
+    print(f"\n✅ Updated {len(localities)} localities in {os.path.abspath(LOCALITY_DATA_FILE)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Normalization
+Percentile scoring for locality metrics, replacing per-call sorting and
+hand-tuned caps (max_expected=20, ...).
+
+QuantileSketch is built once per metric and answers rank / percentile
+lookups in O(log n) via a binary search over sorted values and cumulative
+weights. It is exact until it holds more than `capacity` observations, then
+compacts KLL-style: an over-full level is sorted and every other item
+(alternating start offset) is promoted to the next level at double weight.
+Memory stays bounded, rank error stays unbiased whatever the arrival order
+(sorted, reversed, random), and min / max are tracked exactly. Sketches
+merge, so shards or incremental batches can be combined without rescanning.
+
+MetricNormalizer keeps one sketch per named metric.
+"""
+
+import numpy as np
+
+DEFAULT_CAPACITY = 4096
+MIN_LEVEL_CAPACITY = 8
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile summary with O(log n) rank lookups"""
+
+    def __init__(self, values=(), capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.exact = True
+        self.min = None
+        self.max = None
+        # Level h holds observations standing for 2**h each
+        self._levels = [np.empty(0)]
+        self._offsets = [0]
+        self._pending = []
+        self._values = np.empty(0)
+        self._cumulative = np.empty(0, dtype=np.int64)
+        self.add(values)
+
+    # --- building ---
+
+    def add(self, values):
+        """Add observations (None / NaN are ignored)"""
+        clean = np.asarray([float(v) for v in values if v is not None and v == v])
+        if clean.size:
+            self._pending.append(clean)
+            low, high = float(clean.min()), float(clean.max())
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+        return self
+
+    def update(self, value):
+        return self.add([value])
+
+    def merge(self, other):
+        """Fold another sketch in (both stay usable)"""
+        other._flush()
+        self._flush()
+        for h, level in enumerate(other._levels):
+            if h == len(self._levels):
+                self._levels.append(np.empty(0))
+                self._offsets.append(0)
+            self._levels[h] = np.concatenate([self._levels[h], level])
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.exact = self.exact and other.exact
+        self._compress()
+        return self
+
+    def _level_capacity(self, h):
+        """KLL capacities: the top level gets `capacity`, each level below 2/3 of the one above"""
+        depth = len(self._levels) - 1 - h
+        return max(MIN_LEVEL_CAPACITY, int(np.ceil(self.capacity * (2 / 3) ** depth)))
+
+    def _flush(self):
+        if not self._pending:
+            return
+        self._levels[0] = np.concatenate([self._levels[0], *self._pending])
+        self._pending = []
+        self._compress()
+
+    def _compress(self):
+        # Compact the lowest over-full level until everything fits
+        while sum(len(level) for level in self._levels) > sum(map(self._level_capacity, range(len(self._levels)))):
+            h = next(h for h, level in enumerate(self._levels) if len(level) > self._level_capacity(h))
+            self._compact(h)
+        self._build_index()
+
+    def _compact(self, h):
+        """
+        Sort level h and promote every other item (alternating the starting
+        offset between compactions, so no end is favoured) at double weight.
+        An odd item out stays behind.
+        """
+        level = np.sort(self._levels[h])
+        n = len(level) - len(level) % 2
+        if h + 1 == len(self._levels):
+            self._levels.append(np.empty(0))
+            self._offsets.append(0)
+        offset = self._offsets[h]
+        self._offsets[h] = 1 - offset
+        self._levels[h + 1] = np.concatenate([self._levels[h + 1], level[offset:n:2]])
+        self._levels[h] = level[n:]
+        self.exact = False
+
+    def _build_index(self):
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.int64)
+                                  for h, level in enumerate(self._levels)])
+        order = np.argsort(values, kind='stable')
+        values, weights = values[order], weights[order]
+        # Equal values collapse into one weighted entry
+        unique, starts = np.unique(values, return_index=True)
+        self._values = unique
+        self._cumulative = np.cumsum(np.add.reduceat(weights, starts)) if len(unique) else np.empty(0, dtype=np.int64)
+
+    # --- queries ---
+
+    @property
+    def count(self):
+        self._flush()
+        return int(self._cumulative[-1]) if len(self._cumulative) else 0
+
+    def __len__(self):
+        return self.count
+
+    def rank(self, value):
+        """Number of observations <= value"""
+        self._flush()
+        i = int(np.searchsorted(self._values, value, side='right'))
+        return int(self._cumulative[i - 1]) if i else 0
+
+    def percentile(self, value):
+        """Fraction of observations <= value (ties share the same percentile)"""
+        count = self.count
+        return self.rank(value) / count if count else None
+
+    def quantile(self, q):
+        """Smallest observed value with at least q of the observations at or below it"""
+        count = self.count
+        if not count:
+            return None
+        i = int(np.searchsorted(self._cumulative, max(q, 0.0) * count, side='left'))
+        return float(self._values[min(i, len(self._values) - 1)])
+
+    # --- persistence ---
+
+    def to_dict(self):
+        self._flush()
+        return {"capacity": self.capacity, "exact": self.exact, "min": self.min, "max": self.max,
+                "levels": [level.tolist() for level in self._levels], "offsets": list(self._offsets)}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(capacity=data.get("capacity", DEFAULT_CAPACITY))
+        sketch._levels = [np.asarray(level, dtype=float) for level in data["levels"]]
+        sketch._offsets = list(data.get("offsets", [0] * len(sketch._levels)))
+        sketch.min, sketch.max = data.get("min"), data.get("max")
+        sketch.exact = data.get("exact", True)
+        sketch._compress()
+        return sketch
+
+
+class MetricNormalizer:
+    """One QuantileSketch per metric; scores values by percentile"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.sketches = {}
+
+    def __contains__(self, metric):
+        return metric in self.sketches and self.sketches[metric].count > 0
+
+    def add(self, metric, values):
+        sketch = self.sketches.setdefault(metric, QuantileSketch(capacity=self.capacity))
+        sketch.add(values)
+        return self
+
+    def observe(self, record, extractors):
+        """Add one record's value for every metric in {metric: fn(record)}"""
+        for metric, extract in extractors.items():
+            self.add(metric, [extract(record)])
+        return self
+
+    def merge(self, other):
+        for metric, sketch in other.sketches.items():
+            self.sketches.setdefault(metric, QuantileSketch(capacity=self.capacity)).merge(sketch)
+        return self
+
+    def percentile(self, metric, value):
+        return self.sketches[metric].percentile(value)
+
+    def score(self, metric, value, scale=10, higher_is_better=True):
+        """
+        Percentile mapped to 0..scale (lower_is_better flips it). Values tied
+        at the worst end (e.g. every locality with a zero count) score 0.
+        """
+        if value is None or metric not in self:
+            return None
+        sketch = self.sketches[metric]
+        if higher_is_better:
+            return 0.0 if value <= sketch.min else self.percentile(metric, value) * scale
+        if value >= sketch.max:
+            return 0.0
+        # Share of observations >= value
+        below = sketch.rank(np.nextafter(value, -np.inf))
+        return (sketch.count - below) / sketch.count * scale
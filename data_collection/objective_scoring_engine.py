@@ -8,6 +8,8 @@ import os
 import sys
 import json
 
+from atomic_io import write_json
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -204,6 +206,107 @@ class ObjectiveScoringEngine:
             "breakdown": scores
         }
     
+    def score_arrays(self, data):
+        """
+        Vectorized calculate_overall_score for raster / grid scoring.
+        
+        `data` maps the same field names to equally-shaped NumPy arrays
+        (NaN = missing). Mirrors the per-locality formulas above, including
+        their rounding, so a grid cell and a locality with identical inputs
+        get identical scores.
+        """
+        import numpy as np
+        
+        def rnd(x, digits):
+            # Match Python's round(), not np.round: they disagree on values
+            # like 9.05 and the grid must reproduce the per-locality scores.
+            # Only near-ties need the slow exact path.
+            x = np.array(x, dtype=float, ndmin=1)
+            scale = 10 ** digits
+            y = x * scale
+            out = np.rint(y) / scale
+            tie = np.abs(np.abs(y - np.trunc(y)) - 0.5) < 1e-6
+            if tie.any():
+                out[tie] = [round(v, digits) for v in x[tie].tolist()]
+            return out
+        
+        def field(name, default):
+            value = data.get(name)
+            if value is None:
+                return None if default is None else np.float64(default)
+            return np.asarray(value, dtype=float)
+        
+        def count(name):
+            value = field(name, 0)
+            return np.nan_to_num(value, nan=0.0)
+        
+        def travel(minutes):
+            if minutes is None:
+                return np.float64(5)
+            score = rnd(np.clip(10 - minutes / 6, 0, 10), 1)
+            return np.where(np.isnan(minutes), 5, score)
+        
+        def amenity(n, rating, max_expected):
+            count_score = np.minimum(10, n / max_expected * 10)
+            plain = rnd(count_score, 1)
+            if rating is None:
+                return plain
+            has_rating = ~np.isnan(rating) & (rating != 0)
+            rating_score = np.where(has_rating, (rating - 1) * 2.5, 5)
+            combined = rnd(count_score * 0.6 + rating_score * 0.4, 1)
+            return np.where(has_rating, combined, plain)
+        
+        # Accessibility
+        access_weights = {
+            "technopark_time": 0.30, "city_centre_time": 0.25, "secretariat_time": 0.15,
+            "airport_time": 0.15, "ksrtc_stand_time": 0.15,
+        }
+        accessibility = rnd(sum(
+            travel(field(f, None)) * w for f, w in access_weights.items()
+        ), 1)
+        
+        # Amenities
+        amenities = rnd(
+            amenity(count("hospital_count"), field("hospital_avg_rating", None), 40) * 0.25
+            + amenity(count("school_count"), field("school_avg_rating", None), 40) * 0.20
+            + amenity(count("supermarket_count") + count("pharmacy_count"), None, 40) * 0.20
+            + amenity(count("bank_count") + count("atm_count"), field("bank_avg_rating", None), 40) * 0.15
+            + amenity(count("restaurant_count") + count("cafe_count") + count("gym_count"),
+                      field("restaurant_avg_rating", None), 40) * 0.20,
+            1)
+        
+        # Safety
+        safety = rnd(np.minimum(10, count("police_count") * 0.5) * 0.7
+                          + np.minimum(10, count("fire_station_count") * 2) * 0.3, 1)
+        
+        # Environment
+        noise = np.nan_to_num(field("noise_score", 5), nan=5.0)
+        flood = np.nan_to_num(field("flood_safety_score", 5), nan=5.0)
+        environment = rnd(np.minimum(10, count("park_count") * 0.5) * 0.4
+                               + noise * 0.3 + flood * 0.3, 1)
+        
+        # Economy
+        job = np.nan_to_num(field("job_proximity_score", 5), nan=5.0)
+        commercial = np.minimum(10, (count("bank_count") + count("supermarket_count") + count("atm_count")) / 5)
+        developer = np.minimum(10, count("real_estate_agency_count") * 0.5)
+        economy = rnd(job * 0.5 + commercial * 0.3 + developer * 0.2, 1)
+        
+        breakdown = {
+            "accessibility": accessibility,
+            "amenities": amenities,
+            "safety": safety,
+            "environment": environment,
+            "economy": economy,
+        }
+        overall = rnd(sum(
+            breakdown[cat] * weight for cat, weight in self.CATEGORY_WEIGHTS.items()
+        ), 2)
+        
+        return {
+            "overall": overall,
+            "breakdown": breakdown
+        }
+    
     def rank_localities(self, localities_data):
         """
         Rank all localities by overall score
@@ -264,13 +367,12 @@ def main():
     
     # Save results
     output_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'objective_rankings.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "methodology": "100% Objective API-Sourced Data",
-            "last_updated": "2024-12-10",
-            "category_weights": ObjectiveScoringEngine.CATEGORY_WEIGHTS,
-            "rankings": ranked
-        }, f, indent=2, ensure_ascii=False)
+    write_json(output_file, {
+        "methodology": "100% Objective API-Sourced Data",
+        "last_updated": "2024-12-10",
+        "category_weights": ObjectiveScoringEngine.CATEGORY_WEIGHTS,
+        "rankings": ranked
+    })
     
     print(f"\n✅ Rankings saved to: {output_file}")
     print("="*70)
@@ -0,0 +1,483 @@
+"""
+Photo Pipeline
+Downloads, deduplicates and optimizes every photo referenced by the site's
+data files, replacing the separate download / optimize Node scripts.
+
+1. Collect every `image` / `photo_url` in PHOTO_DATA_FILES: local files under
+   images/ or Places photo URLs (stored without the API key, which is only
+   added here at download time)
+2. Download new remote photos with a bounded worker pool
+3. Identify photos by content hash (exact duplicates) and a 64-bit
+   difference hash (near duplicates - the same photo re-encoded or resized).
+   Near duplicates are only merged within one entity (place, locality), so
+   two different places with similar-looking photos keep their own
+4. Encode a responsive ladder (WIDTHS) in AVIF and WebP plus one JPEG
+   fallback, under content-addressed paths:
+       images/derived/<id[:2]>/<id>-<width>.<avif|webp|jpg>
+5. Rewrite remote URLs in the data files to the local fallback and write
+   data/photo_manifest.json, which js/utils/image-optimizer.js uses to
+   build srcset / <picture> markup
+
+Runs are resumable: unchanged sources (same file stat or photo reference)
+are neither re-read nor re-encoded, so a refresh only pays for new photos.
+
+Requires Pillow (AVIF needs Pillow >= 11.3).
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from atomic_io import atomic_write, write_json
+
+# Pillow is imported inside the functions that use it so the fetch scripts
+# can import places_photo_url() without it.
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+DERIVED_DIR = 'images/derived'  # relative to the site root, as in the manifest
+MANIFEST_FILE = os.path.join(DATA_DIR, 'photo_manifest.json')
+CACHE_FILE = os.path.join(ROOT_DIR, DERIVED_DIR, 'cache.json')
+
+PHOTO_DATA_FILES = [
+    'malls.json', 'boutiques.json', 'specialty_shops.json',
+    'museums.json', 'religious_sites.json',
+    'banking.json', 'education.json', 'healthcare.json',
+    'restaurants.json', 'cafes.json', 'hotels.json',
+    'premium_spots.json', 'locality_photos.json', 'localities.json',
+]
+PHOTO_FIELDS = ('image', 'photo_url')
+
+PLACES_PHOTO_URL = 'https://maps.googleapis.com/maps/api/place/photo'
+WIDTHS = [320, 640, 1024, 1600]
+FORMATS = {'avif': {'quality': 50, 'speed': 6}, 'webp': {'quality': 80, 'method': 4}}
+FALLBACK_WIDTH = 1024
+FALLBACK_QUALITY = 82
+DHASH_DISTANCE = 4  # bits; at or below this two photos are the same picture
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_RETRIES = 3
+
+
+def places_photo_url(photo_reference, max_width=800):
+    """Places photo URL without the API key (added only when downloading)"""
+    if not photo_reference:
+        return None
+    return f"{PLACES_PHOTO_URL}?maxwidth={max_width}&photoreference={photo_reference}"
+
+
+def _strip_key(url):
+    """Drop any &key= a legacy URL still carries"""
+    parts = [p for p in url.split('&') if not p.startswith('key=')]
+    return '&'.join(parts)
+
+
+def is_remote(src):
+    return src.startswith('http://') or src.startswith('https://')
+
+
+def variant_path(asset_id, width, fmt):
+    return f"{DERIVED_DIR}/{asset_id[:2]}/{asset_id}-{width}.{fmt}"
+
+
+# ---------------------------------------------------------------------------
+# Collecting references
+# ---------------------------------------------------------------------------
+
+def _walk(node, visit):
+    """Call visit(src, owner) for every photo field; owner is the dict holding it"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in PHOTO_FIELDS and isinstance(value, str) and value:
+                replacement = visit(value, node)
+                if replacement is not None:
+                    node[key] = replacement
+            else:
+                _walk(value, visit)
+    elif isinstance(node, list):
+        for item in node:
+            _walk(item, visit)
+
+
+def load_data_files():
+    """{filename: (parsed data, ensure_ascii used when it was written)}"""
+    files = {}
+    for name in PHOTO_DATA_FILES:
+        path = os.path.join(DATA_DIR, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            raw = f.read()
+        files[name] = (json.loads(raw), raw.isascii() and b'\\u' in raw)
+    return files
+
+
+def _entity_key(owner, src):
+    """The place / locality a photo belongs to (same id across data files)"""
+    for field in ('place_id', 'id', 'name'):
+        if owner.get(field):
+            return f"{field}:{owner[field]}"
+    return f"src:{src}"
+
+
+def collect_sources(files):
+    """
+    (unique photo sources in first-seen order, {source: entity keys})
+    for every photo the data files reference
+    """
+    sources = {}
+
+    def visit(src, owner):
+        src = _strip_key(src) if is_remote(src) else src
+        sources.setdefault(src, set()).add(_entity_key(owner, src))
+
+    for data, _ in files.values():
+        _walk(data, visit)
+    return list(sources), sources
+
+
+# ---------------------------------------------------------------------------
+# Fetching and hashing
+# ---------------------------------------------------------------------------
+
+def download(url, api_key):
+    """Photo bytes for a Places URL, with retries and backoff"""
+    import requests
+
+    for attempt in range(DOWNLOAD_RETRIES):
+        try:
+            full_url = f"{url}&key={api_key}" if url.startswith(PLACES_PHOTO_URL) else url
+            response = requests.get(full_url, timeout=30)
+            if response.status_code == 200 and response.content:
+                return response.content
+            if response.status_code not in (429, 500, 502, 503):
+                raise RuntimeError(f"HTTP {response.status_code}")
+        except requests.RequestException:
+            pass
+        time.sleep(2 ** attempt)
+    raise RuntimeError("download failed after retries")
+
+
+def dhash(image, size=8):
+    """64-bit difference hash: robust to re-encoding and resizing"""
+    from PIL import Image
+
+    small = image.convert('L').resize((size + 1, size), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()  # one byte per grey pixel, row-major
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def identify(data):
+    """Content id, dHash and dimensions of one photo"""
+    import io
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        return {
+            'id': hashlib.sha256(data).hexdigest()[:16],
+            'dhash': f"{dhash(image):016x}",
+            'width': image.width,
+            'height': image.height,
+        }
+
+
+def ladder(width):
+    """Ladder widths for a source, never upscaling"""
+    widths = [w for w in WIDTHS if w < width]
+    top = min(width, WIDTHS[-1])
+    return widths if top in widths else widths + [top]
+
+
+def encode_variants(data, asset_id, root=ROOT_DIR):
+    """Write every missing derivative of one photo; returns its ladder"""
+    import io
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        widths = ladder(image.width)
+        fallback = max([w for w in widths if w <= FALLBACK_WIDTH] or widths[:1])
+        os.makedirs(os.path.join(root, DERIVED_DIR, asset_id[:2]), exist_ok=True)
+
+        for width in widths:
+            resized = image if width == image.width else image.resize(
+                (width, round(image.height * width / image.width)), Image.Resampling.LANCZOS)
+            jobs = dict(FORMATS)
+            if width == fallback:
+                jobs['jpg'] = {'quality': FALLBACK_QUALITY, 'optimize': True, 'progressive': True}
+            for fmt, options in jobs.items():
+                path = os.path.join(root, variant_path(asset_id, width, fmt))
+                if os.path.exists(path):
+                    continue
+                buffer = io.BytesIO()
+                resized.save(buffer, format={'jpg': 'JPEG'}.get(fmt, fmt.upper()), **options)
+                with atomic_write(path, 'wb', keep=0) as f:
+                    f.write(buffer.getvalue())
+    return widths, fallback
+
+
+def _encode_job(args):
+    source_path, data, asset_id = args
+    if data is None:
+        with open(source_path, 'rb') as f:
+            data = f.read()
+    return asset_id, encode_variants(data, asset_id)
+
+
+def _variants_complete(asset):
+    return all(
+        os.path.exists(os.path.join(ROOT_DIR, variant_path(asset['id'], w, fmt)))
+        for w in asset['widths'] for fmt in FORMATS
+    ) and os.path.exists(os.path.join(ROOT_DIR, variant_path(asset['id'], asset['fallback'], 'jpg')))
+
+
+# ---------------------------------------------------------------------------
+# Deduplication
+# ---------------------------------------------------------------------------
+
+def cluster_near_duplicates(assets, entities):
+    """
+    {asset id: canonical asset id}. Within each entity (a set of asset ids),
+    photos whose dHashes differ by at most DHASH_DISTANCE bits share the
+    highest-resolution copy; photos of different entities are never merged.
+    """
+    parent = {aid: aid for aid in assets}
+
+    def find(aid):
+        while parent[aid] != aid:
+            parent[aid] = parent[parent[aid]]
+            aid = parent[aid]
+        return aid
+
+    for members in entities:
+        members = sorted(aid for aid in members if aid in assets)
+        for i, a in enumerate(members):
+            bits = int(assets[a]['dhash'], 16)
+            for b in members[i + 1:]:
+                if bin(bits ^ int(assets[b]['dhash'], 16)).count('1') <= DHASH_DISTANCE:
+                    parent[find(a)] = find(b)
+
+    # Each cluster is served by its largest photo
+    best = {}
+    for asset in sorted(assets.values(), key=lambda a: (-a['width'] * a['height'], a['id'])):
+        best.setdefault(find(asset['id']), asset['id'])
+    return {aid: best[find(aid)] for aid in assets}
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+def load_cache():
+    if os.path.exists(CACHE_FILE):
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {"sources": {}, "assets": {}}
+
+
+def _source_stamp(src):
+    """Cheap change detector: file stat for local files, the URL itself for remote"""
+    if is_remote(src):
+        return src
+    stat = os.stat(os.path.join(ROOT_DIR, src))
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def run(workers=None, download_workers=DOWNLOAD_WORKERS, api_key=None):
+    cache = load_cache()
+    files = load_data_files()
+    sources, owners = collect_sources(files)
+    stats = {'sources': len(sources), 'unchanged': 0, 'downloaded': 0, 'read': 0,
+             'missing': 0, 'failed': 0, 'encoded': 0}
+
+    # --- 1. Identify new / changed sources (downloads run concurrently) ---
+    pending = {}
+    for src in sources:
+        if not is_remote(src) and not os.path.exists(os.path.join(ROOT_DIR, src)):
+            stats['missing'] += 1
+            continue
+        # A fallback written back by an earlier run is its own asset
+        derived_id = os.path.basename(src).split('-')[0] if src.startswith(DERIVED_DIR + '/') else None
+        if derived_id in cache['assets']:
+            cache['sources'][src] = {'stamp': _source_stamp(src), 'id': derived_id}
+            stats['unchanged'] += 1
+            continue
+        cached = cache['sources'].get(src)
+        if cached and cached['stamp'] == _source_stamp(src) and cached['id'] in cache['assets']:
+            stats['unchanged'] += 1
+        else:
+            pending[src] = None
+
+    remote = [src for src in pending if is_remote(src)]
+    if remote and not api_key:
+        print(f"⚠️ {len(remote)} remote photos need GOOGLE_MAPS_API_KEY; skipping them")
+        for src in remote:
+            del pending[src]
+    elif remote:
+        with ThreadPoolExecutor(max_workers=download_workers) as pool:
+            futures = {pool.submit(download, src, api_key): src for src in remote}
+            for future in as_completed(futures):
+                src = futures[future]
+                try:
+                    pending[src] = future.result()
+                    stats['downloaded'] += 1
+                except Exception as e:
+                    print(f"   ❌ {src[:80]}...: {e}")
+                    del pending[src]
+                    stats['failed'] += 1
+
+    raw = {}
+    for src, data in pending.items():
+        if data is None:
+            with open(os.path.join(ROOT_DIR, src), 'rb') as f:
+                data = f.read()
+            stats['read'] += 1
+        try:
+            info = identify(data)
+        except Exception as e:
+            print(f"   ❌ {src}: not a readable image ({e})")
+            stats['failed'] += 1
+            continue
+        cache['sources'][src] = {'stamp': _source_stamp(src), 'id': info['id']}
+        asset = cache['assets'].setdefault(info['id'], info)
+        # Local sources are re-read by the encoder instead of held in memory
+        raw.setdefault(info['id'], (None if not is_remote(src) else data, src))
+        asset.setdefault('widths', ladder(info['width']))
+
+    # --- 2. Near-duplicate clustering within each entity ---
+    referenced = {cache['sources'][s]['id'] for s in sources if s in cache['sources']}
+    assets = {aid: cache['assets'][aid] for aid in referenced}
+    entities = {}
+    for src in sources:
+        if src in cache['sources']:
+            for key in owners[src]:
+                entities.setdefault(key, set()).add(cache['sources'][src]['id'])
+    canonical = cluster_near_duplicates(assets, entities.values())
+
+    # --- 3. Encode canonical assets whose derivatives are missing ---
+    jobs = []
+    unavailable = set()
+    for aid in sorted(set(canonical.values())):
+        asset = cache['assets'][aid]
+        if 'fallback' in asset and _variants_complete(asset):
+            continue
+        if aid in raw:
+            data, src = raw[aid]
+        else:
+            # Derivatives were deleted since the last run: fetch the source again
+            src = next(s for s in sources if cache['sources'].get(s, {}).get('id') == aid)
+            data = None
+            if is_remote(src):
+                if not api_key:
+                    print(f"   ⚠️ {src[:80]}...: needs GOOGLE_MAPS_API_KEY to re-encode")
+                    unavailable.add(aid)
+                    stats['failed'] += 1
+                    continue
+                try:
+                    data = download(src, api_key)
+                    stats['downloaded'] += 1
+                except Exception as e:
+                    print(f"   ❌ {src[:80]}...: {e}")
+                    unavailable.add(aid)
+                    stats['failed'] += 1
+                    continue
+        jobs.append((os.path.join(ROOT_DIR, src) if not is_remote(src) else None, data, aid))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for aid, (widths, fallback) in pool.map(_encode_job, jobs):
+                cache['assets'][aid].update(widths=widths, fallback=fallback)
+                stats['encoded'] += 1
+    write_json(CACHE_FILE, cache, keep=0)
+
+    def published(entry):
+        """Canonical asset for a source, or None if it has no derivatives this run"""
+        aid = canonical[entry['id']]
+        asset = cache['assets'][aid]
+        return None if aid in unavailable or 'fallback' not in asset else asset
+
+    # --- 4. Manifest and data file rewrite ---
+    photos = {}
+    for src in sources:
+        entry = cache['sources'].get(src)
+        asset = published(entry) if entry else None
+        if not asset:
+            continue
+        key = src if not is_remote(src) else variant_path(asset['id'], asset['fallback'], 'jpg')
+        photos[key] = {'id': asset['id'], 'w': asset['widths'], 'fb': asset['fallback'],
+                       'ratio': round(asset['width'] / asset['height'], 3)}
+
+    for name, (data, ensure_ascii) in files.items():
+        changed = []
+
+        def visit(src, owner):
+            if not is_remote(src):
+                return None
+            entry = cache['sources'].get(_strip_key(src))
+            asset = published(entry) if entry else None
+            if not asset:
+                return None
+            changed.append(src)
+            return variant_path(asset['id'], asset['fallback'], 'jpg')
+
+        _walk(data, visit)
+        if changed:
+            write_json(os.path.join(DATA_DIR, name), data, ensure_ascii=ensure_ascii)
+            print(f"   🔗 {name}: {len(changed)} remote photo URLs replaced with local files")
+
+    manifest = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "base": DERIVED_DIR,
+        "formats": list(FORMATS),
+        "fallback": "jpg",
+        "photos": photos,
+    }
+    write_json(MANIFEST_FILE, manifest, indent=None)
+    stats['assets'] = len(set(canonical.values()))
+    stats['near_duplicates'] = len(canonical) - stats['assets']
+    return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download, dedupe and optimize site photos")
+    parser.add_argument('--workers', type=int, default=None, help="encoder processes (default: CPU count)")
+    parser.add_argument('--download-workers', type=int, default=DOWNLOAD_WORKERS)
+    return parser.parse_args()
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+    args = parse_args()
+
+    print("\n" + "="*70)
+    print("🖼️ PHOTO PIPELINE")
+    print("="*70)
+
+    start = time.perf_counter()
+    stats = run(args.workers, args.download_workers, os.getenv('GOOGLE_MAPS_API_KEY'))
+
+    print(f"\n📊 {stats['sources']} referenced photos -> {stats['assets']} unique assets "
+          f"({stats['near_duplicates']} near duplicates merged)")
+    print(f"   unchanged: {stats['unchanged']} | downloaded: {stats['downloaded']} | read: {stats['read']} | "
+          f"encoded: {stats['encoded']} | missing: {stats['missing']} | failed: {stats['failed']}")
+    print(f"✅ Manifest saved to {os.path.abspath(MANIFEST_FILE)} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Place Store
+One flat list of every known place with coordinates, used by the raster,
+spatial-index and accessibility stages.
+
+Sources (merged, deduplicated by place_id + type):
+1. data/places.json - raw amenities harvested by collect_deduplicated_data.py
+   (Google Places types: school, hospital, police, bank, ...)
+2. data/<category>.json - curated category files shown on the site, mapped
+   to the closest Google Places type
+"""
+
+import os
+
+from json_stream import iter_records, stream_dump
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+PLACES_FILE = os.path.join(DATA_DIR, 'places.json')
+
+# Site category file -> Google Places type used by the scoring engines
+CATEGORY_TYPES = {
+    'healthcare': 'hospital',
+    'education': 'school',
+    'banking': 'bank',
+    'restaurants': 'restaurant',
+    'cafes': 'cafe',
+    'hotels': 'lodging',
+    'malls': 'shopping_mall',
+    'museums': 'museum',
+    'religious_sites': 'place_of_worship',
+    'specialty_shops': 'store',
+    'boutiques': 'clothing_store',
+}
+
+
+def _category_places(category, place_type):
+    """Read one curated category file as place records"""
+    path = os.path.join(DATA_DIR, f'{category}.json')
+    if not os.path.exists(path):
+        return []
+
+    places = []
+    for entry in iter_records(path):
+        location = entry.get('location') or {}
+        if location.get('lat') is None or location.get('lng') is None:
+            continue
+        places.append({
+            'place_id': entry.get('id'),
+            'name': entry.get('name'),
+            'lat': location['lat'],
+            'lng': location['lng'],
+            'rating': entry.get('rating'),
+            'type': place_type,
+            'category': category,
+        })
+    return places
+
+
+def load_places(types=None, include_categories=True):
+    """
+    Load every place with coordinates.
+    types: optional iterable of Google Places types to keep.
+    """
+    wanted = set(types) if types else None
+    merged = {}
+
+    sources = []
+    if os.path.exists(PLACES_FILE):
+        sources.append(iter_records(PLACES_FILE))
+    if include_categories:
+        for category, place_type in CATEGORY_TYPES.items():
+            if wanted is None or place_type in wanted:
+                sources.append(_category_places(category, place_type))
+
+    for places in sources:
+        for place in places:
+            if wanted is not None and place.get('type') not in wanted:
+                continue
+            if place.get('lat') is None or place.get('lng') is None:
+                continue
+            key = (place.get('place_id') or f"{place['lat']},{place['lng']}", place.get('type'))
+            # First source wins: harvested data beats curated copies
+            merged.setdefault(key, place)
+
+    return list(merged.values())
+
+
+def group_by_type(places):
+    """Split a place list into {type: [places]}"""
+    grouped = {}
+    for place in places:
+        grouped.setdefault(place.get('type'), []).append(place)
+    return grouped
+
+
+def save_places(places, path=PLACES_FILE):
+    """Write harvested places (any iterable) to the store"""
+    stream_dump(iter(places), path)
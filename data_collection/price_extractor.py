@@ -0,0 +1,122 @@
+"""
+Price Extractor
+Rule-based extraction of land (lakhs per cent) and apartment (₹ per sq ft)
+prices from web search snippets, tried before the Gemini extractor.
+
+Compiled patterns cover the formats listings actually use: "₹12 lakh per
+cent", "10-12 L/cent", "Rs. 15,00,000 per cent", "1.2 crore per acre",
+"₹6,500/sq ft", "5,200 - 6,800 per sqft", "6.5K/sft". Amounts are normalized
+to the index units (ranges count as their midpoint), implausible values are
+dropped, and each field is the median over snippets.
+
+A field is resolved locally only when at least MIN_SNIPPETS snippets agree
+within MAX_SPREAD (max / min); anything sparser or more scattered is left
+for the LLM.
+"""
+
+import re
+from statistics import median
+
+MIN_SNIPPETS = 2
+MAX_SPREAD = 2.0
+LAND_BOUNDS = (0.5, 200)        # lakhs per cent
+APARTMENT_BOUNDS = (1500, 30000)  # ₹ per sq ft
+
+_CUR = r'(?:₹|rs\.?|inr)\s*'
+_NUM = r'(\d{1,3}(?:,\d{2,3})+|\d+(?:\.\d+)?)'
+_UNIT = r'(?:(lakhs?|lacs?|l|crores?|cr|k)\b\.?)'
+_DASH = r'\s*(?:-|–|to)\s*'
+
+LAND_RE = re.compile(
+    rf'({_CUR})?{_NUM}\s*{_UNIT}?(?:{_DASH}({_CUR})?{_NUM}\s*{_UNIT}?)?'
+    r'\s*(?:per|/|a|an|each)\s*(cent|acre)s?\b',
+    re.IGNORECASE,
+)
+APARTMENT_RE = re.compile(
+    rf'({_CUR})?{_NUM}\s*(k)?\b(?:{_DASH}({_CUR})?{_NUM}\s*(k)?\b)?'
+    r'\s*(?:per|/)\s*(?:sq\.?\s*f(?:ee|oo)?t\.?|sqft|sft|square\s*f(?:ee|oo)t)',
+    re.IGNORECASE,
+)
+
+_MULTIPLIERS = {'l': 1e5, 'lakh': 1e5, 'lakhs': 1e5, 'lac': 1e5, 'lacs': 1e5,
+                'cr': 1e7, 'crore': 1e7, 'crores': 1e7, 'k': 1e3}
+
+
+def _number(text):
+    return float(text.replace(',', ''))
+
+
+def _rupees(amount, unit):
+    return amount * _MULTIPLIERS.get((unit or '').lower().rstrip('.'), 1)
+
+
+def land_prices(snippet):
+    """Lakhs per cent for every land price quoted in one snippet"""
+    values = []
+    for cur, low, low_unit, cur2, high, high_unit, area in LAND_RE.findall(snippet):
+        unit = high_unit or low_unit
+        # "12 per cent" with neither currency nor unit is a percentage
+        if not unit and not (cur or cur2):
+            continue
+        amounts = [_rupees(_number(low), low_unit or unit)]
+        if high:
+            amounts.append(_rupees(_number(high), high_unit or unit))
+        per_cent = sum(amounts) / len(amounts) / 1e5
+        if area.lower() == 'acre':
+            per_cent /= 100
+        if LAND_BOUNDS[0] <= per_cent <= LAND_BOUNDS[1]:
+            values.append(round(per_cent, 2))
+    return values
+
+
+def apartment_prices(snippet):
+    """₹ per sq ft for every apartment rate quoted in one snippet"""
+    values = []
+    for _, low, low_k, _, high, high_k in APARTMENT_RE.findall(snippet):
+        amounts = [_rupees(_number(low), low_k or high_k)]
+        if high:
+            amounts.append(_rupees(_number(high), high_k or low_k))
+        rate = sum(amounts) / len(amounts)
+        if APARTMENT_BOUNDS[0] <= rate <= APARTMENT_BOUNDS[1]:
+            values.append(round(rate))
+    return values
+
+
+def aggregate(per_snippet):
+    """
+    (median, range string, confidence) from each snippet's values, or
+    confidence None when there is not enough agreement to skip the LLM
+    """
+    snippet_medians = [median(v) for v in per_snippet if v]
+    if not snippet_medians:
+        return None, None, None
+    value = median(snippet_medians)
+    low, high = min(snippet_medians), max(snippet_medians)
+    if len(snippet_medians) < MIN_SNIPPETS or high > low * MAX_SPREAD:
+        return value, f"{low}-{high}", None
+    confidence = "high" if len(snippet_medians) > MIN_SNIPPETS else "medium"
+    return value, f"{low}-{high}", confidence
+
+
+def extract_prices(land_snippets, apartment_snippets):
+    """
+    Same shape as the Gemini extractor's output, plus a confidence per
+    field and 'resolved': which fields the rules settled (the rest should
+    go to the LLM).
+    """
+    land, land_range, land_conf = aggregate([land_prices(s) for s in land_snippets])
+    apt, apt_range, apt_conf = aggregate([apartment_prices(s) for s in apartment_snippets])
+    resolved = [field for field, conf in (('land_price_per_cent_lakhs', land_conf),
+                                          ('apartment_price_per_sqft', apt_conf)) if conf]
+    confidences = [c for c in (land_conf, apt_conf) if c]
+    return {
+        "land_price_per_cent_lakhs": round(land, 2) if land_conf else None,
+        "apartment_price_per_sqft": round(apt) if apt_conf else None,
+        "land_price_range": land_range if land_conf else None,
+        "apartment_price_range": apt_range if apt_conf else None,
+        "confidence": min(confidences, key=["medium", "high"].index) if len(confidences) == 2 else "low",
+        "land_price_confidence": land_conf,
+        "apartment_price_confidence": apt_conf,
+        "source_notes": f"Regex: {len(land_snippets)} land / {len(apartment_snippets)} apartment snippets",
+        "resolved": resolved,
+    }
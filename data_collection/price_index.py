@@ -0,0 +1,210 @@
+"""
+Price Index
+Canonical per-locality property prices (data/price_index.json), maintained
+by the price stage and read by every ranking stage.
+
+Each locality holds, per field (land_price in lakhs/cent, apartment_price
+in ₹/sqft), the current value with its source, confidence, override flag
+and timestamp, plus a short history of observations (every extraction run,
+every manual correction). Manual overrides win over automated extractions
+until they are cleared.
+
+The current value is the only price any stage reads. The site's published
+prices (rankings.json, which the clean rankings have always used) are the
+overrides, from CURATED_SOURCE; the former merge_prices corrections and the
+extractions are kept as observations, and clearing an override falls back
+to the latest extraction.
+
+Usage:
+    python data_collection/price_index.py show [LOCALITY]
+    python data_collection/price_index.py set Varkala --land 1.5 --note "site visit"
+    python data_collection/price_index.py unset Varkala --field land_price
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, timezone
+
+from atomic_io import write_json
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+PRICE_INDEX_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'price_index.json')
+
+# Index field -> key used by the extraction output (property_prices.json)
+PRICE_FIELDS = {
+    'land_price': 'land_price_per_cent_lakhs',
+    'apartment_price': 'apartment_price_per_sqft',
+}
+MAX_OBSERVATIONS = 10  # per locality and field
+CURATED_SOURCE = 'curated (rankings.json)'
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def load_index(path=PRICE_INDEX_FILE):
+    if not os.path.exists(path):
+        return {"updated_at": None, "localities": {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_index(index, path=PRICE_INDEX_FILE):
+    index['updated_at'] = _now()
+    write_json(path, index)
+
+
+def _entry(index, locality):
+    return index['localities'].setdefault(locality, {'observations': []})
+
+
+def _known_entry(index, locality):
+    """Entry for a locality already in the index (no typo'd new ones)"""
+    if locality not in index['localities']:
+        raise ValueError(f"Unknown locality: {locality}")
+    return index['localities'][locality]
+
+
+def observe(index, locality, field, value, source, confidence=None, observed_at=None, note=None,
+            promote=True):
+    """
+    Record one observed price. It becomes the current value unless the
+    field carries a manual override, the observation has no value, or
+    promote is False (history only).
+    """
+    if field not in PRICE_FIELDS:
+        raise ValueError(f"Unknown price field: {field}")
+    entry = _entry(index, locality)
+    observed_at = observed_at or _now()
+
+    observation = {'field': field, 'value': value, 'source': source,
+                   'confidence': confidence, 'observed_at': observed_at}
+    if note:
+        observation['note'] = note
+    entry['observations'].append(observation)
+    same_field = [o for o in entry['observations'] if o['field'] == field]
+    for stale in same_field[:-MAX_OBSERVATIONS]:
+        entry['observations'].remove(stale)
+
+    current = entry.get(field)
+    if promote and value is not None and not (current and current.get('override')):
+        entry[field] = {'value': value, 'source': source, 'confidence': confidence,
+                        'override': False, 'updated_at': observed_at}
+
+
+def set_override(index, locality, field, value, source='manual', note=None):
+    """Pin a field to a manually reviewed value"""
+    entry = _known_entry(index, locality)
+    observe(index, locality, field, value, source, confidence='manual', note=note)
+    entry[field] = {'value': value, 'source': source, 'confidence': 'manual',
+                    'override': True, 'updated_at': _now()}
+    if note:
+        entry[field]['note'] = note
+
+
+def clear_override(index, locality, field):
+    """Drop an override; the latest automated observation becomes current"""
+    entry = _known_entry(index, locality)
+    entry.pop(field, None)
+    for o in reversed(entry['observations']):
+        if (o['field'] == field and o['value'] is not None and o.get('confidence') != 'manual'
+                and o['source'] != CURATED_SOURCE):
+            entry[field] = {'value': o['value'], 'source': o['source'], 'confidence': o['confidence'],
+                            'override': False, 'updated_at': o['observed_at']}
+            break
+
+
+def record_extraction(index, extracted, source, observed_at=None):
+    """
+    Fold one price-stage result (a property_prices.json row) into the index.
+    Each field keeps its own '<field>_confidence' when the row has one.
+    """
+    for field, key in PRICE_FIELDS.items():
+        confidence = extracted.get(f'{field}_confidence', extracted.get('confidence'))
+        observe(index, extracted['locality'], field, extracted.get(key), source,
+                confidence=confidence, observed_at=observed_at)
+
+
+def load_prices(path=PRICE_INDEX_FILE):
+    """{locality: {'land_price', 'apartment_price'}} current values - what ranking stages need"""
+    index = load_index(path)
+    return {
+        name: {field: (entry.get(field) or {}).get('value') for field in PRICE_FIELDS}
+        for name, entry in index['localities'].items()
+    }
+
+
+def describe(name, entry):
+    lines = [f"📍 {name}"]
+    for field in PRICE_FIELDS:
+        current = entry.get(field)
+        if current:
+            flag = ' [override]' if current.get('override') else ''
+            lines.append(f"   {field:<16} {current['value']!s:>8}  {current['source']} "
+                         f"({current.get('confidence') or '?'}, {current['updated_at']}){flag}")
+        else:
+            lines.append(f"   {field:<16} {'-':>8}")
+    for o in entry['observations']:
+        lines.append(f"      · {o['observed_at']}  {o['field']:<16} {o['value']!s:>8}  {o['source']}")
+    return '\n'.join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Inspect and edit the canonical price index")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    show = sub.add_parser('show', help="current prices with provenance")
+    show.add_argument('locality', nargs='?')
+
+    set_cmd = sub.add_parser('set', help="manually override a locality's price(s)")
+    set_cmd.add_argument('locality')
+    set_cmd.add_argument('--land', type=float, help="land price, lakhs per cent")
+    set_cmd.add_argument('--apartment', type=float, help="apartment price, ₹ per sqft")
+    set_cmd.add_argument('--note')
+
+    unset = sub.add_parser('unset', help="clear an override")
+    unset.add_argument('locality')
+    unset.add_argument('--field', choices=list(PRICE_FIELDS), required=True)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    index = load_index()
+
+    if args.command == 'show':
+        names = [args.locality] if args.locality else sorted(index['localities'])
+        for name in names:
+            if name not in index['localities']:
+                print(f"❌ No prices for {name}")
+                continue
+            print(describe(name, index['localities'][name]))
+        return
+
+    if args.locality not in index['localities']:
+        print(f"❌ Unknown locality: {args.locality} (known: {', '.join(sorted(index['localities']))})")
+        return
+
+    if args.command == 'set':
+        if args.land is None and args.apartment is None:
+            print("❌ Nothing to set: pass --land and/or --apartment")
+            return
+        if args.land is not None:
+            set_override(index, args.locality, 'land_price', args.land, note=args.note)
+        if args.apartment is not None:
+            set_override(index, args.locality, 'apartment_price', args.apartment, note=args.note)
+    elif args.command == 'unset':
+        clear_override(index, args.locality, args.field)
+
+    save_index(index)
+    print(describe(args.locality, index['localities'][args.locality]))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,8 @@ Based on EoLI-inspired weighted scoring
 import json
 import sys
 
+from atomic_io import write_json
+
 # Fix Windows encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -213,8 +215,7 @@ def main():
         'methodology': 'EoLI-based weighted scoring: QoL 55%, Economic 20%, Sustainability 25%'
     }
     
-    with open('data_collection/output/rankings.json', 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    write_json('data_collection/output/rankings.json', output)
     
     print("\n" + "="*70)
     print("✅ Rankings saved to: data_collection/output/rankings.json")
@@ -0,0 +1,491 @@
+"""
+Road Graph - Offline Travel-Time Engine
+Loads a local OpenStreetMap extract into a compact CSR graph and answers
+drive-time queries without the Distance Matrix API.
+
+One Dijkstra run per destination (on the reversed graph) gives the travel
+time from EVERY road node to that destination, so travel-time features for
+thousands of points cost one nearest-node lookup each.
+
+Road network file:
+    data/osm/trivandrum.osm  (also .osm.gz / .osm.bz2)
+    e.g. an extract of the Thiruvananthapuram district from Geofabrik / BBBike,
+    converted to .osm XML with osmium or osmconvert.
+
+The compiled graph and per-destination node times are cached next to it in
+data/osm/road_graph.npz. The graph is rebuilt when the extract changes,
+and a destination's node times are recomputed when its coordinates move.
+
+Distance Matrix times already collected in data/objective_locality_data.json
+can be used to calibrate the free-flow estimates (`calibrate`).
+"""
+
+import os
+import sys
+import bz2
+import gzip
+import json
+import time
+import heapq
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from geo_utils import haversine_distance, GridIndex
+from atomic_io import atomic_write, write_json
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+OSM_DIR = os.path.join(DATA_DIR, 'osm')
+ROAD_NETWORK_FILE = os.path.join(OSM_DIR, 'trivandrum.osm')
+GRAPH_CACHE_FILE = os.path.join(OSM_DIR, 'road_graph.npz')
+CALIBRATION_FILE = os.path.join(OSM_DIR, 'calibration.json')
+LOCALITY_DATA_FILE = os.path.join(DATA_DIR, 'objective_locality_data.json')
+
+# Bump when parsing / speed rules change so stale caches are rebuilt
+GRAPH_FORMAT_VERSION = 1
+
+# Free-flow driving speed (km/h) per OSM highway class
+HIGHWAY_SPEEDS = {
+    'motorway': 80, 'motorway_link': 50,
+    'trunk': 60, 'trunk_link': 40,
+    'primary': 45, 'primary_link': 35,
+    'secondary': 35, 'secondary_link': 30,
+    'tertiary': 30, 'tertiary_link': 25,
+    'unclassified': 25, 'residential': 20,
+    'living_street': 10, 'service': 15, 'road': 20,
+}
+
+# Time to get from an off-road point to its nearest road node
+ACCESS_SPEED_KMH = 15
+# Points further than this from any road (sea, backwaters) get no time
+MAX_SNAP_KM = 2.0
+
+# Default calibration: Distance Matrix minutes ~ a + b * free-flow minutes
+DEFAULT_CALIBRATION = {"intercept": 0.0, "slope": 1.0}
+
+
+def _open_extract(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _parse_speed(maxspeed):
+    """'50', '50 km/h' or '30 mph' -> km/h, None if unparseable"""
+    if not maxspeed:
+        return None
+    parts = maxspeed.replace('km/h', ' ').split()
+    try:
+        value = float(parts[0])
+    except (ValueError, IndexError):
+        return None
+    return value * 1.609 if 'mph' in maxspeed else value
+
+
+def parse_osm(path):
+    """
+    Stream an OSM XML extract.
+    Returns (node_coords {osm_id: (lat, lng)}, ways [(node_ids, speed_kmh, oneway)]).
+    """
+    node_coords = {}
+    ways = []
+
+    with _open_extract(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event != 'end' or elem.tag not in ('node', 'way', 'relation'):
+                continue
+            if elem.tag == 'node':
+                node_coords[int(elem.get('id'))] = (float(elem.get('lat')), float(elem.get('lon')))
+            elif elem.tag == 'way':
+                tags = {t.get('k'): t.get('v') for t in elem.iter('tag')}
+                highway = tags.get('highway')
+                if highway in HIGHWAY_SPEEDS and tags.get('access') not in ('no', 'private'):
+                    speed = _parse_speed(tags.get('maxspeed')) or HIGHWAY_SPEEDS[highway]
+                    oneway = tags.get('oneway')
+                    if oneway == '-1':
+                        direction = -1
+                    elif oneway in ('yes', 'true', '1') or highway in ('motorway', 'motorway_link'):
+                        direction = 1
+                    else:
+                        direction = 0
+                    refs = [int(nd.get('ref')) for nd in elem.iter('nd')]
+                    ways.append((refs, speed, direction))
+            # Finished elements stay attached to <osm> even when cleared: drop them
+            root.clear()
+
+    return node_coords, ways
+
+
+class RoadGraph:
+    """
+    Directed road graph in CSR form.
+    indptr/indices/weights describe outgoing edges; weights are seconds.
+    """
+
+    def __init__(self, lats, lngs, indptr, indices, weights, source_hash=None):
+        self.lats = np.asarray(lats, dtype=float)
+        self.lngs = np.asarray(lngs, dtype=float)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.source_hash = source_hash
+        self._reverse = None
+
+    @property
+    def node_count(self):
+        return len(self.lats)
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    @classmethod
+    def from_edges(cls, lats, lngs, src, dst, seconds, source_hash=None):
+        """Build CSR arrays from an edge list, keeping the fastest parallel edge"""
+        n = len(lats)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        seconds = np.asarray(seconds, dtype=float)
+
+        order = np.lexsort((seconds, dst, src))
+        src, dst, seconds = src[order], dst[order], seconds[order]
+        first = np.ones(len(src), dtype=bool)
+        first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst, seconds = src[first], dst[first], seconds[first]
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        return cls(lats, lngs, indptr, dst, seconds, source_hash)
+
+    @classmethod
+    def from_osm(cls, path):
+        """Compile an OSM extract: keep only nodes used by drivable ways"""
+        node_coords, ways = parse_osm(path)
+
+        index = {}
+        seg_a, seg_b, seg_speed, seg_dir = [], [], [], []
+        for refs, speed, direction in ways:
+            ids = [index.setdefault(r, len(index)) for r in refs if r in node_coords]
+            seg_a += ids[:-1]
+            seg_b += ids[1:]
+            seg_speed += [speed] * (len(ids) - 1)
+            seg_dir += [direction] * (len(ids) - 1)
+
+        coords = np.empty((len(index), 2))
+        for osm_id, i in index.items():
+            coords[i] = node_coords[osm_id]
+
+        seg_a, seg_b = np.array(seg_a, dtype=np.int64), np.array(seg_b, dtype=np.int64)
+        seg_dir = np.array(seg_dir, dtype=np.int8)
+        km = haversine_distance(coords[seg_a, 0], coords[seg_a, 1], coords[seg_b, 0], coords[seg_b, 1])
+        t = np.asarray(km) / np.array(seg_speed, dtype=float) * 3600
+
+        forward, backward = seg_dir >= 0, seg_dir <= 0
+        src = np.concatenate([seg_a[forward], seg_b[backward]])
+        dst = np.concatenate([seg_b[forward], seg_a[backward]])
+        seconds = np.concatenate([t[forward], t[backward]])
+        return cls.from_edges(coords[:, 0], coords[:, 1], src, dst, seconds, file_hash(path))
+
+    def reversed(self):
+        """Same graph with every edge flipped (for times TO a node)"""
+        if self._reverse is None:
+            src = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+            self._reverse = RoadGraph.from_edges(self.lats, self.lngs, self.indices, src, self.weights)
+        return self._reverse
+
+    def save(self, path=GRAPH_CACHE_FILE, **extra):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_write(path, 'wb', keep=0) as f:
+            np.savez_compressed(
+                f, version=GRAPH_FORMAT_VERSION, source_hash=self.source_hash or '',
+                lats=self.lats, lngs=self.lngs, indptr=self.indptr,
+                indices=self.indices, weights=self.weights, **extra,
+            )
+
+    @classmethod
+    def load(cls, path=GRAPH_CACHE_FILE):
+        with np.load(path) as data:
+            if int(data['version']) != GRAPH_FORMAT_VERSION:
+                raise ValueError(f"Road graph cache {path} has an old format, rebuild it")
+            graph = cls(data['lats'], data['lngs'], data['indptr'], data['indices'],
+                        data['weights'], str(data['source_hash']))
+            extra = {k: data[k] for k in data.files if k.startswith(('times_', 'coords_'))}
+        return graph, extra
+
+
+def file_hash(path):
+    """sha256 of the extract, used to invalidate the compiled cache"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def dijkstra(graph, sources):
+    """
+    Multi-source shortest path seconds from `sources` to every node
+    (np.inf where unreachable). Uses SciPy when installed, heapq otherwise.
+    """
+    sources = np.atleast_1d(np.asarray(sources, dtype=np.int64))
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import dijkstra as sp_dijkstra
+    except ImportError:
+        sp_dijkstra = None
+
+    if sp_dijkstra is not None:
+        # Zero-length edges would vanish from a sparse matrix
+        weights = np.maximum(graph.weights, 1e-3).astype(float)
+        matrix = csr_matrix((weights, graph.indices, graph.indptr),
+                            shape=(graph.node_count, graph.node_count))
+        dist = sp_dijkstra(matrix, directed=True, indices=sources, min_only=True)
+        return np.asarray(dist, dtype=float)
+
+    indptr, indices, weights = graph.indptr, graph.indices, graph.weights.astype(float)
+    dist = np.full(graph.node_count, np.inf)
+    dist[sources] = 0.0
+    heap = [(0.0, int(s)) for s in sources]
+    heapq.heapify(heap)
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            nd = d + weights[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+class TravelTimeEngine:
+    """
+    Drive times from any point to the fixed DESTINATIONS.
+
+    Node times per destination are computed once (one reverse Dijkstra each)
+    and cached with the graph, keyed on the destination's coordinates;
+    queries are then a nearest-node lookup.
+    """
+
+    def __init__(self, graph, destinations, node_times=None, calibration=None, node_coords=None):
+        self.graph = graph
+        self.destinations = destinations
+        self.node_times = dict(node_times or {})
+        self.node_coords = dict(node_coords or {})
+        self.calibration = dict(DEFAULT_CALIBRATION, **(calibration or {}))
+        self._index = None
+
+    @classmethod
+    def load(cls, destinations=None, network_file=ROAD_NETWORK_FILE, cache_file=GRAPH_CACHE_FILE):
+        """Load the cached graph, rebuilding it when the extract changed"""
+        if destinations is None:
+            from collect_objective_data import DESTINATIONS as destinations
+
+        graph, extra = None, {}
+        if os.path.exists(cache_file):
+            graph, extra = RoadGraph.load(cache_file)
+            if os.path.exists(network_file) and graph.source_hash != file_hash(network_file):
+                graph, extra = None, {}
+        if graph is None:
+            if not os.path.exists(network_file):
+                raise FileNotFoundError(f"Road network file not found: {network_file}")
+            graph = RoadGraph.from_osm(network_file)
+
+        node_times = {k[len('times_'):]: v for k, v in extra.items() if k.startswith('times_')}
+        node_coords = {k[len('coords_'):]: tuple(map(float, v)) for k, v in extra.items() if k.startswith('coords_')}
+        calibration = None
+        if os.path.exists(CALIBRATION_FILE):
+            with open(CALIBRATION_FILE, 'r', encoding='utf-8') as f:
+                calibration = json.load(f)
+
+        engine = cls(graph, destinations, node_times, calibration, node_coords)
+        if engine.precompute():
+            engine.save(cache_file)
+        return engine
+
+    @staticmethod
+    def available(network_file=ROAD_NETWORK_FILE, cache_file=GRAPH_CACHE_FILE):
+        return os.path.exists(network_file) or os.path.exists(cache_file)
+
+    def _is_cached(self, key, target):
+        """Node times for `key` exist and were computed for the target's coordinates"""
+        return (key in self.node_times
+                and self.node_coords.get(key) == (float(target['lat']), float(target['lng'])))
+
+    def _dijkstra_times(self, targets):
+        """{key: seconds from every node} for {key: {'lat', 'lng'}}, one reverse Dijkstra each"""
+        if not targets:
+            return {}
+        reverse = self.graph.reversed()
+        dest_nodes, dest_access = self.snap(
+            [t['lat'] for t in targets.values()],
+            [t['lng'] for t in targets.values()],
+        )
+        return {key: (dijkstra(reverse, node) + access).astype(np.float32)
+                for key, node, access in zip(targets, dest_nodes, dest_access)}
+
+    def precompute(self):
+        """Run Dijkstra for destinations without cached node times, or whose coordinates moved"""
+        missing = {k: v for k, v in self.destinations.items() if not self._is_cached(k, v)}
+        if not missing:
+            return False
+        self.node_times.update(self._dijkstra_times(missing))
+        self.node_coords.update({k: (float(v['lat']), float(v['lng'])) for k, v in missing.items()})
+        return True
+
+    def node_times_for(self, targets):
+        """
+        Node times for ad-hoc targets: cached ones are reused, the rest are
+        computed for this call only (the engine and its cache are not changed).
+        """
+        missing = {k: v for k, v in targets.items() if not self._is_cached(k, v)}
+        computed = self._dijkstra_times(missing)
+        return {k: computed[k] if k in computed else self.node_times[k] for k in targets}
+
+    def save(self, path=GRAPH_CACHE_FILE):
+        extra = {f'times_{k}': v for k, v in self.node_times.items()}
+        extra.update({f'coords_{k}': np.array(v) for k, v in self.node_coords.items()})
+        self.graph.save(path, **extra)
+
+    def snap(self, lats, lngs):
+        """
+        Nearest road node per point and the seconds to reach it.
+        Points beyond MAX_SNAP_KM get node 0 and infinite access time.
+        """
+        if self._index is None:
+            self._index = GridIndex(self.graph.lats, self.graph.lngs)
+        nodes, km = self._index.nearest(lats, lngs, max_km=MAX_SNAP_KM)
+        return np.maximum(nodes, 0), km / ACCESS_SPEED_KMH * 3600
+
+    def travel_times(self, lats, lngs, calibrated=True, targets=None):
+        """
+        {<dest>_time: minutes array} for many points at once.
+        Unreachable points get NaN. targets: other {key: {'lat', 'lng'}}
+        to time instead of the engine's destinations (see node_times_for).
+        """
+        node_times = self.node_times if targets is None else self.node_times_for(targets)
+        shape = np.shape(lats)
+        nodes, access = self.snap(np.ravel(lats), np.ravel(lngs))
+        a, b = self.calibration['intercept'], self.calibration['slope']
+        out = {}
+        for key in (self.destinations if targets is None else targets):
+            minutes = (node_times[key][nodes] + access) / 60
+            if calibrated:
+                minutes = a + b * minutes
+            out[f"{key}_time"] = np.where(np.isfinite(minutes), minutes, np.nan).reshape(shape)
+        return out
+
+    def travel_time(self, lat, lng, dest_key):
+        """Single point, whole minutes like get_travel_time (None if unreachable)"""
+        minutes = self.travel_times([lat], [lng])[f"{dest_key}_time"][0]
+        return None if np.isnan(minutes) else round(float(minutes))
+
+    def calibrate(self, localities_data):
+        """
+        Least-squares fit of collected Distance Matrix minutes against
+        free-flow graph minutes. Returns the fit and its mean absolute error.
+        """
+        graph_min, api_min = [], []
+        for loc in localities_data:
+            if loc.get('latitude') is None:
+                continue
+            times = self.travel_times([loc['latitude']], [loc['longitude']], calibrated=False)
+            for key in self.destinations:
+                observed = loc.get(f"{key}_time")
+                predicted = times[f"{key}_time"][0]
+                if observed is not None and np.isfinite(predicted):
+                    graph_min.append(predicted)
+                    api_min.append(observed)
+
+        if len(graph_min) < 3:
+            return None
+        A = np.column_stack([np.ones(len(graph_min)), graph_min])
+        (a, b), *_ = np.linalg.lstsq(A, np.array(api_min, dtype=float), rcond=None)
+        residuals = np.array(api_min) - (a + b * np.array(graph_min))
+        self.calibration = {
+            "intercept": round(float(a), 4),
+            "slope": round(float(b), 4),
+            "samples": len(graph_min),
+            "mae_minutes": round(float(np.abs(residuals).mean()), 2),
+        }
+        return self.calibration
+
+    def save_calibration(self, path=CALIBRATION_FILE):
+        write_json(path, self.calibration, ensure_ascii=True)
+
+
+_engine = None
+
+
+def get_engine():
+    """Shared TravelTimeEngine, or None when no road network is available"""
+    global _engine
+    if _engine is None and TravelTimeEngine.available():
+        _engine = TravelTimeEngine.load()
+    return _engine
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compile the OSM road graph and precompute travel times")
+    parser.add_argument('--network', default=ROAD_NETWORK_FILE, help="OSM XML extract (.osm, .osm.gz, .osm.bz2)")
+    parser.add_argument('--calibrate', action='store_true',
+                        help="fit against Distance Matrix times in objective_locality_data.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("\n" + "="*70)
+    print("🛣️ ROAD GRAPH TRAVEL-TIME ENGINE")
+    print("="*70)
+
+    if not TravelTimeEngine.available(args.network):
+        print(f"❌ Road network file not found: {args.network}")
+        print("   Download an OSM extract for Thiruvananthapuram and save it there.")
+        return
+
+    start = time.perf_counter()
+    engine = TravelTimeEngine.load(network_file=args.network)
+    graph = engine.graph
+    print(f"📦 Graph: {graph.node_count:,} nodes, {graph.edge_count:,} edges "
+          f"({time.perf_counter() - start:.2f}s incl. Dijkstra for {len(engine.destinations)} destinations)")
+
+    from collect_objective_data import LOCALITIES
+    start = time.perf_counter()
+    times = engine.travel_times([l['lat'] for l in LOCALITIES], [l['lng'] for l in LOCALITIES])
+    print(f"⚡ {len(LOCALITIES)} localities x {len(engine.destinations)} destinations "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if args.calibrate:
+        if not os.path.exists(LOCALITY_DATA_FILE):
+            print(f"⚠️ No Distance Matrix data at {LOCALITY_DATA_FILE}, skipping calibration")
+        else:
+            with open(LOCALITY_DATA_FILE, 'r', encoding='utf-8') as f:
+                fit = engine.calibrate(json.load(f))
+            if fit:
+                engine.save_calibration()
+                print(f"🎯 Calibrated: minutes = {fit['intercept']} + {fit['slope']} x free-flow "
+                      f"(MAE {fit['mae_minutes']} min over {fit['samples']} pairs)")
+                times = engine.travel_times([l['lat'] for l in LOCALITIES], [l['lng'] for l in LOCALITIES])
+
+    print(f"\n{'Locality':<20}" + "".join(f"{k[:12]:>14}" for k in engine.destinations))
+    for i, loc in enumerate(LOCALITIES):
+        row = "".join(f"{times[f'{k}_time'][i]:>14.0f}" for k in engine.destinations)
+        print(f"{loc['name']:<20}{row}")
+
+
+if __name__ == '__main__':
+    main()
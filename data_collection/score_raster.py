@@ -0,0 +1,382 @@
+"""
+Score Raster - City-wide Heatmap
+Evaluates the objective scoring engine on a regular grid covering Trivandrum
+instead of only the named locality centroids.
+
+How each engine input is produced per cell:
+- Amenity counts / avg ratings: places from place_store binned onto the grid,
+  then one FFT disc convolution per search radius (no per-cell radius queries)
+- Travel times: O(1) lookups in the precomputed isochrone rasters
+  (isochrones.py), or the same road-graph / calibrated-distance estimate
+  computed on the fly when they have not been built
+- Noise: the multi-source exposure model (noise_model.py), one broadcast
+  over every cell
+- Job proximity / flood safety: same formulas as collect_objective_data.py,
+  vectorized
+- PM2.5: IDW from the cached OpenAQ station set (air_quality.py); not part
+  of the score, saved as its own surface
+
+Output (data/heatmap/):
+- manifest.json  grid bounds, tile index, colour scale, top micro-areas and
+                 which score dimensions had real inputs ("complete"); the
+                 map explorer only offers the overlay when every one did
+- score.npy      float32 overall score grid (row 0 = north)
+- pm25.npy       float32 interpolated PM2.5 grid (NaN = no station in range)
+- tiles/*.png    coloured tiles for the map explorer overlay
+"""
+
+import os
+import sys
+import time
+import zlib
+import struct
+import argparse
+from datetime import datetime, timezone
+
+import numpy as np
+
+from geo_utils import haversine_distance, haversine_matrix, LatLngGrid
+from place_store import load_places, group_by_type
+from collect_objective_data import LOCALITIES, DESTINATIONS, AMENITY_RADII
+from objective_scoring_engine import ObjectiveScoringEngine
+from isochrones import get_index, estimate_minutes
+from air_quality import load_stations, fresh_stations, idw
+from noise_model import get_model as get_noise_model
+from atomic_io import atomic_write, write_json
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+OUTPUT_DIR = os.path.join(DATA_DIR, 'heatmap')
+
+DEFAULT_CELL_METERS = 100
+DEFAULT_TILE_CELLS = 128
+GRID_MARGIN_DEG = 0.03  # ~3 km around the outermost localities
+
+# Cells with no place of any type within this radius are left transparent
+# (sea, backwaters, unsurveyed countryside)
+COVERAGE_RADIUS_M = 3000
+
+# Amenity fields that carry an avg_rating in the engine
+RATED_TYPES = ['hospital', 'school', 'bank', 'restaurant']
+
+# Same weights as collect_objective_data.calculate_job_proximity_score
+JOB_WEIGHTS = {"technopark_time": 0.5, "city_centre_time": 0.3, "secretariat_time": 0.2}
+
+# Red -> amber -> green, applied to the min..max of the city surface
+COLOUR_STOPS = [(0.0, (220, 38, 38)), (0.5, (245, 158, 11)), (1.0, (5, 150, 105))]
+OVERLAY_ALPHA = 170
+
+# Inputs behind each engine dimension: place types that must be in the store,
+# or "flood_safety_score", which has no raster source yet (every cell gets 5)
+DIMENSION_INPUTS = {
+    "accessibility": [],
+    "amenities": ["hospital", "school", "supermarket", "pharmacy", "bank", "atm",
+                  "restaurant", "cafe", "gym"],
+    "safety": ["police", "fire_station"],
+    "environment": ["park", "bus_station", "flood_safety_score"],   # bus stations feed the noise model
+    "economy": ["bank", "supermarket", "atm", "real_estate_agency"],
+}
+RASTER_INPUTS = set()   # derived surfaces beyond the place store (none yet)
+
+MICRO_AREA_COUNT = 10
+MICRO_AREA_SPACING_KM = 1.5    # Minimum distance between reported micro-areas
+MICRO_AREA_LOCALITY_KM = 1.0   # ...and from any named locality centroid
+
+
+def disc_kernel(radius_m, cell_m):
+    """Binary disc covering cells whose centre is within radius_m"""
+    r = int(np.ceil(radius_m / cell_m))
+    offsets = np.arange(-r, r + 1) * cell_m
+    return (offsets[:, None] ** 2 + offsets[None, :] ** 2 <= radius_m ** 2).astype(float)
+
+
+def convolve_same(layers, kernel):
+    """
+    FFT 'same' convolution of a stack of 2D layers with one kernel.
+    Each layer costs O(N log N) no matter how large the radius.
+    """
+    layers = np.asarray(layers, dtype=float)
+    if layers.ndim == 2:
+        layers = layers[None]
+    kr, kc = kernel.shape
+    rows, cols = layers.shape[1:]
+    fshape = (rows + kr - 1, cols + kc - 1)
+
+    spectrum = np.fft.rfft2(layers, fshape) * np.fft.rfft2(kernel, fshape)
+    full = np.fft.irfft2(spectrum, fshape)
+    out = full[:, kr // 2:kr // 2 + rows, kc // 2:kc // 2 + cols]
+    # Counts are integers; strip FFT round-off (and the -0.0 it leaves)
+    return np.round(out, 6) + 0.0
+
+
+def amenity_surfaces(grid, places):
+    """<type>_count and <type>_avg_rating grids for every AMENITY_RADII type"""
+    by_type = group_by_type(places)
+    fields = {}
+
+    # One FFT pass per distinct radius
+    radii = {}
+    for place_type, radius in AMENITY_RADII.items():
+        radii.setdefault(radius, []).append(place_type)
+
+    for radius, types in radii.items():
+        layers, plan = [], []
+        for place_type in types:
+            group = by_type.get(place_type, [])
+            lats = [p['lat'] for p in group]
+            lngs = [p['lng'] for p in group]
+            layers.append(grid.rasterize(lats, lngs))
+            plan.append((place_type, 'count'))
+            if place_type in RATED_TYPES:
+                rated = [p for p in group if p.get('rating')]
+                layers.append(grid.rasterize([p['lat'] for p in rated], [p['lng'] for p in rated],
+                                             [p['rating'] for p in rated]))
+                layers.append(grid.rasterize([p['lat'] for p in rated], [p['lng'] for p in rated]))
+                plan.extend([(place_type, 'rating_sum'), (place_type, 'rated')])
+
+        summed = dict(zip(plan, convolve_same(layers, disc_kernel(radius, grid.cell_m))))
+        for place_type in types:
+            fields[f"{place_type}_count"] = summed[(place_type, 'count')]
+            if place_type in RATED_TYPES:
+                rated = summed[(place_type, 'rated')]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    avg = np.where(rated > 0, summed[(place_type, 'rating_sum')] / rated, np.nan)
+                fields[f"{place_type}_avg_rating"] = np.round(avg, 2)
+
+    return fields
+
+
+def travel_time_surfaces(lats, lngs):
+    """
+    <dest>_time grids in whole minutes, like get_travel_time.
+    Read from the precomputed isochrones when available, otherwise
+    estimated directly (road graph or calibrated distance).
+    """
+    index = get_index()
+    if index and all(k in index.targets for k in DESTINATIONS):
+        fields = index.lookup(lats, lngs)
+    else:
+        fields, _ = estimate_minutes(lats, lngs, DESTINATIONS)
+    return {
+        f"{k}_time": np.round(np.maximum(fields[f"{k}_time"], 1)) for k in DESTINATIONS
+    }
+
+
+def derived_scores(lats, lngs, fields):
+    """noise_score, flood_safety_score and job_proximity_score grids"""
+    noise = get_noise_model().noise_score(lats, lngs)
+
+    weighted = np.zeros(lats.shape)
+    for key, weight in JOB_WEIGHTS.items():
+        t = fields.get(key)
+        if t is not None:
+            weighted += np.where(np.isnan(t), 0, t) * weight
+    job = np.round(np.clip(11 - weighted / 6, 1, 10), 1)
+
+    # No elevation surface yet: same default as a failed Elevation API call
+    flood = np.full(lats.shape, 5.0)
+    return {"noise_score": noise, "flood_safety_score": flood, "job_proximity_score": job}
+
+
+def colourize(values, lo, hi, mask):
+    """Map scores onto COLOUR_STOPS as an RGBA uint8 image"""
+    span = (hi - lo) or 1.0
+    t = np.clip((np.nan_to_num(values, nan=lo) - lo) / span, 0, 1)
+    positions = [s[0] for s in COLOUR_STOPS]
+    rgba = np.zeros(values.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        rgba[..., channel] = np.interp(t, positions, [s[1][channel] for s in COLOUR_STOPS]).round()
+    rgba[..., 3] = np.where(mask, OVERLAY_ALPHA, 0)
+    return rgba
+
+
+def write_png(path, rgba):
+    """Minimal RGBA PNG encoder (stdlib only)"""
+    height, width = rgba.shape[:2]
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = rgba.reshape(height, -1)
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    with atomic_write(path, 'wb', keep=0) as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), 9)))
+        f.write(chunk(b'IEND', b''))
+
+
+def dimension_coverage(places):
+    """{dimension: {'covered', 'missing'}} from the inputs actually available"""
+    available = set(group_by_type(places)) | RASTER_INPUTS
+    coverage = {}
+    for dimension, inputs in DIMENSION_INPUTS.items():
+        missing = [name for name in inputs if name not in available]
+        coverage[dimension] = {"covered": not missing, "missing": missing}
+    return coverage
+
+
+def find_micro_areas(score, mask, lats, lngs, count=MICRO_AREA_COUNT):
+    """
+    Best-scoring cells that are not already a named locality, spaced out by
+    greedy non-maximum suppression.
+    """
+    loc_lats = [l['lat'] for l in LOCALITIES]
+    loc_lngs = [l['lng'] for l in LOCALITIES]
+
+    flat = np.where(mask, score, -np.inf).ravel()
+    candidates = np.argsort(flat)[::-1]
+    candidates = candidates[np.isfinite(flat[candidates])]
+    cand_lats, cand_lngs = lats.ravel()[candidates], lngs.ravel()[candidates]
+
+    to_locality = haversine_matrix(cand_lats, cand_lngs, loc_lats, loc_lngs)
+    nearest = to_locality.argmin(axis=1)
+    far_enough = to_locality.min(axis=1) > MICRO_AREA_LOCALITY_KM
+
+    picked = []
+    for i in np.flatnonzero(far_enough):
+        if picked:
+            d = haversine_distance(cand_lats[i], cand_lngs[i],
+                                   [p['lat'] for p in picked], [p['lng'] for p in picked])
+            if np.min(d) < MICRO_AREA_SPACING_KM:
+                continue
+        picked.append({
+            "lat": round(float(cand_lats[i]), 5),
+            "lng": round(float(cand_lngs[i]), 5),
+            "score": round(float(flat[candidates[i]]), 2),
+            "nearest_locality": LOCALITIES[nearest[i]]['name'],
+            "distance_km": round(float(to_locality[i, nearest[i]]), 2),
+        })
+        if len(picked) >= count:
+            break
+    return picked
+
+
+def build_raster(cell_m=DEFAULT_CELL_METERS, places=None):
+    """Compute every engine input plus the overall score on the city grid"""
+    grid = LatLngGrid.around(LOCALITIES, GRID_MARGIN_DEG, cell_m)
+    lats, lngs = grid.centres()
+
+    if places is None:
+        places = load_places()
+
+    fields = amenity_surfaces(grid, places)
+    fields.update(travel_time_surfaces(lats, lngs))
+    fields.update(derived_scores(lats, lngs, fields))
+
+    result = ObjectiveScoringEngine().score_arrays(fields)
+    result['pm25'], _ = idw(lats, lngs, fresh_stations(load_stations()))
+
+    coverage = convolve_same(
+        grid.rasterize([p['lat'] for p in places], [p['lng'] for p in places]),
+        disc_kernel(COVERAGE_RADIUS_M, cell_m),
+    )[0] > 0
+
+    return grid, lats, lngs, result, coverage
+
+
+def write_outputs(grid, lats, lngs, result, mask, dimensions, tile_cells=DEFAULT_TILE_CELLS, output_dir=OUTPUT_DIR):
+    """Write score.npy, PNG tiles and manifest.json"""
+    tiles_dir = os.path.join(output_dir, 'tiles')
+    os.makedirs(tiles_dir, exist_ok=True)
+
+    score = result['overall']
+    valid = score[mask]
+    lo, hi = (float(valid.min()), float(valid.max())) if valid.size else (0.0, 10.0)
+
+    with atomic_write(os.path.join(output_dir, 'score.npy'), 'wb', keep=0) as f:
+        np.save(f, np.where(mask, score, np.nan).astype(np.float32))
+    pm25 = np.where(mask, result['pm25'], np.nan)
+    with atomic_write(os.path.join(output_dir, 'pm25.npy'), 'wb', keep=0) as f:
+        np.save(f, pm25.astype(np.float32))
+
+    rgba = colourize(score, lo, hi, mask)
+    tiles = []
+    for r0 in range(0, grid.rows, tile_cells):
+        for c0 in range(0, grid.cols, tile_cells):
+            r1, c1 = min(grid.rows, r0 + tile_cells), min(grid.cols, c0 + tile_cells)
+            if not mask[r0:r1, c0:c1].any():
+                continue
+            name = f"{r0 // tile_cells}_{c0 // tile_cells}.png"
+            write_png(os.path.join(tiles_dir, name), rgba[r0:r1, c0:c1])
+            tiles.append({"file": f"tiles/{name}", "bounds": grid.bounds(r0, c0, r1, c1)})
+
+    manifest = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "cell_meters": grid.cell_m,
+        "shape": list(grid.shape),
+        "bounds": grid.bounds(),
+        "tile_cells": tile_cells,
+        "complete": all(d["covered"] for d in dimensions.values()),
+        "dimensions": dimensions,
+        "tiles": tiles,
+        "colour_scale": {
+            "min": round(lo, 2),
+            "max": round(hi, 2),
+            "stops": [{"at": at, "rgb": list(rgb)} for at, rgb in COLOUR_STOPS],
+        },
+        "stats": {
+            "cells": int(score.size),
+            "covered_cells": int(mask.sum()),
+            "mean": round(float(valid.mean()), 2) if valid.size else None,
+            "pm25_range": ([round(float(np.nanmin(pm25)), 1), round(float(np.nanmax(pm25)), 1)]
+                           if np.isfinite(pm25).any() else None),
+            "category_means": {
+                cat: round(float(values[mask].mean()), 2) if valid.size else None
+                for cat, values in result['breakdown'].items()
+            },
+        },
+        "micro_areas": find_micro_areas(score, mask, lats, lngs),
+    }
+    write_json(os.path.join(output_dir, 'manifest.json'), manifest)
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="City-wide objective score heatmap")
+    parser.add_argument('--cell', type=int, default=DEFAULT_CELL_METERS, help="cell size in metres")
+    parser.add_argument('--tile', type=int, default=DEFAULT_TILE_CELLS, help="tile size in cells")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("\n" + "="*70)
+    print("🗺️ CITY-WIDE SCORE HEATMAP")
+    print("="*70)
+
+    start = time.perf_counter()
+    places = load_places()
+    print(f"📍 {len(places)} places in store")
+
+    grid, lats, lngs, result, mask = build_raster(args.cell, places)
+    print(f"🔲 Grid: {grid.rows} x {grid.cols} cells at {grid.cell_m} m "
+          f"({int(mask.sum())} with coverage)")
+
+    dimensions = dimension_coverage(places)
+    manifest = write_outputs(grid, lats, lngs, result, mask, dimensions, args.tile)
+    elapsed = time.perf_counter() - start
+
+    if not manifest['complete']:
+        print("⚠️ Incomplete inputs - the map explorer will not show this heatmap:")
+        for dimension, info in dimensions.items():
+            if not info['covered']:
+                print(f"   {dimension}: missing {', '.join(info['missing'])}")
+
+    print(f"🎨 {len(manifest['tiles'])} tiles, score range "
+          f"{manifest['colour_scale']['min']} - {manifest['colour_scale']['max']}")
+    print("\n✨ Top micro-areas between named localities:")
+    for i, area in enumerate(manifest['micro_areas'], 1):
+        print(f"  {i:2}. ({area['lat']}, {area['lng']}) score {area['score']} "
+              f"- {area['distance_km']} km from {area['nearest_locality']}")
+
+    print(f"\n✅ Saved heatmap to {os.path.abspath(OUTPUT_DIR)} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
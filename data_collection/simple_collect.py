@@ -10,7 +10,8 @@ import sys
 from dotenv import load_dotenv
 import json
 from typing import Dict
-import google.generativeai as genai
+
+from atomic_io import write_json
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -20,10 +21,18 @@ load_dotenv()
 
 class SimpleCollector:
     def __init__(self):
-        """Initialize Gemini AI"""
+        """Initialize Gemini AI (the SDK itself is loaded on first use)"""
         self.gemini_key = os.getenv('GEMINI_API_KEY')
-        genai.configure(api_key=self.gemini_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+        self._model = None
+    
+    @property
+    def model(self):
+        """Gemini model, imported and configured on first use"""
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.gemini_key)
+            self._model = genai.GenerativeModel('gemini-pro')
+        return self._model
     
     def analyze_locality(self, locality_name: str, manual_data: Dict) -> Dict:
         """Use Gemini to generate scores based on locality knowledge"""
@@ -121,8 +130,7 @@ def create_manual_template():
         })
     
     output_file = 'data_collection/manual_input_template.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(template, f, indent=2, ensure_ascii=False)
+    write_json(output_file, template)
     
     print(f"\n✅ Created manual template: {output_file}")
     print(f"\n📝 NEXT STEPS:")
@@ -165,19 +173,19 @@ def process_manual_data(input_file: str):
     output_file = 'data_collection/output/final_locality_scores.json'
     os.makedirs('data_collection/output', exist_ok=True)
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    write_json(output_file, results)
     
     print(f"\\n{'='*60}")
     print(f"✅ COMPLETE! Final scores saved to: {output_file}")
     print(f"{'='*60}")
 
-if __name__ == '__main__':
-    import sys
-    
+def main():
     if len(sys.argv) > 1 and sys.argv[1] == 'process':
         # Process manually-filled data
         process_manual_data('data_collection/manual_input_template.json')
     else:
         # Create template
         create_manual_template()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,460 @@
+"""
+Snapshot Store
+Versioned, content-addressed copies of every pipeline run's data/*.json
+outputs, replacing hand-made backup folders such as data_backup_week1/.
+
+Storage is deduplicated at record level: each element of a JSON array
+(localities, rankings, restaurants, ...) is stored once as a compressed
+object named by its SHA-256, and a snapshot is just a small manifest of
+hashes. A weekly refresh therefore costs storage proportional to the
+records that changed. Non-JSON files fall back to 1 MB chunks.
+
+Because unchanged records keep their hash, diffs between runs only load
+the records that actually differ. The changed-file list drives incremental
+CDN publishing, and any snapshot can be restored (atomically) as a rollback.
+
+Usage:
+    python data_collection/snapshots.py create --label weekly
+    python data_collection/snapshots.py list
+    python data_collection/snapshots.py diff @7d latest rankings.json
+    python data_collection/snapshots.py diff latest~1 latest --files
+    python data_collection/snapshots.py restore latest~1 rankings.json
+    python data_collection/snapshots.py prune --keep 12
+
+Refs: a snapshot id, a label, 'latest', 'latest~N' (N runs back) or '@Nd'
+(newest snapshot at least N days old).
+"""
+
+import os
+import sys
+import json
+import zlib
+import fnmatch
+import hashlib
+import argparse
+from datetime import datetime, timezone, timedelta
+
+from atomic_io import atomic_write, write_json
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+STORE_DIR = os.path.join(ROOT_DIR, 'data_snapshots')
+
+DEFAULT_PATTERNS = ['*.json']
+CHUNK_SIZE = 1 << 20
+# Record fields tried, in order, to pair records across snapshots
+IDENTITY_KEYS = ['id', 'place_id', 'name', 'locality']
+# Formats tried when checking a JSON file can be rebuilt byte for byte
+JSON_FORMATS = [
+    {"indent": indent, "ensure_ascii": ensure_ascii}
+    for indent in (2, 4) for ensure_ascii in (False, True)
+]
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class SnapshotStore:
+    """Content-addressed object store plus one manifest per snapshot"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.snapshots_dir = os.path.join(root, 'snapshots')
+        self.new_bytes = 0
+
+    # -- objects ----------------------------------------------------------
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def put(self, data):
+        """Store bytes once; returns their hash"""
+        digest = sha256(data)
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = zlib.compress(data, 9)
+            with atomic_write(path, 'wb', keep=0) as f:
+                f.write(compressed)
+            self.new_bytes += len(compressed)
+        return digest
+
+    def get(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    def put_record(self, record):
+        return self.put(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    def get_record(self, digest):
+        return json.loads(self.get(digest))
+
+    # -- files ------------------------------------------------------------
+
+    def _records_entry(self, records):
+        """{"$records": [[identity, hash], ...], "$key": field} for a list"""
+        key = _identity_key(records)
+        return {
+            "$key": key,
+            "$records": [[record.get(key) if key else i, self.put_record(record)]
+                         for i, record in enumerate(records)],
+        }
+
+    def put_file(self, path):
+        """Store one file; returns its manifest entry"""
+        with open(path, 'rb') as f:
+            raw = f.read()
+        entry = {"sha256": sha256(raw), "size": len(raw)}
+
+        fmt = _json_format(raw)
+        if fmt is None:
+            entry["kind"] = "chunks"
+            entry["chunks"] = [self.put(raw[i:i + CHUNK_SIZE]) for i in range(0, len(raw), CHUNK_SIZE)]
+            return entry
+
+        obj = json.loads(raw)
+        entry["kind"] = "json"
+        entry["format"] = fmt
+        if isinstance(obj, list) and _is_record_list(obj):
+            entry["skeleton"] = self._records_entry(obj)
+        elif isinstance(obj, dict):
+            entry["skeleton"] = {
+                k: self._records_entry(v) if isinstance(v, list) and _is_record_list(v) else v
+                for k, v in obj.items()
+            }
+        else:
+            entry["skeleton"] = obj
+        return entry
+
+    def _expand(self, value):
+        if isinstance(value, dict) and "$records" in value:
+            return [self.get_record(digest) for _, digest in value["$records"]]
+        if isinstance(value, dict):
+            return {k: self._expand(v) for k, v in value.items()}
+        return value
+
+    def read_file(self, entry):
+        """Rebuild the exact bytes of a stored file"""
+        if entry["kind"] == "chunks":
+            return b"".join(self.get(digest) for digest in entry["chunks"])
+        fmt = entry["format"]
+        obj = self._expand(entry["skeleton"])
+        text = json.dumps(obj, indent=fmt["indent"], ensure_ascii=fmt["ensure_ascii"])
+        return (text + ("\n" if fmt.get("newline") else "")).encode('utf-8')
+
+    # -- snapshots --------------------------------------------------------
+
+    def snapshots(self):
+        """Snapshot manifests, oldest first"""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        manifests = []
+        for name in os.listdir(self.snapshots_dir):
+            if name.endswith('.json'):
+                with open(os.path.join(self.snapshots_dir, name), 'r', encoding='utf-8') as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda m: (m['created_at'], m['id']))
+
+    def create(self, source_dir=DATA_DIR, patterns=DEFAULT_PATTERNS, label=None):
+        """Snapshot every matching file directly under source_dir"""
+        self.new_bytes = 0
+        files = {}
+        for name in sorted(os.listdir(source_dir)):
+            path = os.path.join(source_dir, name)
+            if os.path.isfile(path) and any(fnmatch.fnmatch(name, p) for p in patterns):
+                files[name] = self.put_file(path)
+
+        now = datetime.now(timezone.utc)
+        manifest = {
+            "id": now.strftime('%Y%m%dT%H%M%S%fZ'),
+            "label": label,
+            "created_at": now.isoformat(timespec='seconds'),
+            "files": files,
+            "new_bytes": self.new_bytes,
+        }
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        write_json(os.path.join(self.snapshots_dir, f"{manifest['id']}.json"), manifest, keep=0)
+        return manifest
+
+    def resolve(self, ref):
+        """Snapshot manifest for an id, label, latest, latest~N or @Nd"""
+        manifests = self.snapshots()
+        if not manifests:
+            raise ValueError("No snapshots yet - run 'snapshots.py create' first")
+        if ref == 'latest' or ref.startswith('latest~'):
+            back = int(ref.split('~')[1]) if '~' in ref else 0
+            if back >= len(manifests):
+                raise ValueError(f"Only {len(manifests)} snapshots exist")
+            return manifests[-1 - back]
+        if ref.startswith('@') and ref.endswith('d'):
+            cutoff = datetime.now(timezone.utc) - timedelta(days=int(ref[1:-1]))
+            older = [m for m in manifests if datetime.fromisoformat(m['created_at']) <= cutoff]
+            if not older:
+                raise ValueError(f"No snapshot older than {ref[1:]}")
+            return older[-1]
+        for manifest in reversed(manifests):
+            if ref in (manifest['id'], manifest.get('label')):
+                return manifest
+        raise ValueError(f"Unknown snapshot {ref!r}")
+
+    def restore(self, manifest, names=None, target_dir=DATA_DIR):
+        """Write files from a snapshot back (each one an atomic publish)"""
+        restored = []
+        for name, entry in manifest['files'].items():
+            if names and name not in names:
+                continue
+            with atomic_write(os.path.join(target_dir, name), 'wb') as f:
+                f.write(self.read_file(entry))
+            restored.append(name)
+        return restored
+
+    def prune(self, keep):
+        """Drop all but the newest `keep` snapshots and unreferenced objects"""
+        manifests = self.snapshots()
+        dropped = manifests[:-keep] if keep else manifests
+        for manifest in dropped:
+            os.remove(os.path.join(self.snapshots_dir, f"{manifest['id']}.json"))
+
+        live = set()
+        for manifest in manifests[len(dropped):]:
+            for entry in manifest['files'].values():
+                live.update(_entry_objects(entry))
+        removed = 0
+        if os.path.isdir(self.objects_dir):
+            for prefix in os.listdir(self.objects_dir):
+                for rest in os.listdir(os.path.join(self.objects_dir, prefix)):
+                    if prefix + rest not in live:
+                        os.remove(os.path.join(self.objects_dir, prefix, rest))
+                        removed += 1
+        return len(dropped), removed
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _json_format(raw):
+    """Formatting that rebuilds raw exactly from its parsed value, else None"""
+    try:
+        obj = json.loads(raw)
+        text = raw.decode('utf-8')
+    except (ValueError, UnicodeDecodeError):
+        return None
+    newline = text.endswith('\n')
+    body = text[:-1] if newline else text
+    for fmt in JSON_FORMATS:
+        if json.dumps(obj, **fmt) == body:
+            return dict(fmt, newline=newline)
+    return None
+
+
+def _is_record_list(value):
+    return bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def _identity_key(records):
+    """First IDENTITY_KEYS field that is present and unique in every record"""
+    for key in IDENTITY_KEYS:
+        values = [r.get(key) for r in records]
+        if all(isinstance(v, (str, int)) for v in values) and len(set(values)) == len(values):
+            return key
+    return None
+
+
+def _entry_objects(entry):
+    if entry['kind'] == 'chunks':
+        return list(entry['chunks'])
+    skeleton = entry['skeleton']
+    values = [skeleton] if isinstance(skeleton, dict) and "$records" in skeleton else (
+        skeleton.values() if isinstance(skeleton, dict) else [])
+    return [digest for v in values if isinstance(v, dict) and "$records" in v for _, digest in v["$records"]]
+
+
+def _field_changes(old, new, prefix=''):
+    """[(dotted path, old, new)] for differing leaves of two records"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in list(old) + [k for k in new if k not in old]:
+            changes += _field_changes(old.get(key), new.get(key), f"{prefix}{key}.")
+        return changes
+    if old != new:
+        return [(prefix.rstrip('.'), old, new)]
+    return []
+
+
+# ---------------------------------------------------------------------------
+# Diffs
+# ---------------------------------------------------------------------------
+
+def changed_files(old, new):
+    """{name: 'added' | 'removed' | 'modified'} between two snapshots"""
+    changes = {}
+    for name, entry in new['files'].items():
+        if name not in old['files']:
+            changes[name] = 'added'
+        elif old['files'][name]['sha256'] != entry['sha256']:
+            changes[name] = 'modified'
+    for name in old['files']:
+        if name not in new['files']:
+            changes[name] = 'removed'
+    return changes
+
+
+def _diff_records(store, old, new):
+    old_map = {ident: digest for ident, digest in old["$records"]}
+    new_map = {ident: digest for ident, digest in new["$records"]}
+    result = {"added": [], "removed": [], "changed": {}}
+    for ident, digest in new_map.items():
+        if ident not in old_map:
+            result["added"].append(ident)
+        elif old_map[ident] != digest:
+            result["changed"][str(ident)] = _field_changes(store.get_record(old_map[ident]),
+                                                           store.get_record(digest))
+    result["removed"] = [ident for ident in old_map if ident not in new_map]
+    return result
+
+
+def diff_file(store, old_entry, new_entry):
+    """
+    Record-level diff of one file. Returns {section: {"added", "removed",
+    "changed": {identity: [(field, old, new)]}}}; sections are the record
+    lists of the file ('' for a top-level list, else the object key) plus
+    '$fields' for other top-level values.
+    """
+    if old_entry['sha256'] == new_entry['sha256']:
+        return {}
+    if old_entry['kind'] != 'json' or new_entry['kind'] != 'json':
+        return {"$file": {"added": [], "removed": [], "changed": {"": [("bytes", old_entry['size'], new_entry['size'])]}}}
+
+    old_sk, new_sk = old_entry['skeleton'], new_entry['skeleton']
+    if isinstance(old_sk, dict) and "$records" in old_sk and isinstance(new_sk, dict) and "$records" in new_sk:
+        return {"": _diff_records(store, old_sk, new_sk)}
+
+    sections = {}
+    plain_old, plain_new = {}, {}
+    for key in list(old_sk) + [k for k in new_sk if k not in old_sk]:
+        o, n = old_sk.get(key), new_sk.get(key)
+        if isinstance(o, dict) and "$records" in o and isinstance(n, dict) and "$records" in n:
+            if o != n:
+                sections[key] = _diff_records(store, o, n)
+        else:
+            plain_old[key], plain_new[key] = store._expand(o), store._expand(n)
+    fields = _field_changes(plain_old, plain_new)
+    if fields:
+        sections["$fields"] = {"added": [], "removed": [], "changed": {"": fields}}
+    return sections
+
+
+def _short(value, width=40):
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+
+def print_file_diff(name, sections):
+    for section, result in sections.items():
+        title = name if section in ('', '$fields', '$file') else f"{name} [{section}]"
+        print(f"\n📄 {title}")
+        for ident in result["added"]:
+            print(f"   + {ident}")
+        for ident in result["removed"]:
+            print(f"   - {ident}")
+        for ident, fields in result["changed"].items():
+            if ident:
+                print(f"   ~ {ident}")
+            for field, old, new in fields:
+                print(f"       {field}: {_short(old)} → {_short(new)}")
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Versioned snapshots of pipeline outputs")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    create = sub.add_parser('create', help="snapshot data/*.json")
+    create.add_argument('--label', default=None)
+    create.add_argument('--from', dest='source', default=DATA_DIR, help="directory to snapshot")
+
+    sub.add_parser('list', help="list snapshots")
+
+    diff = sub.add_parser('diff', help="what changed between two snapshots")
+    diff.add_argument('old')
+    diff.add_argument('new', nargs='?', default='latest')
+    diff.add_argument('names', nargs='*', help="limit to these files")
+    diff.add_argument('--files', action='store_true', help="only print changed file names (for publishing)")
+    diff.add_argument('--json', action='store_true', help="machine-readable output")
+
+    restore = sub.add_parser('restore', help="roll data files back to a snapshot")
+    restore.add_argument('ref')
+    restore.add_argument('names', nargs='*')
+
+    prune = sub.add_parser('prune', help="drop old snapshots and unreferenced objects")
+    prune.add_argument('--keep', type=int, required=True)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = SnapshotStore()
+
+    if args.command == 'create':
+        manifest = store.create(args.source, label=args.label)
+        total = sum(e['size'] for e in manifest['files'].values())
+        print(f"📸 Snapshot {manifest['id']}" + (f" ({args.label})" if args.label else ""))
+        print(f"   {len(manifest['files'])} files, {total:,} bytes; {manifest['new_bytes']:,} new bytes stored")
+
+    elif args.command == 'list':
+        manifests = store.snapshots()
+        if not manifests:
+            print("No snapshots yet")
+        previous = None
+        for manifest in manifests:
+            changes = changed_files(previous, manifest) if previous else {}
+            label = manifest.get('label') or ''
+            print(f"  {manifest['id']}  {label:<12} {len(manifest['files']):>3} files  "
+                  f"{len(changes):>3} changed  {manifest.get('new_bytes', 0):>10,} new bytes")
+            previous = manifest
+
+    elif args.command == 'diff':
+        old, new = store.resolve(args.old), store.resolve(args.new)
+        changes = {n: c for n, c in changed_files(old, new).items() if not args.names or n in args.names}
+        if args.files:
+            for name, change in changes.items():
+                print(f"{change}\t{name}")
+            return
+        report = {}
+        for name, change in changes.items():
+            if change == 'modified':
+                report[name] = diff_file(store, old['files'][name], new['files'][name])
+            else:
+                report[name] = change
+        if args.json:
+            print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+            return
+        print(f"🔍 {old['id']} → {new['id']}: {len(changes)} files changed")
+        for name, sections in report.items():
+            if isinstance(sections, str):
+                print(f"\n📄 {name} ({sections})")
+            else:
+                print_file_diff(name, sections)
+
+    elif args.command == 'restore':
+        manifest = store.resolve(args.ref)
+        restored = store.restore(manifest, args.names or None)
+        print(f"⏪ Restored {len(restored)} files from {manifest['id']}: {', '.join(restored)}")
+
+    elif args.command == 'prune':
+        dropped, removed = store.prune(args.keep)
+        print(f"🧹 Dropped {dropped} snapshots and {removed} unreferenced objects")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""Stage scripts import their siblings by module name (python data_collection/x.py)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
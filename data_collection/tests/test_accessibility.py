@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from accessibility import access_at_points, decay, ACCESS_SCALES, CUTOFF_SCALES
+from geo_utils import haversine_matrix
+
+
+def random_places(n, place_type, seed):
+    rng = np.random.default_rng(seed)
+    return [{'lat': 8.45 + rng.random() * 0.15, 'lng': 76.88 + rng.random() * 0.12,
+             'rating': round(1 + rng.random() * 4, 1), 'type': place_type} for _ in range(n)]
+
+
+def test_decay_is_one_at_the_place_and_zero_from_the_cutoff():
+    assert decay(0, 1.0) == pytest.approx(1.0)
+    assert decay(CUTOFF_SCALES, 1.0) == pytest.approx(0.0)
+    assert decay(CUTOFF_SCALES * 2, 1.0) == 0.0
+    assert decay(CUTOFF_SCALES * 0.999, 1.0) > 0
+
+
+def test_matches_brute_force_sum():
+    places = random_places(300, 'hospital', 1) + random_places(200, 'park', 2)
+    rng = np.random.default_rng(3)
+    lats, lngs = 8.45 + rng.random(50) * 0.15, 76.88 + rng.random(50) * 0.12
+
+    fields = access_at_points(lats, lngs, places, types=['hospital', 'park', 'gym'])
+    assert set(fields) == {'hospital_access', 'park_access'}   # no gym places
+
+    hospitals = [p for p in places if p['type'] == 'hospital']
+    km = haversine_matrix(lats, lngs, [p['lat'] for p in hospitals], [p['lng'] for p in hospitals])
+    weights = np.array([p['rating'] / 5 for p in hospitals])
+    expected = decay(km, ACCESS_SCALES['hospital']) @ weights
+    assert np.allclose(fields['hospital_access'], expected, atol=2e-3)
@@ -0,0 +1,80 @@
+import json
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+import pytest
+import requests
+
+import air_quality
+
+STATION = {"name": "Plammoodu", "lat": 8.5141, "lng": 76.9433, "pm25": 21.0,
+           "updated": "2026-01-01T00:00:00Z"}
+
+
+@pytest.fixture
+def stale_cache(tmp_path):
+    path = tmp_path / "air_quality_cache.json"
+    path.write_text(json.dumps({"fetched_at": "2020-01-01T00:00:00+00:00", "stations": [STATION]}))
+    return str(path)
+
+
+def test_http_error_keeps_stale_cache(stale_cache, monkeypatch):
+    class Gone:
+        def raise_for_status(self):
+            raise requests.HTTPError("410 Gone")
+
+        def json(self):
+            return {"results": []}
+
+    fetch = air_quality.fetch_stations
+    monkeypatch.setattr(air_quality.requests, "get", lambda *args, **kwargs: Gone())
+    monkeypatch.setattr(air_quality, "fetch_stations", lambda: fetch(api_key="key"))
+
+    assert air_quality.load_stations(path=stale_cache) == [STATION]
+    assert json.load(open(stale_cache))["fetched_at"].startswith("2020")
+
+
+def test_empty_result_never_replaces_stations(stale_cache, monkeypatch):
+    monkeypatch.setattr(air_quality, "fetch_stations", lambda: [])
+    assert air_quality.load_stations(path=stale_cache) == [STATION]
+    assert json.load(open(stale_cache))["stations"] == [STATION]
+
+
+def test_missing_key_raises():
+    with pytest.raises(RuntimeError):
+        air_quality.fetch_stations(api_key=None)
+
+
+def test_stale_readings_are_dropped():
+    now = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    old = dict(STATION, updated=(now - timedelta(days=30)).isoformat())
+    undated = dict(STATION, updated=None)
+    assert air_quality.fresh_stations([STATION, old, undated], now=now) == [STATION]
+
+
+def test_idw_takes_station_value_on_top_and_nan_out_of_range():
+    pm25, counts = air_quality.idw([8.5141, 10.0], [76.9433, 76.9433], [STATION])
+    assert pm25[0] == pytest.approx(21.0)
+    assert np.isnan(pm25[1]) and counts[1] == 0
+
+
+def test_no_fresh_station_keeps_existing_readings(tmp_path, monkeypatch):
+    path = tmp_path / "objective_locality_data.json"
+    path.write_text(json.dumps([
+        {"name": "Pattom", "latitude": 8.52, "longitude": 76.94, "pm25": 18.4, "aqi_source": "IDW of 2 OpenAQ station(s)"},
+        {"name": "Alappuzha", "latitude": 9.49, "longitude": 76.33, "pm25": 12.0, "aqi_source": "IDW of 1 OpenAQ station(s)"},
+    ]))
+    monkeypatch.setattr(air_quality, "LOCALITY_DATA_FILE", str(path))
+    monkeypatch.setattr(air_quality.sys, "argv", ["air_quality.py"])
+    fresh = dict(STATION, updated=datetime.now(timezone.utc).isoformat())
+
+    monkeypatch.setattr(air_quality, "load_stations", lambda refresh=False: [dict(STATION, updated=None)])
+    before = path.read_text()
+    air_quality.main()
+    assert path.read_text() == before
+
+    monkeypatch.setattr(air_quality, "load_stations", lambda refresh=False: [fresh])
+    air_quality.main()
+    pattom, alappuzha = json.loads(path.read_text())
+    assert pattom["pm25"] == pytest.approx(21.0, abs=1.0) and pattom["aqi_source"].startswith("IDW of 1")
+    assert (alappuzha["pm25"], alappuzha["aqi_source"]) == (12.0, "IDW of 1 OpenAQ station(s)")
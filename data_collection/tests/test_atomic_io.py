@@ -0,0 +1,52 @@
+import os
+import json
+
+import pytest
+
+from atomic_io import write_json, atomic_directory, rollback, generations, current_generation
+
+
+def test_failed_write_leaves_the_published_file(tmp_path):
+    path = tmp_path / "rankings.json"
+    write_json(path, {"v": 1})
+    with pytest.raises(TypeError):
+        write_json(path, {"v": object()})
+    assert json.loads(path.read_text()) == {"v": 1}
+    assert [p for p in os.listdir(tmp_path) if p.endswith('.tmp')] == []
+
+
+def test_generations_and_rollback(tmp_path):
+    path = tmp_path / "rankings.json"
+    for v in (1, 2, 3):
+        write_json(path, {"v": v})
+    assert generations(path) == [1, 2, 3]
+    assert rollback(path) == 2
+    assert json.loads(path.read_text()) == {"v": 2}
+    assert current_generation(path) == 2
+    assert rollback(path, 1) == 1
+    assert json.loads(path.read_text()) == {"v": 1}
+
+
+def test_atomic_directory_swaps_whole_trees(tmp_path):
+    target = tmp_path / "nearby"
+    with atomic_directory(target) as build:
+        write_json(os.path.join(build, "a.json"), 1, keep=0)
+    assert os.listdir(target) == ["a.json"]
+
+    with atomic_directory(target) as build:
+        write_json(os.path.join(build, "b.json"), 2, keep=0)
+    assert os.listdir(target) == ["b.json"]
+    assert sorted(os.listdir(tmp_path)) == ["nearby"]
+
+
+def test_atomic_directory_failure_keeps_the_old_tree(tmp_path):
+    target = tmp_path / "nearby"
+    with atomic_directory(target) as build:
+        write_json(os.path.join(build, "a.json"), 1, keep=0)
+
+    with pytest.raises(RuntimeError):
+        with atomic_directory(target) as build:
+            write_json(os.path.join(build, "b.json"), 2, keep=0)
+            raise RuntimeError("crash mid-build")
+    assert os.listdir(target) == ["a.json"]
+    assert sorted(os.listdir(tmp_path)) == ["nearby"]
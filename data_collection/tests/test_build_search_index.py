@@ -0,0 +1,38 @@
+from build_search_index import normalize, trigrams, word_prefixes, build_index
+
+
+def decode(deltas):
+    out, total = [], 0
+    for d in deltas:
+        total += d
+        out.append(total)
+    return out
+
+
+def test_normalize_strips_accents_and_punctuation():
+    assert normalize("  Café-de  Kowdiar! ") == "cafe de kowdiar"
+    assert normalize(None) == ""
+
+
+def test_prefixes_and_trigrams():
+    assert word_prefixes("east fort") == {"e", "ea", "f", "fo"}
+    assert trigrams("fort") == {"for", "ort"}
+
+
+def test_entries_sorted_by_score_and_postings_decode_to_matches():
+    entries = [
+        ("Pattom", 0, "Pattom", 7.5, None),
+        ("Kowdiar Palace", 3, "k1", 9.1, "Kowdiar"),
+        ("Kowdiar", 0, "Kowdiar", 8.25678, None),
+        ("Unrated Cafe", 5, "c1", None, "Pattom"),
+    ]
+    index = build_index(entries)
+    names = [row[0] for row in index["entries"]]
+    assert names == ["Kowdiar Palace", "Kowdiar", "Pattom", "Unrated Cafe"]
+    assert index["entries"][1][4] == 8.26
+
+    assert decode(index["prefixes"]["ko"]) == [0, 1]
+    assert decode(index["trigrams"]["tto"]) == [2]
+    # Every posting points at an entry whose normalized name has the trigram
+    for gram, deltas in index["trigrams"].items():
+        assert all(gram in index["entries"][i][1] for i in decode(deltas))
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import elevation
+from elevation import sample_grid, elevation_profile, flood_safety_score, get_elevations, point_key
+
+
+def test_grid_spans_radius_and_centres_on_the_locality():
+    grid = sample_grid(8.5, 76.95)
+    assert len(grid) == elevation.GRID_SIZE ** 2
+    assert grid[len(grid) // 2] == pytest.approx((8.5, 76.95))
+    lats = [p[0] for p in grid]
+    # +-600 m is ~0.0054 degrees of latitude
+    assert max(lats) - min(lats) == pytest.approx(2 * 0.6 / 111.19, rel=1e-3)
+
+
+def test_profile_and_flood_score():
+    profile = elevation_profile(20.0, [2.0, 4.0, 20.0, 30.0, None])
+    assert profile == {"elevation_meters": 20.0, "elevation_min": 2.0,
+                       "elevation_median": 12.0, "low_lying_fraction": 0.5}
+    # median 12 m -> 2.4, less 3 x 0.5 low-lying, floored at 1
+    assert flood_safety_score(profile) == 1
+    assert flood_safety_score(elevation_profile(60.0, [60.0] * 4)) == 10
+    assert flood_safety_score(elevation_profile(None, [None])) == 5
+
+
+def test_failed_batch_comes_back_as_none_and_is_not_cached(monkeypatch):
+    monkeypatch.setattr(elevation.time, "sleep", lambda s: None)
+
+    def fail(keys, api_key):
+        raise RuntimeError("OVER_QUERY_LIMIT")
+
+    monkeypatch.setattr(elevation, "request_elevations", fail)
+    cache = {point_key(8.5, 76.95): 12.0}
+    assert get_elevations([(8.5, 76.95), (8.6, 76.9)], cache=cache) == [12.0, None]
+    assert len(cache) == 1
+
+
+def test_batches_respect_the_request_limit(monkeypatch):
+    monkeypatch.setattr(elevation.time, "sleep", lambda s: None)
+    calls = []
+
+    def fake(keys, api_key):
+        calls.append(len(keys))
+        return [1.0] * len(keys)
+
+    monkeypatch.setattr(elevation, "request_elevations", fake)
+    points = [(8 + i * 1e-4, 76.9) for i in range(1100)]
+    assert get_elevations(points, cache={}) == [1.0] * 1100
+    assert calls == [512, 512, 76]
+
+
+def test_failed_fetch_keeps_existing_locality_values(tmp_path, monkeypatch):
+    path = tmp_path / "objective_locality_data.json"
+    path.write_text(json.dumps([{"name": "Pattom", "latitude": 8.52, "longitude": 76.94,
+                                 "elevation_meters": 31.0, "flood_safety_score": 6.2}]))
+    monkeypatch.setattr(elevation, "LOCALITY_DATA_FILE", str(path))
+    monkeypatch.setattr(elevation, "ELEVATION_CACHE_FILE", str(tmp_path / "cache.json"))
+    monkeypatch.setattr(elevation, "GOOGLE_MAPS_API_KEY", "key")
+    monkeypatch.setattr(elevation, "save_cache", lambda cache: None)
+    monkeypatch.setattr(elevation, "get_elevation_profiles",
+                        lambda locations, cache=None: {"Pattom": elevation_profile(None, [None])})
+
+    elevation.main()
+    assert json.loads(path.read_text())[0]["elevation_meters"] == 31.0
+    assert json.loads(path.read_text())[0]["flood_safety_score"] == 6.2
@@ -0,0 +1,44 @@
+import json
+
+import fetch_property_prices
+from fetch_property_prices import extract_prices_with_gemini, merge_gemini
+from price_extractor import extract_prices
+from price_index import record_extraction
+
+SNIPPETS = {"land_snippets": ["₹12 lakh per cent", "10-12 L/cent", "Rs 13 lakh/cent"],
+            "apartment_snippets": ["Flats around ₹6,500/sq ft, some say more"]}
+
+
+class FakeModel:
+    def __init__(self, answer):
+        self.answer, self.prompts = answer, []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return type("Response", (), {"text": json.dumps(self.answer)})()
+
+
+def test_gemini_is_prompted_only_for_unresolved_fields(monkeypatch):
+    model = FakeModel({"apartment_price_per_sqft": 6500, "apartment_price_range": "6000-7000",
+                       "confidence": "low", "source_notes": "one listing"})
+    monkeypatch.setattr(fetch_property_prices, "get_model", lambda: model)
+    extract_prices_with_gemini("Pattom", SNIPPETS, ["apartment_price_per_sqft"])
+    prompt = model.prompts[0]
+    assert "6,500/sq ft" in prompt and "apartment_price_per_sqft" in prompt
+    assert "lakh per cent" not in prompt and "land_price_per_cent_lakhs" not in prompt
+
+
+def test_resolved_fields_keep_their_own_confidence():
+    prices = extract_prices(SNIPPETS["land_snippets"], SNIPPETS["apartment_snippets"])
+    resolved = prices.pop("resolved")
+    missing = [f for f in fetch_property_prices.GEMINI_FIELDS if f not in resolved]
+    merge_gemini(prices, {"apartment_price_per_sqft": 6500, "confidence": "low"}, missing)
+    assert prices["land_price_confidence"] == "high"
+    assert prices["apartment_price_confidence"] == "low"
+    assert prices["confidence"] == "low"
+
+    index = {"updated_at": None, "localities": {}}
+    record_extraction(index, dict(prices, locality="Pattom"), "extraction")
+    entry = index["localities"]["Pattom"]
+    assert entry["land_price"]["confidence"] == "high"
+    assert entry["apartment_price"]["confidence"] == "low"
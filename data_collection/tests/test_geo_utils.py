@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from geo_utils import GridIndex, haversine_matrix
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(7)
+    # A dense cluster plus sparse outliers, so some queries need wider rings
+    lats = np.r_[8.50 + rng.random(2000) * 0.02, 8.3 + rng.random(50) * 0.5]
+    lngs = np.r_[76.95 + rng.random(2000) * 0.02, 76.7 + rng.random(50) * 0.5]
+    return lats, lngs
+
+
+def queries(n, seed):
+    rng = np.random.default_rng(seed)
+    return 8.25 + rng.random(n) * 0.6, 76.65 + rng.random(n) * 0.6
+
+
+def test_nearest_matches_brute_force(points):
+    index = GridIndex(*points)
+    lats, lngs = queries(500, 1)
+    idx, km = index.nearest(lats, lngs)
+    brute = haversine_matrix(lats, lngs, *points)
+    assert np.allclose(km, brute.min(axis=1))
+    assert np.allclose(brute[np.arange(len(lats)), idx], brute.min(axis=1))
+
+
+def test_nearest_with_max_km_marks_far_queries(points):
+    index = GridIndex(*points)
+    lats, lngs = queries(500, 2)
+    idx, km = index.nearest(lats, lngs, max_km=1.0)
+    best = haversine_matrix(lats, lngs, *points).min(axis=1)
+    assert np.array_equal(idx < 0, best > 1.0)
+    assert np.allclose(km[idx >= 0], best[idx >= 0])
+    assert np.isinf(km[idx < 0]).all()
+
+
+def test_within_returns_every_point_in_radius_sorted(points):
+    index = GridIndex(*points)
+    lats, lngs = queries(100, 3)
+    brute = haversine_matrix(lats, lngs, *points)
+    for q, (idx, km) in enumerate(index.within(lats, lngs, 0.5)):
+        assert set(idx) == set(np.flatnonzero(brute[q] <= 0.5))
+        assert np.all(np.diff(km) >= 0)
+
+
+def test_empty_reference_set_is_rejected():
+    with pytest.raises(ValueError):
+        GridIndex([], [])
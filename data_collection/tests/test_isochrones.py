@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import isochrones
+from road_graph import RoadGraph, TravelTimeEngine
+
+
+@pytest.fixture
+def engine():
+    # Three nodes on a line, 60 s apart in both directions
+    lats, lngs = [8.50, 8.51, 8.52], [76.95, 76.95, 76.95]
+    graph = RoadGraph.from_edges(lats, lngs, [0, 1, 1, 2], [1, 0, 2, 1], [60, 60, 60, 60])
+    engine = TravelTimeEngine(graph, {"north": {"lat": 8.52, "lng": 76.95}})
+    engine.precompute()
+    return engine
+
+
+def test_ad_hoc_targets_leave_the_engine_alone(engine, monkeypatch):
+    monkeypatch.setattr(isochrones, "get_engine", lambda: engine)
+    saved = []
+    monkeypatch.setattr(engine, "save", lambda *a, **k: saved.append(True))
+    targets = {"north": {"lat": 8.52, "lng": 76.95}, "south": {"lat": 8.50, "lng": 76.95}}
+
+    fields, source = isochrones.estimate_minutes(np.array([8.50, 8.52]), np.array([76.95, 76.95]), targets)
+
+    assert source == 'road_graph'
+    assert fields["north_time"] == pytest.approx([2.0, 0.0], abs=1e-6)
+    assert fields["south_time"] == pytest.approx([0.0, 2.0], abs=1e-6)
+    assert list(engine.destinations) == ["north"]
+    assert list(engine.node_times) == ["north"]
+    assert not saved
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+import noise_model
+from noise_model import NoiseModel, STATIC_SOURCES, BUS_STATION_SOURCE
+
+STATUE = (8.4931, 76.9489)
+
+
+def with_bus_station(lat, lng):
+    return NoiseModel([dict(s) for s in STATIC_SOURCES] +
+                      [dict(BUS_STATION_SOURCE, name="stand", coords=[[lat, lng]])])
+
+
+def test_bus_stations_are_counted_and_add_noise():
+    static = NoiseModel([dict(s) for s in STATIC_SOURCES])
+    assert static.bus_stations == 0
+    model = with_bus_station(*STATUE)
+    assert model.bus_stations == 1
+    assert model.noise_score(*STATUE) < static.noise_score(*STATUE)
+
+
+def test_mc_road_runs_north_east_from_kesavadasapuram():
+    mc_road = next(s for s in STATIC_SOURCES if s['name'] == 'mc_road')
+    (start_lat, start_lng), (end_lat, end_lng) = mc_road['coords'][0], mc_road['coords'][-1]
+    assert end_lat - start_lat > 0.1
+    # Venjaramoodu, not Kazhakuttam on the coast side
+    assert end_lng > 76.9
+
+
+def test_main_does_not_save_without_bus_stations(tmp_path, monkeypatch):
+    path = tmp_path / "objective_locality_data.json"
+    path.write_text(json.dumps([{"name": "Statue", "latitude": STATUE[0], "longitude": STATUE[1],
+                                 "noise_score": 1.5}]))
+    monkeypatch.setattr(noise_model, "LOCALITY_DATA_FILE", str(path))
+    monkeypatch.setattr(noise_model, "_model", NoiseModel([dict(s) for s in STATIC_SOURCES]))
+
+    monkeypatch.setattr("sys.argv", ["noise_model.py"])
+    noise_model.main()
+    assert json.loads(path.read_text())[0]["noise_score"] == 1.5
+
+    monkeypatch.setattr("sys.argv", ["noise_model.py", "--allow-partial"])
+    noise_model.main()
+    assert json.loads(path.read_text())[0]["noise_score"] == pytest.approx(3.8)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from normalization import QuantileSketch, MetricNormalizer
+
+N = 100_000
+
+
+def max_rank_error(sketch, data):
+    data = np.sort(data)
+    probes = np.linspace(data[0], data[-1], 201)
+    true = np.searchsorted(data, probes, side='right')
+    estimated = np.array([sketch.rank(p) for p in probes])
+    return np.abs(estimated - true).max() / len(data)
+
+
+def streams():
+    ascending = np.arange(N, dtype=float)
+    return {
+        'sorted': ascending,
+        'reversed': ascending[::-1].copy(),
+        'random': np.random.default_rng(7).permutation(ascending),
+    }
+
+
+@pytest.mark.parametrize('order', ['sorted', 'reversed', 'random'])
+@pytest.mark.parametrize('capacity, bound', [(64, 0.05), (4096, 0.002)])
+def test_rank_error_bounded_for_any_arrival_order(order, capacity, bound):
+    data = streams()[order]
+    sketch = QuantileSketch(capacity=capacity)
+    # Incremental flushes, as generate_clean_rankings does per record
+    for start in range(0, N, 1000):
+        sketch.add(data[start:start + 1000])
+        assert sketch.count == start + 1000
+
+    assert not sketch.exact
+    assert max_rank_error(sketch, data) < bound
+    assert abs(sketch.quantile(0.5) - 49999.5) < bound * N
+    assert sketch.min == 0 and sketch.max == N - 1
+
+
+def test_exact_below_capacity_and_ties_share_rank():
+    sketch = QuantileSketch([5, 1, 3, 3, None, float('nan'), 9])
+    assert sketch.exact
+    assert sketch.count == 5
+    assert sketch.rank(3) == 3
+    assert sketch.percentile(3) == pytest.approx(0.6)
+    assert sketch.percentile(0) == 0
+    assert sketch.quantile(0.5) == 3
+
+
+def test_merge_matches_single_sketch():
+    data = streams()['random']
+    left, right = QuantileSketch(data[:N // 2], capacity=256), QuantileSketch(data[N // 2:], capacity=256)
+    merged = left.merge(right)
+    assert merged.count == N
+    assert max_rank_error(merged, data) < 0.03
+
+
+def test_round_trip():
+    sketch = QuantileSketch(np.arange(10_000), capacity=128)
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    assert restored.count == sketch.count
+    assert [restored.rank(v) for v in (0, 2500, 9999)] == [sketch.rank(v) for v in (0, 2500, 9999)]
+
+
+def test_score_ties_at_worst_end_are_zero():
+    normalizer = MetricNormalizer().add('gyms', [0, 0, 0, 2, 5])
+    assert normalizer.score('gyms', 0) == 0
+    assert normalizer.score('gyms', 5) == 10
+    assert 0 < normalizer.score('gyms', 2) < 10
+    assert normalizer.score('gyms', 5, higher_is_better=False) == 0
+    assert normalizer.score('gyms', 0, higher_is_better=False) == 10
+    assert normalizer.score('missing', 1) is None
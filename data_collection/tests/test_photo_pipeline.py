@@ -0,0 +1,75 @@
+import json
+import warnings
+
+import pytest
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image, ImageDraw
+
+import photo_pipeline
+from photo_pipeline import dhash, cluster_near_duplicates, collect_sources
+
+URL = photo_pipeline.PLACES_PHOTO_URL + "?maxwidth=800&photoreference=abc"
+
+
+def sample_image(width=180, height=120):
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([width // 4, height // 4, width // 2, height - 10], fill='black')
+    draw.ellipse([width // 2, 10, width - 10, height // 2], fill='grey')
+    return image
+
+
+def asset(aid, bits, width):
+    return {'id': aid, 'dhash': f"{bits:016x}", 'width': width, 'height': width}
+
+
+def test_dhash_survives_resizing_without_deprecated_calls():
+    image = sample_image()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        full, small = dhash(image), dhash(image.resize((90, 60)))
+    assert bin(full ^ small).count('1') <= photo_pipeline.DHASH_DISTANCE
+
+
+def test_near_duplicates_merge_only_within_an_entity():
+    assets = {'big': asset('big', 0b1111, 1600), 'small': asset('small', 0b0111, 400),
+              'other': asset('other', 0b1111, 800)}
+    canonical = cluster_near_duplicates(assets, [{'big', 'small'}, {'other'}])
+    assert canonical == {'big': 'big', 'small': 'big', 'other': 'other'}
+
+
+def test_sources_are_grouped_by_entity_across_files():
+    files = {'a.json': ([{'id': 'p1', 'image': URL + '&key=secret'}], False),
+             'b.json': ([{'id': 'p1', 'photo_url': URL}, {'name': 'Kowdiar', 'image': 'k.jpg'}], False)}
+    sources, owners = collect_sources(files)
+    assert sources == [URL, 'k.jpg']
+    assert owners == {URL: {'id:p1'}, 'k.jpg': {'name:Kowdiar'}}
+
+
+def test_failed_re_download_is_counted_and_not_published(tmp_path, monkeypatch):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    (data_dir / 'malls.json').write_text(json.dumps([{'id': 'm1', 'image': URL}]))
+    monkeypatch.setattr(photo_pipeline, 'ROOT_DIR', str(tmp_path))
+    monkeypatch.setattr(photo_pipeline, 'DATA_DIR', str(data_dir))
+    monkeypatch.setattr(photo_pipeline, 'MANIFEST_FILE', str(data_dir / 'photo_manifest.json'))
+    monkeypatch.setattr(photo_pipeline, 'CACHE_FILE', str(tmp_path / 'cache.json'))
+    monkeypatch.setattr(photo_pipeline, 'PHOTO_DATA_FILES', ['malls.json'])
+    # Known from an earlier run, but its derivatives have since been deleted
+    (tmp_path / 'cache.json').write_text(json.dumps({
+        'sources': {URL: {'stamp': URL, 'id': 'aa11'}},
+        'assets': {'aa11': dict(asset('aa11', 1, 1024), widths=[320, 640, 1024], fallback=1024)},
+    }))
+
+    def fail(url, api_key):
+        raise RuntimeError("HTTP 403")
+
+    monkeypatch.setattr(photo_pipeline, 'download', fail)
+    stats = photo_pipeline.run(api_key='key')
+    assert stats['failed'] == 1 and stats['encoded'] == 0
+    assert json.loads((data_dir / 'photo_manifest.json').read_text())['photos'] == {}
+    assert json.loads((data_dir / 'malls.json').read_text())[0]['image'] == URL
+
+    stats = photo_pipeline.run(api_key=None)
+    assert stats['failed'] == 1
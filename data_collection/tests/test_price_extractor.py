@@ -0,0 +1,46 @@
+import pytest
+
+from price_extractor import land_prices, apartment_prices, aggregate, extract_prices
+
+
+@pytest.mark.parametrize("snippet, expected", [
+    ("Plots at ₹12 lakh per cent near the bypass", [12.0]),
+    ("Land rates 10-12 L/cent in the area", [11.0]),
+    ("Rs. 15,00,000 per cent", [15.0]),
+    ("Asking 1.2 crore per acre", [1.2]),
+    ("Prices rose 12 per cent this year", []),          # a percentage, not a price
+    ("₹500 crore per acre", []),                        # implausible, dropped
+])
+def test_land_formats(snippet, expected):
+    assert land_prices(snippet) == expected
+
+
+@pytest.mark.parametrize("snippet, expected", [
+    ("Flats from ₹6,500/sq ft", [6500]),
+    ("Rates 5,200 - 6,800 per sqft", [6000]),
+    ("Around 6.5K/sft for new projects", [6500]),
+    ("₹90 per sq ft maintenance", []),
+])
+def test_apartment_formats(snippet, expected):
+    assert apartment_prices(snippet) == expected
+
+
+def test_aggregate_needs_agreement():
+    assert aggregate([[10.0], [12.0], [11.0]]) == (11.0, "10.0-12.0", "high")
+    assert aggregate([[10.0], [11.0]])[2] == "medium"
+    assert aggregate([[10.0]])[2] is None              # too few snippets
+    assert aggregate([[5.0], [20.0]])[2] is None       # too scattered
+    assert aggregate([[], []]) == (None, None, None)
+
+
+def test_extract_prices_reports_resolved_fields():
+    result = extract_prices(
+        ["₹12 lakh per cent", "10-12 L/cent", "Rs 13 lakh/cent"],
+        ["₹6,500/sq ft"],
+    )
+    assert result["land_price_per_cent_lakhs"] == 12.0
+    assert result["apartment_price_per_sqft"] is None
+    assert result["resolved"] == ["land_price_per_cent_lakhs"]
+    assert result["confidence"] == "low"
+    assert result["land_price_confidence"] == "high"
+    assert result["apartment_price_confidence"] is None
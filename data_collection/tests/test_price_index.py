@@ -0,0 +1,50 @@
+import pytest
+
+from price_index import (observe, set_override, clear_override, record_extraction, load_prices,
+                         save_index, CURATED_SOURCE)
+
+
+@pytest.fixture
+def index():
+    index = {"updated_at": None, "localities": {}}
+    record_extraction(index, {"locality": "Pattom", "land_price_per_cent_lakhs": 30.0,
+                              "apartment_price_per_sqft": 6470, "confidence": "medium"}, "extraction")
+    return index
+
+
+def test_override_wins_until_cleared(index):
+    set_override(index, "Pattom", "apartment_price", 8500)
+    record_extraction(index, {"locality": "Pattom", "land_price_per_cent_lakhs": 31.0,
+                              "apartment_price_per_sqft": 6600}, "extraction")
+    entry = index["localities"]["Pattom"]
+    assert entry["apartment_price"]["value"] == 8500
+    assert entry["land_price"]["value"] == 31.0
+
+    clear_override(index, "Pattom", "apartment_price")
+    assert entry["apartment_price"] == {"value": 6600, "source": "extraction", "confidence": None,
+                                        "override": False, "updated_at": entry["apartment_price"]["updated_at"]}
+
+
+def test_unknown_locality_rejected(index):
+    with pytest.raises(ValueError):
+        set_override(index, "Patom", "land_price", 20)
+    with pytest.raises(ValueError):
+        clear_override(index, "Patom", "land_price")
+    assert list(index["localities"]) == ["Pattom"]
+
+
+def test_rankings_read_current_values_with_overrides(index, tmp_path):
+    set_override(index, "Pattom", "land_price", 20.25, source=CURATED_SOURCE)
+    path = tmp_path / "price_index.json"
+    save_index(index, path)
+    assert load_prices(path)["Pattom"] == {"land_price": 20.25, "apartment_price": 6470}
+
+    # A later manual set is what every stage sees next
+    set_override(index, "Pattom", "land_price", 22.0, note="site visit")
+    save_index(index, path)
+    assert load_prices(path)["Pattom"]["land_price"] == 22.0
+
+    # Clearing falls back to the extraction, never to a published value
+    clear_override(index, "Pattom", "land_price")
+    save_index(index, path)
+    assert load_prices(path)["Pattom"]["land_price"] == 30.0
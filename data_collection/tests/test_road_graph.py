@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from road_graph import RoadGraph, TravelTimeEngine, parse_osm
+
+# Three nodes on a north-south residential road, ~1.1 km apart, plus a footpath
+OSM = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="8.50" lon="76.95"/>
+  <node id="2" lat="8.51" lon="76.95"><tag k="highway" v="crossing"/></node>
+  <node id="3" lat="8.52" lon="76.95"/>
+  <way id="10"><nd ref="1"/><nd ref="2"/><nd ref="3"/><tag k="highway" v="residential"/></way>
+  <way id="11"><nd ref="2"/><nd ref="3"/><tag k="highway" v="footway"/></way>
+  <relation id="20"><member type="way" ref="10" role=""/></relation>
+</osm>
+"""
+
+
+@pytest.fixture
+def extract(tmp_path):
+    path = tmp_path / "roads.osm"
+    path.write_text(OSM)
+    return str(path)
+
+
+def test_parse_keeps_nodes_and_drivable_ways(extract):
+    node_coords, ways = parse_osm(extract)
+    assert node_coords == {1: (8.50, 76.95), 2: (8.51, 76.95), 3: (8.52, 76.95)}
+    assert ways == [([1, 2, 3], 20, 0)]
+
+
+def test_cached_times_are_recomputed_when_a_destination_moves(extract, tmp_path):
+    cache = str(tmp_path / "road_graph.npz")
+    north = {"lat": 8.52, "lng": 76.95}
+    engine = TravelTimeEngine.load({"dest": north}, network_file=extract, cache_file=cache)
+    assert engine.node_times["dest"][2] == pytest.approx(0.0)
+
+    # Same key, new coordinates: the cached times belong to the old point
+    south = {"lat": 8.50, "lng": 76.95}
+    moved = TravelTimeEngine.load({"dest": south}, network_file=extract, cache_file=cache)
+    assert moved.node_times["dest"][0] == pytest.approx(0.0)
+    assert moved.node_times["dest"][2] > 0
+
+    graph, extra = RoadGraph.load(cache)
+    assert np.array_equal(extra["coords_dest"], [8.50, 76.95])
+    assert moved.node_times_for({"dest": north})["dest"][2] == pytest.approx(0.0)
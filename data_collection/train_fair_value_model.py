@@ -1,25 +1,39 @@
 
 import json
 import os
-import pandas as pd
-import numpy as np
-from sklearn.linear_model import LassoCV
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_absolute_error, r2_score
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from fair_value_model import (
+    CONNECTIVITY_FEATURES, INFRA_FEATURES, LIFESTYLE_FEATURES, UTILITY_FEATURES,
+    MISSING_TIME, PILLARS, MODEL_FILE, FairValueModel, save_model
+)
+from atomic_io import write_json
+from price_index import load_prices, PRICE_FIELDS
+
+# pandas and scikit-learn are imported inside the functions that use them so
+# that importing this module (e.g. from the pipeline CLI) stays cheap.
 
 # Paths
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 LOCALITY_DATA_FILE = os.path.join(DATA_DIR, 'objective_locality_data.json')
-PRICE_DATA_FILE = os.path.join(DATA_DIR, 'property_prices.json')
 
 def load_data():
     with open(LOCALITY_DATA_FILE, 'r') as f:
         localities = json.load(f)
-    with open(PRICE_DATA_FILE, 'r') as f:
-        prices = json.load(f)['prices']
+    # Current index prices (overrides applied, as the rankings read them),
+    # in the property_prices.json column names prepare_dataset expects
+    prices = [
+        {'locality': name, **{PRICE_FIELDS[field]: value for field, value in fields.items()}}
+        for name, fields in load_prices().items()
+    ]
     return localities, prices
 
 def prepare_dataset(localities, prices):
+    import pandas as pd
+    
     # Convert to DataFrames
     df_loc = pd.DataFrame(localities)
     df_price = pd.DataFrame(prices)
@@ -31,39 +45,37 @@ def prepare_dataset(localities, prices):
     df = df.dropna(subset=['land_price_per_cent_lakhs'])
     
     # FEATURE COMPRESSION: Group features into 4 Pillars
+    # (feature spec lives in fair_value_model.py so inference matches training)
     
     # Pillar 1: Connectivity (Low time = High value)
     # We invert it: (60 - time) so higher number = better connectivity
-    connectivity_features = [
-        'city_centre_time', 'technopark_time', 'airport_time', 
-        'medical_college_time', 'secretariat_time', 'ksrtc_stand_time'
-    ]
-    for col in connectivity_features:
-        df[col] = df[col].fillna(60) # Assume 60 mins if missing
+    for col in CONNECTIVITY_FEATURES:
+        df[col] = df[col].fillna(MISSING_TIME) # Assume 60 mins if missing
         
-    df['Pillar_Connectivity'] = df[connectivity_features].apply(lambda x: 60 - x).mean(axis=1)
+    df['Pillar_Connectivity'] = df[CONNECTIVITY_FEATURES].apply(lambda x: MISSING_TIME - x).mean(axis=1)
     
     # Pillar 2: Infrastructure (Counts of essential services)
-    infra_features = ['school_count', 'hospital_count', 'police_count', 'fire_station_count']
-    df['Pillar_Infrastructure'] = df[infra_features].fillna(0).sum(axis=1)
+    df['Pillar_Infrastructure'] = df[INFRA_FEATURES].fillna(0).sum(axis=1)
     
     # Pillar 3: Lifestyle (Vibe and amenities)
-    lifestyle_features = ['park_count', 'restaurant_count', 'cafe_count', 'gym_count']
-    df['Pillar_Lifestyle'] = df[lifestyle_features].fillna(0).sum(axis=1)
+    df['Pillar_Lifestyle'] = df[LIFESTYLE_FEATURES].fillna(0).sum(axis=1)
     
     # Pillar 4: Utility (Commercial density)
-    utility_features = ['bank_count', 'atm_count', 'supermarket_count', 'pharmacy_count']
-    df['Pillar_Utility'] = df[utility_features].fillna(0).sum(axis=1)
+    df['Pillar_Utility'] = df[UTILITY_FEATURES].fillna(0).sum(axis=1)
     
     # Target
     y = df['land_price_per_cent_lakhs'].astype(float)
     
     # Features
-    X = df[['Pillar_Connectivity', 'Pillar_Infrastructure', 'Pillar_Lifestyle', 'Pillar_Utility']]
+    X = df[PILLARS]
     
     return X, y, df
 
 def train_model(X, y):
+    from sklearn.linear_model import LassoCV
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.metrics import mean_absolute_error, r2_score
+    
     # Standardize features
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
@@ -82,7 +94,163 @@ def train_model(X, y):
     
     return model, scaler, y_pred, mae, r2
 
+# --- Out-of-sample evaluation -------------------------------------------------
+# Workers live at module level so ProcessPoolExecutor can pickle them.
+
+def _quiet_convergence():
+    """Resampled sets with repeated rows often stop short of tolerance; that's expected"""
+    import warnings
+    from sklearn.exceptions import ConvergenceWarning
+    warnings.simplefilter('ignore', ConvergenceWarning)
+
+def _loo_fold(args):
+    """Fit the full LassoCV pipeline without row i and predict row i"""
+    X, y, i = args
+    from sklearn.linear_model import LassoCV
+    from sklearn.preprocessing import StandardScaler
+    import numpy as np
+    _quiet_convergence()
+    
+    mask = np.arange(len(y)) != i
+    scaler = StandardScaler().fit(X[mask])
+    model = LassoCV(cv=min(mask.sum() - 1, 5), random_state=42)
+    model.fit(scaler.transform(X[mask]), y[mask])
+    return i, float(model.predict(scaler.transform(X[i:i + 1]))[0])
+
+def _bootstrap_chunk(args):
+    """Refit scaler + Lasso (fixed alpha) on resampled rows, predict every row"""
+    X, y, alpha, seed, n_iter = args
+    from sklearn.linear_model import Lasso
+    from sklearn.preprocessing import StandardScaler
+    import numpy as np
+    _quiet_convergence()
+    
+    rng = np.random.default_rng(seed)
+    n = len(y)
+    preds = np.empty((n_iter, n))
+    for b in range(n_iter):
+        idx = rng.integers(0, n, n)
+        scaler = StandardScaler().fit(X[idx])
+        model = Lasso(alpha=alpha).fit(scaler.transform(X[idx]), y[idx])
+        preds[b] = model.predict(scaler.transform(X))
+    return preds
+
+def evaluate_model(X, y, alpha, n_bootstrap=2000, workers=None, seed=42):
+    """
+    Leave-one-out predictions plus bootstrap refits, spread across processes.
+    
+    Returns out-of-sample error and, for every row, a 95% prediction interval
+    built from bootstrap predictions plus resampled out-of-sample residuals.
+    Bootstrap refits reuse the full-data alpha (one LassoCV per refit would
+    cost ~50x more and barely move the interval).
+    """
+    import numpy as np
+    
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    workers = workers or os.cpu_count() or 1
+    
+    # Split bootstrap iterations into one chunk per worker, independent streams
+    chunk_sizes = [n_bootstrap // workers + (1 if k < n_bootstrap % workers else 0) for k in range(workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    chunks = [(X, y, alpha, s, size) for s, size in zip(seeds, chunk_sizes) if size]
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        loo = dict(pool.map(_loo_fold, [(X, y, i) for i in range(n)]))
+        boot = np.vstack(list(pool.map(_bootstrap_chunk, chunks)))
+    
+    loo_pred = np.array([loo[i] for i in range(n)])
+    residuals = y - loo_pred
+    
+    # Prediction interval: model uncertainty (bootstrap) + noise (LOO residuals)
+    rng = np.random.default_rng(seed)
+    noisy = boot + rng.choice(residuals, size=boot.shape)
+    lower, upper = np.percentile(noisy, [2.5, 97.5], axis=0)
+    
+    ss_res = float(np.sum(residuals ** 2))
+    ss_tot = float(np.sum((y - y.mean()) ** 2))
+    return {
+        "loo_mae": float(np.mean(np.abs(residuals))),
+        "loo_rmse": float(np.sqrt(np.mean(residuals ** 2))),
+        "loo_r2": 1 - ss_res / ss_tot if ss_tot else None,
+        "bootstrap_refits": int(boot.shape[0]),
+        "workers": workers,
+        "loo_predicted": loo_pred.tolist(),
+        "interval_low": lower.tolist(),
+        "interval_high": upper.tolist(),
+        "bootstrap_mean": boot.mean(axis=0).tolist(),
+    }
+
+def run_evaluation(X, y, df, model, n_bootstrap, workers):
+    """Print and save out-of-sample metrics and per-locality intervals"""
+    start = time.perf_counter()
+    result = evaluate_model(X, y, float(model.alpha_), n_bootstrap=n_bootstrap, workers=workers)
+    elapsed = time.perf_counter() - start
+    
+    print(f"\n--- Out-of-sample Evaluation ({result['bootstrap_refits']} bootstrap refits, "
+          f"{result['workers']} workers, {elapsed:.1f}s) ---")
+    print(f"LOO MAE:  {result['loo_mae']:.2f} Lakhs/cent")
+    print(f"LOO RMSE: {result['loo_rmse']:.2f} Lakhs/cent")
+    if result['loo_r2'] is not None:
+        print(f"LOO R²:   {result['loo_r2']:.2f}")
+    
+    rows = []
+    for i, name in enumerate(df['name']):
+        actual = float(y.iloc[i])
+        low, high = result['interval_low'][i], result['interval_high'][i]
+        rows.append({
+            "name": name,
+            "Actual": actual,
+            "LOO_Predicted": result['loo_predicted'][i],
+            "Interval_Low": low,
+            "Interval_High": high,
+            "Price_Diff": actual - result['loo_predicted'][i],
+            # Outside the 95% interval = the gap is more than model noise
+            "Significant": actual < low or actual > high,
+        })
+    
+    def show(title, items):
+        print(f"\n{title}")
+        for r in items:
+            flag = " *" if r['Significant'] else ""
+            print(f"  {r['name']:<18} Actual {r['Actual']:6.2f} | LOO pred {r['LOO_Predicted']:6.2f} "
+                  f"| 95% PI [{r['Interval_Low']:6.2f}, {r['Interval_High']:6.2f}]{flag}")
+    
+    by_diff = sorted(rows, key=lambda r: r['Price_Diff'])
+    show("Top 'Hidden Gems' (Actual < Predicted):", by_diff[:5])
+    show("Top 'Prestige Premiums' (Actual > Predicted):", by_diff[::-1][:5])
+    print("  (* actual price falls outside the 95% prediction interval)")
+    
+    output = {
+        "evaluation_stats": {
+            "loo_mae": result['loo_mae'],
+            "loo_rmse": result['loo_rmse'],
+            "loo_r2": result['loo_r2'],
+            "bootstrap_refits": result['bootstrap_refits'],
+            "alpha": float(model.alpha_),
+            "samples": len(rows),
+            "seconds": round(elapsed, 2),
+        },
+        "hidden_gems": by_diff[:5],
+        "prestige_premiums": by_diff[::-1][:5],
+        "localities": rows,
+    }
+    write_json(os.path.join(DATA_DIR, 'ml_fair_value_evaluation.json'), output, ensure_ascii=True)
+    print(f"\nEvaluation saved to data/ml_fair_value_evaluation.json")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the Trivandrum fair value model")
+    parser.add_argument('--evaluate', action='store_true',
+                        help="also run parallel leave-one-out + bootstrap evaluation")
+    parser.add_argument('--bootstrap', type=int, default=2000, help="bootstrap refits (default 2000)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    return parser.parse_args(sys.argv[1:])
+
 def main():
+    import pandas as pd
+    
+    args = parse_args()
     print("--- Trivandrum Fair Value Predictor (ML PoC) ---")
     
     localities, prices = load_data()
@@ -133,10 +301,24 @@ def main():
         "localities": analysis.to_dict(orient='records')
     }
     
-    with open(os.path.join(DATA_DIR, 'ml_fair_value_results.json'), 'w') as f:
-        json.dump(output, f, indent=2)
+    # Persist the fitted pipeline so other stages can score without retraining
+    artifact = FairValueModel.from_sklearn(scaler, model, metadata={
+        "target": "land_price_per_cent_lakhs",
+        "alpha": float(model.alpha_),
+        "samples": len(df),
+        "r2": r2,
+        "mae": mae,
+    })
+    model_id = save_model(artifact, MODEL_FILE)
+    output["model_stats"]["model_id"] = model_id
+    
+    write_json(os.path.join(DATA_DIR, 'ml_fair_value_results.json'), output, ensure_ascii=True)
     
     print(f"\nResults saved to data/ml_fair_value_results.json")
+    print(f"Model artifact {model_id} saved to data/fair_value_model.json")
+    
+    if args.evaluate:
+        run_evaluation(X.to_numpy(dtype=float), y, df, model, args.bootstrap, args.workers)
 
 if __name__ == "__main__":
     main()
@@ -8,6 +8,9 @@ import json
 import requests
 from dotenv import load_dotenv
 
+from atomic_io import write_json
+from photo_pipeline import places_photo_url
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -57,8 +60,8 @@ def search_place_photos(query):
 
 
 def get_photo_url(photo_reference, max_width=1200):
-    """Generate photo URL from photo reference"""
-    return f"https://maps.googleapis.com/maps/api/place/photo?maxwidth={max_width}&photoreference={photo_reference}&key={GOOGLE_MAPS_API_KEY}"
+    """Photo URL without the API key; photo_pipeline.py downloads it"""
+    return places_photo_url(photo_reference, max_width)
 
 
 def main():
@@ -100,8 +103,7 @@ def main():
             print(f"   ❌ No better photo found for {locality_name}")
     
     # Save updated photos
-    with open(photos_file, 'w', encoding='utf-8') as f:
-        json.dump(locality_photos, f, indent=2, ensure_ascii=False)
+    write_json(photos_file, locality_photos)
     
     print("\n" + "="*60)
     print("✅ UPDATED locality_photos.json")
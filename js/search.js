@@ -1,22 +1,11 @@
 // Search Functionality - All Categories
-let allSearchData = [];
+// Queries a prebuilt index (data_collection/build_search_index.py) instead of
+// downloading every category file: one small fetch, posting-list lookups per keystroke.
+let searchIndex = null;
 let searchDropdown = null;
 
-// Category configuration for search
-const searchCategories = [
-    { key: 'localities', file: null, label: 'Localities', icon: '🏘️', route: '/locality/' },
-    { key: 'restaurants', file: 'data/restaurants.json', label: 'Restaurants', icon: '🍽️', route: '/entity/restaurants/' },
-    { key: 'cafes', file: 'data/cafes.json', label: 'Cafes', icon: '☕', route: '/entity/cafes/' },
-    { key: 'hotels', file: 'data/hotels.json', label: 'Hotels', icon: '🏨', route: '/entity/hotels/' },
-    { key: 'malls', file: 'data/malls.json', label: 'Malls', icon: '🛒', route: '/entity/malls/' },
-    { key: 'boutiques', file: 'data/boutiques.json', label: 'Boutiques', icon: '👗', route: '/entity/boutiques/' },
-    { key: 'specialty_shops', file: 'data/specialty_shops.json', label: 'Specialty Shops', icon: '🎁', route: '/entity/specialty_shops/' },
-    { key: 'museums', file: 'data/museums.json', label: 'Museums', icon: '🏛️', route: '/entity/museums/' },
-    { key: 'religious_sites', file: 'data/religious_sites.json', label: 'Religious Sites', icon: '🛕', route: '/entity/religious_sites/' },
-    { key: 'healthcare', file: 'data/healthcare.json', label: 'Healthcare', icon: '🏥', route: '/entity/healthcare/' },
-    { key: 'education', file: 'data/education.json', label: 'Education', icon: '🎓', route: '/entity/education/' },
-    { key: 'banking', file: 'data/banking.json', label: 'Banking', icon: '🏦', route: '/entity/banking/' }
-];
+const SEARCH_INDEX_FILE = 'data/search_index.json';
+const MAX_SEARCH_RESULTS = 15;
 
 // Initialize search on page load
 document.addEventListener('DOMContentLoaded', initSearch);
@@ -51,56 +40,90 @@ async function initSearch() {
 }
 
 async function loadAllSearchData() {
-    allSearchData = [];
-
-    // Load localities from rankings
     try {
-        const rankingsData = await loadRankings();
-        if (rankingsData) {
-            const localities = rankingsData.all_rankings || rankingsData.top_10 || [];
-            localities.forEach(loc => {
-                allSearchData.push({
-                    name: loc.name,
-                    category: 'localities',
-                    categoryLabel: 'Localities',
-                    icon: '🏘️',
-                    route: `/locality/${loc.name}`,
-                    score: loc.overall_score,
-                    id: loc.name
-                });
-            });
-        }
+        const response = await fetch(SEARCH_INDEX_FILE);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const index = await response.json();
+        searchIndex = {
+            categories: index.categories,
+            entries: index.entries,
+            prefixes: index.prefixes,
+            trigrams: index.trigrams,
+            decoded: new Map()
+        };
+        console.log(`Search initialized with ${index.entries.length} items across all categories`);
     } catch (e) {
-        console.warn('Could not load localities for search');
+        console.warn('Could not load search index', e);
     }
+}
 
-    // Load all other categories
-    for (const cat of searchCategories) {
-        if (!cat.file) continue; // Skip localities, already loaded
-
-        try {
-            const response = await fetch(cat.file);
-            if (response.ok) {
-                const data = await response.json();
-                data.forEach(item => {
-                    allSearchData.push({
-                        name: item.name,
-                        category: cat.key,
-                        categoryLabel: cat.label,
-                        icon: cat.icon,
-                        route: `${cat.route}${encodeURIComponent(item.id || item.name)}`,
-                        score: item.score || item.rating,
-                        id: item.id || item.name,
-                        locality: item.locality
-                    });
-                });
-            }
-        } catch (e) {
-            console.warn(`Could not load ${cat.key} for search`);
-        }
+// Must match normalize() in data_collection/build_search_index.py
+function normalizeQuery(text) {
+    return text.normalize('NFKD').replace(/\p{M}/gu, '').toLowerCase()
+        .replace(/[^a-z0-9]+/g, ' ').trim();
+}
+
+// Delta-decoded posting list (ascending entry indices), cached per key
+function getPostings(table, key) {
+    const cacheKey = table + ':' + key;
+    let list = searchIndex.decoded.get(cacheKey);
+    if (!list) {
+        const deltas = searchIndex[table][key];
+        if (!deltas) return null;
+        list = new Int32Array(deltas.length);
+        let value = 0;
+        deltas.forEach((delta, i) => { value += delta; list[i] = value; });
+        searchIndex.decoded.set(cacheKey, list);
     }
+    return list;
+}
 
-    console.log(`Search initialized with ${allSearchData.length} items across all categories`);
+function intersectSorted(a, b) {
+    const out = [];
+    let i = 0, j = 0;
+    while (i < a.length && j < b.length) {
+        if (a[i] === b[j]) { out.push(a[i]); i++; j++; }
+        else if (a[i] < b[j]) i++;
+        else j++;
+    }
+    return out;
+}
+
+// Entry indices that may contain the query, in index (score) order
+function findCandidates(query) {
+    // Short queries: names with a word starting with the query
+    if (query.length < 3) {
+        return getPostings('prefixes', query) || [];
+    }
+
+    // Longer queries: every trigram of the query must occur in the name
+    const lists = [];
+    for (let i = 0; i + 3 <= query.length; i++) {
+        const list = getPostings('trigrams', query.slice(i, i + 3));
+        if (!list) return [];
+        lists.push(list);
+    }
+    lists.sort((a, b) => a.length - b.length);
+    let candidates = Array.from(lists[0]);
+    for (let k = 1; k < lists.length && candidates.length; k++) {
+        candidates = intersectSorted(candidates, lists[k]);
+    }
+    return candidates.filter(i => searchIndex.entries[i][1].includes(query));
+}
+
+function toSearchResult(entry) {
+    const [name, , categoryIndex, id, score, locality] = entry;
+    const [key, label, icon, route] = searchIndex.categories[categoryIndex];
+    return {
+        name,
+        category: key,
+        categoryLabel: label,
+        icon,
+        route: key === 'localities' ? `${route}${id}` : `${route}${encodeURIComponent(id)}`,
+        score,
+        id,
+        locality
+    };
 }
 
 function createSearchDropdown() {
@@ -126,40 +149,24 @@ function handleSearchInput(e) {
 }
 
 function searchAllCategories(query) {
-    if (!allSearchData.length) return [];
-
-    // Search by name
-    const matches = allSearchData.filter(item => {
-        const name = item.name.toLowerCase();
-        return name.includes(query) || name.startsWith(query);
-    });
-
-    // Sort: exact matches first, then starts with, then contains, then by score
-    matches.sort((a, b) => {
-        const aName = a.name.toLowerCase();
-        const bName = b.name.toLowerCase();
-
-        // Exact match comes first
-        if (aName === query) return -1;
-        if (bName === query) return 1;
-
-        // Starts with comes next
-        const aStarts = aName.startsWith(query);
-        const bStarts = bName.startsWith(query);
-        if (aStarts && !bStarts) return -1;
-        if (!aStarts && bStarts) return 1;
-
-        // Then by score (higher first)
-        const aScore = a.score || 0;
-        const bScore = b.score || 0;
-        if (aScore !== bScore) return bScore - aScore;
-
-        // Then alphabetical
-        return aName.localeCompare(bName);
-    });
+    if (!searchIndex) return [];
+
+    const normalized = normalizeQuery(query);
+    if (!normalized) return [];
+
+    // Exact matches first, then starts with, then contains. Entries are
+    // pre-sorted by score (then name), so each tier is already in order.
+    const exact = [], starts = [], contains = [];
+    for (const i of findCandidates(normalized)) {
+        const norm = searchIndex.entries[i][1];
+        if (norm === normalized) exact.push(i);
+        else if (norm.startsWith(normalized)) starts.push(i);
+        else if (contains.length < MAX_SEARCH_RESULTS) contains.push(i);
+    }
 
-    // Limit to 15 results max
-    return matches.slice(0, 15);
+    return exact.concat(starts, contains)
+        .slice(0, MAX_SEARCH_RESULTS)
+        .map(i => toSearchResult(searchIndex.entries[i]));
 }
 
 function showSearchResults(query, results) {
@@ -29,6 +29,17 @@ const EDGE_FUNCTION_URL = `${SUPABASE_URL}/functions/v1/track-event`;
 
 // Helper function to track locality views (via Edge Function)
 async function trackLocalityView(localityName) {
+    // Batched with the other analytics events when the manager is running.
+    // Batch rows must carry the batch's session id, so use the manager's.
+    if (window.analytics?.initialized) {
+        window.analytics.queueEvent('locality_view', {
+            locality_name: localityName,
+            session_id: window.analytics.sessionId
+        });
+        console.log(`[Supabase] Queued view for: ${localityName}`);
+        return;
+    }
+
     // Get or Create a simple persistent session ID for this browser
     let sessionId = localStorage.getItem('unique_session_id');
     if (!sessionId) {
@@ -75,24 +86,16 @@ async function getTrendingLocalities(limit = 3) {
         const oneWeekAgo = new Date();
         oneWeekAgo.setDate(oneWeekAgo.getDate() - 7);
 
-        const { data, error } = await sbClient
-            .from('locality_views')
-            .select('locality_name')
-            .gte('viewed_at', oneWeekAgo.toISOString());
+        // Counted server-side (trending_localities RPC), so only the top
+        // rows are transferred regardless of traffic
+        const { data, error } = await sbClient.rpc('trending_localities', {
+            since: oneWeekAgo.toISOString(),
+            max_results: limit
+        });
 
         if (error) throw error;
 
-        // Count occurrences
-        const counts = {};
-        data.forEach(row => {
-            counts[row.locality_name] = (counts[row.locality_name] || 0) + 1;
-        });
-
-        // Sort by count and return top N
-        const sorted = Object.entries(counts)
-            .sort((a, b) => b[1] - a[1])
-            .slice(0, limit)
-            .map(entry => entry[0]);
+        const sorted = data.map(row => row.locality_name);
 
         console.log('[Supabase] Trending localities:', sorted);
         return sorted;
@@ -11,6 +11,16 @@ class AnalyticsManager {
         // Capture referrer on first load (before any navigation)
         this.initialReferrer = this._captureReferrer();
 
+        // Events are buffered and sent in batches (track-event batch mode)
+        this.queue = [];
+        this.flushTimer = null;
+
+        // Flush before the page goes away; keepalive lets the request outlive it
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') this.flush({ keepalive: true });
+        });
+        window.addEventListener('pagehide', () => this.flush({ keepalive: true }));
+
         // Auto-track page views on hash change
         window.addEventListener('hashchange', () => {
             this.trackPageView(window.location.hash);
@@ -96,11 +106,32 @@ class AnalyticsManager {
     }
 
     /**
-     * Send event to Edge Function (secure insert)
+     * Queue an event for the next batch. Flushes immediately once the batch
+     * is full, otherwise within FLUSH_INTERVAL_MS.
+     * @param {string} type - 'site_event' or 'locality_view'
+     * @param {Object} data - Event payload (validated by the Edge Function)
      */
-    async _sendToEdgeFunction(type, data) {
-        if (!this.edgeFunctionUrl) return;
+    queueEvent(type, data) {
+        this.queue.push({ type, data });
+
+        if (this.queue.length >= AnalyticsManager.MAX_BATCH_SIZE) {
+            this.flush();
+        } else if (!this.flushTimer) {
+            this.flushTimer = setTimeout(() => this.flush(), AnalyticsManager.FLUSH_INTERVAL_MS);
+        }
+    }
 
+    /**
+     * Send all queued events to the Edge Function as one batch request
+     */
+    async flush({ keepalive = false } = {}) {
+        clearTimeout(this.flushTimer);
+        this.flushTimer = null;
+        if (!this.edgeFunctionUrl || this.queue.length === 0) return;
+
+        // The Edge Function rejects rows whose session_id differs from the batch's
+        const events = this.queue.splice(0, AnalyticsManager.MAX_BATCH_SIZE)
+            .map(({ type, data }) => ({ type, data: { ...data, session_id: this.sessionId } }));
         try {
             const response = await fetch(this.edgeFunctionUrl, {
                 method: 'POST',
@@ -108,7 +139,8 @@ class AnalyticsManager {
                     'Content-Type': 'application/json',
                     'Authorization': `Bearer ${this.anonKey}`
                 },
-                body: JSON.stringify({ type, data })
+                body: JSON.stringify({ session_id: this.sessionId, events }),
+                keepalive
             });
 
             if (!response.ok) {
@@ -116,10 +148,16 @@ class AnalyticsManager {
                 throw new Error(errorData.error || 'Edge Function error');
             }
 
-            return await response.json();
+            const result = await response.json();
+            console.log(`📊 [Analytics] ✅ Sent ${result.accepted} of ${events.length} events`);
+            return result;
         } catch (err) {
-            console.debug('📊 [Analytics] Edge Function call failed:', err.message);
+            // Analytics is best effort: drop the batch rather than retry-storm
+            console.debug('📊 [Analytics] Batch send failed:', err.message);
             return null;
+        } finally {
+            // Anything queued beyond one batch goes out right away
+            if (this.queue.length > 0) this.flush({ keepalive });
         }
     }
 
@@ -143,14 +181,8 @@ class AnalyticsManager {
             user_agent: navigator.userAgent
         };
 
-        try {
-            const result = await this._sendToEdgeFunction('site_event', payload);
-            if (result?.success) {
-                console.log(`📊 [Analytics] ✅ Event tracked: ${eventName}`);
-            }
-        } catch (err) {
-            console.debug('📊 [Analytics] Event tracking failed:', err.message);
-        }
+        this.queueEvent('site_event', payload);
+        console.log(`📊 [Analytics] Queued event: ${eventName}`);
     }
 
     /**
@@ -159,21 +191,17 @@ class AnalyticsManager {
     async trackPageView(path) {
         if (!this.initialized) return;
 
-        try {
-            await this._sendToEdgeFunction('site_event', {
-                event_type: 'page_view',
-                event_name: 'view_page',
-                page_path: path,
-                session_id: this.sessionId,
-                user_agent: navigator.userAgent,
-                referrer_type: this.initialReferrer.type,
-                referrer_source: this.initialReferrer.source,
-                referrer_domain: this.initialReferrer.domain
-            });
-            console.log(`📊 [Analytics] Page View: ${path} (${this.initialReferrer.type})`);
-        } catch (err) {
-            console.debug('📊 [Analytics] Page track failed:', err.message);
-        }
+        this.queueEvent('site_event', {
+            event_type: 'page_view',
+            event_name: 'view_page',
+            page_path: path,
+            session_id: this.sessionId,
+            user_agent: navigator.userAgent,
+            referrer_type: this.initialReferrer.type,
+            referrer_source: this.initialReferrer.source,
+            referrer_domain: this.initialReferrer.domain
+        });
+        console.log(`📊 [Analytics] Page View: ${path} (${this.initialReferrer.type})`);
     }
 
     /**
@@ -190,5 +218,9 @@ class AnalyticsManager {
     }
 }
 
+// Batching: at most one request per FLUSH_INTERVAL_MS (or per full batch)
+AnalyticsManager.MAX_BATCH_SIZE = 20;
+AnalyticsManager.FLUSH_INTERVAL_MS = 5000;
+
 // Global Singleton
 window.analytics = new AnalyticsManager();
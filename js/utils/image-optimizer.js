@@ -28,16 +28,57 @@
     // Initialize WebP check
     checkWebPSupport();
 
+    // Responsive variants written by data_collection/photo_pipeline.py:
+    // { base, formats, fallback, photos: { <original path>: { id, w, fb, ratio } } }
+    let photoManifest = null;
+    const DEFAULT_SIZES = '(max-width: 640px) 100vw, 400px';
+
+    const manifestReady = fetch('data/photo_manifest.json')
+        .then(response => response.ok ? response.json() : null)
+        .then(manifest => { photoManifest = manifest; })
+        .catch(() => { photoManifest = null; });
+
+    function variantUrl(entry, width, format) {
+        return `${photoManifest.base}/${entry.id.slice(0, 2)}/${entry.id}-${width}.${format}`;
+    }
+
+    function lookupPhoto(url) {
+        return photoManifest?.photos?.[url] || null;
+    }
+
+    /**
+     * Smallest ladder width covering the requested width (largest if none does)
+     */
+    function pickWidth(entry, width) {
+        return entry.w.find(w => w >= width) || entry.w[entry.w.length - 1];
+    }
+
+    /**
+     * srcset attribute value for one format of a manifest entry
+     */
+    function buildSrcset(entry, format) {
+        return entry.w.map(w => `${variantUrl(entry, w, format)} ${w}w`).join(', ');
+    }
+
     /**
      * Get optimized image URL
      * Returns WebP version if supported and exists, otherwise original
      *
      * @param {string} url - Original image URL
+     * @param {number} width - Rendered width in CSS pixels (manifest photos only)
      * @returns {string} - Optimized image URL
      */
-    function getOptimizedImageUrl(url) {
+    function getOptimizedImageUrl(url, width) {
         if (!url) return url;
 
+        // Pipeline-processed photos: right-sized variant from the ladder
+        const entry = lookupPhoto(url);
+        if (entry) {
+            if (webpSupported === false) return variantUrl(entry, entry.fb, photoManifest.fallback);
+            const target = (width || entry.fb) * Math.min(window.devicePixelRatio || 1, 2);
+            return variantUrl(entry, pickWidth(entry, target), 'webp');
+        }
+
         // Skip external URLs (Google Places photos, etc.)
         if (url.startsWith('http://') || url.startsWith('https://')) {
             return url;
@@ -70,16 +111,29 @@
      * @param {string} alt - Alt text
      * @param {string} className - CSS class names
      * @param {boolean} lazy - Use lazy loading (default: true)
+     * @param {string} fallback - Image shown if loading fails
+     * @param {string} sizes - sizes attribute for manifest photos
      * @returns {string} - HTML string
      */
-    function createOptimizedImage(src, alt = '', className = '', lazy = true) {
+    function createOptimizedImage(src, alt = '', className = '', lazy = true,
+                                  fallback = 'https://via.placeholder.com/400x250?text=No+Image', sizes = DEFAULT_SIZES) {
         if (!src) {
-            return `<img src="https://via.placeholder.com/400x250?text=No+Image" alt="${alt}" class="${className}" loading="lazy">`;
+            return `<img src="${fallback}" alt="${alt}" class="${className}" loading="lazy">`;
+        }
+
+        // Pipeline-processed photos: AVIF / WebP ladders with a JPEG fallback
+        const entry = lookupPhoto(src);
+        if (entry) {
+            const height = Math.round(entry.fb / entry.ratio);
+            const sources = photoManifest.formats
+                .map(format => `<source type="image/${format}" srcset="${buildSrcset(entry, format)}" sizes="${sizes}">`)
+                .join('');
+            return `<picture>${sources}<img src="${variantUrl(entry, entry.fb, photoManifest.fallback)}" width="${entry.fb}" height="${height}" alt="${alt}" class="${className}" ${lazy ? 'loading="lazy" decoding="async"' : ''} onerror="this.onerror=null;this.parentElement.querySelectorAll('source').forEach(s=>s.remove());this.src='${fallback}'"></picture>`;
         }
 
         // External URLs don't get WebP treatment
         if (src.startsWith('http://') || src.startsWith('https://')) {
-            return `<img src="${src}" alt="${alt}" class="${className}" ${lazy ? 'loading="lazy"' : ''} onerror="this.src='https://via.placeholder.com/400x250?text=No+Image'">`;
+            return `<img src="${src}" alt="${alt}" class="${className}" ${lazy ? 'loading="lazy"' : ''} onerror="this.src='${fallback}'">`;
         }
 
         // Local images with supported formats get picture element
@@ -88,23 +142,24 @@
             return `
                 <picture>
                     <source srcset="${webpSrc}" type="image/webp">
-                    <img src="${src}" alt="${alt}" class="${className}" ${lazy ? 'loading="lazy"' : ''} onerror="this.src='https://via.placeholder.com/400x250?text=No+Image'">
+                    <img src="${src}" alt="${alt}" class="${className}" ${lazy ? 'loading="lazy"' : ''} onerror="this.src='${fallback}'">
                 </picture>
             `;
         }
 
         // Default fallback
-        return `<img src="${src}" alt="${alt}" class="${className}" ${lazy ? 'loading="lazy"' : ''} onerror="this.src='https://via.placeholder.com/400x250?text=No+Image'">`;
+        return `<img src="${src}" alt="${alt}" class="${className}" ${lazy ? 'loading="lazy"' : ''} onerror="this.src='${fallback}'">`;
     }
 
     /**
      * Create a background image style with WebP support
      *
      * @param {string} url - Original image URL
+     * @param {number} width - Rendered width in CSS pixels (default: viewport width)
      * @returns {string} - CSS background-image value
      */
-    function getOptimizedBackgroundUrl(url) {
-        const optimizedUrl = getOptimizedImageUrl(url);
+    function getOptimizedBackgroundUrl(url, width = window.innerWidth) {
+        const optimizedUrl = getOptimizedImageUrl(url, width);
         return optimizedUrl;
     }
 
@@ -113,6 +168,8 @@
         getOptimizedUrl: getOptimizedImageUrl,
         createImage: createOptimizedImage,
         getBackgroundUrl: getOptimizedBackgroundUrl,
-        isWebPSupported: () => webpSupported
+        isWebPSupported: () => webpSupported,
+        hasVariants: (url) => Boolean(lookupPhoto(url)),
+        ready: manifestReady
     };
 })();
@@ -395,8 +395,35 @@ async function renderAdminView() {
             return { labels, eventsData, visitorsData };
         }
 
+        // Daily totals maintained by refresh_analytics_rollups() (migration 004):
+        // at most one row per day instead of the whole event log
+        const { data: dailyTotals, error: rollupError } = await window.sbClient
+            .from('site_events_daily_totals')
+            .select('day, events, sessions')
+            .order('day', { ascending: true });
+
+        function aggregateFromRollup(rows, days) {
+            const startDate = new Date();
+            startDate.setDate(startDate.getDate() - days);
+            const byDay = Object.fromEntries(rows.map(r => [r.day, r]));
+
+            const labels = [];
+            for (let i = 0; i <= days; i++) {
+                const date = new Date(startDate);
+                date.setDate(date.getDate() + i);
+                labels.push(date.toISOString().split('T')[0]);
+            }
+            const eventsData = labels.map(d => byDay[d]?.events || 0);
+            const visitorsData = labels.map(d => byDay[d]?.sessions || 0);
+
+            return { labels, eventsData, visitorsData };
+        }
+
         function renderTrafficChart(days) {
-            const { labels, eventsData, visitorsData } = aggregateByDay(allEvents, days);
+            // Fall back to the raw events until the rollup migration has run
+            const { labels, eventsData, visitorsData } = (!rollupError && dailyTotals?.length)
+                ? aggregateFromRollup(dailyTotals, days)
+                : aggregateByDay(allEvents, days);
 
             const ctx = document.getElementById('traffic-trends-chart');
             if (!ctx) return;
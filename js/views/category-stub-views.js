@@ -49,7 +49,7 @@ async function renderCategoryView(type, config) {
         const customizeRoute = type.replace(/_/g, '-');
 
         let html = `
-            <div class="dining-hero" style="background: linear-gradient(rgba(0,0,0,0.7), rgba(0,0,0,0.7)), url('${config.heroImage || top10[0]?.image || "images/skyline.png"}') center/cover fixed;">
+            <div class="dining-hero" style="background: linear-gradient(rgba(0,0,0,0.7), rgba(0,0,0,0.7)), url('${window.ImageOptimizer?.getBackgroundUrl(config.heroImage || top10[0]?.image) || config.heroImage || top10[0]?.image || "images/skyline.png"}') center/cover fixed;">
                 <div class="hero-content">
                     <h1 style="color: white; text-shadow: 2px 2px 8px rgba(0,0,0,1), 0 0 20px rgba(0,0,0,0.8); font-size: 3.5rem;">${config.title}</h1>
                     <p class="hero-subtitle" style="color: rgba(255,255,255,0.9); text-shadow: 1px 1px 4px rgba(0,0,0,0.9); font-size: 1.25rem; margin-top: 0.5rem;">${config.subtitle}</p>
@@ -163,7 +163,7 @@ function createCategoryItemCard(item, rank, config, type) {
                 <div class="card-rank" style="background: ${accentColor}">#${rank}</div>
                 ${featuredBadge}
                 <div class="card-image-container">
-                    <img src="${item.image || 'images/skyline.png'}" alt="${item.name}" class="card-image" loading="lazy" onerror="this.src='images/skyline.png'">
+                    ${window.ImageOptimizer?.createImage(item.image || 'images/skyline.png', item.name, 'card-image', true, 'images/skyline.png') || `<img src="${item.image || 'images/skyline.png'}" alt="${item.name}" class="card-image" loading="lazy" onerror="this.src='images/skyline.png'">`}
                     <div class="card-overlay">
                         ${item.price_level ? `<span class="card-price">${'$'.repeat(item.price_level)}</span>` : ''}
                     </div>
@@ -262,7 +262,7 @@ async function renderDetailView(localityName) {
                 if (photoData && photoData.photo_url) {
                     const heroElement = document.getElementById('detail-hero-image');
                     if (heroElement) {
-                        heroElement.style.backgroundImage = `url('${photoData.photo_url}')`;
+                        heroElement.style.backgroundImage = `url('${window.ImageOptimizer?.getBackgroundUrl(photoData.photo_url) || photoData.photo_url}')`;
                         console.log('[Photo] Loaded photo for:', locality.name);
                     }
                 } else {
@@ -97,7 +97,7 @@ async function renderDiningView(type, filters = {}) {
         ` : '';
 
         let html = `
-            <div class="dining-hero" style="background: linear-gradient(rgba(0,0,0,0.7), rgba(0,0,0,0.7)), url('${top10[0].image}') center/cover fixed;">
+            <div class="dining-hero" style="background: linear-gradient(rgba(0,0,0,0.7), rgba(0,0,0,0.7)), url('${window.ImageOptimizer?.getBackgroundUrl(top10[0].image) || top10[0].image}') center/cover fixed;">
                 <div class="hero-content">
                     <h1 style="color: white; text-shadow: 2px 2px 8px rgba(0,0,0,1), 0 0 20px rgba(0,0,0,0.8); font-size: 3.5rem;">${config.title}</h1>
                     <p class="hero-subtitle" style="color: rgba(255,255,255,0.9); text-shadow: 1px 1px 4px rgba(0,0,0,0.9); font-size: 1.25rem; margin-top: 0.5rem;">${config.subtitle}</p>
@@ -374,7 +374,7 @@ function createDiningCard(place, rank, config, type) {
                 <div class="card-rank">#${rank}</div>
                 ${featuredBadge}
                 <div class="card-image-container">
-                    <img src="${place.image}" alt="${place.name}" class="card-image" loading="lazy" onerror="this.src='https://via.placeholder.com/400x250?text=No+Image'">
+                    ${window.ImageOptimizer?.createImage(place.image, place.name, 'card-image') || `<img src="${place.image}" alt="${place.name}" class="card-image" loading="lazy" onerror="this.src='https://via.placeholder.com/400x250?text=No+Image'">`}
                     <div class="card-overlay">
                         <span class="card-price">${price}</span>
                     </div>
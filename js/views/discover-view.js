@@ -61,7 +61,7 @@ async function renderDiscoverView(localityName) {
             if (photosResponse.ok) {
                 const photos = await photosResponse.json();
                 if (photos[localityName] && photos[localityName].photo_url) {
-                    heroPhoto = photos[localityName].photo_url;
+                    heroPhoto = window.ImageOptimizer?.getBackgroundUrl(photos[localityName].photo_url) || photos[localityName].photo_url;
                 }
             }
         } catch (e) {
@@ -104,7 +104,7 @@ async function renderDiscoverView(localityName) {
 
             html += `
                 <a href="${spot.google_maps_url}" target="_blank" class="discover-spot-card" data-category="${spot.category}" rel="noopener noreferrer">
-                    <div class="discover-spot-image" style="${hasPhoto ? `background-image: url('${spot.photo_url}')` : `background: ${placeholderColor}`}">
+                    <div class="discover-spot-image" style="${hasPhoto ? `background-image: url('${window.ImageOptimizer?.getBackgroundUrl(spot.photo_url, 400) || spot.photo_url}')` : `background: ${placeholderColor}`}">
                         ${!hasPhoto ? `<span class="discover-spot-icon">${spot.icon}</span>` : ''}
                         <span class="discover-spot-badge">${spot.category}</span>
                     </div>
@@ -151,52 +151,40 @@ function formatMetricValue(value, format) {
 }
 
 /**
- * Calculate distance between two coordinates (Haversine formula)
+ * File-safe name for a place id or locality name
+ * (must match nearby_slug() in data_collection/build_nearby.py)
  */
-function calculateDistance(lat1, lon1, lat2, lon2) {
-    const R = 6371; // Earth's radius in km
-    const dLat = (lat2 - lat1) * Math.PI / 180;
-    const dLon = (lon2 - lon1) * Math.PI / 180;
-    const a = Math.sin(dLat / 2) * Math.sin(dLat / 2) +
-        Math.cos(lat1 * Math.PI / 180) * Math.cos(lat2 * Math.PI / 180) *
-        Math.sin(dLon / 2) * Math.sin(dLon / 2);
-    const c = 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
-    return R * c;
+function nearbySlug(value) {
+    return String(value).replace(/[^A-Za-z0-9_-]+/g, '-').replace(/^-+|-+$/g, '') || '_';
 }
 
 /**
  * Find nearby entities from all categories
+ * Lists are precomputed by data_collection/build_nearby.py (sorted by distance)
  */
-async function findNearbyEntities(lat, lng, currentId, limit = 6) {
-    const nearby = [];
+async function findNearbyEntities(category, entityId, limit = 6) {
     const categoriesToSearch = ['restaurants', 'cafes', 'hotels', 'malls', 'museums', 'healthcare'];
 
-    for (const category of categoriesToSearch) {
-        try {
-            const response = await fetch(ENTITY_CATEGORIES[category].dataFile);
-            if (response.ok) {
-                const data = await response.json();
-                data.forEach(item => {
-                    if (item.id !== currentId && item.location) {
-                        const distance = calculateDistance(lat, lng, item.location.lat, item.location.lng);
-                        if (distance <= 3) { // Within 3km
-                            nearby.push({
-                                ...item,
-                                category,
-                                distance,
-                                categoryConfig: ENTITY_CATEGORIES[category]
-                            });
-                        }
-                    }
-                });
-            }
-        } catch (e) {
-            console.warn(`Could not load ${category} for nearby:`, e);
-        }
+    try {
+        const response = await fetch(`data/nearby/${category}/${nearbySlug(entityId)}.json`);
+        if (!response.ok) return [];
+        const { places } = await response.json();
+
+        return places
+            .filter(([placeCategory]) => categoriesToSearch.includes(placeCategory))
+            .slice(0, limit)
+            .map(([placeCategory, id, name, distance, rating]) => ({
+                id,
+                name,
+                rating,
+                distance,
+                category: placeCategory,
+                categoryConfig: ENTITY_CATEGORIES[placeCategory]
+            }));
+    } catch (e) {
+        console.warn('Could not load nearby places:', e);
+        return [];
     }
-
-    // Sort by distance and return top N
-    return nearby.sort((a, b) => a.distance - b.distance).slice(0, limit);
 }
 
 /**
@@ -235,11 +223,7 @@ async function renderEntityDetailView(category, entityId) {
         // Get nearby entities
         let nearbyHtml = '';
         if (entity.location) {
-            const nearby = await findNearbyEntities(
-                entity.location.lat,
-                entity.location.lng,
-                entity.id
-            );
+            const nearby = await findNearbyEntities(category, entity.id);
 
             if (nearby.length > 0) {
                 nearbyHtml = `
@@ -291,7 +275,7 @@ async function renderEntityDetailView(category, entityId) {
                 </div>
 
                 <!-- Hero Section -->
-                <div class="entity-hero" style="background-image: linear-gradient(rgba(0,0,0,0.5), rgba(0,0,0,0.7)), url('${entity.image || 'images/skyline.png'}');">
+                <div class="entity-hero" style="background-image: linear-gradient(rgba(0,0,0,0.5), rgba(0,0,0,0.7)), url('${window.ImageOptimizer?.getBackgroundUrl(entity.image) || entity.image || 'images/skyline.png'}');">
                     <div class="entity-hero-content">
                         <div class="entity-rank-badge" style="background: ${config.color}">
                             #${rank}
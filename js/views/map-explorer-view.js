@@ -95,23 +95,14 @@ const MAP_CATEGORIES = {
 let mapInstance = null;
 let categoryLayers = {};
 let activeCategories = new Set(['localities']);
-let allEntityData = {}; // Cache for entity data
-let localityFacilities = {}; // Facilities near each locality
+let mapTileManifest = null; // Clustered marker tiles (data/map_tiles)
+const tileCache = new Map(); // 'z/x/y' -> tile promise, oldest first
+const MAX_CACHED_TILES = 64;
+let tileRefreshId = 0;
+let localityFacilities = {}; // Facility counts near each locality (data/nearby)
 let globalMarkers = {}; // NEW: ID -> Marker mapping for all categories
 let isDataLoading = false;
-
-/**
- * Calculate distance between two coordinates (km)
- */
-function haversineDistance(lat1, lon1, lat2, lon2) {
-    const R = 6371;
-    const dLat = (lat2 - lat1) * Math.PI / 180;
-    const dLon = (lon2 - lon1) * Math.PI / 180;
-    const a = Math.sin(dLat / 2) * Math.sin(dLat / 2) +
-        Math.cos(lat1 * Math.PI / 180) * Math.cos(lat2 * Math.PI / 180) *
-        Math.sin(dLon / 2) * Math.sin(dLon / 2);
-    return R * 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
-}
+let heatmapLayer = null; // City-wide score raster (data/heatmap)
 
 /**
  * Create marker icon - clean, no rankings
@@ -196,7 +187,7 @@ function createLocalityPopup(locality) {
     const categoryOrder = ['restaurants', 'cafes', 'hotels', 'healthcare', 'education', 'malls', 'museums', 'religious_sites', 'banking'];
 
     for (const cat of categoryOrder) {
-        const count = facilities[cat]?.length || 0;
+        const count = facilities[cat] || 0;
         if (count > 0) {
             const catConfig = MAP_CATEGORIES[cat];
             facilitiesHtml += `<span style="background: ${catConfig.color}; color: white; padding: 2px 6px; border-radius: 10px; font-size: 11px;" title="${count} ${catConfig.label}">${catConfig.icon} ${count}</span>`;
@@ -216,181 +207,270 @@ function createLocalityPopup(locality) {
 }
 
 /**
- * Load all entity data and compute locality facilities
+ * Load the tile manifest and locality facilities
+ * (markers themselves are fetched per visible tile)
  */
 async function loadAllData() {
-    if (Object.keys(allEntityData).length > 1 && !isDataLoading) return; // Already loaded
+    if (mapTileManifest && !isDataLoading) return; // Already loaded
 
     isDataLoading = true;
     globalMarkers = {}; // Clear global markers on reload
-    console.log('[Debug] Loading all map data...');
-
-    // Load localities first
-    const rankingsData = await loadRankings();
-    allEntityData.localities = rankingsData?.all_rankings || [];
-
-    // Load all other categories in parallel for speed
-    const loadPromises = Object.entries(MAP_CATEGORIES)
-        .filter(([cat, config]) => cat !== 'localities' && config.dataFile)
-        .map(async ([category, config]) => {
-            try {
-                const response = await fetch(config.dataFile);
-                if (response.ok) {
-                    allEntityData[category] = await response.json();
-                }
-            } catch (e) {
-                console.warn(`Failed to load ${category}:`, e);
-                allEntityData[category] = [];
-            }
-        });
 
-    await Promise.all(loadPromises);
-    computeLocalityFacilities();
+    const [manifestResponse] = await Promise.all([
+        fetch('data/map_tiles/manifest.json'),
+        loadLocalityFacilities()
+    ]);
+    if (!manifestResponse.ok) throw new Error('Map tiles not found');
+    mapTileManifest = await manifestResponse.json();
     isDataLoading = false;
 }
 
 /**
- * Compute what facilities are near each locality (within 3km)
+ * Load what facilities are near each locality (within 3km)
+ * Counts are precomputed by data_collection/build_nearby.py
  */
-function computeLocalityFacilities() {
-    localityFacilities = {};
-
-    for (const locality of allEntityData.localities || []) {
-        const lat = locality.latitude || locality.data?.latitude;
-        const lng = locality.longitude || locality.data?.longitude;
-        if (!lat || !lng) continue;
-
-        localityFacilities[locality.name] = {};
-
-        for (const [category, entities] of Object.entries(allEntityData)) {
-            if (category === 'localities') continue;
-
-            const nearby = (entities || []).filter(entity => {
-                const eLat = entity.location?.lat;
-                const eLng = entity.location?.lng;
-                if (!eLat || !eLng) return false;
-                return haversineDistance(lat, lng, eLat, eLng) <= 3;
-            });
-
-            if (nearby.length > 0) {
-                localityFacilities[locality.name][category] = nearby;
-            }
-        }
+async function loadLocalityFacilities() {
+    try {
+        const response = await fetch('data/nearby/locality_counts.json');
+        localityFacilities = response.ok ? await response.json() : {};
+    } catch (e) {
+        console.warn('Failed to load locality facilities:', e);
+        localityFacilities = {};
     }
 }
 
 /**
- * Add category markers to map
+ * Marker (with hover tooltip and click-through) for one place or locality
  */
-async function addCategoryToMap(category) {
-    if (categoryLayers[category]) {
-        mapInstance.addLayer(categoryLayers[category]);
-        return;
-    }
-
-    const data = allEntityData[category] || [];
-    const markers = [];
-    const config = MAP_CATEGORIES[category];
-
-    data.forEach((entity) => {
-        let lat, lng;
+function createEntityMarker(entity, category, lat, lng) {
+    const entityId = category === 'localities' ? entity.name : entity.id;
+    const marker = L.marker([lat, lng], {
+        icon: createMarkerIcon(category),
+        entityId: entityId // Store ID for precise matching
+    });
 
-        if (category === 'localities') {
-            lat = entity.latitude || entity.data?.latitude;
-            lng = entity.longitude || entity.data?.longitude;
-        } else {
-            lat = entity.location?.lat;
-            lng = entity.location?.lng;
-        }
+    // Setup content for hover and click
+    const content = category === 'localities' ? createLocalityPopup(entity) : createEntityPopup(entity, category);
+
+    // Use Tooltips for hover label (Clean Revert with Fixes)
+    marker.bindTooltip(content, {
+        permanent: false,
+        direction: 'top',
+        className: 'interactive-tooltip',
+        interactive: true,
+        offset: [0, -2],
+        opacity: 1.0,
+        sticky: false
+    });
 
-        if (lat && lng) {
-            const entityId = category === 'localities' ? entity.name : entity.id;
-            const marker = L.marker([lat, lng], {
-                icon: createMarkerIcon(category),
-                entityId: entityId // Store ID for precise matching
+    // NEW: Direct navigation on click
+    marker.on('click', function () {
+        // Tracking marker interaction
+        if (window.analytics) {
+            window.analytics.trackEvent('marker_clicked', {
+                entity_id: entityId,
+                category: category,
+                name: entity.name
             });
+        }
+        navigateToEntity(category, entityId);
+    });
 
-            // Setup content for hover and click
-            const content = category === 'localities' ? createLocalityPopup(entity) : createEntityPopup(entity, category);
-
-            // Use Tooltips for hover label (Clean Revert with Fixes)
-            marker.bindTooltip(content, {
-                permanent: false,
-                direction: 'top',
-                className: 'interactive-tooltip',
-                interactive: true,
-                offset: [0, -2],
-                opacity: 1.0,
-                sticky: false
-            });
+    // Robust persistence logic
+    let closeTimer = null;
+    const mRef = marker;
 
-            // NEW: Direct navigation on click
-            marker.on('click', function () {
-                // Tracking marker interaction
-                if (window.analytics) {
-                    window.analytics.trackEvent('marker_clicked', {
-                        entity_id: entityId,
-                        category: category,
-                        name: entity.name
-                    });
-                }
-                navigateToEntity(category, entityId);
-            });
+    marker.on('mouseover', function () {
+        clearTimeout(closeTimer);
+        if (!this.isTooltipOpen()) {
+            this.openTooltip();
+        }
+    });
 
-            // Robust persistence logic
-            let closeTimer = null;
-            const mRef = marker;
+    marker.on('mouseout', function () {
+        closeTimer = setTimeout(() => {
+            this.closeTooltip();
+        }, 1000); // 1.0s grace period
+    });
 
-            marker.on('mouseover', function () {
+    // When tooltip opens, attach listeners to ITSELF to keep it open
+    marker.on('tooltipopen', function (e) {
+        const tooltipEl = e.tooltip._container;
+        if (tooltipEl) {
+            tooltipEl.onmouseenter = () => {
                 clearTimeout(closeTimer);
-                if (!this.isTooltipOpen()) {
-                    this.openTooltip();
-                }
-            });
+            };
 
-            marker.on('mouseout', function () {
+            tooltipEl.onmouseleave = () => {
                 closeTimer = setTimeout(() => {
-                    this.closeTooltip();
-                }, 1000); // 1.0s grace period
-            });
+                    mRef.closeTooltip();
+                }, 1000);
+            };
+
+            // Stability: prevent the tooltip from closing if user clicks inside
+            tooltipEl.onclick = (ev) => {
+                ev.stopPropagation();
+            };
+        }
+    });
 
-            // When tooltip opens, attach listeners to ITSELF to keep it open
-            marker.on('tooltipopen', function (e) {
-                const tooltipEl = e.tooltip._container;
-                if (tooltipEl) {
-                    tooltipEl.onmouseenter = () => {
-                        clearTimeout(closeTimer);
-                    };
-
-                    tooltipEl.onmouseleave = () => {
-                        closeTimer = setTimeout(() => {
-                            mRef.closeTooltip();
-                        }, 1000);
-                    };
-
-                    // Stability: prevent the tooltip from closing if user clicks inside
-                    tooltipEl.onclick = (ev) => {
-                        ev.stopPropagation();
-                    };
-                }
-            });
+    return marker;
+}
+
+/**
+ * Marker for a precomputed cluster; clicking zooms to where it splits
+ */
+function createClusterMarker(cluster, category) {
+    const [lat, lng, count, expansionZoom] = cluster;
+    const config = MAP_CATEGORIES[category];
+    const dimensions = count < 10 ? 30 : count < 100 ? 38 : 46;
+
+    const marker = L.marker([lat, lng], {
+        icon: L.divIcon({
+            className: `map-cluster-${category}`,
+            html: `<div style="
+                background: ${config.color};
+                color: white;
+                width: ${dimensions}px;
+                height: ${dimensions}px;
+                border-radius: 50%;
+                display: flex;
+                align-items: center;
+                justify-content: center;
+                font-size: 13px;
+                font-weight: bold;
+                border: 3px solid rgba(255,255,255,0.8);
+                box-shadow: 0 2px 8px rgba(0,0,0,0.3);
+                cursor: pointer;
+            ">${count}</div>`,
+            iconSize: [dimensions, dimensions],
+            iconAnchor: [dimensions / 2, dimensions / 2]
+        })
+    });
+    marker.bindTooltip(`${count} ${config.label}`, { direction: 'top' });
+    marker.on('click', () => mapInstance.setView([lat, lng], expansionZoom));
+    return marker;
+}
 
+/**
+ * Entity-like object from a tile point row
+ */
+function pointToEntity(row, category) {
+    const [, , id, name, rating, reviews, score, locality] = row;
+    if (category === 'localities') {
+        return { id, name, overall_score: score };
+    }
+    return { id, name, rating, reviews, score, locality };
+}
 
-            markers.push(marker);
+/**
+ * Fetch one tile (cached; the oldest tiles are evicted)
+ */
+function fetchTile(z, x, y) {
+    const key = `${z}/${x}/${y}`;
+    if (tileCache.has(key)) {
+        const tile = tileCache.get(key);
+        tileCache.delete(key);
+        tileCache.set(key, tile);
+        return tile;
+    }
+    const tile = fetch(`data/map_tiles/${key}.json`)
+        .then(response => response.ok ? response.json() : null)
+        .catch(() => null);
+    tileCache.set(key, tile);
+    if (tileCache.size > MAX_CACHED_TILES) {
+        tileCache.delete(tileCache.keys().next().value);
+    }
+    return tile;
+}
+
+/**
+ * Tiles covering the current viewport at the current zoom
+ */
+function visibleTileKeys() {
+    const m = mapTileManifest;
+    const zoom = Math.min(Math.max(Math.round(mapInstance.getZoom()), m.min_zoom), m.max_zoom);
+    const shard = Math.min(zoom, m.max_shard_zoom);
+    const n = 2 ** shard;
+    const bounds = mapInstance.getBounds().pad(0.2);
+
+    const toX = lng => Math.min(n - 1, Math.max(0, Math.floor((lng / 360 + 0.5) * n)));
+    const toY = lat => {
+        const sin = Math.sin(lat * Math.PI / 180);
+        const y = 0.5 - 0.25 * Math.log((1 + sin) / (1 - sin)) / Math.PI;
+        return Math.min(n - 1, Math.max(0, Math.floor(y * n)));
+    };
+
+    const keys = [];
+    for (let x = toX(bounds.getWest()); x <= toX(bounds.getEast()); x++) {
+        for (let y = toY(bounds.getNorth()); y <= toY(bounds.getSouth()); y++) {
+            keys.push([zoom, x, y]);
         }
-    });
+    }
+    return keys;
+}
 
-    // No clustering - all markers are individually accessible for hover
-    categoryLayers[category] = L.featureGroup(markers);
+/**
+ * Redraw active categories from the tiles in view
+ */
+async function refreshVisibleTiles() {
+    if (!mapInstance || !mapTileManifest) return;
+
+    const refreshId = ++tileRefreshId;
+    const tiles = (await Promise.all(visibleTileKeys().map(([z, x, y]) => fetchTile(z, x, y)))).filter(Boolean);
+    if (refreshId !== tileRefreshId) return; // A newer move superseded this one
+
+    globalMarkers = {};
+    for (const category of activeCategories) {
+        const layer = categoryLayers[category];
+        if (!layer) continue;
+        layer.clearLayers();
+
+        tiles.forEach(tile => {
+            (tile.clusters[category] || []).forEach(cluster => {
+                layer.addLayer(createClusterMarker(cluster, category));
+            });
+            (tile.points[category] || []).forEach(row => {
+                const marker = createEntityMarker(pointToEntity(row, category), category, row[0], row[1]);
+                layer.addLayer(marker);
+                // Populate global markers for instant access
+                globalMarkers[marker.options.entityId] = marker;
+            });
+        });
+    }
+}
 
+/**
+ * Add category markers to map
+ */
+async function addCategoryToMap(category) {
+    if (!categoryLayers[category]) {
+        categoryLayers[category] = L.featureGroup();
+    }
     mapInstance.addLayer(categoryLayers[category]);
+    await refreshVisibleTiles();
+}
 
-    // Populate global markers for instant access
-    markers.forEach(m => {
-        if (m.options.entityId) {
-            globalMarkers[m.options.entityId] = m;
+/**
+ * [lat, lng] of one place, for ?highlight= links
+ */
+async function findEntityLocation(category, entityId) {
+    try {
+        if (category === 'localities') {
+            const rankingsData = await loadRankings();
+            const locality = (rankingsData?.all_rankings || []).find(l => l.name === entityId);
+            const lat = locality?.latitude || locality?.data?.latitude;
+            const lng = locality?.longitude || locality?.data?.longitude;
+            return lat && lng ? [lat, lng] : null;
         }
-    });
+        const response = await fetch(MAP_CATEGORIES[category].dataFile);
+        if (!response.ok) return null;
+        const entity = (await response.json()).find(item => item.id === entityId);
+        return entity?.location ? [entity.location.lat, entity.location.lng] : null;
+    } catch (e) {
+        console.warn('Could not locate highlighted place:', e);
+        return null;
+    }
 }
 
 /**
@@ -402,6 +482,52 @@ function removeCategoryFromMap(category) {
     }
 }
 
+/**
+ * Load the city-wide score heatmap tiles produced by score_raster.py
+ */
+async function loadHeatmapLayer() {
+    try {
+        const response = await fetch('data/heatmap/manifest.json');
+        if (!response.ok) return null;
+        const manifest = await response.json();
+        // A raster missing inputs for any score dimension would disagree
+        // with the locality rankings, so it is not offered at all
+        if (!manifest.complete) {
+            const missing = Object.entries(manifest.dimensions || {})
+                .filter(([, info]) => !info.covered)
+                .map(([dimension, info]) => `${dimension} (${info.missing.join(', ')})`);
+            console.info('Score heatmap hidden, incomplete inputs:', missing.join('; ') || 'unknown');
+            return null;
+        }
+
+        const overlays = manifest.tiles.map(tile =>
+            L.imageOverlay(`data/heatmap/${tile.file}`, tile.bounds, {
+                opacity: 0.7,
+                interactive: false,
+                className: 'score-heatmap-tile'
+            })
+        );
+
+        const microAreas = (manifest.micro_areas || []).map(area =>
+            L.circleMarker([area.lat, area.lng], {
+                radius: 6,
+                color: '#ffffff',
+                weight: 2,
+                fillColor: '#059669',
+                fillOpacity: 0.9
+            }).bindTooltip(
+                `Score ${area.score} · ${area.distance_km} km from ${area.nearest_locality}`,
+                { direction: 'top' }
+            )
+        );
+
+        return L.layerGroup([...overlays, ...microAreas]);
+    } catch (e) {
+        console.warn('Failed to load score heatmap:', e);
+        return null;
+    }
+}
+
 /**
  * Toggle category
  */
@@ -451,15 +577,7 @@ function updateUI() {
  * Get mapped counts for each category
  */
 function getCategoryCounts() {
-    const counts = {};
-    for (const [category, data] of Object.entries(allEntityData)) {
-        if (category === 'localities') {
-            counts[category] = (data || []).filter(e => e.latitude || e.data?.latitude).length;
-        } else {
-            counts[category] = (data || []).filter(e => e.location?.lat).length;
-        }
-    }
-    return counts;
+    return mapTileManifest?.counts || {};
 }
 
 /**
@@ -610,20 +728,25 @@ async function renderMapExplorerView() {
             maxZoom: 18
         }).addTo(mapInstance);
 
-        // Load active categories
-        for (const cat of activeCategories) {
-            await addCategoryToMap(cat);
+        // Optional score heatmap overlay (off by default)
+        heatmapLayer = await loadHeatmapLayer();
+        if (heatmapLayer) {
+            L.control.layers(null, { 'Score heatmap': heatmapLayer }, { position: 'topright' }).addTo(mapInstance);
         }
-        updateUI();
 
         // Fit to localities bounds
-        if (categoryLayers.localities && typeof categoryLayers.localities.getBounds === 'function') {
-            const bounds = categoryLayers.localities.getBounds();
-            if (bounds.isValid()) {
-                mapInstance.fitBounds(bounds.pad(0.1));
-            }
+        const localityBounds = mapTileManifest.bounds?.localities;
+        if (localityBounds) {
+            mapInstance.fitBounds(L.latLngBounds(localityBounds).pad(0.1));
         }
 
+        // Load active categories; markers follow the viewport from here on
+        for (const cat of activeCategories) {
+            await addCategoryToMap(cat);
+        }
+        mapInstance.on('moveend', refreshVisibleTiles);
+        updateUI();
+
         // Event handlers
         document.querySelectorAll('.map-category-toggle').forEach(btn => {
             btn.addEventListener('click', async () => {
@@ -655,40 +778,21 @@ async function renderMapExplorerView() {
                 await toggleCategory(highlightCategory, true);
             }
 
-            // Wait specifically for rendering to settle
-            setTimeout(() => {
-                const layerGroup = categoryLayers[highlightCategory];
-                const targetMarker = globalMarkers[highlightId];
-
-                if (targetMarker && layerGroup) {
-                    console.log('[Debug] Target marker found in cache:', highlightId);
-
-                    // 1. Zoom and frame the layer
-                    if (layerGroup.getBounds && layerGroup.getBounds().isValid()) {
-                        mapInstance.fitBounds(layerGroup.getBounds().pad(0.1));
-                    }
-
-                    // 2. Reveal and open popup
-                    if (layerGroup.zoomToShowLayer) {
-                        layerGroup.zoomToShowLayer(targetMarker, () => {
-                            targetMarker.openPopup();
-                        });
-                    } else {
-                        mapInstance.setView(targetMarker.getLatLng(), 15);
-                        setTimeout(() => targetMarker.openPopup(), 100);
-                    }
-                } else {
-                    console.warn('[Debug] Target marker NOT found in cache:', highlightId);
-                    // Fallback to text search if cache failed for some reason
-                    if (layerGroup && layerGroup.eachLayer) {
-                        layerGroup.eachLayer(marker => {
-                            if (marker.options.entityId === highlightId) {
-                                marker.openPopup();
-                            }
-                        });
-                    }
-                }
-            }, 1000); // Increased timeout for stability
+            // Only the highlighted place's tile is loaded, so look up its
+            // position and zoom to where it is shown unclustered
+            const location = await findEntityLocation(highlightCategory, highlightId);
+            if (location) {
+                mapInstance.setView(location, mapTileManifest.max_zoom);
+                await refreshVisibleTiles();
+            }
+
+            const targetMarker = globalMarkers[highlightId];
+            if (targetMarker) {
+                console.log('[Debug] Target marker found in cache:', highlightId);
+                targetMarker.openTooltip();
+            } else {
+                console.warn('[Debug] Target marker NOT found in cache:', highlightId);
+            }
         }
     } catch (error) {
         console.error('Error rendering map explorer:', error);
@@ -0,0 +1,251 @@
+"""
+Analytics load test
+Replays a realistic event mix through a local stand-in of the track-event
+Edge Function and the analytics tables (social_media/local_analytics.py),
+so the analytics path can be sized without touching the Supabase project.
+
+- event types / names / localities come from the Edge Function whitelists
+- localities are Zipf-distributed, sessions are spread over --days
+- --batch-size 1 replays the old one-request-per-event client, larger values
+  the buffered client (flush every 5 s or when the batch is full)
+
+Reports ingestion throughput, request latency percentiles, events
+accepted / rejected / rate limited (counted per event from the response
+bodies, so single and batch runs compare), rollup refresh time and trending
+/ dashboard query times (raw vs rollup, over the same window).
+
+Usage:
+    python scripts/analytics_load_test.py --sessions 2000 --batch-size 20
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'social_media'))
+import local_analytics
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+FLUSH_INTERVAL_S = 5  # AnalyticsManager.FLUSH_INTERVAL_MS
+REFERRER_MIX = {'direct': 0.5, 'search': 0.25, 'social': 0.2, 'referral': 0.05}
+PAGES = ['#/', '#/localities', '#/map', '#/customize', '#/dining', '#/compare']
+USER_AGENTS = [
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 14) Mobile Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0 Safari/537.36',
+]
+
+# Trending query as it ran before the rollups: a scan of the raw window
+RAW_TRENDING_SQL = """
+SELECT locality_name, COUNT(*) AS views FROM locality_views
+WHERE viewed_at >= ? GROUP BY locality_name ORDER BY views DESC, locality_name LIMIT 3
+"""
+RAW_DAILY_SQL = """
+SELECT substr(created_at, 1, 10), COUNT(*), COUNT(DISTINCT session_id) FROM site_events
+WHERE created_at >= ? GROUP BY 1 ORDER BY 1
+"""
+
+
+def zipf_weights(n, s):
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    return weights / weights.sum()
+
+
+def generate_sessions(rules, args, rng):
+    """Per session: a time-ordered list of (timestamp, type, data)"""
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=args.days)
+    locality_p = zipf_weights(len(rules['localities']), args.zipf)
+    interaction_names = [n for n in rules['event_names'] if n != 'view_page']
+    referrers = [r for r in REFERRER_MIX if r in rules['referrer_types']]
+    referrer_p = np.array([REFERRER_MIX[r] for r in referrers])
+    referrer_p /= referrer_p.sum()
+
+    sessions = []
+    for i in range(args.sessions):
+        sid = f"sid_load{i:08d}"
+        t = start + timedelta(seconds=float(rng.uniform(0, args.days * 86400)))
+        referrer = str(rng.choice(referrers, p=referrer_p))
+        agent = USER_AGENTS[int(rng.integers(len(USER_AGENTS)))]
+        events = []
+        for _ in range(1 + int(rng.geometric(1 / args.events_per_session))):
+            t += timedelta(seconds=float(rng.exponential(args.think_time)))
+            roll = rng.random()
+            if not events or roll < 0.3:
+                data = {'event_type': 'page_view', 'event_name': 'view_page',
+                        'page_path': PAGES[int(rng.integers(len(PAGES)))], 'referrer_type': referrer}
+                kind = 'site_event'
+            elif roll < 0.55:
+                data = {'locality_name': str(rng.choice(rules['localities'], p=locality_p))}
+                kind = 'locality_view'
+            else:
+                name = str(rng.choice(interaction_names))
+                if rng.random() < args.invalid_rate:
+                    name = 'weights_updated'  # sent by the app, not whitelisted
+                data = {'event_type': 'interaction', 'event_name': name,
+                        'page_path': '#/map', 'metadata': {'value': int(rng.integers(100))}}
+                kind = 'site_event'
+            data.update(session_id=sid, user_agent=agent)
+            events.append((t, kind, data))
+        sessions.append((sid, events))
+    return sessions
+
+
+def build_requests(sessions, batch_size, max_batch):
+    """[(timestamp, body)] as the client would send them, time-ordered"""
+    requests = []
+    for sid, events in sessions:
+        if batch_size <= 1:
+            requests += [(t, {'type': kind, 'data': data}) for t, kind, data in events]
+            continue
+        batch, opened = [], None
+        for t, kind, data in events:
+            if batch and ((t - opened).total_seconds() >= FLUSH_INTERVAL_S or len(batch) >= min(batch_size, max_batch)):
+                requests.append((opened + timedelta(seconds=FLUSH_INTERVAL_S), {'session_id': sid, 'events': batch}))
+                batch = []
+            if not batch:
+                opened = t
+            batch.append({'type': kind, 'data': data})
+        if batch:
+            requests.append((opened + timedelta(seconds=FLUSH_INTERVAL_S), {'session_id': sid, 'events': batch}))
+    requests.sort(key=lambda r: r[0])
+    return requests
+
+
+def event_outcomes(body, status, payload):
+    """(accepted, rejected, rate_limited) events for one request"""
+    if 'events' not in body:
+        return {200: (1, 0, 0), 429: (0, 0, 1)}.get(status, (0, 1, 0))
+    sent = len(body['events'])
+    if status == 200:
+        return payload['accepted'], len(payload['rejected']), payload['rate_limited']
+    if status == 429:
+        # The endpoint does not validate further once a batch is limited
+        return 0, 0, sent
+    return 0, sent, 0
+
+
+def timed(fn, repeat=5):
+    """Best-of-repeat wall time in ms, plus the last result"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the analytics path against a local stand-in")
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--events-per-session', type=float, default=12, help="mean events per session")
+    parser.add_argument('--think-time', type=float, default=8, help="mean seconds between events")
+    parser.add_argument('--days', type=float, default=14, help="spread sessions over this many days")
+    parser.add_argument('--batch-size', type=int, default=20, help="1 = one request per event")
+    parser.add_argument('--workers', type=int, default=8, help="concurrent client threads")
+    parser.add_argument('--zipf', type=float, default=1.1, help="locality popularity exponent")
+    parser.add_argument('--invalid-rate', type=float, default=0.02, help="share of non-whitelisted interactions")
+    parser.add_argument('--db', default=None, help="SQLite file (default: temporary)")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    random.seed(args.seed)
+
+    rules = local_analytics.load_track_event_rules()
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'analytics_load.db')
+    conn = local_analytics.connect(db_path)
+    endpoint = local_analytics.LocalTrackEvent(conn, rules)
+
+    print("=" * 70)
+    print("📈 ANALYTICS LOAD TEST (local stand-in)")
+    print("=" * 70)
+
+    sessions = generate_sessions(rules, args, rng)
+    requests = build_requests(sessions, args.batch_size, rules['max_batch_size'])
+    total_events = sum(len(events) for _, events in sessions)
+    print(f"   {args.sessions:,} sessions, {total_events:,} events over {args.days:g} days")
+    print(f"   {len(requests):,} requests (batch size {args.batch_size}), {args.workers} workers")
+    print(f"   DB: {db_path}")
+
+    # --- Ingestion ---
+    latencies = np.empty(len(requests))
+    outcomes = np.zeros((len(requests), 3), dtype=int)
+
+    def send(i):
+        when, body = requests[i]
+        start = time.perf_counter()
+        status, payload = endpoint.handle(body, now=when)
+        latencies[i] = time.perf_counter() - start
+        outcomes[i] = event_outcomes(body, status, payload)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(send, range(len(requests))))
+    elapsed = time.perf_counter() - start
+
+    stored = sum(conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ('site_events', 'locality_views'))
+    ms = latencies * 1000
+    print("\n🚚 INGESTION")
+    print(f"   {len(requests) / elapsed:,.0f} requests/s, {stored / elapsed:,.0f} events/s stored ({elapsed:.2f}s)")
+    print(f"   latency p50 {np.percentile(ms, 50):.2f} ms | p95 {np.percentile(ms, 95):.2f} ms | "
+          f"p99 {np.percentile(ms, 99):.2f} ms | max {ms.max():.2f} ms")
+    accepted, rejected, limited = outcomes.sum(axis=0)
+    print(f"   events: {accepted:,} accepted ({stored:,} stored) | {rejected:,} rejected | "
+          f"{limited:,} rate limited | of {total_events:,}")
+
+    # --- Rollups ---
+    end = max(t for t, _ in requests) + timedelta(minutes=5)
+    start = time.perf_counter()
+    rolled = local_analytics.refresh_rollups(conn, now=end)
+    refresh_ms = (time.perf_counter() - start) * 1000
+    rollup_rows = sum(conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in (
+        'locality_views_hourly', 'locality_views_daily', 'site_events_hourly',
+        'site_events_daily', 'site_events_daily_totals'))
+    print("\n🧮 ROLLUPS")
+    print(f"   full refresh: {refresh_ms:.1f} ms for {sum(rolled.values()):,} raw rows -> {rollup_rows:,} rollup rows")
+
+    # An incremental refresh after one more flush interval of traffic
+    sid, events = sessions[0]
+    endpoint.handle({'session_id': sid, 'events': [{'type': k, 'data': d} for _, k, d in events[:10]]}, now=end)
+    start = time.perf_counter()
+    local_analytics.refresh_rollups(conn, now=end + timedelta(minutes=5))
+    print(f"   incremental refresh: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    # --- Reads (anon role: SELECT only), raw and rollup over the same 7 days ---
+    reader = local_analytics.read_only(db_path)
+    week_ago = end - timedelta(days=7)
+    since = local_analytics.timestamp(week_ago)
+    raw_ms, raw_top = timed(lambda: reader.execute(RAW_TRENDING_SQL, (since,)).fetchall())
+    rollup_ms, rollup_top = timed(lambda: local_analytics.trending_localities(reader, week_ago, 3))
+    daily_raw_ms, daily_raw = timed(lambda: reader.execute(RAW_DAILY_SQL, (since[:10],)).fetchall())
+    daily_ms, daily = timed(lambda: local_analytics.daily_totals(reader, 7, now=end))
+    print("\n🔎 QUERIES (best of 5, last 7 days)")
+    print(f"   trending, raw scan:      {raw_ms:8.2f} ms  {[tuple(r) for r in raw_top]}")
+    print(f"   trending, rollups:       {rollup_ms:8.2f} ms  {rollup_top}")
+    print(f"   daily totals, raw scan:  {daily_raw_ms:8.2f} ms  {len(daily_raw)} days")
+    print(f"   daily totals, rollup:    {daily_ms:8.2f} ms  {len(daily)} days")
+
+    try:
+        reader.execute("INSERT INTO site_events (created_at, event_type, event_name) VALUES ('x', 'x', 'x')")
+        print("\n❌ Read-only connection accepted a write")
+    except local_analytics.sqlite3.OperationalError:
+        print("\n🔒 Read-only (anon) connection rejects writes, as RLS does")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,11 @@
 """Fix incorrect locality categories in rankings.json"""
+import os
 import json
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data_collection'))
+from atomic_io import write_json
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -45,8 +49,7 @@ if 'all_rankings' in data:
     count += update_categories(data['all_rankings'])
 
 # Save
-with open('data/rankings.json', 'w', encoding='utf-8') as f:
-    json.dump(data, f, indent=2, ensure_ascii=False)
+write_json('data/rankings.json', data)
 
 print(f"\n📊 Updated {count} locality entries")
 print("✅ Changes saved to data/rankings.json")
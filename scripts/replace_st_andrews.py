@@ -3,6 +3,10 @@ Script to replace St Andrews Trivandrum with Poojapura in rankings.json
 """
 import json
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data_collection'))
+from atomic_io import write_json
 
 RANKINGS_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'rankings.json')
 
@@ -108,8 +112,7 @@ def main():
     
     if replaced_count > 0:
         print(f"Saving changes ({replaced_count} replacements)...")
-        with open(RANKINGS_PATH, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        write_json(RANKINGS_PATH, data)
         print("Done!")
     else:
         print("St Andrews Trivandrum not found in top_10 or all_rankings.")
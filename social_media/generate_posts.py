@@ -7,9 +7,15 @@ Usage:
 """
 
 import os
+import sys
 import json
 from datetime import datetime, timedelta, timezone
 
+import local_analytics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data_collection'))
+from atomic_io import atomic_write
+
 # Try to load from .env if python-dotenv is available
 try:
     from dotenv import load_dotenv
@@ -24,7 +30,6 @@ try:
 except ImportError:
     SUPABASE_AVAILABLE = False
     import urllib.request
-    import urllib.parse
 
 # Configuration
 SUPABASE_URL = os.getenv('SUPABASE_URL', 'https://jhygaazqujzufiklqaah.supabase.co')
@@ -35,34 +40,47 @@ SITE_URL = 'trivandrumtop10.netlify.app'
 RANKINGS_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'rankings.json')
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'social_posts')
 
+# Set to a SQLite file (see local_analytics.py) to skip Supabase entirely
+TRENDING_SQLITE_DB = os.getenv('TRENDING_SQLITE_DB')
+
 
 def get_trending_from_supabase(days=7, limit=3):
-    """Fetch trending localities from Supabase."""
-    one_week_ago = (datetime.utcnow() - timedelta(days=days)).isoformat()
-    
+    """
+    Fetch trending localities from Supabase.
+    Counting happens in the database (trending_localities RPC, see
+    supabase/migrations/003_trending_localities_rpc.sql), so only the top
+    `limit` rows come back however many views were recorded.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+
+    # Local SQLite stand-in (fixtures / offline runs)
+    if TRENDING_SQLITE_DB:
+        conn = local_analytics.connect(TRENDING_SQLITE_DB)
+        try:
+            return local_analytics.trending_localities(conn, since, limit)
+        finally:
+            conn.close()
+
+    params = {'since': since.isoformat(), 'max_results': limit}
     if SUPABASE_AVAILABLE:
         supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        response = supabase.table('locality_views').select('locality_name').gte('viewed_at', one_week_ago).execute()
-        data = response.data
+        data = supabase.rpc('trending_localities', params).execute().data
     else:
         # Fallback: Use REST API directly
-        url = f"{SUPABASE_URL}/rest/v1/locality_views?select=locality_name&viewed_at=gte.{one_week_ago}"
-        req = urllib.request.Request(url, headers={
-            'apikey': SUPABASE_KEY,
-            'Authorization': f'Bearer {SUPABASE_KEY}'
-        })
+        req = urllib.request.Request(
+            f"{SUPABASE_URL}/rest/v1/rpc/trending_localities",
+            data=json.dumps(params).encode(),
+            headers={
+                'apikey': SUPABASE_KEY,
+                'Authorization': f'Bearer {SUPABASE_KEY}',
+                'Content-Type': 'application/json'
+            },
+            method='POST'
+        )
         with urllib.request.urlopen(req) as response:
             data = json.loads(response.read().decode())
-    
-    # Count occurrences
-    counts = {}
-    for row in data:
-        name = row['locality_name']
-        counts[name] = counts.get(name, 0) + 1
-    
-    # Sort and return top N
-    sorted_items = sorted(counts.items(), key=lambda x: x[1], reverse=True)[:limit]
-    return sorted_items  # List of (name, count) tuples
+
+    return [(row['locality_name'], row['views']) for row in data]  # List of (name, count) tuples
 
 
 def load_rankings():
@@ -246,7 +264,7 @@ def main():
     # Save to file
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     output_file = os.path.join(OUTPUT_DIR, 'latest_posts.txt')
-    with open(output_file, 'w', encoding='utf-8') as f:
+    with atomic_write(output_file, keep=0) as f:
         f.write(full_output)
     
     print()
@@ -0,0 +1,410 @@
+"""
+Local Analytics Stand-in
+SQLite copy of the Supabase analytics tables (supabase/schema.sql), the
+rollup tables and the RPCs in supabase/migrations, for running the social
+media tooling offline and against fixtures.
+
+refresh_rollups() is the Python rollup worker: like
+refresh_analytics_rollups() in 004_analytics_rollups.sql it folds raw rows
+past a per-table id watermark into hourly/daily rollups.
+
+LocalTrackEvent replays supabase/functions/track-event (same whitelists,
+parsed from index.ts, same rate limits, single and batch mode). As with
+RLS, only it writes; read_only() connections can only SELECT.
+
+Usage:
+    TRENDING_SQLITE_DB=analytics.db python social_media/generate_posts.py
+"""
+
+import os
+import re
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+TRACK_EVENT_SOURCE = os.path.join(os.path.dirname(__file__), '..', 'supabase', 'functions', 'track-event', 'index.ts')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locality_views (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    locality_name TEXT NOT NULL,
+    viewed_at TEXT NOT NULL,
+    session_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_locality_views_viewed_at_name
+    ON locality_views(viewed_at, locality_name);
+
+CREATE TABLE IF NOT EXISTS site_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    event_name TEXT NOT NULL,
+    page_path TEXT,
+    session_id TEXT,
+    metadata TEXT,
+    user_agent TEXT,
+    referrer_type TEXT,
+    referrer_source TEXT,
+    referrer_domain TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_locality_views_name_viewed_at
+    ON locality_views(locality_name, viewed_at);
+CREATE INDEX IF NOT EXISTS idx_site_events_created_at ON site_events(created_at);
+CREATE INDEX IF NOT EXISTS idx_site_events_name_created_at ON site_events(event_name, created_at);
+
+CREATE TABLE IF NOT EXISTS rate_limits (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    request_count INTEGER DEFAULT 1,
+    window_start TEXT NOT NULL,
+    UNIQUE(session_id, endpoint)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_rollup_state (
+    source TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+);
+INSERT OR IGNORE INTO analytics_rollup_state (source) VALUES ('locality_views'), ('site_events');
+
+CREATE TABLE IF NOT EXISTS locality_views_hourly (
+    bucket TEXT NOT NULL,
+    locality_name TEXT NOT NULL,
+    views INTEGER NOT NULL,
+    PRIMARY KEY (bucket, locality_name)
+);
+CREATE TABLE IF NOT EXISTS locality_views_daily (
+    day TEXT NOT NULL,
+    locality_name TEXT NOT NULL,
+    views INTEGER NOT NULL,
+    PRIMARY KEY (day, locality_name)
+);
+CREATE TABLE IF NOT EXISTS site_events_hourly (
+    bucket TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    event_name TEXT NOT NULL,
+    referrer_type TEXT NOT NULL,
+    events INTEGER NOT NULL,
+    PRIMARY KEY (bucket, event_type, event_name, referrer_type)
+);
+CREATE TABLE IF NOT EXISTS site_events_daily (
+    day TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    event_name TEXT NOT NULL,
+    referrer_type TEXT NOT NULL,
+    events INTEGER NOT NULL,
+    PRIMARY KEY (day, event_type, event_name, referrer_type)
+);
+CREATE TABLE IF NOT EXISTS site_events_daily_totals (
+    day TEXT PRIMARY KEY,
+    events INTEGER NOT NULL,
+    sessions INTEGER NOT NULL
+);
+"""
+
+# Timestamps are fixed-width ISO text, so prefixes give hour / day buckets
+HOUR = "substr({col}, 1, 13) || ':00:00.000000Z'"
+DAY = "substr({col}, 1, 10)"
+
+ROLLUP_SQL = {
+    'locality_views': [
+        f"""INSERT INTO locality_views_hourly (bucket, locality_name, views)
+            SELECT {HOUR.format(col='viewed_at')}, locality_name, COUNT(*)
+            FROM locality_views WHERE id > :lo AND id <= :hi GROUP BY 1, 2
+            ON CONFLICT (bucket, locality_name) DO UPDATE SET views = views + excluded.views""",
+        f"""INSERT INTO locality_views_daily (day, locality_name, views)
+            SELECT {DAY.format(col='viewed_at')}, locality_name, COUNT(*)
+            FROM locality_views WHERE id > :lo AND id <= :hi GROUP BY 1, 2
+            ON CONFLICT (day, locality_name) DO UPDATE SET views = views + excluded.views""",
+    ],
+    'site_events': [
+        f"""INSERT INTO site_events_hourly (bucket, event_type, event_name, referrer_type, events)
+            SELECT {HOUR.format(col='created_at')}, event_type, event_name, COALESCE(referrer_type, ''), COUNT(*)
+            FROM site_events WHERE id > :lo AND id <= :hi GROUP BY 1, 2, 3, 4
+            ON CONFLICT (bucket, event_type, event_name, referrer_type) DO UPDATE SET events = events + excluded.events""",
+        f"""INSERT INTO site_events_daily (day, event_type, event_name, referrer_type, events)
+            SELECT {DAY.format(col='created_at')}, event_type, event_name, COALESCE(referrer_type, ''), COUNT(*)
+            FROM site_events WHERE id > :lo AND id <= :hi GROUP BY 1, 2, 3, 4
+            ON CONFLICT (day, event_type, event_name, referrer_type) DO UPDATE SET events = events + excluded.events""",
+        # Distinct sessions are not additive, so touched days are recounted
+        f"""INSERT INTO site_events_daily_totals (day, events, sessions)
+            SELECT d.day, COUNT(e.id), COUNT(DISTINCT e.session_id)
+            FROM (SELECT DISTINCT {DAY.format(col='created_at')} AS day
+                  FROM site_events WHERE id > :lo AND id <= :hi) d
+            JOIN site_events e
+              ON e.created_at >= d.day AND e.created_at < d.day || 'T24' AND e.id <= :hi
+            GROUP BY d.day
+            ON CONFLICT (day) DO UPDATE SET events = excluded.events, sessions = excluded.sessions""",
+    ],
+}
+TIME_COLUMNS = {'locality_views': 'viewed_at', 'site_events': 'created_at'}
+
+# Mirrors trending_localities() in 004_analytics_rollups.sql: hourly
+# rollups plus the raw rows past the watermark
+TRENDING_SQL = """
+WITH counts AS (
+    SELECT locality_name, views FROM locality_views_hourly WHERE bucket >= :since_hour
+    UNION ALL
+    SELECT locality_name, COUNT(*) FROM locality_views
+    WHERE id > (SELECT last_id FROM analytics_rollup_state WHERE source = 'locality_views')
+      AND viewed_at >= :since
+    GROUP BY locality_name
+)
+SELECT locality_name, SUM(views) AS views
+FROM counts
+GROUP BY locality_name
+ORDER BY views DESC, locality_name
+LIMIT :limit
+"""
+
+
+def timestamp(dt):
+    """UTC ISO-8601 text; sorts the same way as timestamptz"""
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def connect(path=':memory:'):
+    """Open (and create if needed) a local analytics database"""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def read_only(path):
+    """Connection with the anon role's rights: SELECT only"""
+    return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False)
+
+
+def record_views(conn, views):
+    """Insert (locality_name, viewed_at datetime, session_id) rows"""
+    conn.executemany(
+        "INSERT INTO locality_views (locality_name, viewed_at, session_id) VALUES (?, ?, ?)",
+        [(name, timestamp(viewed_at), session) for name, viewed_at, session in views]
+    )
+    conn.commit()
+
+
+def refresh_rollups(conn, settle_seconds=60, now=None):
+    """
+    Fold raw rows past each table's watermark into the rollups. Rows newer
+    than settle_seconds wait for the next run. Returns {table: rows rolled}.
+    """
+    cutoff = timestamp((now or datetime.now(timezone.utc)) - timedelta(seconds=settle_seconds))
+    rolled = {}
+    with conn:
+        for table, statements in ROLLUP_SQL.items():
+            time_col = TIME_COLUMNS[table]
+            lo = conn.execute("SELECT last_id FROM analytics_rollup_state WHERE source = ?", (table,)).fetchone()[0]
+            row = conn.execute(
+                f"SELECT MAX(id) FROM {table} WHERE id > ? AND {time_col} < ?", (lo, cutoff)
+            ).fetchone()
+            hi = row[0] if row[0] is not None else lo
+            if hi > lo:
+                for sql in statements:
+                    conn.execute(sql, {'lo': lo, 'hi': hi})
+                conn.execute(
+                    "UPDATE analytics_rollup_state SET last_id = ?, updated_at = ? WHERE source = ?",
+                    (hi, timestamp(datetime.now(timezone.utc)), table)
+                )
+            rolled[table] = hi - lo
+    return rolled
+
+
+def trending_localities(conn, since=None, max_results=3):
+    """Top localities by views since `since` as [(name, views)]"""
+    if since is None:
+        since = datetime.now(timezone.utc) - timedelta(days=7)
+    since_text = timestamp(since)
+    params = {'since': since_text, 'since_hour': since_text[:13] + ':00:00.000000Z', 'limit': max_results}
+    return [tuple(row) for row in conn.execute(TRENDING_SQL, params)]
+
+
+def daily_totals(conn, days=30, now=None):
+    """[(day, events, sessions)] for the last `days` days from the rollup"""
+    start = ((now or datetime.now(timezone.utc)) - timedelta(days=days)).strftime('%Y-%m-%d')
+    return [tuple(row) for row in conn.execute(
+        "SELECT day, events, sessions FROM site_events_daily_totals WHERE day >= ? ORDER BY day", (start,)
+    )]
+
+
+# ---------------------------------------------------------------------------
+# track-event stand-in
+# ---------------------------------------------------------------------------
+
+def load_track_event_rules(path=TRACK_EVENT_SOURCE):
+    """Whitelists and limits declared in the Edge Function source"""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+
+    def string_list(name):
+        body = re.search(rf"const {name} = \[(.*?)\]", source, re.S).group(1)
+        return re.findall(r"'([^']*)'", body)
+
+    def number(name):
+        # An integer literal or a product/sum of literals and earlier constants,
+        # e.g. `BATCH_RATE_LIMIT_MAX_EVENTS = RATE_LIMIT_MAX * 2`
+        match = re.search(rf"^const {name} = ([^\n/]+)", source, re.M)
+        if not match:
+            raise ValueError(f"{name} is not declared in {path}")
+        value = None
+        for term in re.split(r"\s*\+\s*", match.group(1).strip()):
+            product = 1
+            for factor in re.split(r"\s*\*\s*", term):
+                if re.fullmatch(r"\d+", factor):
+                    product *= int(factor)
+                elif re.fullmatch(r"[A-Z][A-Z0-9_]*", factor):
+                    product *= number(factor)
+                else:
+                    raise ValueError(f"Cannot parse {name} = {match.group(1).strip()} in {path}")
+            value = product if value is None else value + product
+        return value
+
+    return {
+        'event_types': string_list('VALID_EVENT_TYPES'),
+        'event_names': string_list('VALID_EVENT_NAMES'),
+        'referrer_types': string_list('VALID_REFERRER_TYPES'),
+        'localities': string_list('VALID_LOCALITIES'),
+        'rate_limit_max': number('RATE_LIMIT_MAX'),
+        'rate_limit_window_s': number('RATE_LIMIT_WINDOW_MS') / 1000,
+        'max_batch_size': number('MAX_BATCH_SIZE'),
+        'batch_rate_limit_max': number('BATCH_RATE_LIMIT_MAX_EVENTS'),
+    }
+
+
+class LocalTrackEvent:
+    """
+    The track-event Edge Function against a local database.
+    handle(body, now) returns (status, payload) like the HTTP endpoint.
+    Writes are serialized, as they would be on one Postgres connection.
+    """
+
+    def __init__(self, conn, rules=None):
+        self.conn = conn
+        self.rules = rules or load_track_event_rules()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _valid_session(session_id):
+        return isinstance(session_id, str) and len(session_id) >= 10
+
+    def build_row(self, event_type, data, now):
+        """(table, row) or (None, error) - mirrors buildRow()"""
+        rules = self.rules
+        if not isinstance(data, dict) or not self._valid_session(data.get('session_id')):
+            return None, 'Invalid session_id'
+
+        if event_type == 'site_event':
+            if data.get('event_type') not in rules['event_types']:
+                return None, 'Invalid event_type'
+            if data.get('event_name') and data['event_name'] not in rules['event_names']:
+                return None, 'Invalid event_name'
+            metadata = data.get('metadata')
+            if metadata and len(json.dumps(metadata)) > 2000:
+                return None, 'Metadata too large'
+            referrer = data.get('referrer_type')
+            return 'site_events', (
+                timestamp(now), data['event_type'], data.get('event_name') or 'unknown',
+                (data.get('page_path') or '')[:200] or None, data['session_id'],
+                json.dumps(metadata) if metadata else None,
+                (data.get('user_agent') or '')[:500] or None,
+                referrer if referrer in rules['referrer_types'] else None,
+                (data.get('referrer_source') or '')[:100] or None,
+                (data.get('referrer_domain') or '')[:200] or None,
+            )
+
+        if event_type == 'locality_view':
+            if data.get('locality_name') not in rules['localities']:
+                return None, 'Invalid locality_name'
+            return 'locality_views', (data['locality_name'], timestamp(now), data['session_id'])
+
+        return None, 'Unknown event type'
+
+    def _consume_rate_limit(self, session_id, endpoint, cost, limit, now):
+        """Allowed share of `cost` - mirrors consumeRateLimit()"""
+        row = self.conn.execute(
+            "SELECT request_count, window_start FROM rate_limits WHERE session_id = ? AND endpoint = ?",
+            (session_id, endpoint)
+        ).fetchone()
+        window_open = row is not None and (
+            now - datetime.fromisoformat(row[1].replace('Z', '+00:00'))
+        ).total_seconds() < self.rules['rate_limit_window_s']
+        used = row[0] if window_open else 0
+        allowed = max(0, min(cost, limit - used))
+        if allowed:
+            self.conn.execute(
+                "INSERT INTO rate_limits (session_id, endpoint, request_count, window_start) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (session_id, endpoint) DO UPDATE SET "
+                "request_count = excluded.request_count, window_start = excluded.window_start",
+                (session_id, endpoint, used + allowed, row[1] if window_open else timestamp(now))
+            )
+        return allowed
+
+    def _insert(self, rows):
+        if rows['site_events']:
+            self.conn.executemany(
+                "INSERT INTO site_events (created_at, event_type, event_name, page_path, session_id, metadata, "
+                "user_agent, referrer_type, referrer_source, referrer_domain) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows['site_events']
+            )
+        if rows['locality_views']:
+            self.conn.executemany(
+                "INSERT INTO locality_views (locality_name, viewed_at, session_id) VALUES (?, ?, ?)",
+                rows['locality_views']
+            )
+
+    def handle(self, body, now=None):
+        now = now or datetime.now(timezone.utc)
+        with self.lock, self.conn:
+            if isinstance(body.get('events'), list):
+                return self._handle_batch(body, now)
+
+            event_type, data = body.get('type'), body.get('data')
+            if not event_type or not data:
+                return 400, {'error': 'Missing type or data'}
+            if not self._valid_session(data.get('session_id')):
+                return 400, {'error': 'Invalid session_id'}
+            if not self._consume_rate_limit(data['session_id'], event_type, 1, self.rules['rate_limit_max'], now):
+                return 429, {'error': 'Rate limit exceeded. Try again later.'}
+            table, row = self.build_row(event_type, data, now)
+            if table is None:
+                return 400, {'error': row}
+            self._insert({'site_events': [], 'locality_views': [], table: [row]})
+            return 200, {'success': True, 'type': event_type}
+
+    def _handle_batch(self, body, now):
+        session_id, events = body.get('session_id'), body['events']
+        if not self._valid_session(session_id):
+            return 400, {'error': 'Invalid session_id'}
+        if not events:
+            return 400, {'error': 'Missing events'}
+        if len(events) > self.rules['max_batch_size']:
+            return 400, {'error': f"Batch too large (max {self.rules['max_batch_size']})"}
+
+        valid, rejected = [], []
+        for index, event in enumerate(events):
+            event = event if isinstance(event, dict) else {}
+            data = event.get('data')
+            if not isinstance(data, dict) or data.get('session_id') != session_id:
+                rejected.append({'index': index, 'error': 'session_id does not match batch'})
+                continue
+            table, row = self.build_row(event.get('type'), data, now)
+            if table is None:
+                rejected.append({'index': index, 'error': row})
+            else:
+                valid.append((table, row))
+
+        if not valid:
+            return 400, {'error': 'No valid events', 'rejected': rejected}
+        allowed = self._consume_rate_limit(session_id, 'batch', len(valid), self.rules['batch_rate_limit_max'], now)
+        if not allowed:
+            return 429, {'error': 'Rate limit exceeded. Try again later.'}
+
+        # Over the limit: keep the first `allowed` events in batch order
+        rows = {'site_events': [], 'locality_views': []}
+        for table, row in valid[:allowed]:
+            rows[table].append(row)
+        self._insert(rows)
+        return 200, {'success': True, 'type': 'batch', 'accepted': allowed,
+                     'rate_limited': len(valid) - allowed, 'rejected': rejected}
@@ -0,0 +1,44 @@
+// Runs the site's real analytics client (js/utils/analytics.js and
+// js/supabase-client.js) in a stub browser and prints the request bodies
+// it would POST to track-event, one JSON document per line.
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const root = path.join(__dirname, '..', '..');
+const storage = { unique_session_id: 'sess_k3j9x2m1q' };  // left over from the old tracker
+const sent = [];
+const listeners = () => ({ addEventListener() {} });
+
+const window = {
+  ...listeners(),
+  location: { hash: '#/', hostname: 'trivandrumtop10.netlify.app' },
+  supabase: { createClient: () => ({}) },
+};
+const context = vm.createContext({
+  window,
+  document: { ...listeners(), referrer: '', visibilityState: 'visible' },
+  navigator: { userAgent: 'node' },
+  localStorage: {
+    getItem: (k) => (k in storage ? storage[k] : null),
+    setItem: (k, v) => { storage[k] = String(v); },
+  },
+  fetch: async (url, options) => {
+    sent.push(JSON.parse(options.body));
+    return { ok: true, json: async () => ({ accepted: 0 }) };
+  },
+  console: { log() {}, warn() {}, error() {}, debug() {}, info() {} },
+  setTimeout, clearTimeout, URL,
+});
+
+for (const file of ['js/utils/analytics.js', 'js/supabase-client.js']) {
+  vm.runInContext(fs.readFileSync(path.join(root, file), 'utf8'), context, { filename: file });
+}
+
+(async () => {
+  await window.trackLocalityView('Pattom');
+  await window.analytics.trackEvent('marker_clicked', { id: 1 });
+  await window.trackLocalityView('Kowdiar');
+  await window.analytics.flush();
+  for (const body of sent) console.log(JSON.stringify(body));
+})();
@@ -0,0 +1,6 @@
+"""Scripts here import their siblings by module name (python social_media/x.py)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
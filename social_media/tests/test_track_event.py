@@ -0,0 +1,84 @@
+import os
+import json
+import shutil
+import subprocess
+from datetime import datetime, timezone
+
+import pytest
+
+from local_analytics import connect, LocalTrackEvent, load_track_event_rules, TRACK_EVENT_SOURCE
+
+SID = 'session-0001'
+NOW = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def view(locality='Pattom', sid=SID):
+    return {'type': 'locality_view', 'data': {'session_id': sid, 'locality_name': locality}}
+
+
+def page(sid=SID):
+    return {'type': 'site_event', 'data': {'session_id': sid, 'event_type': 'page_view', 'event_name': 'view_page'}}
+
+
+def test_over_limit_batch_keeps_the_first_events_in_batch_order():
+    conn = connect()
+    endpoint = LocalTrackEvent(conn)
+    limit = endpoint.rules['batch_rate_limit_max']
+    # Fill the window to 2 events short of the limit
+    for size in (endpoint.rules['max_batch_size'], limit - 2 - endpoint.rules['max_batch_size']):
+        assert endpoint.handle({'session_id': SID, 'events': [page()] * size}, now=NOW)[0] == 200
+
+    status, body = endpoint.handle({'session_id': SID, 'events': [view('Kowdiar'), page(), view('Statue')]}, now=NOW)
+    assert status == 200
+    assert (body['accepted'], body['rate_limited']) == (2, 1)
+    assert [r[0] for r in conn.execute("SELECT locality_name FROM locality_views")] == ['Kowdiar']
+    assert conn.execute("SELECT COUNT(*) FROM site_events").fetchone()[0] == limit - 1
+
+
+def edge_function_source(tmp_path, batch_limit):
+    with open(TRACK_EVENT_SOURCE, encoding='utf-8') as f:
+        source = f.read().replace('const BATCH_RATE_LIMIT_MAX_EVENTS = RATE_LIMIT_MAX * 2',
+                                  f'const BATCH_RATE_LIMIT_MAX_EVENTS = {batch_limit}')
+    path = tmp_path / 'index.ts'
+    path.write_text(source, encoding='utf-8')
+    return str(path)
+
+
+def test_batch_limit_is_read_from_the_edge_function():
+    rules = load_track_event_rules()
+    assert rules['batch_rate_limit_max'] == 2 * rules['rate_limit_max']
+
+
+def test_batch_limit_follows_edits_or_fails_loudly(tmp_path):
+    rules = load_track_event_rules(edge_function_source(tmp_path, 'RATE_LIMIT_MAX * 3'))
+    assert rules['batch_rate_limit_max'] == 90
+    with pytest.raises(ValueError):
+        load_track_event_rules(edge_function_source(tmp_path, 'Math.max(RATE_LIMIT_MAX, 60)'))
+
+
+def test_rows_for_another_session_are_rejected():
+    conn = connect()
+    status, body = LocalTrackEvent(conn).handle(
+        {'session_id': SID, 'events': [view(), view(sid='someone-else-1'), {'type': 'locality_view'}]}, now=NOW)
+    assert status == 200
+    assert body['accepted'] == 1
+    assert [r['index'] for r in body['rejected']] == [1, 2]
+    assert {r['error'] for r in body['rejected']} == {'session_id does not match batch'}
+    assert [r[0] for r in conn.execute("SELECT session_id FROM locality_views")] == [SID]
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="needs node to run the site's client")
+def test_real_client_batches_are_accepted():
+    # The browser has two id schemes: the tracker's 'sess_' id and the
+    # analytics manager's 'sid_' batch id; every row must carry the latter
+    script = os.path.join(os.path.dirname(__file__), 'client_batch.js')
+    out = subprocess.run(['node', script], capture_output=True, text=True, check=True).stdout
+    bodies = [json.loads(line) for line in out.splitlines()]
+    assert bodies and all(b['session_id'].startswith('sid_') for b in bodies)
+
+    conn = connect()
+    endpoint = LocalTrackEvent(conn)
+    for body in bodies:
+        status, result = endpoint.handle(body, now=NOW)
+        assert status == 200 and result['rejected'] == []
+    assert [r[0] for r in conn.execute("SELECT locality_name FROM locality_views ORDER BY id")] == ['Pattom', 'Kowdiar']
@@ -13,6 +13,15 @@ const corsHeaders = {
 const RATE_LIMIT_MAX = 30
 const RATE_LIMIT_WINDOW_MS = 60000 // 1 minute
 
+// Batch mode: { session_id, events: [{ type, data }, ...] }
+// One rate-limit row per session counts events (same capacity as the two
+// single-event buckets together), so batching is never a way around it.
+// Every event's data.session_id must equal the batch session_id, so a
+// batch can only write rows for the session it is charged to.
+const MAX_BATCH_SIZE = 50
+const BATCH_ENDPOINT = 'batch'
+const BATCH_RATE_LIMIT_MAX_EVENTS = RATE_LIMIT_MAX * 2
+
 // Valid event types and names (whitelist)
 const VALID_EVENT_TYPES = ['page_view', 'interaction', 'search', 'locality_view']
 const VALID_EVENT_NAMES = [
@@ -33,6 +42,168 @@ const VALID_LOCALITIES = [
   'Technopark', 'Thampanoor', 'East Fort', 'Palayam'
 ]
 
+const jsonResponse = (payload: unknown, status = 200) => new Response(
+  JSON.stringify(payload),
+  { status, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+)
+
+const isValidSessionId = (sessionId: unknown) =>
+  typeof sessionId === 'string' && sessionId.length >= 10
+
+// Validate one event and build its row. Returns { table, row } or { error }.
+function buildRow(type: string, data: any): { table?: string, row?: Record<string, unknown>, error?: string } {
+  if (!data || !isValidSessionId(data.session_id)) {
+    return { error: 'Invalid session_id' }
+  }
+
+  if (type === 'site_event') {
+    // Validate event_type
+    if (!VALID_EVENT_TYPES.includes(data.event_type)) {
+      return { error: 'Invalid event_type' }
+    }
+
+    // Validate event_name (if provided)
+    if (data.event_name && !VALID_EVENT_NAMES.includes(data.event_name)) {
+      return { error: 'Invalid event_name' }
+    }
+
+    // Sanitize metadata (limit size)
+    let sanitizedMetadata = null
+    if (data.metadata) {
+      const metadataStr = JSON.stringify(data.metadata)
+      if (metadataStr.length > 2000) {
+        return { error: 'Metadata too large' }
+      }
+      sanitizedMetadata = data.metadata
+    }
+
+    // Validate referrer_type if provided
+    const referrerType = data.referrer_type && VALID_REFERRER_TYPES.includes(data.referrer_type)
+      ? data.referrer_type
+      : null
+
+    return {
+      table: 'site_events',
+      row: {
+        event_type: data.event_type,
+        event_name: data.event_name || 'unknown',
+        page_path: data.page_path?.substring(0, 200) || null,
+        session_id: data.session_id,
+        metadata: sanitizedMetadata,
+        user_agent: data.user_agent?.substring(0, 500) || null,
+        referrer_type: referrerType,
+        referrer_source: data.referrer_source?.substring(0, 100) || null,
+        referrer_domain: data.referrer_domain?.substring(0, 200) || null
+      }
+    }
+  }
+
+  if (type === 'locality_view') {
+    // Validate locality name
+    if (!data.locality_name || !VALID_LOCALITIES.includes(data.locality_name)) {
+      return { error: 'Invalid locality_name' }
+    }
+    return {
+      table: 'locality_views',
+      row: {
+        locality_name: data.locality_name,
+        session_id: data.session_id
+      }
+    }
+  }
+
+  return { error: 'Unknown event type' }
+}
+
+// Count `cost` requests/events against a session's window.
+// One read plus one write. Returns how many of `cost` are allowed (0 = limited).
+async function consumeRateLimit(supabase: any, sessionId: string, endpoint: string, cost: number, max: number) {
+  const { data: rateData } = await supabase
+    .from('rate_limits')
+    .select('request_count, window_start')
+    .eq('session_id', sessionId)
+    .eq('endpoint', endpoint)
+    .maybeSingle()
+
+  const now = new Date()
+  const windowOpen = rateData &&
+    now.getTime() - new Date(rateData.window_start).getTime() < RATE_LIMIT_WINDOW_MS
+  const used = windowOpen ? rateData.request_count : 0
+  const allowed = Math.max(0, Math.min(cost, max - used))
+
+  if (allowed > 0) {
+    await supabase
+      .from('rate_limits')
+      .upsert({
+        session_id: sessionId,
+        endpoint,
+        request_count: used + allowed,
+        window_start: windowOpen ? rateData.window_start : now.toISOString()
+      }, { onConflict: 'session_id,endpoint' })
+  }
+  return allowed
+}
+
+// Batch mode: validate every event in one pass, then one rate-limit update
+// and one multi-row insert per table
+async function handleBatch(supabase: any, body: any) {
+  const { session_id: sessionId, events } = body
+
+  if (!isValidSessionId(sessionId)) {
+    return jsonResponse({ error: 'Invalid session_id' }, 400)
+  }
+  if (!Array.isArray(events) || events.length === 0) {
+    return jsonResponse({ error: 'Missing events' }, 400)
+  }
+  if (events.length > MAX_BATCH_SIZE) {
+    return jsonResponse({ error: `Batch too large (max ${MAX_BATCH_SIZE})` }, 400)
+  }
+
+  const valid: { table: string, row: Record<string, unknown> }[] = []
+  const rejected: { index: number, error: string }[] = []
+  events.forEach((event: any, index: number) => {
+    if (event?.data?.session_id !== sessionId) {
+      rejected.push({ index, error: 'session_id does not match batch' })
+      return
+    }
+    const { table, row, error } = buildRow(event?.type, event?.data)
+    if (error) {
+      rejected.push({ index, error })
+    } else {
+      valid.push({ table: table!, row: row! })
+    }
+  })
+
+  if (valid.length === 0) {
+    return jsonResponse({ error: 'No valid events', rejected }, 400)
+  }
+
+  const allowed = await consumeRateLimit(supabase, sessionId, BATCH_ENDPOINT, valid.length, BATCH_RATE_LIMIT_MAX_EVENTS)
+  if (allowed === 0) {
+    return jsonResponse({ error: 'Rate limit exceeded. Try again later.' }, 429)
+  }
+
+  // Over the limit: keep the first `allowed` events in batch order
+  const rows: Record<string, Record<string, unknown>[]> = { site_events: [], locality_views: [] }
+  for (const { table, row } of valid.slice(0, allowed)) {
+    rows[table].push(row)
+  }
+  for (const table of ['site_events', 'locality_views']) {
+    if (rows[table].length > 0) {
+      const { error } = await supabase.from(table).insert(rows[table])
+      if (error) throw error
+    }
+  }
+
+  return jsonResponse({
+    success: true,
+    type: 'batch',
+    accepted: allowed,
+    rate_limited: valid.length - allowed,
+    rejected
+  })
+}
+
 serve(async (req) => {
   // Handle CORS preflight
   if (req.method === 'OPTIONS') {
@@ -42,174 +213,52 @@ serve(async (req) => {
   try {
     // Only accept POST requests
     if (req.method !== 'POST') {
-      return new Response(
-        JSON.stringify({ error: 'Method not allowed' }),
-        { status: 405, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-      )
+      return jsonResponse({ error: 'Method not allowed' }, 405)
     }
 
     // Parse request body
     const body = await req.json()
-    const { type, data } = body
-
-    // Validate request structure
-    if (!type || !data) {
-      return new Response(
-        JSON.stringify({ error: 'Missing type or data' }),
-        { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-      )
-    }
-
-    // Validate session_id exists
-    if (!data.session_id || typeof data.session_id !== 'string' || data.session_id.length < 10) {
-      return new Response(
-        JSON.stringify({ error: 'Invalid session_id' }),
-        { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-      )
-    }
 
     // Create Supabase client with service role (bypasses RLS)
     const supabaseUrl = Deno.env.get('SUPABASE_URL')!
     const supabaseServiceKey = Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!
     const supabase = createClient(supabaseUrl, supabaseServiceKey)
 
-    // Check rate limit
-    const rateLimitKey = `${data.session_id}:${type}`
-    const { data: rateData, error: rateError } = await supabase
-      .from('rate_limits')
-      .select('request_count, window_start')
-      .eq('session_id', data.session_id)
-      .eq('endpoint', type)
-      .single()
-
-    const now = new Date()
-
-    if (rateData) {
-      const windowStart = new Date(rateData.window_start)
-      const windowElapsed = now.getTime() - windowStart.getTime()
-
-      if (windowElapsed < RATE_LIMIT_WINDOW_MS) {
-        // Within rate limit window
-        if (rateData.request_count >= RATE_LIMIT_MAX) {
-          return new Response(
-            JSON.stringify({ error: 'Rate limit exceeded. Try again later.' }),
-            { status: 429, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-          )
-        }
-        // Increment counter
-        await supabase
-          .from('rate_limits')
-          .update({ request_count: rateData.request_count + 1 })
-          .eq('session_id', data.session_id)
-          .eq('endpoint', type)
-      } else {
-        // Window expired, reset
-        await supabase
-          .from('rate_limits')
-          .update({ request_count: 1, window_start: now.toISOString() })
-          .eq('session_id', data.session_id)
-          .eq('endpoint', type)
-      }
-    } else {
-      // First request from this session
-      await supabase
-        .from('rate_limits')
-        .insert({ session_id: data.session_id, endpoint: type, request_count: 1 })
+    if (Array.isArray(body?.events)) {
+      return await handleBatch(supabase, body)
     }
 
-    // Handle different event types
-    let result
-
-    if (type === 'site_event') {
-      // Validate event_type
-      if (!VALID_EVENT_TYPES.includes(data.event_type)) {
-        return new Response(
-          JSON.stringify({ error: 'Invalid event_type' }),
-          { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-        )
-      }
-
-      // Validate event_name (if provided)
-      if (data.event_name && !VALID_EVENT_NAMES.includes(data.event_name)) {
-        return new Response(
-          JSON.stringify({ error: 'Invalid event_name' }),
-          { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-        )
-      }
-
-      // Sanitize metadata (limit size)
-      let sanitizedMetadata = null
-      if (data.metadata) {
-        const metadataStr = JSON.stringify(data.metadata)
-        if (metadataStr.length > 2000) {
-          return new Response(
-            JSON.stringify({ error: 'Metadata too large' }),
-            { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-          )
-        }
-        sanitizedMetadata = data.metadata
-      }
-
-      // Validate referrer_type if provided
-      const referrerType = data.referrer_type && VALID_REFERRER_TYPES.includes(data.referrer_type)
-        ? data.referrer_type
-        : null
-
-      // Insert into site_events
-      const { error } = await supabase
-        .from('site_events')
-        .insert({
-          event_type: data.event_type,
-          event_name: data.event_name || 'unknown',
-          page_path: data.page_path?.substring(0, 200) || null,
-          session_id: data.session_id,
-          metadata: sanitizedMetadata,
-          user_agent: data.user_agent?.substring(0, 500) || null,
-          referrer_type: referrerType,
-          referrer_source: data.referrer_source?.substring(0, 100) || null,
-          referrer_domain: data.referrer_domain?.substring(0, 200) || null
-        })
+    const { type, data } = body
 
-      if (error) throw error
-      result = { success: true, type: 'site_event' }
-
-    } else if (type === 'locality_view') {
-      // Validate locality name
-      if (!data.locality_name || !VALID_LOCALITIES.includes(data.locality_name)) {
-        return new Response(
-          JSON.stringify({ error: 'Invalid locality_name' }),
-          { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-        )
-      }
+    // Validate request structure
+    if (!type || !data) {
+      return jsonResponse({ error: 'Missing type or data' }, 400)
+    }
 
-      // Insert into locality_views
-      const { error } = await supabase
-        .from('locality_views')
-        .insert({
-          locality_name: data.locality_name,
-          session_id: data.session_id
-        })
+    // Validate session_id exists
+    if (!isValidSessionId(data.session_id)) {
+      return jsonResponse({ error: 'Invalid session_id' }, 400)
+    }
 
-      if (error) throw error
-      result = { success: true, type: 'locality_view' }
+    // Check rate limit
+    const allowed = await consumeRateLimit(supabase, data.session_id, type, 1, RATE_LIMIT_MAX)
+    if (allowed === 0) {
+      return jsonResponse({ error: 'Rate limit exceeded. Try again later.' }, 429)
+    }
 
-    } else {
-      return new Response(
-        JSON.stringify({ error: 'Unknown event type' }),
-        { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-      )
+    // Validate and insert the single event
+    const { table, row, error: validationError } = buildRow(type, data)
+    if (validationError) {
+      return jsonResponse({ error: validationError }, 400)
     }
 
-    return new Response(
-      JSON.stringify(result),
-      { status: 200, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-    )
+    const { error } = await supabase.from(table!).insert(row!)
+    if (error) throw error
+
+    return jsonResponse({ success: true, type })
 
   } catch (error) {
     console.error('Edge Function Error:', error)
-    return new Response(
-      JSON.stringify({ error: 'Internal server error' }),
-      { status: 500, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-    )
+    return jsonResponse({ error: 'Internal server error' }, 500)
   }
 })
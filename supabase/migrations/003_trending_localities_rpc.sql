@@ -0,0 +1,45 @@
+-- ============================================================
+-- MIGRATION: Server-side aggregation for trending localities
+-- Run this in Supabase SQL Editor (Dashboard > SQL Editor)
+-- ============================================================
+
+-- Clients used to download every locality_views row of the last week
+-- (capped by PostgREST's max-rows, so counts were silently truncated) and
+-- count them locally. This function returns only the top N counts, so the
+-- response size no longer grows with traffic.
+
+-- ============================================================
+-- STEP 1: Covering index for the 7-day window scan
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_locality_views_viewed_at_name
+ON locality_views(viewed_at, locality_name);
+
+-- ============================================================
+-- STEP 2: Aggregation RPC
+-- Called as POST /rest/v1/rpc/trending_localities
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION trending_localities(
+  since timestamp with time zone DEFAULT now() - interval '7 days',
+  max_results int DEFAULT 3
+)
+RETURNS TABLE (locality_name text, views bigint)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT lv.locality_name, count(*) AS views
+  FROM locality_views lv
+  WHERE lv.viewed_at >= since
+  GROUP BY lv.locality_name
+  ORDER BY views DESC, lv.locality_name
+  LIMIT max_results;
+$$;
+
+-- Same audience as the existing public SELECT policy on locality_views
+GRANT EXECUTE ON FUNCTION trending_localities(timestamp with time zone, int) TO anon, authenticated;
+
+-- ============================================================
+-- VERIFICATION
+-- ============================================================
+-- SELECT * FROM trending_localities(now() - interval '7 days', 3);
@@ -0,0 +1,225 @@
+-- ============================================================
+-- MIGRATION: Hourly / daily analytics rollups
+-- Run this in Supabase SQL Editor (Dashboard > SQL Editor)
+-- ============================================================
+
+-- Dashboards and trending queries used to scan the raw event log. The
+-- rollup tables below hold one row per (hour or day, key) and are
+-- maintained incrementally by refresh_analytics_rollups(), which only
+-- reads rows past a per-table id watermark. Readers then touch a few
+-- hundred rollup rows plus the small not-yet-rolled-up tail.
+
+-- ============================================================
+-- STEP 1: Indexes on the raw tables
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_locality_views_name_viewed_at
+ON locality_views(locality_name, viewed_at);
+
+CREATE INDEX IF NOT EXISTS idx_site_events_created_at
+ON site_events(created_at);
+
+CREATE INDEX IF NOT EXISTS idx_site_events_name_created_at
+ON site_events(event_name, created_at);
+
+-- ============================================================
+-- STEP 2: Rollup tables
+-- ============================================================
+
+-- Last raw id folded into the rollups, per source table
+CREATE TABLE IF NOT EXISTS analytics_rollup_state (
+  source text PRIMARY KEY,
+  last_id bigint NOT NULL DEFAULT 0,
+  updated_at timestamp with time zone DEFAULT now()
+);
+
+INSERT INTO analytics_rollup_state (source) VALUES ('locality_views'), ('site_events')
+ON CONFLICT (source) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS locality_views_hourly (
+  bucket timestamp with time zone NOT NULL,
+  locality_name text NOT NULL,
+  views bigint NOT NULL,
+  PRIMARY KEY (bucket, locality_name)
+);
+
+CREATE TABLE IF NOT EXISTS locality_views_daily (
+  day date NOT NULL,
+  locality_name text NOT NULL,
+  views bigint NOT NULL,
+  PRIMARY KEY (day, locality_name)
+);
+
+-- referrer_type is '' when the event had none
+CREATE TABLE IF NOT EXISTS site_events_hourly (
+  bucket timestamp with time zone NOT NULL,
+  event_type text NOT NULL,
+  event_name text NOT NULL,
+  referrer_type text NOT NULL,
+  events bigint NOT NULL,
+  PRIMARY KEY (bucket, event_type, event_name, referrer_type)
+);
+
+CREATE TABLE IF NOT EXISTS site_events_daily (
+  day date NOT NULL,
+  event_type text NOT NULL,
+  event_name text NOT NULL,
+  referrer_type text NOT NULL,
+  events bigint NOT NULL,
+  PRIMARY KEY (day, event_type, event_name, referrer_type)
+);
+
+-- Distinct sessions are not additive, so touched days are recounted
+CREATE TABLE IF NOT EXISTS site_events_daily_totals (
+  day date PRIMARY KEY,
+  events bigint NOT NULL,
+  sessions bigint NOT NULL
+);
+
+-- Same access as the raw analytics tables: public read, no public writes
+ALTER TABLE analytics_rollup_state ENABLE ROW LEVEL SECURITY;
+ALTER TABLE locality_views_hourly ENABLE ROW LEVEL SECURITY;
+ALTER TABLE locality_views_daily ENABLE ROW LEVEL SECURITY;
+ALTER TABLE site_events_hourly ENABLE ROW LEVEL SECURITY;
+ALTER TABLE site_events_daily ENABLE ROW LEVEL SECURITY;
+ALTER TABLE site_events_daily_totals ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Enable read for all" ON analytics_rollup_state;
+DROP POLICY IF EXISTS "Enable read for all" ON locality_views_hourly;
+DROP POLICY IF EXISTS "Enable read for all" ON locality_views_daily;
+DROP POLICY IF EXISTS "Enable read for all" ON site_events_hourly;
+DROP POLICY IF EXISTS "Enable read for all" ON site_events_daily;
+DROP POLICY IF EXISTS "Enable read for all" ON site_events_daily_totals;
+
+CREATE POLICY "Enable read for all" ON analytics_rollup_state FOR SELECT USING (true);
+CREATE POLICY "Enable read for all" ON locality_views_hourly FOR SELECT USING (true);
+CREATE POLICY "Enable read for all" ON locality_views_daily FOR SELECT USING (true);
+CREATE POLICY "Enable read for all" ON site_events_hourly FOR SELECT USING (true);
+CREATE POLICY "Enable read for all" ON site_events_daily FOR SELECT USING (true);
+CREATE POLICY "Enable read for all" ON site_events_daily_totals FOR SELECT USING (true);
+
+-- ============================================================
+-- STEP 3: Incremental refresh
+-- The watermark is the highest id older than the settle delay. Rows
+-- younger than that wait for the next run, which covers inserts that
+-- commit slightly out of id order; one that commits later than the settle
+-- delay behind a higher id can still be missed.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION refresh_analytics_rollups(settle interval DEFAULT interval '1 minute')
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  lv_from bigint;
+  lv_to bigint;
+  se_from bigint;
+  se_to bigint;
+BEGIN
+  -- Serialize concurrent refreshes
+  PERFORM 1 FROM analytics_rollup_state FOR UPDATE;
+
+  SELECT last_id INTO lv_from FROM analytics_rollup_state WHERE source = 'locality_views';
+  SELECT coalesce(max(id), lv_from) INTO lv_to FROM locality_views
+  WHERE id > lv_from AND viewed_at < now() - settle;
+
+  INSERT INTO locality_views_hourly (bucket, locality_name, views)
+  SELECT date_trunc('hour', viewed_at), locality_name, count(*)
+  FROM locality_views WHERE id > lv_from AND id <= lv_to
+  GROUP BY 1, 2
+  ON CONFLICT (bucket, locality_name) DO UPDATE SET views = locality_views_hourly.views + excluded.views;
+
+  INSERT INTO locality_views_daily (day, locality_name, views)
+  SELECT (viewed_at AT TIME ZONE 'utc')::date, locality_name, count(*)
+  FROM locality_views WHERE id > lv_from AND id <= lv_to
+  GROUP BY 1, 2
+  ON CONFLICT (day, locality_name) DO UPDATE SET views = locality_views_daily.views + excluded.views;
+
+  SELECT last_id INTO se_from FROM analytics_rollup_state WHERE source = 'site_events';
+  SELECT coalesce(max(id), se_from) INTO se_to FROM site_events
+  WHERE id > se_from AND created_at < now() - settle;
+
+  INSERT INTO site_events_hourly (bucket, event_type, event_name, referrer_type, events)
+  SELECT date_trunc('hour', created_at), event_type, event_name, coalesce(referrer_type, ''), count(*)
+  FROM site_events WHERE id > se_from AND id <= se_to
+  GROUP BY 1, 2, 3, 4
+  ON CONFLICT (bucket, event_type, event_name, referrer_type)
+  DO UPDATE SET events = site_events_hourly.events + excluded.events;
+
+  INSERT INTO site_events_daily (day, event_type, event_name, referrer_type, events)
+  SELECT (created_at AT TIME ZONE 'utc')::date, event_type, event_name, coalesce(referrer_type, ''), count(*)
+  FROM site_events WHERE id > se_from AND id <= se_to
+  GROUP BY 1, 2, 3, 4
+  ON CONFLICT (day, event_type, event_name, referrer_type)
+  DO UPDATE SET events = site_events_daily.events + excluded.events;
+
+  INSERT INTO site_events_daily_totals (day, events, sessions)
+  SELECT d.day, count(e.id), count(DISTINCT e.session_id)
+  FROM (
+    SELECT DISTINCT (created_at AT TIME ZONE 'utc')::date AS day
+    FROM site_events WHERE id > se_from AND id <= se_to
+  ) d
+  JOIN site_events e
+    ON e.created_at >= d.day::timestamp AT TIME ZONE 'utc'
+   AND e.created_at < (d.day + 1)::timestamp AT TIME ZONE 'utc'
+   AND e.id <= se_to
+  GROUP BY d.day
+  ON CONFLICT (day) DO UPDATE SET events = excluded.events, sessions = excluded.sessions;
+
+  UPDATE analytics_rollup_state SET last_id = lv_to, updated_at = now() WHERE source = 'locality_views';
+  UPDATE analytics_rollup_state SET last_id = se_to, updated_at = now() WHERE source = 'site_events';
+
+  RETURN jsonb_build_object('locality_views', lv_to - lv_from, 'site_events', se_to - se_from);
+END;
+$$;
+
+REVOKE ALL ON FUNCTION refresh_analytics_rollups(interval) FROM public, anon, authenticated;
+
+-- ============================================================
+-- STEP 4: Trending reads rollups plus the un-rolled tail
+-- (hourly buckets, so the window may start up to an hour early)
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION trending_localities(
+  since timestamp with time zone DEFAULT now() - interval '7 days',
+  max_results int DEFAULT 3
+)
+RETURNS TABLE (locality_name text, views bigint)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH watermark AS (
+    SELECT last_id FROM analytics_rollup_state WHERE source = 'locality_views'
+  ),
+  counts AS (
+    SELECT h.locality_name, h.views
+    FROM locality_views_hourly h
+    WHERE h.bucket >= date_trunc('hour', since)
+    UNION ALL
+    SELECT lv.locality_name, count(*)
+    FROM locality_views lv, watermark w
+    WHERE lv.id > w.last_id AND lv.viewed_at >= since
+    GROUP BY lv.locality_name
+  )
+  SELECT c.locality_name, sum(c.views)::bigint AS views
+  FROM counts c
+  GROUP BY c.locality_name
+  ORDER BY views DESC, c.locality_name
+  LIMIT max_results;
+$$;
+
+-- ============================================================
+-- STEP 5: Schedule (requires the pg_cron extension:
+-- Dashboard > Database > Extensions > pg_cron)
+-- ============================================================
+
+-- SELECT cron.schedule('analytics-rollups', '*/5 * * * *', 'SELECT refresh_analytics_rollups()');
+
+-- ============================================================
+-- VERIFICATION
+-- ============================================================
+-- SELECT refresh_analytics_rollups();
+-- SELECT * FROM site_events_daily_totals ORDER BY day DESC LIMIT 30;
+-- SELECT * FROM trending_localities(now() - interval '7 days', 3);